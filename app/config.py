@@ -21,6 +21,7 @@ class Settings(BaseSettings):
     # Email Configuration (Gmail SMTP)
     SMTP_HOST: str = "smtp.gmail.com"
     SMTP_PORT: int = 587
+    SMTP_START_TLS: bool = True  # Upgrade with STARTTLS after connecting; off for plain local SMTP sinks
     SMTP_USER: str = os.getenv("SMTP_USER", "")
     SMTP_PASSWORD: str = os.getenv("SMTP_PASSWORD", "")
     SMTP_FROM_EMAIL: str = os.getenv("SMTP_FROM_EMAIL", "")
@@ -32,6 +33,7 @@ class Settings(BaseSettings):
     
     # Application Settings
     APP_URL: str = os.getenv("APP_URL", "http://localhost:5173")
+    API_BASE_URL: str = os.getenv("API_BASE_URL", "http://localhost:8000")  # Public backend URL for links in emails
     ENABLE_EMAIL: bool = os.getenv("ENABLE_EMAIL", "true").lower() == "true"
     
     # Security
@@ -45,11 +47,77 @@ class Settings(BaseSettings):
     PDF_TEMPLATE_VERSION: str = os.getenv("PDF_TEMPLATE_VERSION", "v2")  # 'v1' or 'v2'
     PREMIUM_CHECKOUT_URL: str = os.getenv("PREMIUM_CHECKOUT_URL", "https://carhythm.com/premium")
     
+    # Report Rendering Admission Control
+    REPORT_MAX_CONCURRENCY: int = 2  # PDF renders allowed to run at once
+    REPORT_ADMIN_MAX_CONCURRENCY: int = 1  # Of those, how many admin exports may hold
+    REPORT_MAX_QUEUE: int = 20  # Requests allowed to wait before shedding with 503
+    REPORT_QUEUE_TIMEOUT: int = 30  # seconds a request may wait for a render slot
+    REPORT_RETRY_AFTER: int = 15  # seconds, sent as Retry-After when shedding
+    
+    # Report Delivery
+    RESULTS_DELIVERY_MODE: str = os.getenv("RESULTS_DELIVERY_MODE", "attachment")  # 'attachment' or 'link'
+    REPORT_LINK_TTL_HOURS: int = 24 * 14  # Lifetime of emailed download links
+    REPORT_PRERENDER: bool = True  # In link mode, render right after submission instead of on first fetch
+    REPORT_STORE_DIR: str = os.getenv("REPORT_STORE_DIR", "report_store")
+    REPORT_STORE_MAX_MB: int = 500  # Least recently used reports are evicted above this size
+    REPORT_STORE_MAX_FILES: int = 5000  # ...or above this many stored reports
+    
+    # Data Exports
+    EXPORT_BATCH_SIZE: int = 1000  # Rows fetched per database round trip while streaming
+    EXPORT_CSV_CHUNK_ROWS: int = 500  # CSV rows written to the client per chunk
+    ANSWER_EXPORT_DIR: str = os.getenv("ANSWER_EXPORT_DIR", "exports")  # Parquet/Arrow answer matrix files
+    ANSWER_EXPORT_ROW_GROUP_SIZE: int = 5000  # Responses per Parquet row group / Arrow record batch
+    
+    # Question CSV Import
+    CSV_IMPORT_CHUNK_SIZE: int = 500  # Rows validated and inserted per transaction
+    CSV_IMPORT_MAX_ERRORS: int = 1000  # Per-row errors kept in the result and import log
+    
+    # Admin Statistics
+    STATS_CACHE_TTL: int = 30  # seconds dashboard/feedback/response counts are cached between writes
+    
+    # SQL Instrumentation
+    SQL_INSTRUMENTATION: bool = os.getenv("SQL_INSTRUMENTATION", "true").lower() == "true"  # Server-Timing and N+1 warnings per request
+    SQL_SLOW_QUERY_MS: int = 200  # Queries at least this slow are logged, parameters redacted
+    SQL_N_PLUS_ONE_THRESHOLD: int = 10  # Repeats of one statement shape in a request flagged as N+1
+    
+    # Prometheus Metrics (set PROMETHEUS_MULTIPROC_DIR when running several workers)
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"  # /metrics endpoint and recording middleware
+    ACTIVE_SESSION_WINDOW_MINUTES: int = 30  # Sessions with activity this recent count as active
+    
+    # Event Loop Watchdog
+    LOOP_WATCHDOG_ENABLED: bool = os.getenv("LOOP_WATCHDOG_ENABLED", "true").lower() == "true"
+    LOOP_WATCHDOG_INTERVAL_MS: int = 50  # Heartbeat interval; lag is measured on every beat
+    LOOP_BLOCK_THRESHOLD_MS: int = 250  # Blocks at least this long are logged with their stack
+    
+    # On-demand Request Profiler (admins add X-Profile: sample|cprofile or ?_profile=...)
+    REQUEST_PROFILER_ENABLED: bool = os.getenv("REQUEST_PROFILER_ENABLED", "true").lower() == "true"
+    REQUEST_PROFILER_MAX_PER_MINUTE: int = 6  # Profiled requests allowed per worker per minute
+    REQUEST_PROFILER_INTERVAL_MS: int = 5  # Stack sampling interval
+    REQUEST_PROFILER_MAX_SECONDS: int = 30  # Sampling stops after this long, the request carries on
+    REQUEST_PROFILER_BUFFER_SIZE: int = 20  # Most recent profiles kept in memory per worker
+    
     # Email Settings
     EMAIL_RETRY_ATTEMPTS: int = 3
     EMAIL_RETRY_DELAY: int = 5  # seconds
     MAX_RESEND_PER_SESSION: int = 3
     
+    # SMTP Connection Pool
+    SMTP_POOL_SIZE: int = 2  # Concurrent SMTP sessions kept open
+    SMTP_MAX_MESSAGES_PER_CONNECTION: int = 50  # Recycle a connection after this many messages
+    SMTP_POOL_IDLE_TIMEOUT: int = 60  # seconds before an idle connection is closed
+    SMTP_HEALTH_CHECK_INTERVAL: int = 15  # seconds idle before NOOP check on reuse
+    SMTP_SEND_TIMEOUT: int = 30  # seconds per SMTP operation; a send retried on a new connection may take twice this
+    
+    # Email Outbox (background delivery)
+    EMAIL_OUTBOX_POLL_INTERVAL: int = 5  # seconds between dispatcher polls
+    EMAIL_OUTBOX_BATCH_SIZE: int = 10  # Messages claimed per poll
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 8  # Attempts before a message is dead-lettered
+    EMAIL_OUTBOX_BACKOFF_BASE: int = 30  # seconds before the first retry, doubled each attempt
+    EMAIL_OUTBOX_BACKOFF_MAX: int = 3600  # seconds, cap on the retry delay
+    EMAIL_OUTBOX_CLAIM_TIMEOUT: int = 300  # seconds before a stuck 'sending' row is re-queued; must exceed 2 x SMTP_SEND_TIMEOUT
+    EMAIL_CIRCUIT_FAILURE_THRESHOLD: int = 5  # Consecutive SMTP host failures that open the circuit
+    EMAIL_CIRCUIT_RESET_TIMEOUT: int = 120  # seconds the circuit stays open before a probe
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
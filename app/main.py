@@ -1,27 +1,36 @@
 from fastapi import FastAPI, Request, Depends
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 import os
 from dotenv import load_dotenv
 
 # Import models and database setup
 from .models import create_tables, get_db, Admin
 from .utils.security import get_password_hash
-from .routers.admin import router as admin_router
+from .routers.admin import router as admin_router, profile_request
 from .routers.admin_panel import router as admin_panel_router
 from .routers.examination import router as examination_router
 from .routers.question_pool import router as question_pool_router
 from .routers.api_v2 import router as api_v2_router
 from .routers.feedback import router as feedback_router
+from .services.smtp_pool import smtp_pool
+from .services.email_outbox import email_dispatcher
+from .services.email_service import preload_email_assets
+from .services import sql_instrumentation, metrics
+from .services.loop_watchdog import loop_watchdog, LoopWatchdogMiddleware
+from .config import settings
 
 # Load environment variables
 load_dotenv()
 
 # Create FastAPI app
-app = FastAPI(title="Career DNA Assessment", version="2.0.0", description="Story Mode Career Assessment")
+# profile_request lets admins profile any single request on demand
+app = FastAPI(title="Career DNA Assessment", version="2.0.0", description="Story Mode Career Assessment",
+              dependencies=[Depends(profile_request)])
 
 # Add CORS middleware for React frontend
 app.add_middleware(
@@ -39,6 +48,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Route latency/status metrics; added first so it runs inside the SQL
+# instrumentation below and can read each request's query stats
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
+# Lets the event loop watchdog name the route that blocked the loop
+if settings.LOOP_WATCHDOG_ENABLED:
+    app.add_middleware(LoopWatchdogMiddleware)
+
+# Per-request query counts and timings (Server-Timing header, N+1 warnings)
+if settings.SQL_INSTRUMENTATION:
+    sql_instrumentation.install()
+    app.add_middleware(sql_instrumentation.SQLInstrumentationMiddleware)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
@@ -82,6 +105,22 @@ async def startup_event():
         db.add(admin_user)
         db.commit()
     db.close()
+    
+    # Deliver queued emails in the background
+    if settings.ENABLE_EMAIL:
+        preload_email_assets()
+        email_dispatcher.start()
+    
+    if settings.LOOP_WATCHDOG_ENABLED:
+        loop_watchdog.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the email dispatcher and watchdog, and close pooled SMTP connections."""
+    await email_dispatcher.stop()
+    await loop_watchdog.stop()
+    await smtp_pool.close()
+    metrics.mark_process_dead()
 
 @app.get("/")
 async def root(request: Request):
@@ -93,6 +132,15 @@ async def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint(db: Session = Depends(get_db)):
+    """Prometheus scrape endpoint (all workers when PROMETHEUS_MULTIPROC_DIR is set)."""
+    if not settings.METRICS_ENABLED or not metrics.PROMETHEUS_AVAILABLE:
+        return Response("Metrics are not available\n", status_code=503, media_type="text/plain")
+    # Database gauges and multiprocess file reads are blocking work
+    body, content_type = await run_in_threadpool(metrics.render_latest, db)
+    return Response(body, headers={"Content-Type": content_type})
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
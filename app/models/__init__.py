@@ -3,9 +3,14 @@ from .admin import Admin
 from .page import Page
 from .question import Question, QuestionType
 from .response import StudentResponse, QuestionAnswer, SessionStatus
-from .question_pool import Category, QuestionPool, QuestionPageAssignment, ImportLog
+from .question_pool import Category, QuestionPool, QuestionPageAssignment, ImportLog, ImportStatus
+from . import question_search  # registers the FTS index DDL on question_pool
 from .assessment_score import AssessmentScore
 from .feedback import Feedback
+from .email_outbox import EmailOutbox, OutboxStatus, EmailKind
+from .report_artifact import ReportArtifact
+from .answer_export import AnswerExportRun
+from .analytics_rollup import DailyActivityRollup, DailyCountryRollup, DailyScoreRollup, DailyLabelRollup
 
 __all__ = [
     "Base",
@@ -23,6 +28,16 @@ __all__ = [
     "QuestionPool", 
     "QuestionPageAssignment",
     "ImportLog",
+    "ImportStatus",
     "AssessmentScore",
-    "Feedback"
+    "Feedback",
+    "EmailOutbox",
+    "OutboxStatus",
+    "EmailKind",
+    "ReportArtifact",
+    "AnswerExportRun",
+    "DailyActivityRollup",
+    "DailyCountryRollup",
+    "DailyScoreRollup",
+    "DailyLabelRollup"
 ]
\ No newline at end of file
@@ -0,0 +1,64 @@
+"""
+Analytics Rollup Models
+Daily pre-aggregated counters read by the admin analytics dashboard.
+Kept current by app.services.analytics_rollup as responses start, complete,
+are abandoned or are scored; the backfill job rebuilds them from base tables.
+"""
+
+from sqlalchemy import Column, Integer, String, Float, Date, UniqueConstraint
+from .database import Base
+
+
+class DailyActivityRollup(Base):
+    """Responses started, completed and abandoned per UTC day."""
+
+    __tablename__ = "daily_activity_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False, unique=True, index=True)
+    started = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
+    abandoned = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DailyActivityRollup(day={self.day}, started={self.started}, completed={self.completed})>"
+
+
+class DailyCountryRollup(Base):
+    """Completed responses per UTC day and country (country is only known at completion)."""
+
+    __tablename__ = "daily_country_rollups"
+    __table_args__ = (UniqueConstraint("day", "country", name="uq_daily_country_rollup"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False, index=True)
+    country = Column(String(100), nullable=False)
+    completed = Column(Integer, nullable=False, default=0)
+
+
+class DailyScoreRollup(Base):
+    """Sum and count of one scale domain's raw scores per UTC day, for averages."""
+
+    __tablename__ = "daily_score_rollups"
+    __table_args__ = (UniqueConstraint("day", "scale", "domain", name="uq_daily_score_rollup"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False, index=True)
+    scale = Column(String(20), nullable=False)  # 'riasec' or 'bigfive'
+    domain = Column(String(5), nullable=False)  # 'R', 'I', ... or 'O', 'C', ...
+    score_sum = Column(Float, nullable=False, default=0.0)
+    score_count = Column(Integer, nullable=False, default=0)
+
+
+class DailyLabelRollup(Base):
+    """How often each strength label was assigned to a scale domain per UTC day."""
+
+    __tablename__ = "daily_label_rollups"
+    __table_args__ = (UniqueConstraint("day", "scale", "domain", "label", name="uq_daily_label_rollup"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False, index=True)
+    scale = Column(String(20), nullable=False)
+    domain = Column(String(5), nullable=False)
+    label = Column(String(30), nullable=False)  # e.g. 'High', 'Very High'
+    count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,28 @@
+"""
+Answer Export Model
+Record of each analyst answer-matrix export, used as the watermark for incremental runs
+"""
+
+from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from datetime import datetime
+from .database import Base
+
+
+class AnswerExportRun(Base):
+    """One completed export file covering responses completed in (since, until]."""
+
+    __tablename__ = "answer_export_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    format = Column(String(10), nullable=False)  # 'parquet' or 'arrow'
+    path = Column(String(500), nullable=False)
+    incremental = Column(Boolean, nullable=False, default=False)
+    since = Column(DateTime, nullable=True)  # None for a full export
+    until = Column(DateTime, nullable=False, index=True)  # Watermark for the next incremental run
+    row_count = Column(Integer, nullable=False, default=0)
+    item_count = Column(Integer, nullable=False, default=0)
+    size_bytes = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<AnswerExportRun(id={self.id}, format={self.format}, rows={self.row_count}, until={self.until})>"
@@ -22,7 +22,7 @@ class AssessmentScore(Base):
     riasec_s_score = Column(Float)  # Social
     riasec_e_score = Column(Float)  # Enterprising
     riasec_c_score = Column(Float)  # Conventional
-    riasec_profile = Column(String(20))  # Top 3 codes (e.g., "R-I-A")
+    riasec_profile = Column(String(20), index=True)  # Top 3 codes (e.g., "R-I-A")
     riasec_complete = Column(Boolean, default=False)  # Module completion flag
     
     # Big Five Personality Scores (0-100 for each trait)
@@ -22,4 +22,13 @@ def get_db():
         db.close()
 
 def create_tables():
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
+    # create_all skips tables that already exist, so indexes added to
+    # existing models later are created here
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    # ...and the same goes for the question search index
+    from .question_search import ensure_question_search_index
+    with engine.begin() as connection:
+        ensure_question_search_index(connection)
\ No newline at end of file
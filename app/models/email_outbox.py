@@ -0,0 +1,57 @@
+"""
+Email Outbox Model
+Durable queue of outgoing emails drained by the background dispatcher
+"""
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, LargeBinary, ForeignKey, Enum, Index
+from datetime import datetime
+from .database import Base
+import enum
+
+
+class OutboxStatus(enum.Enum):
+    """Delivery state of an outbox message"""
+    pending = "pending"    # Waiting for its first or next attempt
+    sending = "sending"    # Claimed by a dispatcher
+    sent = "sent"          # Accepted by the SMTP server
+    dead = "dead"          # Gave up after max attempts (dead letter)
+
+
+class EmailKind(enum.Enum):
+    """Which email template the payload renders into"""
+    results = "results"
+    admin_notification = "admin_notification"
+
+
+class EmailOutbox(Base):
+    """One queued email. The MIME message is rebuilt from `payload` at send time."""
+
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(Enum(EmailKind), nullable=False)
+    to_email = Column(String(255), nullable=False)
+    payload = Column(Text, nullable=False)  # JSON template parameters
+    attachment = Column(LargeBinary, nullable=True)  # PDF bytes for results emails
+    attachment_filename = Column(String(255), nullable=True)
+
+    response_id = Column(Integer, ForeignKey("student_responses.id", ondelete="SET NULL"), nullable=True, index=True)
+    session_id = Column(String(36), nullable=True)
+
+    status = Column(Enum(OutboxStatus), default=OutboxStatus.pending, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, nullable=False)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Dispatcher poll: WHERE status = 'pending' AND next_attempt_at <= now
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    def __repr__(self):
+        return f"<EmailOutbox(id={self.id}, kind={self.kind.value}, to={self.to_email}, status={self.status.value})>"
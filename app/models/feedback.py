@@ -20,7 +20,7 @@ class Feedback(Base):
     experience_text = Column(Text, nullable=True)  # How was your experience?
     would_recommend = Column(Boolean, nullable=True)  # Would recommend to others?
     suggestions = Column(Text, nullable=True)  # Suggestions for improvement
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
     
     # Relationship to response (to get user email and assessment info)
     response = relationship("StudentResponse", back_populates="feedback")
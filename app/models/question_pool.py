@@ -1,6 +1,16 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, func
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Enum, func
 from sqlalchemy.orm import relationship
 from .database import Base
+import enum
+
+
+class ImportStatus(enum.Enum):
+    """Progress of a background CSV import job"""
+    queued = "queued"        # Upload stored, waiting for a worker
+    running = "running"      # Rows are being imported
+    completed = "completed"  # Every row was processed
+    cancelled = "cancelled"  # Stopped on request; rows committed before that are kept
+    failed = "failed"        # Stopped by an error (e.g. undecodable file)
 
 class Category(Base):
     """Question categories for organizing the question pool."""
@@ -90,4 +100,12 @@ class ImportLog(Base):
     failed_imports = Column(Integer, default=0)
     errors = Column(Text)  # JSON string of errors
     imported_by = Column(String(100))
-    imported_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    imported_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Background job progress
+    status = Column(Enum(ImportStatus), default=ImportStatus.completed)
+    processed_rows = Column(Integer, default=0)
+    cancel_requested = Column(Boolean, default=False)
+    upload_path = Column(String(500))  # Spooled upload, removed when the job ends
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
\ No newline at end of file
@@ -0,0 +1,89 @@
+"""
+Question Pool Search Index
+SQLite FTS5 index over pool question titles, English and Arabic text and
+options. Triggers on question_pool keep it in sync for every write path,
+including bulk inserts and set-based deletes. The index is created with
+the question_pool table; create_tables() builds it for existing databases.
+On other databases nothing is created and search falls back to ILIKE.
+"""
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+
+from .question_pool import QuestionPool
+
+FTS_TABLE = "question_pool_fts"
+
+# Options are JSON arrays; json_each decodes them so escaped Arabic text is
+# indexed as words. Malformed JSON is skipped rather than failing the write.
+OPTION_COLUMNS = ("mcq_options", "ordering_options", "mcq_options_ar", "ordering_options_ar")
+
+
+def _options_expr(prefix: str) -> str:
+    parts = [
+        f"coalesce(CASE WHEN json_valid({prefix}{column}) "
+        f"THEN (SELECT group_concat(value, ' ') FROM json_each({prefix}{column})) END, '')"
+        for column in OPTION_COLUMNS
+    ]
+    return " || ' ' || ".join(parts)
+
+
+def _row_values(prefix: str) -> str:
+    return (f"{prefix}id, {prefix}title, {prefix}question_text, {prefix}question_text_ar, "
+            f"{_options_expr(prefix)}")
+
+
+CREATE_STATEMENTS = (
+    # prefix='2 3' keeps short prefix queries ("car*") off full-index scans
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "title, question_text, question_text_ar, options, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON question_pool BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, question_text, question_text_ar, options) "
+    f"VALUES ({_row_values('new.')}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON question_pool BEGIN "
+    f"DELETE FROM {FTS_TABLE} WHERE rowid = old.id; END",
+    # Only fires for indexed columns, so usage_count bumps leave the index alone
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update AFTER UPDATE OF "
+    f"title, question_text, question_text_ar, {', '.join(OPTION_COLUMNS)} ON question_pool BEGIN "
+    f"DELETE FROM {FTS_TABLE} WHERE rowid = old.id; "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, question_text, question_text_ar, options) "
+    f"VALUES ({_row_values('new.')}); END",
+)
+
+
+def is_supported(connection: Connection) -> bool:
+    return connection.dialect.name == "sqlite"
+
+
+def rebuild_question_search_index(connection: Connection) -> None:
+    """Repopulate the index from question_pool."""
+    connection.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    connection.execute(text(
+        f"INSERT INTO {FTS_TABLE}(rowid, title, question_text, question_text_ar, options) "
+        f"SELECT {_row_values('')} FROM question_pool"
+    ))
+
+
+def ensure_question_search_index(connection: Connection) -> None:
+    """Create the index and triggers if missing, filling a new index from existing questions."""
+    if not is_supported(connection):
+        return
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+    ).first()
+    for statement in CREATE_STATEMENTS:
+        connection.execute(text(statement))
+    if not exists:
+        rebuild_question_search_index(connection)
+
+
+@event.listens_for(QuestionPool.__table__, "after_create")
+def _create_index(target, connection, **kw):
+    ensure_question_search_index(connection)
+
+
+@event.listens_for(QuestionPool.__table__, "after_drop")
+def _drop_index(target, connection, **kw):
+    if is_supported(connection):
+        connection.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
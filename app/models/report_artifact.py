@@ -0,0 +1,27 @@
+"""
+Report Artifact Model
+Metadata for rendered PDF reports kept in the on-disk report store
+"""
+
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from datetime import datetime
+from .database import Base
+
+
+class ReportArtifact(Base):
+    """One stored report file. `key` is the content address used as its filename and ETag."""
+
+    __tablename__ = "report_artifacts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String(64), unique=True, nullable=False, index=True)  # SHA-256 of render inputs
+    response_id = Column(Integer, ForeignKey("student_responses.id", ondelete="SET NULL"), nullable=True, index=True)
+    size_bytes = Column(Integer, nullable=False)
+    is_free_version = Column(Boolean, nullable=False, default=True)
+    template_version = Column(String(10), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_accessed_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)  # LRU eviction order
+    access_count = Column(Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<ReportArtifact(key={self.key[:12]}, response_id={self.response_id}, size={self.size_bytes})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float, Enum, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from .database import Base
@@ -34,11 +34,18 @@ class StudentResponse(Base):
     current_page = relationship("Page", foreign_keys=[current_page_id])
     feedback = relationship("Feedback", back_populates="response", uselist=False, cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Keyset pagination of the admin results list (newest first)
+        Index("ix_student_responses_created_id", "created_at", "id"),
+        Index("ix_student_responses_country_created", "country", "created_at"),
+        Index("ix_student_responses_completed_at", "completed_at"),
+    )
+
 class QuestionAnswer(Base):
     __tablename__ = "question_answers"
 
     id = Column(Integer, primary_key=True, index=True)
-    response_id = Column(Integer, ForeignKey("student_responses.id"), nullable=False)
+    response_id = Column(Integer, ForeignKey("student_responses.id"), nullable=False, index=True)
     question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
     answer_text = Column(Text)  # For essay questions
     answer_value = Column(Float)  # For slider questions (0-100)
@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 from ..models import get_db
 from ..schemas import AdminLogin
 from ..services.auth import login_admin, get_admin_by_username
+from ..services.request_profiler import request_profiler, requested_mode
 from ..utils.security import verify_token
 from typing import Optional
 
@@ -34,6 +35,19 @@ def require_admin(request: Request, db: Session = Depends(get_db)):
         )
     return admin
 
+async def profile_request(request: Request, db: Session = Depends(get_db)):
+    """
+    App-wide dependency: profile this request when an admin asks for it with
+    the X-Profile header or _profile query parameter (see request_profiler).
+    """
+    mode = requested_mode(request.headers, request.query_params)
+    if mode is None:
+        yield
+        return
+    admin = require_admin(request, db)
+    with request_profiler.profile(request.method, request.url.path, mode, admin.username):
+        yield
+
 @router.get("/login", response_class=HTMLResponse)
 async def login_page(request: Request):
     """Display admin login page."""
@@ -76,17 +90,10 @@ async def logout(request: Request):
 @router.get("/dashboard", response_class=HTMLResponse)
 async def dashboard(request: Request, db: Session = Depends(get_db), admin=Depends(require_admin)):
     """Admin dashboard."""
-    from ..models import Page, Question, StudentResponse, Feedback
-    from ..models.question_pool import QuestionPool
+    from ..services import stats_cache
     
     # Get statistics
-    stats = {
-        "total_pages": db.query(Page).count(),
-        "total_questions": db.query(Question).count(),
-        "total_responses": db.query(StudentResponse).count(),
-        "total_pool_questions": db.query(QuestionPool).count(),
-        "total_feedbacks": db.query(Feedback).count()
-    }
+    stats = stats_cache.get_dashboard_counts(db)
     
     return templates.TemplateResponse(
         "admin/dashboard.html", 
@@ -102,12 +109,9 @@ async def analytics(request: Request, db: Session = Depends(get_db), admin=Depen
     statistics = response_service.get_response_statistics(db)
     recent_responses = db.query(StudentResponse).order_by(StudentResponse.created_at.desc()).limit(20).all()
     
-    # Calculate average rating from feedbacks
-    from ..models import Feedback
-    from sqlalchemy import func
-    avg_rating = db.query(func.avg(Feedback.rating)).filter(
-        Feedback.rating.isnot(None)
-    ).scalar()
+    # Average rating from feedbacks
+    from ..services import stats_cache
+    avg_rating = stats_cache.get_feedback_stats(db)["average_rating"]
     
     return templates.TemplateResponse(
         "admin/analytics.html",
@@ -123,65 +127,35 @@ async def analytics(request: Request, db: Session = Depends(get_db), admin=Depen
 
 @router.get("/analytics/data")
 async def analytics_data(db: Session = Depends(get_db), admin=Depends(require_admin)):
-    """API endpoint for analytics chart data."""
-    from ..models import StudentResponse as Response, AssessmentScore
-    from datetime import datetime, timedelta
-    from sqlalchemy import func
-    
-    # Get response trend data (last 30 days)
-    thirty_days_ago = datetime.now() - timedelta(days=30)
-    response_trend = db.query(
-        func.date(Response.created_at).label('date'),
-        func.count(Response.id).label('count')
-    ).filter(
-        Response.created_at >= thirty_days_ago
-    ).group_by(
-        func.date(Response.created_at)
-    ).all()
-    
-    # Get completion statistics
-    total_responses = db.query(Response).count()
-    completed = db.query(Response).filter(Response.is_completed == True).count()
-    in_progress = total_responses - completed
-    completion_rate = (completed / total_responses * 100) if total_responses > 0 else 0
-    
-    # Get RIASEC distribution from completed assessments
-    riasec_scores = db.query(AssessmentScore).filter(
-        AssessmentScore.riasec_realistic.isnot(None)
-    ).all()
-    
-    riasec_distribution = {
-        'Realistic': sum(s.riasec_realistic or 0 for s in riasec_scores) / len(riasec_scores) if riasec_scores else 0,
-        'Investigative': sum(s.riasec_investigative or 0 for s in riasec_scores) / len(riasec_scores) if riasec_scores else 0,
-        'Artistic': sum(s.riasec_artistic or 0 for s in riasec_scores) / len(riasec_scores) if riasec_scores else 0,
-        'Social': sum(s.riasec_social or 0 for s in riasec_scores) / len(riasec_scores) if riasec_scores else 0,
-        'Enterprising': sum(s.riasec_enterprising or 0 for s in riasec_scores) / len(riasec_scores) if riasec_scores else 0,
-        'Conventional': sum(s.riasec_conventional or 0 for s in riasec_scores) / len(riasec_scores) if riasec_scores else 0,
-    }
+    """API endpoint for analytics chart data, served from the daily rollup tables."""
+    from ..models import StudentResponse as Response
+    from ..services import analytics_rollup
+    
+    data = analytics_rollup.get_dashboard_data(db)
     
     # Get recent activity
-    recent_responses = db.query(Response).order_by(Response.created_at.desc()).limit(10).all()
-    recent_activity = [
+    recent_responses = db.query(Response).order_by(Response.created_at.desc(), Response.id.desc()).limit(10).all()
+    data["recent_activity"] = [
         {
             'id': r.id,
-            'name': r.student_name or 'Anonymous',
-            'email': r.student_email or 'N/A',
-            'status': 'Completed' if r.is_completed else 'In Progress',
-            'created_at': r.created_at.strftime('%Y-%m-%d %H:%M')
+            'name': r.full_name or 'Anonymous',
+            'email': r.email or 'N/A',
+            'status': 'Completed' if r.completed_at else 'In Progress',
+            'created_at': r.created_at.strftime('%Y-%m-%d %H:%M') if r.created_at else ''
         }
         for r in recent_responses
     ]
     
-    return {
-        "response_trend": [{"date": str(r.date), "count": r.count} for r in response_trend],
-        "completion_stats": {
-            "completed": completed,
-            "in_progress": in_progress,
-            "completion_rate": round(completion_rate, 1)
-        },
-        "riasec_distribution": riasec_distribution,
-        "recent_activity": recent_activity
-    }
+    return data
+
+@router.post("/analytics/rebuild")
+async def rebuild_analytics(db: Session = Depends(get_db), admin=Depends(require_admin)):
+    """Recompute the analytics rollups from the response and score tables."""
+    from ..services import analytics_rollup
+    from starlette.concurrency import run_in_threadpool
+    
+    written = await run_in_threadpool(analytics_rollup.rebuild_rollups, db)
+    return {"success": True, "rows": written}
 
 @router.get("/settings", response_class=HTMLResponse)
 async def settings(request: Request, db: Session = Depends(get_db), admin=Depends(require_admin)):
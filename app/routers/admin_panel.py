@@ -1,17 +1,23 @@
 from fastapi import APIRouter, Depends, Request, Form, UploadFile, File, HTTPException
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, StreamingResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, StreamingResponse, FileResponse, PlainTextResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
-from ..models import get_db, QuestionType, Feedback, StudentResponse as Response
+from ..models import get_db, QuestionType, StudentResponse as Response, OutboxStatus, SessionStatus
 from ..services import question_service, response_service
-from ..services import scoring_service_v1_1 as scoring_service, pdf_service
+from ..services import scoring_service_v1_1 as scoring_service
+from ..services.report_admission import report_admission, ReportPriority, ReportQueueFull
+from ..services.report_store import report_store, build_report_inputs, ADMIN_REPORT_OPTIONS, STUDENT_REPORT_OPTIONS
+from ..services.results_export import iter_results_csv
+from ..services import email_outbox, stats_cache, feedback_service, pdf_profiler
+from ..services.smtp_pool import smtp_pool
+from ..services.request_profiler import request_profiler
+from ..services.loop_watchdog import loop_watchdog
 from ..schemas import PageCreate, PageUpdate, QuestionCreate, QuestionUpdate
 from ..utils.helpers import save_upload_file, validate_image_file, delete_file, format_datetime
 from .admin import require_admin
-from typing import Optional
-from sqlalchemy import desc, func
-import csv
-import io
+from typing import Optional, Dict, Any
+from datetime import date
+from starlette.concurrency import run_in_threadpool
 import json
 
 router = APIRouter(prefix="/admin", tags=["admin_panel"])
@@ -396,27 +402,101 @@ async def delete_question(
 
 # Results Management Routes
 
+def results_filters(
+    status: Optional[str] = None,
+    completion: Optional[str] = None,
+    country: Optional[str] = None,
+    holland_code: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    search: Optional[str] = None
+) -> Dict[str, Any]:
+    """Parse results list filters from the query string; empty form fields are ignored."""
+    filters: Dict[str, Any] = {}
+    if status:
+        try:
+            filters["status"] = SessionStatus(status)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Unknown status '{status}'")
+    if completion:
+        if completion not in ("completed", "incomplete"):
+            raise HTTPException(status_code=400, detail="completion must be 'completed' or 'incomplete'")
+        filters["completion"] = completion
+    if country:
+        filters["country"] = country
+    if holland_code and holland_code.replace("-", "").strip():
+        filters["holland_code"] = holland_code
+    for name, value in (("date_from", date_from), ("date_to", date_to)):
+        if value:
+            try:
+                filters[name] = date.fromisoformat(value)
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"{name} must be a YYYY-MM-DD date")
+    if search and search.strip():
+        filters["search"] = search
+    return filters
+
+
+def _result_item(response: Response, score_id: Optional[int], riasec_profile: Optional[str]) -> Dict[str, Any]:
+    """JSON shape of one results table row."""
+    return {
+        "id": response.id,
+        "session_id": response.session_id,
+        "full_name": response.full_name,
+        "email": response.email,
+        "age_group": response.age_group,
+        "country": response.country,
+        "status": response.status.value if response.status else None,
+        "created_at": response.created_at.isoformat() if response.created_at else None,
+        "completed_at": response.completed_at.isoformat() if response.completed_at else None,
+        "riasec_profile": riasec_profile,
+        "has_scores": score_id is not None
+    }
+
+
 @router.get("/results", response_class=HTMLResponse)
 async def view_results(
     request: Request,
+    cursor: Optional[int] = None,
+    filters: Dict[str, Any] = Depends(results_filters),
     db: Session = Depends(get_db),
     admin=Depends(require_admin)
 ):
-    """View all student responses and results."""
-    responses = response_service.get_all_responses(db)
+    """View student responses, newest first, with server-side filters and keyset pagination."""
+    rows, next_cursor = response_service.list_responses_page(db, cursor=cursor, **filters)
     statistics = response_service.get_response_statistics(db)
     
     return templates.TemplateResponse(
         "admin/results.html",
         {
             "request": request,
-            "responses": responses,
+            "rows": rows,
+            "next_cursor": next_cursor,
+            "filters": request.query_params,
+            "countries": response_service.get_response_countries(db),
+            "statuses": list(SessionStatus),
             "statistics": statistics,
             "admin": admin,
             "format_datetime": format_datetime
         }
     )
 
+@router.get("/results/data")
+async def results_data(
+    cursor: Optional[int] = None,
+    limit: int = response_service.RESULTS_PAGE_SIZE,
+    filters: Dict[str, Any] = Depends(results_filters),
+    db: Session = Depends(get_db),
+    admin=Depends(require_admin)
+):
+    """JSON page of the results table. Pass `next_cursor` back as `cursor` for the following page."""
+    rows, next_cursor = response_service.list_responses_page(db, cursor=cursor, limit=limit, **filters)
+    return {
+        "items": [_result_item(*row) for row in rows],
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None
+    }
+
 @router.get("/results/{response_id}", response_class=HTMLResponse)
 async def view_response_detail(
     response_id: int,
@@ -425,49 +505,26 @@ async def view_response_detail(
     admin=Depends(require_admin)
 ):
     """View detailed response with all answers and calculated scores."""
-    response = response_service.get_response_with_answers(db, response_id)
-    if not response:
+    detail = response_service.get_response_detail(db, response_id)
+    if not detail:
         raise HTTPException(status_code=404, detail="Response not found")
     
-    # Get questions with answers
-    answers_by_question = {}
-    for answer in response.answers:
-        question = question_service.get_question_by_id(db, answer.question_id)
-        answers_by_question[question.id] = {
-            'question': question,
-            'answer': answer
-        }
-    
-    # Get or calculate scores
-    scores = scoring_service.get_scores_for_response(db, response_id)
-    
-    # Parse v1.1 JSON fields for template
-    riasec_labels = {}
-    bigfive_labels = {}
-    behavioral_flags = {}
-    ikigai_zones = {}
-    
-    if scores:
-        if scores.riasec_strength_labels:
-            riasec_labels = json.loads(scores.riasec_strength_labels)
-        if scores.bigfive_strength_labels:
-            bigfive_labels = json.loads(scores.bigfive_strength_labels)
-        if scores.behavioral_flags:
-            behavioral_flags = json.loads(scores.behavioral_flags)
-        if scores.ikigai_zones:
-            ikigai_zones = json.loads(scores.ikigai_zones)
+    answers_by_question = {
+        item.question.id: {'question': item.question, 'answer': item.answer}
+        for item in detail.answers
+    }
     
     return templates.TemplateResponse(
         "admin/response_detail.html",
         {
             "request": request,
-            "response": response,
+            "response": detail.response,
             "answers_by_question": answers_by_question,
-            "scores": scores,
-            "riasec_labels": riasec_labels,
-            "bigfive_labels": bigfive_labels,
-            "behavioral_flags": behavioral_flags,
-            "ikigai_zones": ikigai_zones,
+            "scores": detail.scores,
+            "riasec_labels": detail.riasec_labels,
+            "bigfive_labels": detail.bigfive_labels,
+            "behavioral_flags": detail.behavioral_flags,
+            "ikigai_zones": detail.ikigai_zones,
             "admin": admin,
             "format_datetime": format_datetime
         }
@@ -480,6 +537,7 @@ async def delete_response(
     admin=Depends(require_admin)
 ):
     """Delete a student response."""
+    report_store.delete_for_response(response_id)
     response_service.delete_student_response(db, response_id)
     return RedirectResponse(url="/admin/results", status_code=302)
 
@@ -490,10 +548,17 @@ async def bulk_delete_results(
     db: Session = Depends(get_db),
     admin=Depends(require_admin)
 ):
-    """Bulk delete selected results."""
+    """Bulk delete selected results with set-based, chunked deletes."""
     try:
         data = await request.json()
-        result_ids = data.get("ids", [])
+        raw_ids = data.get("ids") or data.get("response_ids") or []
+        try:
+            result_ids = sorted({int(response_id) for response_id in raw_ids})
+        except (TypeError, ValueError):
+            return JSONResponse(content={
+                "success": False,
+                "message": "Result ids must be integers"
+            }, status_code=400)
         
         if not result_ids:
             return JSONResponse(content={
@@ -501,13 +566,13 @@ async def bulk_delete_results(
                 "message": "No results selected"
             }, status_code=400)
         
-        # Delete all selected responses
-        for response_id in result_ids:
-            response_service.delete_student_response(db, response_id)
+        await run_in_threadpool(report_store.delete_for_responses, result_ids)
+        counts = await run_in_threadpool(response_service.bulk_delete_responses, db, result_ids)
         
         return JSONResponse(content={
             "success": True,
-            "message": f"Deleted {len(result_ids)} result(s)"
+            "message": f"Deleted {counts['student_responses']} result(s)",
+            "deleted": counts
         })
     except Exception as e:
         return JSONResponse(content={
@@ -542,124 +607,18 @@ async def export_results_csv(
     db: Session = Depends(get_db),
     admin=Depends(require_admin)
 ):
-    """Export all results with scores to CSV."""
-    responses = response_service.get_all_responses(db)
-    
-    # Create CSV in memory
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write header with v1.1 fields
-    writer.writerow([
-        'Response ID', 'Session ID', 'Name', 'Email', 'Age Group', 'Country', 'Origin Country',
-        'Started At', 'Completed At', 'Status',
-        # RIASEC raw scores
-        'RIASEC R', 'RIASEC I', 'RIASEC A', 'RIASEC S', 'RIASEC E', 'RIASEC C', 'RIASEC Profile',
-        # RIASEC v1.1 strength labels
-        'RIASEC R Label', 'RIASEC I Label', 'RIASEC A Label', 'RIASEC S Label', 'RIASEC E Label', 'RIASEC C Label',
-        # Big Five raw scores
-        'Big5 O', 'Big5 C', 'Big5 E', 'Big5 A', 'Big5 N',
-        # Big Five v1.1 strength labels
-        'Big5 O Label', 'Big5 C Label', 'Big5 E Label', 'Big5 A Label', 'Big5 N Label',
-        # Behavioral flags v1.1
-        'Procrastination Risk', 'Perfectionism Risk', 'Low Grit Risk', 'Poor Regulation Risk', 'Growth Mindset',
-        'Scores Calculated At'
-    ])
-    
-    # Write data rows
-    for response in responses:
-        scores = scoring_service.get_scores_for_response(db, response.id)
-        
-        status = "Complete" if response.completed_at else "In Progress"
-        
-        row = [
-            response.id,
-            response.session_id,
-            response.full_name,
-            response.email,
-            response.age_group,
-            response.country,
-            response.origin_country,
-            response.created_at.strftime('%Y-%m-%d %H:%M:%S') if response.created_at else '',
-            response.completed_at.strftime('%Y-%m-%d %H:%M:%S') if response.completed_at else '',
-            status
-        ]
-        
-        # Add scores if available
-        if scores:
-            # RIASEC raw scores
-            row.extend([
-                scores.riasec_r_score or '',
-                scores.riasec_i_score or '',
-                scores.riasec_a_score or '',
-                scores.riasec_s_score or '',
-                scores.riasec_e_score or '',
-                scores.riasec_c_score or '',
-                scores.riasec_profile or '',
-            ])
-            
-            # RIASEC v1.1 strength labels
-            riasec_labels = json.loads(scores.riasec_strength_labels) if scores.riasec_strength_labels else {}
-            row.extend([
-                riasec_labels.get('R', ''),
-                riasec_labels.get('I', ''),
-                riasec_labels.get('A', ''),
-                riasec_labels.get('S', ''),
-                riasec_labels.get('E', ''),
-                riasec_labels.get('C', ''),
-            ])
-            
-            # Big Five raw scores
-            row.extend([
-                scores.bigfive_o_score or '',
-                scores.bigfive_c_score or '',
-                scores.bigfive_e_score or '',
-                scores.bigfive_a_score or '',
-                scores.bigfive_n_score or '',
-            ])
-            
-            # Big Five v1.1 strength labels
-            bigfive_labels = json.loads(scores.bigfive_strength_labels) if scores.bigfive_strength_labels else {}
-            row.extend([
-                bigfive_labels.get('O', ''),
-                bigfive_labels.get('C', ''),
-                bigfive_labels.get('E', ''),
-                bigfive_labels.get('A', ''),
-                bigfive_labels.get('N', ''),
-            ])
-            
-            # Behavioral flags v1.1
-            behavioral_flags = json.loads(scores.behavioral_flags) if scores.behavioral_flags else {}
-            row.extend([
-                'Yes' if behavioral_flags.get('procrastination_risk') else 'No',
-                'Yes' if behavioral_flags.get('perfectionism_risk') else 'No',
-                'Yes' if behavioral_flags.get('low_grit_risk') else 'No',
-                'Yes' if behavioral_flags.get('poor_regulation_risk') else 'No',
-                'Yes' if behavioral_flags.get('growth_mindset') else 'No',
-            ])
-            
-            row.append(scores.calculated_at.strftime('%Y-%m-%d %H:%M:%S') if scores.calculated_at else '')
-        else:
-            row.extend([''] * 30)  # Empty columns for all score fields
-        
-        writer.writerow(row)
-    
-    # Prepare response
-    output.seek(0)
+    """Export all results with scores to CSV, streamed in constant memory."""
+    # The request session stays open until the response has been sent,
+    # so the generator can keep fetching batches from it while streaming
     return StreamingResponse(
-        iter([output.getvalue()]),
+        iter_results_csv(db),
         media_type="text/csv",
         headers={"Content-Disposition": "attachment; filename=carhythm_results_v1.1_export.csv"}
     )
 
 
-@router.get("/results/{response_id}/export/pdf")
-async def export_response_pdf(
-    response_id: int,
-    db: Session = Depends(get_db),
-    admin=Depends(require_admin)
-):
-    """Export individual response as PDF report with scores and visualizations."""
+def _response_and_scores(db: Session, response_id: int):
+    """Response with its scores (calculated if missing) for report rendering."""
     response = response_service.get_response_with_answers(db, response_id)
     if not response:
         raise HTTPException(status_code=404, detail="Response not found")
@@ -668,88 +627,141 @@ async def export_response_pdf(
     scores = scoring_service.get_scores_for_response(db, response_id)
     if not scores:
         # Calculate scores if they don't exist
-        scores = scoring_service.calculate_and_save_scores(db, response_id)
+        try:
+            scores = scoring_service.calculate_and_save_scores(db, response_id)
+        except ValueError:
+            scores = None
     
     if not scores:
         raise HTTPException(status_code=400, detail="Unable to calculate scores for this response")
-    
-    # Generate PDF
+    return response, scores
+
+
+@router.get("/results/{response_id}/export/pdf")
+async def export_response_pdf(
+    response_id: int,
+    db: Session = Depends(get_db),
+    admin=Depends(require_admin)
+):
+    """Export individual response as PDF report with scores and visualizations."""
+    response, scores = _response_and_scores(db, response_id)
+    response_dict, scores_dict = build_report_inputs(response, scores)
     try:
-        # Convert response and scores to dict format for V2 template
-        response_dict = {
-            'student_name': response.full_name,
-            'student_email': response.email,
-            'session_id': response.session_id
-        }
-        
-        scores_dict = {
-            'riasec_raw_scores': json.loads(scores.riasec_raw_scores) if scores.riasec_raw_scores else {},
-            'holland_code': scores.holland_code,
-            'riasec_strength_labels': json.loads(scores.riasec_strength_labels) if scores.riasec_strength_labels else {},
-            'bigfive_raw_scores': json.loads(scores.bigfive_raw_scores) if scores.bigfive_raw_scores else {},
-            'bigfive_strength_labels': json.loads(scores.bigfive_strength_labels) if scores.bigfive_strength_labels else {},
-            'behavioral_raw_scores': json.loads(scores.behavioral_raw_scores) if scores.behavioral_raw_scores else {},
-            'behavioral_strength_labels': json.loads(scores.behavioral_strength_labels) if scores.behavioral_strength_labels else {},
-            'behavioral_flags': json.loads(scores.behavioral_flags) if scores.behavioral_flags else {},
-            'ikigai_zones': json.loads(scores.ikigai_zones) if scores.ikigai_zones else {}
-        }
-        
-        pdf_buffer = pdf_service.generate_pdf_report(
-            response_dict, 
+        # Rendered once per distinct set of inputs, then served from the report store
+        stored = await report_store.get_or_render(
+            response_dict,
             scores_dict,
-            template_version='v2',  # Admin always gets V2 for now
-            checkout_url='https://carhythm.com/premium'
+            priority=ReportPriority.ADMIN,
+            response_id=response.id,
+            **ADMIN_REPORT_OPTIONS
         )
-        
-        # Create safe filename
-        safe_name = "".join(c for c in response.full_name if c.isalnum() or c in (' ', '-', '_')).strip()
-        filename = f"CaRhythm_Report_{safe_name}_{response.id}.pdf"
-        
-        return StreamingResponse(
-            pdf_buffer,
-            media_type="application/pdf",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
+    except ReportQueueFull as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Report rendering is busy, please retry shortly",
+            headers={"Retry-After": str(e.retry_after)}
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating PDF: {str(e)}")
+    
+    # Create safe filename
+    safe_name = "".join(c for c in response.full_name if c.isalnum() or c in (' ', '-', '_')).strip()
+    filename = f"CaRhythm_Report_{safe_name}_{response.id}.pdf"
+    
+    return FileResponse(
+        stored.path,
+        media_type="application/pdf",
+        filename=filename,
+        headers={"ETag": f'"{stored.key}"'}
+    )
+
+
+@router.get("/results/{response_id}/export/pdf/profile")
+async def profile_response_pdf(
+    response_id: int,
+    template: str = "v1",
+    free: bool = False,
+    memory: bool = True,
+    format: str = "json",
+    db: Session = Depends(get_db),
+    admin=Depends(require_admin)
+):
+    """
+    Render a response's report with section profiling (wall, CPU and peak
+    allocation per section). Bypasses the report store; format is json,
+    text (flame-style breakdown) or folded (stacks for flame graph tools).
+    """
+    if template not in pdf_profiler.TEMPLATES:
+        raise HTTPException(status_code=400, detail=f"template must be one of {', '.join(pdf_profiler.TEMPLATES)}")
+    if format not in ("json", "text", "folded"):
+        raise HTTPException(status_code=400, detail="format must be json, text or folded")
+
+    response, scores = _response_and_scores(db, response_id)
+    response_dict, scores_dict = build_report_inputs(response, scores)
+    if template == "v1":
+        options = dict(STUDENT_REPORT_OPTIONS if free else ADMIN_REPORT_OPTIONS)
+    else:
+        options = {"checkout_url": ADMIN_REPORT_OPTIONS["checkout_url"]}
+
+    try:
+        profile = await report_admission.render(
+            ReportPriority.ADMIN, pdf_profiler.profile_render,
+            response_dict, scores_dict, template=template, trace_memory=memory, **options
+        )
+    except ReportQueueFull as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Report rendering is busy, please retry shortly",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except pdf_profiler.ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    if format == "text":
+        return PlainTextResponse(profile.flame())
+    if format == "folded":
+        return PlainTextResponse(profile.folded())
+    return JSONResponse(content=profile.to_dict())
 
 
 # Feedback Management Routes
 
+def feedback_filters(
+    rating: Optional[int] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None
+) -> Dict[str, Any]:
+    """Parse feedback list/export filters from the query string; empty form fields are ignored."""
+    filters: Dict[str, Any] = {}
+    if rating is not None:
+        filters["rating"] = rating
+    for name, value in (("date_from", date_from), ("date_to", date_to)):
+        if value:
+            try:
+                filters[name] = date.fromisoformat(value)
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"{name} must be a YYYY-MM-DD date")
+    return filters
+
+
 @router.get("/feedbacks", response_class=HTMLResponse)
 async def manage_feedbacks(
     request: Request,
-    rating: Optional[int] = None,
+    cursor: Optional[int] = None,
+    filters: Dict[str, Any] = Depends(feedback_filters),
     db: Session = Depends(get_db),
     admin=Depends(require_admin)
 ):
-    """Feedback management interface."""
-    query = db.query(Feedback).join(Response)
-    
-    # Filter by rating if specified
-    if rating is not None:
-        query = query.filter(Feedback.rating == rating)
-    
-    # Order by most recent first
-    feedbacks = query.order_by(desc(Feedback.created_at)).all()
+    """Feedback management interface, newest first, with keyset pagination."""
+    feedbacks, next_cursor = feedback_service.list_feedbacks_page(db, cursor=cursor, **filters)
     
     # Calculate statistics
-    total_feedbacks = db.query(func.count(Feedback.id)).scalar() or 0
-    avg_rating = db.query(func.avg(Feedback.rating)).filter(
-        Feedback.rating.isnot(None)
-    ).scalar()
-    would_recommend = db.query(func.count(Feedback.id)).filter(
-        Feedback.would_recommend == True
-    ).scalar() or 0
-    would_not_recommend = db.query(func.count(Feedback.id)).filter(
-        Feedback.would_recommend == False
-    ).scalar() or 0
-    
+    feedback_stats = stats_cache.get_feedback_stats(db)
     stats = {
-        'total_feedbacks': total_feedbacks,
-        'average_rating': round(avg_rating, 2) if avg_rating else 0,
-        'would_recommend': would_recommend,
-        'would_not_recommend': would_not_recommend
+        'total_feedbacks': feedback_stats['total_feedbacks'],
+        'average_rating': feedback_stats['average_rating'] or 0,
+        'would_recommend': feedback_stats['would_recommend_count'],
+        'would_not_recommend': feedback_stats['would_not_recommend_count']
     }
     
     return templates.TemplateResponse(
@@ -757,8 +769,10 @@ async def manage_feedbacks(
         {
             "request": request,
             "feedbacks": feedbacks,
+            "next_cursor": next_cursor,
+            "filters": request.query_params,
             "stats": stats,
-            "selected_rating": rating,
+            "selected_rating": filters.get("rating"),
             "admin": admin
         }
     )
@@ -766,40 +780,146 @@ async def manage_feedbacks(
 
 @router.get("/feedbacks/export", response_class=StreamingResponse)
 async def export_feedbacks(
+    format: str = "csv",
+    filters: Dict[str, Any] = Depends(feedback_filters),
     db: Session = Depends(get_db),
     admin=Depends(require_admin)
 ):
-    """Export feedbacks to CSV."""
-    feedbacks = db.query(Feedback).join(Response).order_by(desc(Feedback.created_at)).all()
-    
-    # Create CSV in memory
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write header
-    writer.writerow([
-        'ID', 'Date', 'Session ID', 'User Name', 'User Email',
-        'Rating', 'Experience', 'Would Recommend', 'Suggestions'
-    ])
-    
-    # Write data
-    for feedback in feedbacks:
-        writer.writerow([
-            feedback.id,
-            feedback.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-            feedback.session_id,
-            feedback.response.full_name if feedback.response else '',
-            feedback.response.email if feedback.response else '',
-            feedback.rating or '',
-            feedback.experience_text or '',
-            'Yes' if feedback.would_recommend else ('No' if feedback.would_recommend is False else ''),
-            feedback.suggestions or ''
-        ])
+    """Export feedbacks as CSV or JSON Lines (`format=jsonl`), streamed in constant memory."""
+    if format == "csv":
+        body = feedback_service.iter_feedbacks_csv(db, **filters)
+        media_type, filename = "text/csv", "feedbacks_export.csv"
+    elif format == "jsonl":
+        body = feedback_service.iter_feedbacks_jsonl(db, **filters)
+        media_type, filename = "application/x-ndjson", "feedbacks_export.jsonl"
+    else:
+        raise HTTPException(status_code=400, detail="format must be 'csv' or 'jsonl'")
     
-    output.seek(0)
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+# Email Outbox Routes
+
+@router.get("/email-outbox", response_class=HTMLResponse)
+async def manage_email_outbox(
+    request: Request,
+    status: Optional[str] = None,
+    db: Session = Depends(get_db),
+    admin=Depends(require_admin)
+):
+    """Queued, failed and dead-lettered emails."""
+    try:
+        selected_status = OutboxStatus(status) if status else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Unknown status: {status}")
     
+    return templates.TemplateResponse(
+        "admin/email_outbox.html",
+        {
+            "request": request,
+            "messages": email_outbox.list_outbox_messages(db, selected_status),
+            "counts": email_outbox.get_outbox_counts(db),
+            "dispatcher": email_outbox.email_dispatcher.stats(),
+            "statuses": [s.value for s in OutboxStatus],
+            "selected_status": status,
+            "admin": admin
+        }
+    )
+
+@router.post("/email-outbox/{message_id}/retry")
+async def retry_email_outbox_message(
+    message_id: int,
+    db: Session = Depends(get_db),
+    admin=Depends(require_admin)
+):
+    """Send a pending or dead-lettered email again now."""
+    if not email_outbox.retry_outbox_message(db, message_id):
+        raise HTTPException(status_code=404, detail="Message not found or not retryable")
+    return RedirectResponse(url="/admin/email-outbox", status_code=302)
+
+@router.post("/email-outbox/{message_id}/delete")
+async def delete_email_outbox_message(
+    message_id: int,
+    db: Session = Depends(get_db),
+    admin=Depends(require_admin)
+):
+    """Discard a queued email."""
+    if not email_outbox.delete_outbox_message(db, message_id):
+        raise HTTPException(status_code=404, detail="Message not found or currently sending")
+    return RedirectResponse(url="/admin/email-outbox", status_code=302)
+
+# System Monitoring Routes
+
+@router.get("/system/report-queue")
+async def report_queue_status(admin=Depends(require_admin)):
+    """Report rendering queue depth, slot usage and wait-time metrics."""
+    return JSONResponse(content=report_admission.stats())
+
+@router.get("/system/email-outbox")
+async def email_outbox_status(db: Session = Depends(get_db), admin=Depends(require_admin)):
+    """Outbox depth by status, dispatcher/circuit breaker state and SMTP pool counters."""
+    return JSONResponse(content={
+        "counts": email_outbox.get_outbox_counts(db),
+        "dispatcher": email_outbox.email_dispatcher.stats(),
+        "smtp_pool": smtp_pool.stats()
+    })
+
+@router.get("/system/stats-cache")
+async def stats_cache_status(admin=Depends(require_admin)):
+    """Hit/miss/invalidation counters and hit rate of the cached admin statistics."""
+    return JSONResponse(content=stats_cache.stats_cache.stats())
+
+@router.get("/system/event-loop")
+async def event_loop_status(admin=Depends(require_admin)):
+    """Event loop lag and recent blocks with the route and stack that caused them."""
+    return JSONResponse(content=loop_watchdog.stats())
+
+@router.get("/system/report-store")
+async def report_store_status(admin=Depends(require_admin)):
+    """Stored report count/size against the eviction limits, plus hit/miss counters."""
+    return JSONResponse(content=await run_in_threadpool(report_store.stats))
+
+# Request Profiles
+
+@router.get("/system/profiles", response_class=HTMLResponse)
+async def manage_request_profiles(request: Request, admin=Depends(require_admin)):
+    """Recent on-demand request profiles kept by this worker."""
+    return templates.TemplateResponse(
+        "admin/request_profiles.html",
+        {
+            "request": request,
+            "profiles": request_profiler.profiles(),
+            "stats": request_profiler.stats(),
+            "admin": admin
+        }
+    )
+
+@router.get("/system/profiles/{profile_id}")
+async def view_request_profile(profile_id: int, admin=Depends(require_admin)):
+    """Text summary of a stored profile."""
+    profile = request_profiler.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found (evicted, or recorded by another worker)")
+    header = f"{profile.method} {profile.path} - {profile.mode}, {profile.duration * 1000:.0f} ms, {profile.detail}"
+    return PlainTextResponse(f"{header}\n\n{profile.summary}")
+
+@router.get("/system/profiles/{profile_id}/download")
+async def download_request_profile(profile_id: int, admin=Depends(require_admin)):
+    """Stored profile as speedscope JSON (sample) or a pstats dump (cprofile)."""
+    profile = request_profiler.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found (evicted, or recorded by another worker)")
     return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=feedbacks_export.csv"}
-    )
\ No newline at end of file
+        iter([profile.content]),
+        media_type=profile.media_type,
+        headers={"Content-Disposition": f"attachment; filename={profile.filename}"}
+    )
+
+@router.post("/system/profiles/clear")
+async def clear_request_profiles(admin=Depends(require_admin)):
+    """Discard this worker's stored profiles."""
+    request_profiler.clear()
+    return RedirectResponse(url="/admin/system/profiles", status_code=302)
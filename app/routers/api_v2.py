@@ -3,8 +3,9 @@ REST API v2 for Story Mode React Frontend
 Provides endpoints for modern assessment interface with enhanced UX
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, BackgroundTasks, status
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List, Optional, Dict, Any
@@ -16,11 +17,14 @@ import json
 from ..models import get_db, Page, Question, StudentResponse, QuestionAnswer, QuestionType, AssessmentScore
 from ..services import question_service, response_service
 from ..services.scoring_service_v1_1 import calculate_complete_profile_v1_1, save_assessment_score_v1_1
-from ..services.email_service import send_results_email, send_admin_notification
-from ..services.pdf_service import generate_pdf_report
+from ..services.email_outbox import enqueue_results_email, enqueue_admin_notification
+from ..services.report_admission import ReportQueueFull
+from ..services.report_store import report_store, build_report_inputs, top_strength, create_download_url
 from ..schemas import StudentResponseCreate, QuestionAnswerCreate
 from ..config import settings
 from ..utils.localization import get_localized_text, get_localized_json, validate_language
+from ..utils.security import verify_report_token
+from ..utils.helpers import ranged_file_response
 import logging
 
 logger = logging.getLogger(__name__)
@@ -90,6 +94,77 @@ class ProgressResponse(BaseModel):
     current_page_id: Optional[int]
     percentage_complete: float
 
+# ============================================================================
+# Report Delivery
+# ============================================================================
+
+async def _queue_results_delivery(db: Session, student_response: StudentResponse,
+                                  assessment_score: AssessmentScore, to_email: str,
+                                  background_tasks: BackgroundTasks) -> Dict[str, Any]:
+    """
+    Queue the results email in the configured delivery mode.
+
+    attachment: the report is fetched from (or rendered into) the report store
+                and attached to the email.
+    link:       the email carries a signed, expiring download URL; the report is
+                pre-rendered in the background or rendered on first fetch.
+
+    Raises:
+        HTTPException 503: when the report has to be rendered and the render queue is full
+    """
+    response_dict, scores_dict = build_report_inputs(student_response, assessment_score, email=to_email)
+    holland_code = scores_dict.get('holland_code') or 'N/A'
+    
+    if settings.RESULTS_DELIVERY_MODE == 'link':
+        download_url = create_download_url(student_response.session_id)
+        enqueue_results_email(
+            db,
+            to_email=to_email,
+            student_name=student_response.full_name,
+            holland_code=holland_code,
+            top_strength=top_strength(scores_dict),
+            download_url=download_url,
+            response_id=student_response.id,
+            session_id=student_response.session_id
+        )
+        if settings.REPORT_PRERENDER:
+            background_tasks.add_task(_prerender_report, response_dict, scores_dict, student_response.id)
+        return {"delivery_mode": "link", "download_url": download_url}
+    
+    logger.info(f"Preparing PDF report for {student_response.full_name}")
+    try:
+        stored = await report_store.get_or_render(response_dict, scores_dict, response_id=student_response.id)
+    except ReportQueueFull as e:
+        logger.warning(f"Report rendering busy, asking {student_response.session_id} to retry: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="We're generating a lot of reports right now. Please try again in a moment.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    
+    enqueue_results_email(
+        db,
+        to_email=to_email,
+        student_name=student_response.full_name,
+        holland_code=holland_code,
+        top_strength=top_strength(scores_dict),
+        pdf_bytes=await run_in_threadpool(stored.read_bytes),
+        response_id=student_response.id,
+        session_id=student_response.session_id
+    )
+    return {"delivery_mode": "attachment"}
+
+
+async def _prerender_report(response_dict: Dict[str, Any], scores_dict: Dict[str, Any], response_id: int):
+    """Render a linked report ahead of the first download (best effort)."""
+    try:
+        await report_store.get_or_render(response_dict, scores_dict, response_id=response_id)
+    except ReportQueueFull:
+        logger.info("Render queue busy, report will be rendered on first download instead")
+    except Exception as e:
+        logger.error(f"Report pre-render failed: {e}", exc_info=True)
+
+
 # ============================================================================
 # Endpoints
 # ============================================================================
@@ -548,6 +623,7 @@ async def get_answered_questions(
 @router.post("/student/info")
 async def submit_student_info(
     submission: StudentInfoSubmission,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """
@@ -591,107 +667,19 @@ async def submit_student_info(
                 "email_sent": False
             }
         
-        # 7. Generate PDF report
-        logger.info(f"Generating PDF report for {submission.full_name}")
-        response_dict = {
-            'student_name': submission.full_name,
-            'email': submission.email,
-            'age_group': submission.age_group,
-            'country': submission.country,
-            'origin_country': submission.origin_country
-        }
-        
-        # Parse JSON fields from assessment_score
-        import json as json_lib
-        
-        scores_dict = {
-            'riasec_raw_scores': json_lib.loads(assessment_score.riasec_raw_scores) if assessment_score.riasec_raw_scores else {},
-            'riasec_strength_labels': json_lib.loads(assessment_score.riasec_strength_labels) if assessment_score.riasec_strength_labels else {},
-            'holland_code': assessment_score.riasec_profile or '',
-            'bigfive_raw_scores': {
-                'O': assessment_score.bigfive_openness or 0,
-                'C': assessment_score.bigfive_conscientiousness or 0,
-                'E': assessment_score.bigfive_extraversion or 0,
-                'A': assessment_score.bigfive_agreeableness or 0,
-                'N': assessment_score.bigfive_neuroticism or 0
-            },
-            'bigfive_strength_labels': json_lib.loads(assessment_score.bigfive_strength_labels) if assessment_score.bigfive_strength_labels else {},
-            'behavioral_strength_labels': json_lib.loads(assessment_score.behavioral_strength_labels) if assessment_score.behavioral_strength_labels else {},
-            'behavioral_flags': json_lib.loads(assessment_score.behavioral_flags) if assessment_score.behavioral_flags else {},
-            'ikigai_zones': json_lib.loads(assessment_score.ikigai_zones) if assessment_score.ikigai_zones else {}
-        }
-        
-        # Extract behavioral raw scores from rhythm_profile
-        if assessment_score.rhythm_profile:
-            try:
-                rhythm_profile = json_lib.loads(assessment_score.rhythm_profile)
-                behavioral_raw_scores = rhythm_profile.get('behavioral', {}).get('raw_scores', {})
-                scores_dict['behavioral_raw_scores'] = behavioral_raw_scores
-            except:
-                scores_dict['behavioral_raw_scores'] = {}
-        
-        pdf_buffer = generate_pdf_report(
-            response_dict, 
-            scores_dict,
-            is_free_version=True,  # Generate free version with blurred premium sections
-            checkout_url='https://carhythm.com/paid',
-            discount_code='LAUNCH50'
-        )
-        
-        # 8. Send email with PDF attachment
-        logger.info(f"Sending results email to {submission.email}")
-        
-        # Get holland_code and top_strength from scores
-        holland_code = scores_dict.get('holland_code', 'N/A')
-        
-        # Get top strength from Big Five
-        bigfive_strength_labels = scores_dict.get('bigfive_strength_labels', {})
-        if bigfive_strength_labels:
-            # Find trait with highest score
-            bigfive_raw = scores_dict.get('bigfive_raw_scores', {})
-            top_trait = max(bigfive_raw.items(), key=lambda x: x[1])[0] if bigfive_raw else 'O'
-            trait_names = {'O': 'Openness', 'C': 'Conscientiousness', 'E': 'Extraversion', 'A': 'Agreeableness', 'N': 'Neuroticism'}
-            top_strength = f"{trait_names.get(top_trait, 'Openness')} ({bigfive_strength_labels.get(top_trait, 'High')})"
-        else:
-            top_strength = 'Openness'
-        
-        email_result = await send_results_email(
-            to_email=submission.email,
-            student_name=submission.full_name,
-            holland_code=holland_code,
-            top_strength=top_strength,
-            pdf_buffer=pdf_buffer
+        # 7. Queue results email (delivered by the outbox dispatcher)
+        delivery = await _queue_results_delivery(
+            db, student_response, assessment_score, submission.email, background_tasks
         )
         
-        if email_result['success']:
-            logger.info(f"Email sent successfully to {submission.email}")
-            return {
-                "success": True,
-                "message": f"Your results have been sent to {submission.email}. Please check your inbox!",
-                "email_sent": True,
-                "session_id": submission.session_id
-            }
-        else:
-            # Email failed - notify admin and return error
-            logger.error(f"Failed to send email to {submission.email}: {email_result.get('error', 'Unknown error')}")
-            
-            # Send admin notification
-            try:
-                await send_admin_notification(
-                    student_name=submission.full_name,
-                    student_email=submission.email,
-                    session_id=submission.session_id,
-                    error_message="Email delivery failed after retries"
-                )
-            except Exception as admin_error:
-                logger.error(f"Failed to send admin notification: {admin_error}")
-            
-            return {
-                "success": False,
-                "message": "Assessment completed, but we couldn't send the email. Please contact support.",
-                "email_sent": False,
-                "session_id": submission.session_id
-            }
+        return {
+            "success": True,
+            "message": f"Your results are on their way to {submission.email}. Please check your inbox!",
+            "email_sent": True,
+            "email_status": "queued",
+            "session_id": submission.session_id,
+            **delivery
+        }
             
     except HTTPException:
         raise
@@ -700,15 +688,16 @@ async def submit_student_info(
         
         # Try to notify admin
         try:
-            if 'submission' in locals():
-                await send_admin_notification(
-                    student_name=submission.full_name if hasattr(submission, 'full_name') else 'Unknown',
-                    student_email=submission.email if hasattr(submission, 'email') else 'Unknown',
-                    session_id=submission.session_id if hasattr(submission, 'session_id') else 'Unknown',
-                    error_message=str(e)
-                )
-        except:
-            pass
+            db.rollback()
+            enqueue_admin_notification(
+                db,
+                student_name=submission.full_name,
+                student_email=submission.email,
+                session_id=submission.session_id,
+                error_message=str(e)
+            )
+        except Exception as admin_error:
+            logger.error(f"Failed to queue admin notification: {admin_error}")
         
         raise HTTPException(
             status_code=500,
@@ -725,6 +714,7 @@ class ResendRequest(BaseModel):
 @router.post("/resend-results")
 async def resend_results(
     request: ResendRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """
@@ -738,7 +728,7 @@ async def resend_results(
             raise HTTPException(status_code=404, detail="Session not found")
         
         # 2. Check if assessment is completed
-        if not student_response.completed:
+        if not student_response.completed_at:
             raise HTTPException(status_code=400, detail="Assessment not completed yet")
         
         # 3. Update email if provided
@@ -763,63 +753,19 @@ async def resend_results(
                 "message": "Email delivery is currently disabled"
             }
         
-        # 6. Regenerate PDF
-        logger.info(f"Regenerating PDF for session {request.session_id}")
-        response_dict = {
-            'student_name': student_response.full_name,
-            'email': target_email,
-            'age_group': student_response.age_group,
-            'country': student_response.country,
-            'origin_country': student_response.origin_country
-        }
-        
-        scores_dict = {
-            'riasec_scores_v1_1': assessment_score.riasec_scores_v1_1,
-            'bigfive_scores_v1_1': assessment_score.bigfive_scores_v1_1,
-            'behavioral_scores_v1_1': assessment_score.behavioral_scores_v1_1,
-            'behavioral_flags_v1_1': assessment_score.behavioral_flags_v1_1,
-            'holland_code_v1_1': assessment_score.holland_code_v1_1
-        }
-        
-        pdf_buffer = generate_pdf_report(
-            response_dict, 
-            scores_dict,
-            is_free_version=True,  # Generate free version with blurred premium sections
-            checkout_url='https://carhythm.com/paid',
-            discount_code='LAUNCH50'
+        # 6. Queue the email again (reuses the stored report if inputs are unchanged)
+        logger.info(f"Queueing results resend to {target_email}")
+        delivery = await _queue_results_delivery(
+            db, student_response, assessment_score, target_email, background_tasks
         )
         
-        # 7. Resend email
-        logger.info(f"Resending results to {target_email}")
-        email_success = await send_results_email(
-            to_email=target_email,
-            student_name=student_response.full_name,
-            pdf_buffer=pdf_buffer,
-            session_id=request.session_id
-        )
-        
-        if email_success:
-            return {
-                "success": True,
-                "message": f"Results resent successfully to {target_email}",
-                "email": target_email
-            }
-        else:
-            # Notify admin
-            try:
-                await send_admin_notification(
-                    student_name=student_response.full_name,
-                    student_email=target_email,
-                    session_id=request.session_id,
-                    error_message="Resend failed after retries"
-                )
-            except:
-                pass
-            
-            return {
-                "success": False,
-                "message": "Failed to send email. Please try again or contact support."
-            }
+        return {
+            "success": True,
+            "message": f"Results are on their way to {target_email}",
+            "email": target_email,
+            "email_status": "queued",
+            **delivery
+        }
             
     except HTTPException:
         raise
@@ -831,6 +777,51 @@ async def resend_results(
         )
 
 
+@router.api_route("/reports/{token}", methods=["GET", "HEAD"])
+async def download_report(
+    token: str,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """
+    Download a student's PDF report via the signed link from the results email.
+    Rendered on first fetch, then served from the report store with ETag,
+    conditional GET and Range support.
+    """
+    session_id = verify_report_token(token)
+    if not session_id:
+        raise HTTPException(status_code=404, detail="This download link is invalid or has expired")
+    
+    student_response = response_service.get_student_response_by_session(db, session_id)
+    if not student_response or not student_response.completed_at:
+        raise HTTPException(status_code=404, detail="Report not found")
+    
+    assessment_score = db.query(AssessmentScore).filter(
+        AssessmentScore.response_id == student_response.id
+    ).first()
+    if not assessment_score:
+        raise HTTPException(status_code=404, detail="Report not found")
+    
+    response_dict, scores_dict = build_report_inputs(student_response, assessment_score)
+    try:
+        stored = await report_store.get_or_render(response_dict, scores_dict, response_id=student_response.id)
+    except ReportQueueFull as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Your report is being prepared. Please try again in a moment.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    
+    return ranged_file_response(
+        request,
+        stored.path,
+        etag=stored.key,
+        media_type="application/pdf",
+        filename="CaRhythm_Career_DNA_Report.pdf",
+        max_age=3600
+    )
+
+
 @router.get("/settings/theme")
 async def get_theme_settings():
     """
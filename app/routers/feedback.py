@@ -3,14 +3,14 @@ Feedback Router
 API endpoints for submitting and managing user feedback
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Response as HTTPResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, date
 import logging
 
 from ..models import get_db, Feedback, StudentResponse as Response
+from ..services import stats_cache, feedback_service
 from ..schemas.feedback import (
     FeedbackSubmit, 
     FeedbackResponse, 
@@ -61,6 +61,7 @@ async def submit_feedback(
                 existing_feedback.suggestions = feedback_data.suggestions
             
             db.commit()
+            stats_cache.invalidate_feedback()
             db.refresh(existing_feedback)
             
             logger.info(f"Updated feedback for session {feedback_data.session_id}")
@@ -78,6 +79,7 @@ async def submit_feedback(
         
         db.add(new_feedback)
         db.commit()
+        stats_cache.invalidate_feedback()
         db.refresh(new_feedback)
         
         logger.info(f"Created feedback for session {feedback_data.session_id}")
@@ -100,33 +102,7 @@ async def get_feedback_stats(db: Session = Depends(get_db)):
     Get feedback statistics (for admin dashboard).
     """
     try:
-        total_feedbacks = db.query(func.count(Feedback.id)).scalar() or 0
-        
-        # Average rating (only counting feedbacks with ratings)
-        avg_rating = db.query(func.avg(Feedback.rating)).filter(
-            Feedback.rating.isnot(None)
-        ).scalar()
-        
-        total_with_rating = db.query(func.count(Feedback.id)).filter(
-            Feedback.rating.isnot(None)
-        ).scalar() or 0
-        
-        # Recommendation counts
-        would_recommend = db.query(func.count(Feedback.id)).filter(
-            Feedback.would_recommend == True
-        ).scalar() or 0
-        
-        would_not_recommend = db.query(func.count(Feedback.id)).filter(
-            Feedback.would_recommend == False
-        ).scalar() or 0
-        
-        return FeedbackStats(
-            total_feedbacks=total_feedbacks,
-            average_rating=round(avg_rating, 2) if avg_rating else None,
-            would_recommend_count=would_recommend,
-            would_not_recommend_count=would_not_recommend,
-            total_with_rating=total_with_rating
-        )
+        return FeedbackStats(**stats_cache.get_feedback_stats(db))
         
     except Exception as e:
         logger.error(f"Error getting feedback stats: {str(e)}")
@@ -138,26 +114,29 @@ async def get_feedback_stats(db: Session = Depends(get_db)):
 
 @router.get("/list", response_model=List[FeedbackWithDetails])
 async def list_feedbacks(
+    http_response: HTTPResponse,
     limit: int = 100,
+    cursor: Optional[int] = None,
     offset: int = 0,
     rating: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
     db: Session = Depends(get_db)
 ):
     """
-    List all feedbacks with user details (for admin).
+    List feedbacks with user details (for admin), newest first.
+    
+    Page with `cursor`: the `X-Next-Cursor` response header holds the value
+    for the following page and is absent on the last one. `offset` still
+    works but gets slower the deeper it goes.
     """
     try:
-        query = db.query(Feedback).join(Response)
-        
-        # Filter by rating if specified
-        if rating is not None:
-            query = query.filter(Feedback.rating == rating)
-        
-        # Order by most recent first
-        query = query.order_by(desc(Feedback.created_at))
-        
-        # Pagination
-        feedbacks = query.offset(offset).limit(limit).all()
+        feedbacks, next_cursor = feedback_service.list_feedbacks_page(
+            db, cursor=cursor, limit=limit, rating=rating,
+            date_from=date_from, date_to=date_to, offset=offset
+        )
+        if next_cursor is not None:
+            http_response.headers["X-Next-Cursor"] = str(next_cursor)
         
         # Build response with user details
         result = []
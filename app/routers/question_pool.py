@@ -1,17 +1,21 @@
-from fastapi import APIRouter, Depends, Request, Form, UploadFile, File, HTTPException
+from fastapi import APIRouter, Depends, Request, Form, UploadFile, File, HTTPException, BackgroundTasks, Query
 from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from ..models import get_db, QuestionPageAssignment
+from sqlalchemy import update as sa_update
+from sqlalchemy.orm import Session, sessionmaker
+from ..models import get_db, QuestionPageAssignment, ImportLog
 from ..services.question_pool_service import QuestionPoolService
 from ..services.csv_import_service import CSVImportExportService
+from ..services import import_jobs
 from ..schemas.question_pool import (
     CategoryCreate, CategoryUpdate, QuestionPoolCreate, QuestionPoolUpdate, 
     QuestionPageAssignmentCreate, QuestionPoolFilter
 )
 from .admin import require_admin
 from typing import Optional, List
+from starlette.concurrency import run_in_threadpool
 import io
+import itertools
 
 router = APIRouter(prefix="/admin", tags=["question_pool"])
 templates = Jinja2Templates(directory="app/templates")
@@ -251,11 +255,12 @@ async def download_csv_template(question_type: str, admin=Depends(require_admin)
 @router.post("/csv-import/{question_type}")
 async def import_csv_questions(
     question_type: str,
+    background_tasks: BackgroundTasks,
     csv_file: UploadFile = File(...),
     db: Session = Depends(get_db),
     admin=Depends(require_admin)
 ):
-    """Import questions from CSV file."""
+    """Queue a CSV import job. Poll the returned `status_url` for progress."""
     if question_type not in ["essay", "slider", "mcq", "ordering"]:
         raise HTTPException(status_code=400, detail="Invalid question type")
     
@@ -263,33 +268,73 @@ async def import_csv_questions(
         raise HTTPException(status_code=400, detail="File must be a CSV")
     
     try:
-        # Read CSV content
-        content = await csv_file.read()
-        csv_content = content.decode('utf-8')
-        
-        # Import questions
-        result = CSVImportExportService.validate_and_import_csv(
-            db=db,
-            csv_content=csv_content,
-            question_type=question_type,
-            filename=csv_file.filename,
-            imported_by=admin.username
+        job = await run_in_threadpool(
+            import_jobs.create_import_job,
+            db, csv_file.file, question_type, csv_file.filename, admin.username
         )
-        
-        # Return result as JSON for AJAX handling
-        return JSONResponse(content={
-            "success": True,
-            "total_rows": result.total_rows,
-            "successful_imports": result.successful_imports,
-            "failed_imports": result.failed_imports,
-            "errors": result.errors
-        })
-        
     except Exception as e:
         return JSONResponse(
             status_code=400,
             content={"success": False, "error": str(e)}
         )
+    
+    # Runs in the threadpool after the response has been sent, with its own
+    # sessions on the same database as this request
+    background_tasks.add_task(import_jobs.run_import_job, job.id, sessionmaker(bind=db.get_bind()))
+    return JSONResponse(status_code=202, content={
+        "success": True,
+        "job_id": job.id,
+        "status": job.status.value,
+        "status_url": f"/admin/csv-import/jobs/{job.id}",
+        "cancel_url": f"/admin/csv-import/jobs/{job.id}/cancel"
+    })
+
+@router.get("/csv-import/jobs/{job_id}")
+async def csv_import_job_status(
+    job_id: int,
+    db: Session = Depends(get_db),
+    admin=Depends(require_admin)
+):
+    """Progress of a CSV import job: status, rows processed so far and errors."""
+    job = db.get(ImportLog, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return JSONResponse(content=import_jobs.job_status(job))
+
+@router.post("/csv-import/jobs/{job_id}/cancel")
+async def cancel_csv_import_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    admin=Depends(require_admin)
+):
+    """Cancel a CSV import job. A running job stops after its current chunk."""
+    job = import_jobs.request_cancel(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return JSONResponse(content=import_jobs.job_status(job))
+
+def _questions_csv_response(db: Session, question_type: Optional[str],
+                            question_ids: Optional[List[int]] = None,
+                            filters: Optional[QuestionPoolFilter] = None) -> StreamingResponse:
+    """Stream a pool export, or fail with 400 before streaming if nothing matches."""
+    if not question_type:
+        raise HTTPException(status_code=400, detail="Question type is required")
+    
+    try:
+        rows = CSVImportExportService.iter_export_rows(
+            db, question_type, question_ids=question_ids, filters=filters
+        )
+        first = next(rows, None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if first is None:
+        raise HTTPException(status_code=400, detail=f"No {question_type} questions found to export")
+    
+    return StreamingResponse(
+        CSVImportExportService.iter_questions_csv(itertools.chain([first], rows), question_type),
+        media_type="text/csv",
+        headers={"Content-Disposition": f"attachment; filename=questions_{question_type}.csv"}
+    )
 
 @router.post("/csv-export")
 async def export_questions_csv(
@@ -306,25 +351,30 @@ async def export_questions_csv(
     if not question_ids:
         raise HTTPException(status_code=400, detail="No questions selected")
     
-    if not question_type:
-        raise HTTPException(status_code=400, detail="Question type is required")
-    
     try:
         question_ids = [int(qid) for qid in question_ids]
-        csv_content = CSVImportExportService.export_questions_to_csv(
-            db=db,
-            question_ids=question_ids,
-            question_type=question_type
-        )
-        
-        return StreamingResponse(
-            io.BytesIO(csv_content.encode()),
-            media_type="text/csv",
-            headers={"Content-Disposition": f"attachment; filename=questions_{question_type}.csv"}
-        )
-        
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Question ids must be integers")
+    
+    return _questions_csv_response(db, question_type, question_ids=question_ids)
+
+@router.get("/question-pool/export")
+async def export_filtered_questions_csv(
+    question_type: str,
+    question_ids: Optional[List[int]] = Query(None),
+    category_id: Optional[int] = None,
+    search: Optional[str] = None,
+    db: Session = Depends(get_db),
+    admin=Depends(require_admin)
+):
+    """
+    Export pool questions of one type to CSV: the given question_ids, or
+    without them every question matching the dashboard's category/search filter.
+    """
+    filters = None
+    if question_ids is None:
+        filters = QuestionPoolFilter(category_id=category_id, search_text=search or None)
+    return _questions_csv_response(db, question_type, question_ids=question_ids, filters=filters)
 
 # Page Assignment Routes
 
@@ -369,25 +419,20 @@ async def page_question_assignment(
         limit=100
     )
     
-    # Debug print to see what filters are being applied
-    print(f"DEBUG: Filters - category_id: {parsed_category_id}, question_type: {parsed_question_type}, search: {parsed_search}")
-    
     available_questions = QuestionPoolService.get_questions_pool(db, filters)
     assigned_questions = QuestionPoolService.get_page_assigned_questions(db, page_id)
     categories = QuestionPoolService.get_categories(db)
+    assigned_ids = {assignment.question_pool_id for assignment in assigned_questions}
     
     # Serialize questions
     serialized_available = []
     for question in available_questions:
         question_dict = QuestionPoolService.serialize_question_for_response(question)
         question_dict['category'] = question.category
-        # Check if already assigned
-        question_dict['is_assigned'] = any(
-            assign.question_pool_id == question.id for assign in assigned_questions
-        )
+        question_dict['is_assigned'] = question.id in assigned_ids
         serialized_available.append(question_dict)
     
-    # Serialize assigned questions
+    # Serialize assigned questions (already in page order)
     serialized_assigned = []
     for assignment in assigned_questions:
         question_dict = QuestionPoolService.serialize_question_for_response(assignment.question)
@@ -403,7 +448,7 @@ async def page_question_assignment(
             "admin": admin,
             "page": page,
             "available_questions": serialized_available,
-            "assigned_questions": sorted(serialized_assigned, key=lambda x: x['order_index']),
+            "assigned_questions": serialized_assigned,
             "categories": categories,
             "current_filters": {
                 "category_id": parsed_category_id,
@@ -447,23 +492,97 @@ async def unassign_question_from_page(
     
     return RedirectResponse(url=f"/admin/pages/{page_id}/assign-questions", status_code=302)
 
+def _question_ids(data) -> List[int]:
+    """Read the `question_ids` list of a bulk assignment request body."""
+    raw_ids = data.get("question_ids") if isinstance(data, dict) else None
+    if not isinstance(raw_ids, list):
+        raise HTTPException(status_code=400, detail="question_ids must be a list of question ids")
+    try:
+        return [int(question_id) for question_id in raw_ids]
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Question ids must be integers")
+
+def _order_updates(data) -> List[dict]:
+    """Read the `updates` list of an order request body as assignment id / order index pairs."""
+    raw_updates = data.get("updates") if isinstance(data, dict) else None
+    if not isinstance(raw_updates, list):
+        raise HTTPException(status_code=400, detail="updates must be a list")
+    updates = []
+    for update in raw_updates:
+        if not isinstance(update, dict) or update.get("assignment_id") is None:
+            raise HTTPException(
+                status_code=400,
+                detail="Each update needs an assignment_id; reorder by question id with "
+                       "/admin/pages/{page_id}/assignments/reorder"
+            )
+        try:
+            updates.append({"id": int(update["assignment_id"]), "order_index": int(update["order_index"])})
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="assignment_id and order_index must be integers")
+    return updates
+
+def _get_page_or_404(db: Session, page_id: int):
+    from ..services.question_service import get_page_by_id
+    
+    page = get_page_by_id(db, page_id)
+    if not page:
+        raise HTTPException(status_code=404, detail="Page not found")
+    return page
+
+@router.post("/pages/{page_id}/assignments/bulk-assign")
+async def bulk_assign_questions(
+    page_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    admin=Depends(require_admin)
+):
+    """Assign a list of questions to a page in one transaction, appended in the order given."""
+    question_ids = _question_ids(await request.json())
+    _get_page_or_404(db, page_id)
+    result = await run_in_threadpool(
+        QuestionPoolService.bulk_assign_questions, db, page_id, question_ids, admin.username
+    )
+    return JSONResponse({"success": True, **result})
+
+@router.post("/pages/{page_id}/assignments/bulk-unassign")
+async def bulk_unassign_questions(
+    page_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    admin=Depends(require_admin)
+):
+    """Remove a list of questions from a page in one transaction."""
+    question_ids = _question_ids(await request.json())
+    _get_page_or_404(db, page_id)
+    removed = await run_in_threadpool(
+        QuestionPoolService.bulk_unassign_questions, db, page_id, question_ids
+    )
+    return JSONResponse({"success": True, "unassigned": removed})
+
+@router.post("/pages/{page_id}/assignments/reorder")
+async def reorder_page_questions(
+    page_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    admin=Depends(require_admin)
+):
+    """Set the page's question order from a list of question ids."""
+    question_ids = _question_ids(await request.json())
+    _get_page_or_404(db, page_id)
+    count = await run_in_threadpool(
+        QuestionPoolService.reorder_page_questions, db, page_id, question_ids
+    )
+    return JSONResponse({"success": True, "reordered": count})
+
 @router.post("/update-question-order")
 async def update_question_order(
     request: Request,
     db: Session = Depends(get_db),
     admin=Depends(require_admin)
 ):
-    """Update the order of assigned questions."""
-    data = await request.json()
-    updates = data.get("updates", [])
-    
-    for update in updates:
-        assignment = db.query(QuestionPageAssignment).filter(
-            QuestionPageAssignment.question_pool_id == update["question_id"]
-        ).first()
-        
-        if assignment:
-            assignment.order_index = update["order_index"]
-    
-    db.commit()
-    return JSONResponse({"success": True})
\ No newline at end of file
+    """Update the order of assigned questions (by assignment id; use the per-page reorder endpoint)."""
+    updates = _order_updates(await request.json())
+    if updates:
+        db.execute(sa_update(QuestionPageAssignment), updates)
+        db.commit()
+    return JSONResponse({"success": True})
@@ -6,7 +6,7 @@ from .question_service import (
 from .response_service import (
     create_student_response, get_student_response_by_session, complete_student_response,
     create_question_answer, get_all_responses, get_response_with_answers, get_answers_by_response,
-    delete_student_response, get_response_statistics
+    delete_student_response, get_response_statistics, list_responses_page, bulk_delete_responses
 )
 
 __all__ = [
@@ -36,5 +36,7 @@ __all__ = [
     "get_response_with_answers",
     "get_answers_by_response",
     "delete_student_response", 
-    "get_response_statistics"
+    "get_response_statistics",
+    "list_responses_page",
+    "bulk_delete_responses"
 ]
\ No newline at end of file
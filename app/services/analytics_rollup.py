@@ -0,0 +1,374 @@
+"""
+Analytics rollups
+Daily counters behind /admin/analytics/data, so the dashboard reads a few
+hundred pre-aggregated rows instead of scanning responses and scores.
+
+Counters are bumped in the same transaction as the event that changes them
+(response started, completed, abandoned, scored), and deleting responses
+subtracts everything they contributed (`remove_responses`). `rebuild_rollups`
+recomputes them from the base tables, for backfilling data recorded before
+the rollups existed.
+"""
+
+import json
+import logging
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..models import (
+    StudentResponse, AssessmentScore, SessionStatus,
+    DailyActivityRollup, DailyCountryRollup, DailyScoreRollup, DailyLabelRollup
+)
+
+logger = logging.getLogger(__name__)
+
+RIASEC_NAMES = {
+    'R': 'Realistic', 'I': 'Investigative', 'A': 'Artistic',
+    'S': 'Social', 'E': 'Enterprising', 'C': 'Conventional',
+}
+BIGFIVE_NAMES = {
+    'O': 'Openness', 'C': 'Conscientiousness', 'E': 'Extraversion',
+    'A': 'Agreeableness', 'N': 'Neuroticism',
+}
+
+# scale -> domain -> AssessmentScore column holding the raw score
+SCORE_COLUMNS = {
+    'riasec': {
+        'R': 'riasec_r_score', 'I': 'riasec_i_score', 'A': 'riasec_a_score',
+        'S': 'riasec_s_score', 'E': 'riasec_e_score', 'C': 'riasec_c_score',
+    },
+    'bigfive': {
+        'O': 'bigfive_openness', 'C': 'bigfive_conscientiousness', 'E': 'bigfive_extraversion',
+        'A': 'bigfive_agreeableness', 'N': 'bigfive_neuroticism',
+    },
+}
+LABEL_COLUMNS = {'riasec': 'riasec_strength_labels', 'bigfive': 'bigfive_strength_labels'}
+
+ROLLUP_MODELS = (DailyActivityRollup, DailyCountryRollup, DailyScoreRollup, DailyLabelRollup)
+TOP_COUNTRIES = 20
+# Rows per multi-row upsert, keeping the bound parameters under SQLite's limit
+UPSERT_BATCH_ROWS = 150
+
+
+def utc_today() -> date:
+    return datetime.utcnow().date()
+
+
+def _as_date(value) -> Optional[date]:
+    """func.date() returns a string on SQLite and a date elsewhere."""
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _increment_many(db: Session, model, keys: List[str], rows: List[Dict[str, Any]]):
+    """
+    Add each row's other columns to the rollup row identified by its `keys`
+    columns, creating rows as needed. On SQLite and PostgreSQL that is one
+    multi-row upsert per UPSERT_BATCH_ROWS rows; elsewhere row by row.
+    """
+    # One statement can't upsert the same row twice (PostgreSQL rejects it), so merge first
+    merged: Dict[Tuple, Dict[str, Any]] = {}
+    for row in rows:
+        key = tuple(row[column] for column in keys)
+        if key in merged:
+            for column, amount in row.items():
+                if column not in keys:
+                    merged[key][column] += amount
+        else:
+            merged[key] = dict(row)
+    if not merged:
+        return
+    rows = list(merged.values())
+    increments = [column for column in rows[0] if column not in keys]
+
+    dialect = db.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        table = model.__table__
+        for start in range(0, len(rows), UPSERT_BATCH_ROWS):
+            stmt = insert(table).values(rows[start:start + UPSERT_BATCH_ROWS])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=keys,
+                set_={column: table.c[column] + stmt.excluded[column] for column in increments}
+            )
+            db.execute(stmt)
+        return
+
+    for values in rows:
+        row = db.query(model).filter_by(**{column: values[column] for column in keys}).first()
+        if row is None:
+            db.add(model(**values))
+            db.flush()
+        else:
+            for column in increments:
+                setattr(row, column, getattr(row, column) + values[column])
+
+
+def _increment(db: Session, model, keys: Dict[str, Any], increments: Dict[str, Any]):
+    """Add `increments` to the rollup row identified by `keys`, creating it if needed."""
+    _increment_many(db, model, list(keys), [{**keys, **increments}])
+
+
+# ---------------------------------------------------------------------------
+# Incremental updates (called by the services that change the base tables;
+# the caller commits)
+# ---------------------------------------------------------------------------
+
+def record_started(db: Session, day: Optional[date] = None):
+    _increment(db, DailyActivityRollup, {'day': day or utc_today()}, {'started': 1})
+
+
+def record_completed(db: Session, country: Optional[str], day: Optional[date] = None):
+    day = day or utc_today()
+    _increment(db, DailyActivityRollup, {'day': day}, {'completed': 1})
+    if country:
+        _increment(db, DailyCountryRollup, {'day': day, 'country': country}, {'completed': 1})
+
+
+def record_abandoned(db: Session, day: Optional[date] = None):
+    _increment(db, DailyActivityRollup, {'day': day or utc_today()}, {'abandoned': 1})
+
+
+def _load_labels(value: Optional[str]) -> Dict[str, Any]:
+    if not value:
+        return {}
+    try:
+        labels = json.loads(value)
+    except (TypeError, ValueError):
+        return {}
+    return labels if isinstance(labels, dict) else {}
+
+
+def score_contributions(score: AssessmentScore) -> Tuple[List[Tuple[str, str, float]], List[Tuple[str, str, str]]]:
+    """(scale, domain, raw score) and (scale, domain, label) entries a score record adds to the rollups."""
+    scores = []
+    labels = []
+    for scale, columns in SCORE_COLUMNS.items():
+        for domain, column in columns.items():
+            value = getattr(score, column)
+            if value is not None:
+                scores.append((scale, domain, float(value)))
+        for domain, label in _load_labels(getattr(score, LABEL_COLUMNS[scale])).items():
+            if label:
+                labels.append((scale, domain, str(label)))
+    return scores, labels
+
+
+def record_score(db: Session, score: AssessmentScore, day: Optional[date] = None, sign: int = 1):
+    """Add a score record to the day's rollups; sign=-1 removes it before a recalculation."""
+    day = day or utc_today()
+    scores, labels = score_contributions(score)
+    _increment_many(db, DailyScoreRollup, ['day', 'scale', 'domain'], [
+        {'day': day, 'scale': scale, 'domain': domain, 'score_sum': sign * value, 'score_count': sign}
+        for scale, domain, value in scores
+    ])
+    _increment_many(db, DailyLabelRollup, ['day', 'scale', 'domain', 'label'], [
+        {'day': day, 'scale': scale, 'domain': domain, 'label': label, 'count': sign}
+        for scale, domain, label in labels
+    ])
+
+
+# ---------------------------------------------------------------------------
+# Backfill
+# ---------------------------------------------------------------------------
+
+def _in_range(query, column, since: Optional[date], until: Optional[date]):
+    if since:
+        query = query.filter(column >= datetime.combine(since, datetime.min.time()))
+    if until:
+        query = query.filter(column < datetime.combine(until + timedelta(days=1), datetime.min.time()))
+    return query
+
+
+def _aggregate(db: Session, since: Optional[date], until: Optional[date], *filters,
+               batch_size: int = 1000) -> Tuple[Dict[date, Dict[str, int]], List[Dict[str, Any]],
+                                                List[Dict[str, Any]], Counter]:
+    """
+    Rollup contributions of the responses matching `filters` (criteria on
+    StudentResponse) for days in [since, until]: activity counts per day,
+    country rows, score rows and label counts, attributed to the same days
+    the incremental updates use.
+    """
+    activity: Dict[date, Dict[str, int]] = {}
+
+    def add_activity(column, field, *conditions):
+        day = func.date(column)
+        query = db.query(day, func.count(StudentResponse.id)).filter(column.isnot(None), *conditions, *filters)
+        for value, count in _in_range(query, column, since, until).group_by(day):
+            activity.setdefault(_as_date(value), {'started': 0, 'completed': 0, 'abandoned': 0})[field] = count
+
+    add_activity(StudentResponse.created_at, 'started')
+    add_activity(StudentResponse.completed_at, 'completed')
+    # The abandonment time is not stored; last_activity is the closest record of it
+    add_activity(StudentResponse.last_activity, 'abandoned',
+                 StudentResponse.status == SessionStatus.abandoned, StudentResponse.completed_at.is_(None))
+
+    completed_day = func.date(StudentResponse.completed_at)
+    country_query = _in_range(
+        db.query(completed_day, StudentResponse.country, func.count(StudentResponse.id))
+        .filter(StudentResponse.completed_at.isnot(None), *filters),
+        StudentResponse.completed_at, since, until
+    ).group_by(completed_day, StudentResponse.country)
+    countries = [{'day': _as_date(value), 'country': country, 'completed': count}
+                 for value, country, count in country_query if country]
+
+    # Scores count on the day the response completed (or was scored, if it never completed)
+    scored_at = func.coalesce(StudentResponse.completed_at, AssessmentScore.calculated_at)
+    scored_day = func.date(scored_at)
+    aggregates = []
+    for columns in SCORE_COLUMNS.values():
+        for column in columns.values():
+            attribute = getattr(AssessmentScore, column)
+            aggregates.extend([func.sum(attribute), func.count(attribute)])
+    score_query = _in_range(
+        db.query(scored_day, *aggregates).join(StudentResponse, StudentResponse.id == AssessmentScore.response_id)
+        .filter(*filters),
+        scored_at, since, until
+    ).group_by(scored_day)
+    score_rows = []
+    for row in score_query:
+        day, values = _as_date(row[0]), row[1:]
+        position = 0
+        for scale, columns in SCORE_COLUMNS.items():
+            for domain in columns:
+                total, count = values[position], values[position + 1]
+                position += 2
+                if count:
+                    score_rows.append({'day': day, 'scale': scale, 'domain': domain,
+                                       'score_sum': float(total or 0), 'score_count': count})
+
+    label_counts: Counter = Counter()
+    label_query = _in_range(
+        db.query(scored_day, AssessmentScore.riasec_strength_labels, AssessmentScore.bigfive_strength_labels)
+        .join(StudentResponse, StudentResponse.id == AssessmentScore.response_id).filter(*filters),
+        scored_at, since, until
+    ).execution_options(yield_per=batch_size)
+    for value, riasec_labels, bigfive_labels in label_query:
+        day = _as_date(value)
+        for scale, raw in (('riasec', riasec_labels), ('bigfive', bigfive_labels)):
+            for domain, label in _load_labels(raw).items():
+                if label:
+                    label_counts[(day, scale, domain, str(label))] += 1
+
+    return activity, countries, score_rows, label_counts
+
+
+def remove_responses(db: Session, response_ids: List[int]):
+    """
+    Subtract what the responses and their scores added to the rollups. Call
+    before deleting them, in the same transaction; the caller commits.
+    """
+    activity, countries, score_rows, label_counts = _aggregate(db, None, None, StudentResponse.id.in_(response_ids))
+    _increment_many(db, DailyActivityRollup, ['day'], [
+        {'day': day, **{field: -count for field, count in counts.items()}} for day, counts in activity.items()
+    ])
+    _increment_many(db, DailyCountryRollup, ['day', 'country'], [
+        {'day': row['day'], 'country': row['country'], 'completed': -row['completed']} for row in countries
+    ])
+    _increment_many(db, DailyScoreRollup, ['day', 'scale', 'domain'], [
+        {**row, 'score_sum': -row['score_sum'], 'score_count': -row['score_count']} for row in score_rows
+    ])
+    _increment_many(db, DailyLabelRollup, ['day', 'scale', 'domain', 'label'], [
+        {'day': day, 'scale': scale, 'domain': domain, 'label': label, 'count': -count}
+        for (day, scale, domain, label), count in label_counts.items()
+    ])
+
+
+def rebuild_rollups(db: Session, since: Optional[date] = None, until: Optional[date] = None,
+                    batch_size: int = 1000) -> Dict[str, int]:
+    """
+    Recompute all rollups for days in [since, until] (everything when both are None)
+    from the base tables. Counts and sums are aggregated in SQL; only the JSON label
+    columns are read row by row, in `yield_per` batches.
+    Returns the number of rollup rows written per table.
+    """
+    for model in ROLLUP_MODELS:
+        query = db.query(model)
+        if since:
+            query = query.filter(model.day >= since)
+        if until:
+            query = query.filter(model.day <= until)
+        query.delete(synchronize_session=False)
+
+    activity, countries, score_rows, label_counts = _aggregate(db, since, until, batch_size=batch_size)
+    db.bulk_insert_mappings(DailyActivityRollup, [{'day': day, **counts} for day, counts in activity.items()])
+    db.bulk_insert_mappings(DailyCountryRollup, countries)
+    db.bulk_insert_mappings(DailyScoreRollup, score_rows)
+    db.bulk_insert_mappings(DailyLabelRollup, [
+        {'day': day, 'scale': scale, 'domain': domain, 'label': label, 'count': count}
+        for (day, scale, domain, label), count in label_counts.items()
+    ])
+
+    db.commit()
+    written = {
+        'activity_days': len(activity),
+        'country_rows': len(countries),
+        'score_rows': len(score_rows),
+        'label_rows': len(label_counts),
+    }
+    logger.info(f"Rebuilt analytics rollups ({since or 'start'} to {until or 'today'}): {written}")
+    return written
+
+
+# ---------------------------------------------------------------------------
+# Dashboard reads
+# ---------------------------------------------------------------------------
+
+def get_dashboard_data(db: Session, trend_days: int = 30) -> Dict[str, Any]:
+    """Everything the analytics charts need, read from the rollup tables only."""
+    started, completed, abandoned = db.query(
+        func.coalesce(func.sum(DailyActivityRollup.started), 0),
+        func.coalesce(func.sum(DailyActivityRollup.completed), 0),
+        func.coalesce(func.sum(DailyActivityRollup.abandoned), 0)
+    ).one()
+
+    trend_start = utc_today() - timedelta(days=trend_days - 1)
+    trend = db.query(DailyActivityRollup.day, DailyActivityRollup.started, DailyActivityRollup.completed).filter(
+        DailyActivityRollup.day >= trend_start
+    ).order_by(DailyActivityRollup.day).all()
+
+    averages: Dict[str, Dict[str, float]] = {'riasec': {}, 'bigfive': {}}
+    score_totals = db.query(
+        DailyScoreRollup.scale, DailyScoreRollup.domain,
+        func.sum(DailyScoreRollup.score_sum), func.sum(DailyScoreRollup.score_count)
+    ).group_by(DailyScoreRollup.scale, DailyScoreRollup.domain)
+    for scale, domain, total, count in score_totals:
+        if count:
+            averages.setdefault(scale, {})[domain] = round(total / count, 2)
+
+    labels: Dict[str, Dict[str, Dict[str, int]]] = {'riasec': {}, 'bigfive': {}}
+    label_totals = db.query(
+        DailyLabelRollup.scale, DailyLabelRollup.domain, DailyLabelRollup.label, func.sum(DailyLabelRollup.count)
+    ).group_by(DailyLabelRollup.scale, DailyLabelRollup.domain, DailyLabelRollup.label)
+    for scale, domain, label, count in label_totals:
+        if count:
+            labels.setdefault(scale, {}).setdefault(domain, {})[label] = count
+
+    country_total = func.sum(DailyCountryRollup.completed)
+    countries = db.query(DailyCountryRollup.country, country_total).group_by(
+        DailyCountryRollup.country
+    ).having(country_total > 0).order_by(country_total.desc()).limit(TOP_COUNTRIES).all()
+
+    return {
+        "total_responses": started,
+        "response_trend": [{"date": row.day.isoformat(), "count": row.started, "completed": row.completed}
+                           for row in trend],
+        "completion_stats": {
+            "completed": completed,
+            "in_progress": max(started - completed - abandoned, 0),
+            "abandoned": abandoned,
+            "completion_rate": round(completed / started * 100, 1) if started else 0
+        },
+        "riasec_distribution": {name: averages['riasec'].get(code, 0) for code, name in RIASEC_NAMES.items()},
+        "bigfive_distribution": {name: averages['bigfive'].get(code, 0) for code, name in BIGFIVE_NAMES.items()},
+        "label_distribution": labels,
+        "country_counts": [{"country": country, "completed": count} for country, count in countries],
+    }
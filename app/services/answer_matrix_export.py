@@ -0,0 +1,250 @@
+"""
+Answer matrix export
+Writes the wide response x item answer table (one column per Question.item_id)
+plus score columns to Parquet or Arrow IPC for offline analysis.
+
+Responses are read in keyset-paginated batches and each batch is written as
+its own row group / record batch, so memory stays bounded by the batch size.
+Every run is recorded in AnswerExportRun; an incremental run exports only
+responses completed after the previous run's watermark.
+"""
+
+import logging
+import os
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models import StudentResponse, QuestionAnswer, Question, QuestionType, AssessmentScore, AnswerExportRun
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ('parquet', 'arrow')
+FILE_EXTENSIONS = {'parquet': 'parquet', 'arrow': 'arrow'}
+
+# Respondent metadata only -- names and emails are deliberately left out
+RESPONSE_COLUMNS = (
+    ('response_id', StudentResponse.id),
+    ('session_id', StudentResponse.session_id),
+    ('age_group', StudentResponse.age_group),
+    ('country', StudentResponse.country),
+    ('origin_country', StudentResponse.origin_country),
+    ('started_at', StudentResponse.created_at),
+    ('completed_at', StudentResponse.completed_at),
+)
+
+SCORE_COLUMNS = (
+    ('riasec_r_score', AssessmentScore.riasec_r_score),
+    ('riasec_i_score', AssessmentScore.riasec_i_score),
+    ('riasec_a_score', AssessmentScore.riasec_a_score),
+    ('riasec_s_score', AssessmentScore.riasec_s_score),
+    ('riasec_e_score', AssessmentScore.riasec_e_score),
+    ('riasec_c_score', AssessmentScore.riasec_c_score),
+    ('riasec_profile', AssessmentScore.riasec_profile),
+    ('bigfive_openness', AssessmentScore.bigfive_openness),
+    ('bigfive_conscientiousness', AssessmentScore.bigfive_conscientiousness),
+    ('bigfive_extraversion', AssessmentScore.bigfive_extraversion),
+    ('bigfive_agreeableness', AssessmentScore.bigfive_agreeableness),
+    ('bigfive_neuroticism', AssessmentScore.bigfive_neuroticism),
+    ('workrhythm_motivation', AssessmentScore.workrhythm_motivation),
+    ('workrhythm_grit', AssessmentScore.workrhythm_grit),
+    ('workrhythm_self_efficacy', AssessmentScore.workrhythm_self_efficacy),
+    ('workrhythm_resilience', AssessmentScore.workrhythm_resilience),
+    ('workrhythm_learning', AssessmentScore.workrhythm_learning),
+    ('workrhythm_empathy', AssessmentScore.workrhythm_empathy),
+    ('workrhythm_procrastination', AssessmentScore.workrhythm_procrastination),
+)
+
+STRING_COLUMNS = {'session_id', 'age_group', 'country', 'origin_country', 'riasec_profile'}
+TIMESTAMP_COLUMNS = {'started_at', 'completed_at'}
+
+
+class MatrixItem(NamedTuple):
+    """One answer column: slider items are numeric, the rest keep their raw answer text/JSON."""
+    question_id: int
+    item_id: str
+    numeric: bool
+
+
+def load_items(db: Session) -> List[MatrixItem]:
+    """Questions that have an item_id, in item_id order."""
+    rows = db.query(Question.id, Question.item_id, Question.question_type).filter(
+        Question.item_id.isnot(None)
+    ).order_by(Question.item_id).all()
+    return [MatrixItem(qid, item_id, qtype == QuestionType.slider) for qid, item_id, qtype in rows]
+
+
+def column_names(items: List[MatrixItem]) -> List[str]:
+    """Column order of the exported table."""
+    return ([name for name, _ in RESPONSE_COLUMNS]
+            + [item.item_id for item in items]
+            + [name for name, _ in SCORE_COLUMNS])
+
+
+def _answer_cell(item: MatrixItem, answer_value, answer_text, answer_json) -> Any:
+    if item.numeric:
+        return answer_value
+    if answer_json is not None:
+        return answer_json
+    if answer_text is not None:
+        return answer_text
+    return None if answer_value is None else str(answer_value)
+
+
+def iter_matrix_batches(db: Session, items: List[MatrixItem], since: Optional[datetime] = None,
+                        until: Optional[datetime] = None,
+                        batch_size: Optional[int] = None) -> Iterator[Dict[str, List[Any]]]:
+    """
+    Yield column-oriented batches ({column: [values]}) of completed responses,
+    limited to those completed in (since, until].
+    Each batch costs two queries: responses joined to scores, then their answers.
+    """
+    batch_size = batch_size or settings.ANSWER_EXPORT_ROW_GROUP_SIZE
+    names = column_names(items)
+    items_by_question = {item.question_id: item for item in items}
+    selected = [column for _, column in RESPONSE_COLUMNS] + [column for _, column in SCORE_COLUMNS]
+
+    base = db.query(*selected).outerjoin(
+        AssessmentScore, AssessmentScore.response_id == StudentResponse.id
+    ).filter(StudentResponse.completed_at.isnot(None))
+    if since is not None:
+        base = base.filter(StudentResponse.completed_at > since)
+    if until is not None:
+        base = base.filter(StudentResponse.completed_at <= until)
+
+    last_id = 0
+    while True:
+        rows = base.filter(StudentResponse.id > last_id).order_by(StudentResponse.id).limit(batch_size).all()
+        if not rows:
+            return
+        last_id = rows[-1][0]
+
+        response_ids = [row[0] for row in rows]
+        position = {response_id: i for i, response_id in enumerate(response_ids)}
+        columns: Dict[str, List[Any]] = {name: [None] * len(rows) for name in names}
+
+        for i, row in enumerate(rows):
+            for (name, _), value in zip(RESPONSE_COLUMNS + SCORE_COLUMNS, row):
+                columns[name][i] = value
+
+        if items_by_question:
+            answers = db.query(
+                QuestionAnswer.response_id, QuestionAnswer.question_id, QuestionAnswer.answer_value,
+                QuestionAnswer.answer_text, QuestionAnswer.answer_json
+            ).filter(QuestionAnswer.response_id.in_(response_ids))
+            for response_id, question_id, answer_value, answer_text, answer_json in answers:
+                item = items_by_question.get(question_id)
+                if item is not None:
+                    columns[item.item_id][position[response_id]] = _answer_cell(
+                        item, answer_value, answer_text, answer_json)
+
+        yield columns
+
+
+def arrow_schema(items: List[MatrixItem]):
+    """Arrow schema for the exported table."""
+    fields = []
+    for name, _ in RESPONSE_COLUMNS + SCORE_COLUMNS:
+        if name == 'response_id':
+            arrow_type = pa.int64()
+        elif name in STRING_COLUMNS:
+            arrow_type = pa.string()
+        elif name in TIMESTAMP_COLUMNS:
+            arrow_type = pa.timestamp('us')
+        else:
+            arrow_type = pa.float64()
+        fields.append(pa.field(name, arrow_type))
+    item_fields = [pa.field(item.item_id, pa.float64() if item.numeric else pa.string()) for item in items]
+    by_name = {field.name: field for field in fields + item_fields}
+    return pa.schema([by_name[name] for name in column_names(items)])
+
+
+def write_answer_matrix(db: Session, path: str, fmt: str = 'parquet', since: Optional[datetime] = None,
+                        until: Optional[datetime] = None, batch_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Stream the answer matrix to `path` (written atomically).
+    Returns row and item counts.
+    """
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("pyarrow is required for answer matrix exports (pip install pyarrow)")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}', expected one of {', '.join(EXPORT_FORMATS)}")
+
+    items = load_items(db)
+    schema = arrow_schema(items)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+
+    row_count = 0
+    try:
+        if fmt == 'parquet':
+            writer = pq.ParquetWriter(tmp_path, schema)
+        else:
+            # Uncompressed IPC file so analysts can memory-map it directly
+            writer = pa_ipc.new_file(tmp_path, schema)
+        try:
+            for columns in iter_matrix_batches(db, items, since, until, batch_size):
+                batch = pa.RecordBatch.from_pydict(columns, schema=schema)
+                writer.write_batch(batch)  # One Parquet row group / IPC record batch per fetch
+                row_count += batch.num_rows
+        finally:
+            writer.close()
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return {'rows': row_count, 'items': len(items)}
+
+
+def last_export_run(db: Session) -> Optional[AnswerExportRun]:
+    """Most recent export, whose `until` is the watermark for the next incremental run."""
+    return db.query(AnswerExportRun).order_by(AnswerExportRun.until.desc(), AnswerExportRun.id.desc()).first()
+
+
+def run_export(db: Session, fmt: str = 'parquet', incremental: bool = True,
+               output_dir: Optional[str] = None, batch_size: Optional[int] = None) -> AnswerExportRun:
+    """
+    Export responses completed since the last run (or all of them when
+    `incremental` is False or there is no previous run) and record the run.
+    """
+    output_dir = output_dir or settings.ANSWER_EXPORT_DIR
+    previous = last_export_run(db) if incremental else None
+    since = previous.until if previous else None
+    until = datetime.utcnow()
+
+    suffix = f"since_{since:%Y%m%dT%H%M%S}" if since else "full"
+    filename = f"answer_matrix_{until:%Y%m%dT%H%M%S}_{suffix}.{FILE_EXTENSIONS.get(fmt, fmt)}"
+    path = os.path.join(output_dir, filename)
+
+    counts = write_answer_matrix(db, path, fmt=fmt, since=since, until=until, batch_size=batch_size)
+
+    run = AnswerExportRun(
+        format=fmt,
+        path=path,
+        incremental=since is not None,
+        since=since,
+        until=until,
+        row_count=counts['rows'],
+        item_count=counts['items'],
+        size_bytes=os.path.getsize(path),
+    )
+    db.add(run)
+    db.commit()
+    db.refresh(run)
+    logger.info(f"Answer matrix export wrote {run.row_count} responses x {run.item_count} items to {path}")
+    return run
@@ -1,11 +1,48 @@
 import csv
 import io
+import itertools
 import json
-from typing import List, Dict, Any, Optional
+import logging
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterable, Iterator, BinaryIO, Callable
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from ..models import Category, ImportLog
+from ..config import settings
+from ..models import Category, ImportLog, ImportStatus, QuestionPool
 from ..services.question_pool_service import QuestionPoolService
-from ..schemas.question_pool import QuestionPoolCreate, CSVImportResult
+from ..services import stats_cache
+from ..schemas.question_pool import QuestionPoolCreate, QuestionPoolFilter, CSVImportResult
+from ..utils.helpers import csv_chunks
+
+logger = logging.getLogger(__name__)
+
+MAX_EXPORT_OPTIONS = 6
+
+# Columns each export selects beyond title, text, category and is_required
+EXPORT_COLUMNS = {
+    "essay": (QuestionPool.essay_char_limit,),
+    "slider": (QuestionPool.slider_min_label, QuestionPool.slider_max_label),
+    "mcq": (QuestionPool.allow_multiple_selection, QuestionPool.mcq_options, QuestionPool.mcq_correct_answer),
+    "ordering": (QuestionPool.randomize_order, QuestionPool.ordering_options),
+}
+
+_BASE_FIELDNAMES = ['title', 'question_text', 'category_name', 'is_required']
+
+EXPORT_FIELDNAMES = {
+    "essay": _BASE_FIELDNAMES + ['essay_char_limit'],
+    "slider": _BASE_FIELDNAMES + ['slider_min_label', 'slider_max_label'],
+    "mcq": (_BASE_FIELDNAMES + ['allow_multiple_selection']
+            + [f'option_{i}' for i in range(1, MAX_EXPORT_OPTIONS + 1)] + ['correct_answers']),
+    "ordering": (_BASE_FIELDNAMES + ['randomize_order']
+                 + [f'item_{i}' for i in range(1, MAX_EXPORT_OPTIONS + 1)]),
+}
+
+
+def _load_list(value: Optional[str]) -> List[Any]:
+    try:
+        return json.loads(value) if value else []
+    except (json.JSONDecodeError, TypeError):
+        return []
 
 class CSVImportExportService:
     
@@ -18,67 +55,139 @@ class CSVImportExportService:
         imported_by: str
     ) -> CSVImportResult:
         """Validate and import questions from CSV content."""
+        return CSVImportExportService.import_csv_stream(
+            db, io.StringIO(csv_content), question_type, filename, imported_by
+        )
+    
+    @staticmethod
+    def import_csv_file(
+        db: Session,
+        csv_file: BinaryIO,
+        question_type: str,
+        filename: str,
+        imported_by: str,
+        chunk_size: Optional[int] = None,
+        import_log: Optional[ImportLog] = None
+    ) -> CSVImportResult:
+        """Import questions from a binary file object (e.g. UploadFile.file) without reading it into memory."""
+        text = io.TextIOWrapper(csv_file, encoding='utf-8-sig', newline='')
+        try:
+            return CSVImportExportService.import_csv_stream(
+                db, text, question_type, filename, imported_by, chunk_size, import_log
+            )
+        finally:
+            # Leave the underlying file open for its owner
+            text.detach()
+    
+    @staticmethod
+    def import_csv_stream(
+        db: Session,
+        lines: Iterable[str],
+        question_type: str,
+        filename: str,
+        imported_by: str,
+        chunk_size: Optional[int] = None,
+        import_log: Optional[ImportLog] = None
+    ) -> CSVImportResult:
+        """
+        Validate and import questions from CSV text, one chunk of rows at a time.
         
-        errors = []
+        Rows are parsed lazily and validated in chunks of `chunk_size`; the valid
+        rows of each chunk are written with a single executemany INSERT and the
+        chunk is committed together with the import log counters. Invalid rows
+        are recorded as per-row errors and skipped. If a chunk's INSERT fails,
+        its rows are retried one by one so only the offending rows are rejected.
+        
+        Pass an existing `import_log` (a background job) to report progress into
+        it; setting its `cancel_requested` flag stops the import after the
+        current chunk, keeping the chunks already committed.
+        """
+        chunk_size = chunk_size or settings.CSV_IMPORT_CHUNK_SIZE
+        processors: Dict[str, Callable[[Dict[str, str], Dict[str, int]], Dict[str, Any]]] = {
+            "essay": CSVImportExportService._process_essay_row,
+            "slider": CSVImportExportService._process_slider_row,
+            "mcq": CSVImportExportService._process_mcq_row,
+            "ordering": CSVImportExportService._process_ordering_row,
+        }
+        process_row = processors.get(question_type)
+        
+        errors: List[Dict[str, Any]] = []
+        total_rows = 0
         successful_imports = 0
         failed_imports = 0
         
+        def record_error(row_num: int, error: Any, row: Dict[str, str]) -> None:
+            nonlocal failed_imports
+            failed_imports += 1
+            if len(errors) < settings.CSV_IMPORT_MAX_ERRORS:
+                errors.append({"row": row_num, "error": str(error), "data": dict(row)})
+        
+        def flush_chunk(chunk: List[tuple]) -> None:
+            nonlocal successful_imports
+            if chunk:
+                try:
+                    db.execute(insert(QuestionPool), [values for _, values, _ in chunk])
+                    successful_imports += len(chunk)
+                except Exception:
+                    db.rollback()
+                    for row_num, values, row in chunk:
+                        try:
+                            with db.begin_nested():
+                                db.execute(insert(QuestionPool), [values])
+                            successful_imports += 1
+                        except Exception as e:
+                            record_error(row_num, e, row)
+            import_log.total_rows = total_rows
+            import_log.processed_rows = total_rows
+            import_log.successful_imports = successful_imports
+            import_log.failed_imports = failed_imports
+            import_log.errors = json.dumps(errors) if errors else None
+            db.commit()
+        
         try:
-            # Parse CSV
-            csv_reader = csv.DictReader(io.StringIO(csv_content))
-            rows = list(csv_reader)
-            total_rows = len(rows)
+            if process_row is None:
+                raise ValueError(f"Unsupported question type: {question_type}")
             
-            # Create import log
-            import_log = ImportLog(
-                filename=filename,
-                import_type=question_type,
-                total_rows=total_rows,
-                imported_by=imported_by
-            )
-            db.add(import_log)
-            db.flush()  # Get the ID
+            # Create the import log up front so each chunk commits against it
+            if import_log is None:
+                import_log = ImportLog(
+                    filename=filename,
+                    import_type=question_type,
+                    total_rows=0,
+                    imported_by=imported_by
+                )
+                db.add(import_log)
+            import_log.status = ImportStatus.running
+            import_log.started_at = datetime.utcnow()
+            db.commit()
             
             # Get categories for name lookup
             categories = {cat.name: cat.id for cat in QuestionPoolService.get_categories(db, active_only=False)}
             
-            for row_num, row in enumerate(rows, start=2):  # Start at 2 since row 1 is header
+            chunk: List[tuple] = []
+            for row_num, row in enumerate(csv.DictReader(lines), start=2):  # Start at 2 since row 1 is header
+                total_rows += 1
                 try:
-                    # Validate and process based on question type
-                    if question_type == "essay":
-                        question_data = CSVImportExportService._process_essay_row(row, categories)
-                    elif question_type == "slider":
-                        question_data = CSVImportExportService._process_slider_row(row, categories)
-                    elif question_type == "mcq":
-                        question_data = CSVImportExportService._process_mcq_row(row, categories)
-                    elif question_type == "ordering":
-                        question_data = CSVImportExportService._process_ordering_row(row, categories)
-                    else:
-                        raise ValueError(f"Unsupported question type: {question_type}")
-                    
-                    # Add metadata
+                    question_data = process_row(row, categories)
                     question_data['created_by'] = imported_by
-                    
-                    # Create question
-                    question_create = QuestionPoolCreate(**question_data)
-                    QuestionPoolService.create_question_pool(db, question_create)
-                    successful_imports += 1
-                    
+                    values = QuestionPoolService.question_pool_values(QuestionPoolCreate(**question_data))
+                    chunk.append((row_num, values, row))
                 except Exception as e:
-                    failed_imports += 1
-                    errors.append({
-                        "row": row_num,
-                        "error": str(e),
-                        "data": dict(row)
-                    })
-            
-            # Update import log
-            import_log.successful_imports = successful_imports
-            import_log.failed_imports = failed_imports
-            import_log.errors = json.dumps(errors) if errors else None
+                    record_error(row_num, e, row)
+                
+                if total_rows % chunk_size == 0:
+                    flush_chunk(chunk)
+                    chunk = []
+                    # The commit expired the log, so this reads the flag fresh
+                    if import_log.cancel_requested:
+                        break
+            else:
+                flush_chunk(chunk)
             
+            import_log.status = ImportStatus.cancelled if import_log.cancel_requested else ImportStatus.completed
+            import_log.finished_at = datetime.utcnow()
             db.commit()
-            
+            logger.info(f"Imported {successful_imports}/{total_rows} {question_type} questions from {filename}")
             return CSVImportResult(
                 total_rows=total_rows,
                 successful_imports=successful_imports,
@@ -89,7 +198,16 @@ class CSVImportExportService:
             
         except Exception as e:
             db.rollback()
+            if import_log is not None and import_log.id is not None:
+                # Earlier chunks are already committed; keep the log in step with them
+                import_log.errors = json.dumps(errors + [{"row": None, "error": str(e)}])
+                import_log.status = ImportStatus.failed
+                import_log.finished_at = datetime.utcnow()
+                db.commit()
             raise ValueError(f"Failed to process CSV: {str(e)}")
+        finally:
+            if successful_imports:
+                stats_cache.invalidate_content()
     
     @staticmethod
     def _process_essay_row(row: Dict[str, str], categories: Dict[str, int]) -> Dict[str, Any]:
@@ -275,102 +393,95 @@ class CSVImportExportService:
         }
     
     @staticmethod
-    def export_questions_to_csv(db: Session, question_ids: List[int], question_type: str) -> str:
-        """Export questions to CSV format."""
-        from ..services.question_pool_service import QuestionPoolService
+    def iter_export_rows(
+        db: Session,
+        question_type: str,
+        question_ids: Optional[List[int]] = None,
+        filters: Optional[QuestionPoolFilter] = None,
+        batch_size: Optional[int] = None
+    ) -> Iterator[Any]:
+        """
+        Yield the exported columns of `question_type` questions, either the
+        given ids (fetched `batch_size` ids per IN query, in the order given)
+        or every question matching `filters` (newest first, streamed in
+        `batch_size` batches).
+        """
+        if question_type not in EXPORT_COLUMNS:
+            raise ValueError(f"Unsupported question type: {question_type}")
+        batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+        query = db.query(
+            QuestionPool.id,
+            QuestionPool.title,
+            QuestionPool.question_text,
+            Category.name.label('category_name'),
+            QuestionPool.is_required,
+            *EXPORT_COLUMNS[question_type]
+        ).outerjoin(Category, QuestionPool.category_id == Category.id).filter(
+            QuestionPool.question_type == question_type
+        )
         
-        questions = []
-        for qid in question_ids:
-            question = QuestionPoolService.get_question_pool_by_id(db, qid)
-            if question and question.question_type == question_type:
-                questions.append(question)
-        
-        if not questions:
-            raise ValueError(f"No {question_type} questions found with the given IDs")
+        if question_ids is not None:
+            ids = list(dict.fromkeys(question_ids))
+            for start in range(0, len(ids), batch_size):
+                chunk = ids[start:start + batch_size]
+                rows = {row.id: row for row in query.filter(QuestionPool.id.in_(chunk))}
+                for qid in chunk:
+                    if qid in rows:
+                        yield rows[qid]
+            return
         
-        # Generate CSV based on question type
-        output = io.StringIO()
+        query, _ = QuestionPoolService.apply_pool_filters(db, query, filters or QuestionPoolFilter())
+        yield from query.order_by(QuestionPool.updated_at.desc(), QuestionPool.id.desc()).execution_options(
+            yield_per=batch_size
+        )
+    
+    @staticmethod
+    def export_row(question_type: str, row) -> Dict[str, Any]:
+        """Convert an export row into a CSV record in the import template's layout."""
+        record = {
+            'title': row.title,
+            'question_text': row.question_text,
+            'category_name': row.category_name or '',
+            'is_required': 'TRUE' if row.is_required else 'FALSE',
+        }
         
         if question_type == "essay":
-            writer = csv.DictWriter(output, fieldnames=['title', 'question_text', 'category_name', 'is_required', 'essay_char_limit'])
-            writer.writeheader()
-            
-            for q in questions:
-                writer.writerow({
-                    'title': q.title,
-                    'question_text': q.question_text,
-                    'category_name': q.category.name if q.category else '',
-                    'is_required': 'TRUE' if q.is_required else 'FALSE',
-                    'essay_char_limit': q.essay_char_limit or ''
-                })
+            record['essay_char_limit'] = row.essay_char_limit or ''
         
         elif question_type == "slider":
-            writer = csv.DictWriter(output, fieldnames=['title', 'question_text', 'category_name', 'is_required', 'slider_min_label', 'slider_max_label'])
-            writer.writeheader()
-            
-            for q in questions:
-                writer.writerow({
-                    'title': q.title,
-                    'question_text': q.question_text,
-                    'category_name': q.category.name if q.category else '',
-                    'is_required': 'TRUE' if q.is_required else 'FALSE',
-                    'slider_min_label': q.slider_min_label or '',
-                    'slider_max_label': q.slider_max_label or ''
-                })
+            record['slider_min_label'] = row.slider_min_label or ''
+            record['slider_max_label'] = row.slider_max_label or ''
         
         elif question_type == "mcq":
-            fieldnames = ['title', 'question_text', 'category_name', 'is_required', 'allow_multiple_selection']
-            fieldnames.extend([f'option_{i}' for i in range(1, 7)])
-            fieldnames.append('correct_answers')
-            
-            writer = csv.DictWriter(output, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            for q in questions:
-                serialized = QuestionPoolService.serialize_question_for_response(q)
-                options = serialized.get('mcq_options', [])
-                correct = serialized.get('mcq_correct_answer', [])
-                
-                row_data = {
-                    'title': q.title,
-                    'question_text': q.question_text,
-                    'category_name': q.category.name if q.category else '',
-                    'is_required': 'TRUE' if q.is_required else 'FALSE',
-                    'allow_multiple_selection': 'TRUE' if q.allow_multiple_selection else 'FALSE',
-                    'correct_answers': ','.join([str(i + 1) for i in correct]) if correct else ''
-                }
-                
-                # Add options
-                for i, option in enumerate(options):
-                    if i < 6:
-                        row_data[f'option_{i + 1}'] = option
-                
-                writer.writerow(row_data)
+            options = _load_list(row.mcq_options)
+            correct = _load_list(row.mcq_correct_answer)
+            record['allow_multiple_selection'] = 'TRUE' if row.allow_multiple_selection else 'FALSE'
+            record['correct_answers'] = ','.join([str(i + 1) for i in correct]) if correct else ''
+            for i, option in enumerate(options[:MAX_EXPORT_OPTIONS]):
+                record[f'option_{i + 1}'] = option
         
         elif question_type == "ordering":
-            fieldnames = ['title', 'question_text', 'category_name', 'is_required', 'randomize_order']
-            fieldnames.extend([f'item_{i}' for i in range(1, 7)])
-            
-            writer = csv.DictWriter(output, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            for q in questions:
-                serialized = QuestionPoolService.serialize_question_for_response(q)
-                items = serialized.get('ordering_options', [])
-                
-                row_data = {
-                    'title': q.title,
-                    'question_text': q.question_text,
-                    'category_name': q.category.name if q.category else '',
-                    'is_required': 'TRUE' if q.is_required else 'FALSE',
-                    'randomize_order': 'TRUE' if q.randomize_order else 'FALSE'
-                }
-                
-                # Add items
-                for i, item in enumerate(items):
-                    if i < 6:
-                        row_data[f'item_{i + 1}'] = item
-                
-                writer.writerow(row_data)
+            record['randomize_order'] = 'TRUE' if row.randomize_order else 'FALSE'
+            for i, item in enumerate(_load_list(row.ordering_options)[:MAX_EXPORT_OPTIONS]):
+                record[f'item_{i + 1}'] = item
         
-        return output.getvalue()
\ No newline at end of file
+        return record
+    
+    @staticmethod
+    def iter_questions_csv(rows: Iterable[Any], question_type: str,
+                           chunk_rows: Optional[int] = None) -> Iterator[bytes]:
+        """Write export rows through a DictWriter, yielding UTF-8 chunks of `chunk_rows` rows."""
+        fieldnames = EXPORT_FIELDNAMES[question_type]
+        cells = ([record.get(name, '') for name in fieldnames]
+                 for record in (CSVImportExportService.export_row(question_type, row) for row in rows))
+        return csv_chunks(cells, fieldnames, chunk_rows or settings.EXPORT_CSV_CHUNK_ROWS)
+    
+    @staticmethod
+    def export_questions_to_csv(db: Session, question_ids: List[int], question_type: str) -> str:
+        """Export questions to CSV format."""
+        rows = CSVImportExportService.iter_export_rows(db, question_type, question_ids=question_ids)
+        first = next(rows, None)
+        if first is None:
+            raise ValueError(f"No {question_type} questions found with the given IDs")
+        chunks = CSVImportExportService.iter_questions_csv(itertools.chain([first], rows), question_type)
+        return b''.join(chunks).decode('utf-8')
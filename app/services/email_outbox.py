@@ -0,0 +1,559 @@
+"""
+CaRhythm Email Outbox
+Request handlers enqueue emails into the `email_outbox` table and return
+immediately; a background dispatcher delivers them with exponential backoff,
+a circuit breaker around the SMTP host and a dead-letter state
+"""
+
+import asyncio
+import json
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+import aiosmtplib
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from ..config import settings
+from ..models.database import SessionLocal
+from ..models.email_outbox import EmailOutbox, OutboxStatus, EmailKind
+from .email_service import build_results_message, build_admin_notification_message
+from .smtp_pool import smtp_pool, CONNECTION_ERRORS
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Failures that say the SMTP host (not this particular message) is unhealthy
+HOST_ERRORS = CONNECTION_ERRORS + (aiosmtplib.SMTPAuthenticationError,)
+
+# Failures that will not succeed on retry - dead-letter straight away
+PERMANENT_ERRORS = (aiosmtplib.SMTPRecipientsRefused,)
+
+
+# ============================================================================
+# Enqueue (called from request handlers)
+# ============================================================================
+
+def enqueue_results_email(
+    db: Session,
+    to_email: str,
+    student_name: str,
+    holland_code: str,
+    top_strength: str,
+    pdf_bytes: Optional[bytes] = None,
+    pdf_filename: str = "CaRhythm_Career_DNA_Report.pdf",
+    response_id: Optional[int] = None,
+    session_id: Optional[str] = None,
+    download_url: Optional[str] = None
+) -> EmailOutbox:
+    """
+    Queue a results email for background delivery. Pass either the PDF bytes
+    to attach or a download_url to link to (link delivery mode).
+    """
+    message = EmailOutbox(
+        kind=EmailKind.results,
+        to_email=to_email,
+        payload=json.dumps({
+            "student_name": student_name,
+            "holland_code": holland_code,
+            "top_strength": top_strength,
+            "download_url": download_url,
+        }),
+        attachment=pdf_bytes,
+        attachment_filename=pdf_filename,
+        response_id=response_id,
+        session_id=session_id,
+        max_attempts=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+        next_attempt_at=datetime.utcnow(),
+    )
+    db.add(message)
+    db.commit()
+    db.refresh(message)
+    logger.info(f"Queued results email #{message.id} for {to_email}")
+    email_dispatcher.wake()
+    return message
+
+
+def enqueue_admin_notification(
+    db: Session,
+    student_name: str,
+    student_email: str,
+    session_id: str,
+    error_message: str,
+    response_id: Optional[int] = None
+) -> Optional[EmailOutbox]:
+    """Queue an error notification for the admin. Returns None if no admin email is set."""
+    if not settings.ADMIN_EMAIL:
+        logger.warning("Admin email not configured, skipping admin notification")
+        return None
+
+    message = EmailOutbox(
+        kind=EmailKind.admin_notification,
+        to_email=settings.ADMIN_EMAIL,
+        payload=json.dumps({
+            "student_name": student_name,
+            "student_email": student_email,
+            "session_id": session_id,
+            "error_message": error_message,
+            "response_id": response_id,
+        }),
+        response_id=response_id,
+        session_id=session_id,
+        max_attempts=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+        next_attempt_at=datetime.utcnow(),
+    )
+    db.add(message)
+    db.commit()
+    db.refresh(message)
+    email_dispatcher.wake()
+    return message
+
+
+def build_message(kind: EmailKind, to_email: str, payload: Dict[str, Any],
+                  attachment: Optional[bytes], attachment_filename: Optional[str]):
+    """Rebuild the MIME message for a queued email."""
+    if kind == EmailKind.results:
+        return build_results_message(
+            to_email,
+            payload["student_name"],
+            payload["holland_code"],
+            payload["top_strength"],
+            attachment,
+            attachment_filename or "CaRhythm_Career_DNA_Report.pdf",
+            download_url=payload.get("download_url"),
+        )
+    return build_admin_notification_message(
+        payload["student_name"],
+        payload["student_email"],
+        payload["session_id"],
+        payload["error_message"],
+        payload.get("response_id"),
+    )
+
+
+def backoff_delay(attempts: int) -> float:
+    """Seconds to wait before the next attempt: exponential with +/-20% jitter."""
+    base = settings.EMAIL_OUTBOX_BACKOFF_BASE * (2 ** max(0, attempts - 1))
+    delay = min(base, settings.EMAIL_OUTBOX_BACKOFF_MAX)
+    return delay * random.uniform(0.8, 1.2)
+
+
+# ============================================================================
+# Circuit breaker
+# ============================================================================
+
+class CircuitBreaker:
+    """
+    Stops the dispatcher hammering an SMTP host that is down.
+
+    closed    - deliveries flow normally
+    open      - after `failure_threshold` consecutive host failures; nothing
+                is attempted until `reset_timeout` seconds have passed
+    half_open - one probe delivery is allowed; success closes the circuit,
+                failure opens it again
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.times_opened = 0
+
+    def allow(self) -> bool:
+        """Whether a delivery may be attempted now."""
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            logger.info("SMTP circuit half-open, sending a probe message")
+        return True
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info("SMTP circuit closed, deliveries resumed")
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+                logger.error(
+                    f"SMTP circuit opened after {self.consecutive_failures} consecutive failures, "
+                    f"pausing deliveries for {self.reset_timeout}s"
+                )
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        retry_in = None
+        if self.state == self.OPEN:
+            retry_in = max(0.0, round(self.reset_timeout - (time.monotonic() - self.opened_at), 1))
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "retry_in_seconds": retry_in,
+        }
+
+
+# ============================================================================
+# Dispatcher
+# ============================================================================
+
+class EmailDispatcher:
+    """
+    Background task that drains the outbox.
+
+    Rows are claimed with a conditional UPDATE (pending -> sending) so several
+    workers can run a dispatcher against the same database without sending a
+    message twice. Rows left in `sending` by a crashed worker are returned to
+    `pending` after `claim_timeout` seconds. A batch can take longer than
+    that, so each claim is renewed just before its message is sent; the claim
+    must outlast one send, which may be retried once on a new connection.
+    """
+
+    def __init__(self, poll_interval: float, batch_size: int, claim_timeout: float,
+                 breaker: CircuitBreaker, session_factory: Callable[[], Session] = SessionLocal,
+                 sender: Optional[Callable] = None, send_timeout: float = 30):
+        if claim_timeout <= 2 * send_timeout:
+            raise ValueError(
+                f"Outbox claim timeout ({claim_timeout}s) must exceed twice the send timeout "
+                f"({send_timeout}s), or messages still being sent are re-queued and sent twice"
+            )
+        self.poll_interval = poll_interval
+        self.batch_size = max(1, batch_size)
+        self.claim_timeout = claim_timeout
+        self.send_timeout = send_timeout
+        self.breaker = breaker
+        self.session_factory = session_factory
+        self.sender = sender or smtp_pool.send_message
+
+        self._task: Optional[asyncio.Task] = None
+        self._wake_event: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping = False
+
+        self._sent_total = 0
+        self._failed_attempts_total = 0
+        self._dead_total = 0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start the dispatcher loop on the running event loop."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake_event = asyncio.Event()
+        self._stopping = False
+        self._task = self._loop.create_task(self._run())
+        logger.info("Email outbox dispatcher started")
+
+    async def stop(self):
+        """Stop the loop. A message cancelled mid-send is re-queued by the stale-claim sweep."""
+        if not self.running:
+            return
+        # asyncio.wait_for can swallow a cancel that arrives as the wake event fires,
+        # so the loop also checks this flag rather than rely on the cancel alone
+        self._stopping = True
+        self._wake_event.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("Email outbox dispatcher stopped")
+
+    def wake(self):
+        """Ask the dispatcher to poll now instead of waiting for the next interval."""
+        if self._loop is None or self._wake_event is None or self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._wake_event.set)
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await self.dispatch_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Email outbox dispatch cycle failed")
+
+            try:
+                await asyncio.wait_for(self._wake_event.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake_event.clear()
+
+    # ------------------------------------------------------------------
+    # Dispatch
+    # ------------------------------------------------------------------
+
+    async def dispatch_once(self) -> int:
+        """Deliver one batch of due messages. Returns how many were sent."""
+        if not self.breaker.allow():
+            return 0
+
+        # While half-open only a single probe message goes out
+        limit = 1 if self.breaker.state == CircuitBreaker.HALF_OPEN else self.batch_size
+        claimed = await run_in_threadpool(self._claim_due, limit)
+
+        sent = 0
+        for index, item in enumerate(claimed):
+            if not self.breaker.allow():
+                # Circuit opened mid-batch - hand the rest back untouched
+                await run_in_threadpool(self._unclaim, [i["id"] for i in claimed[index:]])
+                break
+            if await self._deliver(item):
+                sent += 1
+        return sent
+
+    async def _deliver(self, item: Dict[str, Any]) -> bool:
+        try:
+            message = build_message(item["kind"], item["to_email"], item["payload"],
+                                    item["attachment"], item["attachment_filename"])
+        except Exception as e:
+            logger.error(f"Could not build outbox message #{item['id']}: {e}")
+            await run_in_threadpool(self._record_failure, item, e, True)
+            return False
+
+        # Renew the claim so the stale-claim sweep can't hand it to another worker mid-batch
+        if not await run_in_threadpool(self._renew_claim, item["id"]):
+            logger.warning(f"Outbox message #{item['id']} is no longer claimed by this dispatcher, skipping it")
+            return False
+
+        try:
+            await self.sender(message, timeout=self.send_timeout)
+        except Exception as e:
+            if isinstance(e, HOST_ERRORS):
+                self.breaker.record_failure()
+            logger.warning(f"Outbox message #{item['id']} attempt {item['attempts'] + 1} failed: {e}")
+            await run_in_threadpool(self._record_failure, item, e, isinstance(e, PERMANENT_ERRORS))
+            return False
+
+        self.breaker.record_success()
+        await run_in_threadpool(self._record_sent, item["id"])
+        logger.info(f"✅ Outbox message #{item['id']} ({item['kind'].value}) sent to {item['to_email']}")
+        return True
+
+    # ------------------------------------------------------------------
+    # Database steps (run in the threadpool)
+    # ------------------------------------------------------------------
+
+    def _claim_due(self, limit: int) -> List[Dict[str, Any]]:
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+
+            # Recover rows claimed by a dispatcher that died mid-send
+            stale = db.query(EmailOutbox).filter(
+                EmailOutbox.status == OutboxStatus.sending,
+                EmailOutbox.updated_at < now - timedelta(seconds=self.claim_timeout)
+            ).update({EmailOutbox.status: OutboxStatus.pending, EmailOutbox.updated_at: now},
+                     synchronize_session=False)
+            if stale:
+                logger.warning(f"Returned {stale} stale outbox claim(s) to pending")
+
+            due_ids = [row.id for row in db.query(EmailOutbox.id).filter(
+                EmailOutbox.status == OutboxStatus.pending,
+                EmailOutbox.next_attempt_at <= now
+            ).order_by(EmailOutbox.next_attempt_at, EmailOutbox.id).limit(limit)]
+
+            claimed_ids = []
+            for message_id in due_ids:
+                updated = db.query(EmailOutbox).filter(
+                    EmailOutbox.id == message_id,
+                    EmailOutbox.status == OutboxStatus.pending
+                ).update({EmailOutbox.status: OutboxStatus.sending, EmailOutbox.updated_at: now},
+                         synchronize_session=False)
+                if updated:
+                    claimed_ids.append(message_id)
+            db.commit()
+
+            if not claimed_ids:
+                return []
+            rows = db.query(EmailOutbox).filter(EmailOutbox.id.in_(claimed_ids)).order_by(
+                EmailOutbox.next_attempt_at, EmailOutbox.id
+            ).all()
+            return [{
+                "id": row.id,
+                "kind": row.kind,
+                "to_email": row.to_email,
+                "payload": json.loads(row.payload),
+                "attachment": row.attachment,
+                "attachment_filename": row.attachment_filename,
+                "attempts": row.attempts,
+                "max_attempts": row.max_attempts,
+                "response_id": row.response_id,
+                "session_id": row.session_id,
+            } for row in rows]
+        finally:
+            db.close()
+
+    def _renew_claim(self, message_id: int) -> bool:
+        db = self.session_factory()
+        try:
+            renewed = db.query(EmailOutbox).filter(
+                EmailOutbox.id == message_id,
+                EmailOutbox.status == OutboxStatus.sending
+            ).update({EmailOutbox.updated_at: datetime.utcnow()}, synchronize_session=False)
+            db.commit()
+            return bool(renewed)
+        finally:
+            db.close()
+
+    def _unclaim(self, message_ids: List[int]):
+        db = self.session_factory()
+        try:
+            db.query(EmailOutbox).filter(
+                EmailOutbox.id.in_(message_ids),
+                EmailOutbox.status == OutboxStatus.sending
+            ).update({EmailOutbox.status: OutboxStatus.pending, EmailOutbox.updated_at: datetime.utcnow()},
+                     synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def _record_sent(self, message_id: int):
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            db.query(EmailOutbox).filter(EmailOutbox.id == message_id).update({
+                EmailOutbox.status: OutboxStatus.sent,
+                EmailOutbox.attempts: EmailOutbox.attempts + 1,
+                EmailOutbox.sent_at: now,
+                EmailOutbox.updated_at: now,
+                EmailOutbox.last_error: None,
+                # The PDF is no longer needed once delivered
+                EmailOutbox.attachment: None,
+            }, synchronize_session=False)
+            db.commit()
+            self._sent_total += 1
+            metrics.record_email_delivery("sent")
+        finally:
+            db.close()
+
+    def _record_failure(self, item: Dict[str, Any], error: Exception, permanent: bool):
+        db = self.session_factory()
+        try:
+            message = db.query(EmailOutbox).filter(EmailOutbox.id == item["id"]).first()
+            if not message:
+                return
+            now = datetime.utcnow()
+            message.attempts += 1
+            message.last_error = f"{type(error).__name__}: {error}"[:2000]
+            message.updated_at = now
+            self._failed_attempts_total += 1
+
+            if permanent or message.attempts >= message.max_attempts:
+                message.status = OutboxStatus.dead
+                self._dead_total += 1
+                metrics.record_email_delivery("dead")
+                logger.error(
+                    f"Outbox message #{message.id} to {message.to_email} dead-lettered "
+                    f"after {message.attempts} attempt(s): {message.last_error}"
+                )
+                if message.kind == EmailKind.results:
+                    payload = item["payload"]
+                    db.commit()
+                    enqueue_admin_notification(
+                        db,
+                        student_name=payload.get("student_name", "Unknown"),
+                        student_email=message.to_email,
+                        session_id=message.session_id or "Unknown",
+                        error_message=f"Results email undeliverable after {message.attempts} attempt(s): "
+                                      f"{message.last_error}",
+                        response_id=message.response_id,
+                    )
+            else:
+                message.status = OutboxStatus.pending
+                message.next_attempt_at = now + timedelta(seconds=backoff_delay(message.attempts))
+                metrics.record_email_delivery("failed")
+            db.commit()
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "sent_total": self._sent_total,
+            "failed_attempts_total": self._failed_attempts_total,
+            "dead_total": self._dead_total,
+            "circuit": self.breaker.stats(),
+        }
+
+
+# ============================================================================
+# Admin helpers
+# ============================================================================
+
+def get_outbox_counts(db: Session) -> Dict[str, int]:
+    """Number of outbox messages in each status."""
+    counts = {status.value: 0 for status in OutboxStatus}
+    for status, count in db.query(EmailOutbox.status, func.count(EmailOutbox.id)).group_by(EmailOutbox.status):
+        counts[status.value] = count
+    return counts
+
+
+def list_outbox_messages(db: Session, status: Optional[OutboxStatus] = None, limit: int = 100) -> List[EmailOutbox]:
+    """Most recent outbox messages, optionally filtered by status."""
+    query = db.query(EmailOutbox)
+    if status is not None:
+        query = query.filter(EmailOutbox.status == status)
+    return query.order_by(EmailOutbox.created_at.desc(), EmailOutbox.id.desc()).limit(limit).all()
+
+
+def retry_outbox_message(db: Session, message_id: int) -> Optional[EmailOutbox]:
+    """Move a dead or pending message to the front of the queue with a fresh attempt budget."""
+    message = db.query(EmailOutbox).filter(EmailOutbox.id == message_id).first()
+    if not message or message.status not in (OutboxStatus.dead, OutboxStatus.pending):
+        return None
+    if message.status == OutboxStatus.dead:
+        message.attempts = 0
+    message.status = OutboxStatus.pending
+    message.next_attempt_at = datetime.utcnow()
+    db.commit()
+    email_dispatcher.wake()
+    return message
+
+
+def delete_outbox_message(db: Session, message_id: int) -> bool:
+    """Discard a message that is not currently being sent."""
+    message = db.query(EmailOutbox).filter(EmailOutbox.id == message_id).first()
+    if not message or message.status == OutboxStatus.sending:
+        return False
+    db.delete(message)
+    db.commit()
+    return True
+
+
+# Global dispatcher started with the application
+email_dispatcher = EmailDispatcher(
+    poll_interval=settings.EMAIL_OUTBOX_POLL_INTERVAL,
+    batch_size=settings.EMAIL_OUTBOX_BATCH_SIZE,
+    claim_timeout=settings.EMAIL_OUTBOX_CLAIM_TIMEOUT,
+    send_timeout=settings.SMTP_SEND_TIMEOUT,
+    breaker=CircuitBreaker(
+        failure_threshold=settings.EMAIL_CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout=settings.EMAIL_CIRCUIT_RESET_TIMEOUT,
+    ),
+)
@@ -4,20 +4,23 @@ Handles sending emails with PDF attachments via Gmail SMTP
 """
 
 import smtplib
-import aiosmtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
-from email.mime.image import MIMEImage
+from email.mime.nonmultipart import MIMENonMultipart
 from email.utils import formataddr
 from typing import Optional, Dict, Any
 import logging
 from datetime import datetime
 from io import BytesIO
 import os
-import base64
+from base64 import encodebytes
+from functools import lru_cache
+from html import escape
+from string import Template
 
 from ..config import settings, validate_email_config
+from .smtp_pool import smtp_pool
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -27,25 +30,15 @@ LOGO_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file_
                          'frontend', 'public', 'CaRhythm updated logo.png')
 
 
-def create_results_email_html(student_name: str, holland_code: str, top_strength: str, logo_cid: str = None) -> str:
-    """
-    Create HTML email template for results delivery
-    """
-    # Logo section - use embedded image if available, otherwise show text logo
-    if logo_cid:
-        logo_html = f'<img src="cid:{logo_cid}" alt="CaRhythm Logo" style="width: 120px; height: 120px; margin: 0 auto; display: block;"/>'
-    else:
-        # Fallback to text-based logo if image embedding fails
-        logo_html = '<div class="logo-text-fallback" style="font-size: 48px; font-weight: bold; color: white; text-shadow: 2px 2px 4px rgba(0,0,0,0.2);">CaRhythm</div>'
-    
-    html = f"""
+# Results email body. Compiled once; only the per-student fields are substituted per message.
+RESULTS_EMAIL_TEMPLATE = Template("""
     <!DOCTYPE html>
     <html>
     <head>
         <meta charset="UTF-8">
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
         <style>
-            body {{
+            body {
                 font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
                 line-height: 1.6;
                 color: #333;
@@ -53,56 +46,56 @@ def create_results_email_html(student_name: str, holland_code: str, top_strength
                 margin: 0 auto;
                 padding: 20px;
                 background-color: #f5f5f5;
-            }}
-            .container {{
+            }
+            .container {
                 background: linear-gradient(135deg, #FF6F61 0%, #2E1A47 100%);
                 border-radius: 16px;
                 padding: 40px;
                 box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-            }}
-            .logo {{
+            }
+            .logo {
                 text-align: center;
                 margin-bottom: 30px;
-            }}
-            .logo-icon {{
+            }
+            .logo-icon {
                 font-size: 48px;
                 margin-bottom: 10px;
-            }}
-            .logo-text {{
+            }
+            .logo-text {
                 font-size: 32px;
                 font-weight: bold;
                 color: white;
                 text-shadow: 2px 2px 4px rgba(0,0,0,0.2);
-            }}
-            .tagline {{
+            }
+            .tagline {
                 color: rgba(255,255,255,0.9);
                 font-size: 14px;
                 font-style: italic;
                 margin-top: 5px;
-            }}
-            .content {{
+            }
+            .content {
                 background: white;
                 border-radius: 12px;
                 padding: 30px;
                 margin-top: 20px;
-            }}
-            h1 {{
+            }
+            h1 {
                 color: #FF6F61;
                 font-size: 24px;
                 margin-bottom: 20px;
-            }}
-            .highlight-box {{
+            }
+            .highlight-box {
                 background: linear-gradient(135deg, #FFF5F4 0%, #FFE5E2 100%);
                 border-left: 4px solid #FF6F61;
                 padding: 20px;
                 margin: 20px 0;
                 border-radius: 8px;
-            }}
-            .highlight-box strong {{
+            }
+            .highlight-box strong {
                 color: #2E1A47;
                 font-size: 18px;
-            }}
-            .cta-button {{
+            }
+            .cta-button {
                 display: inline-block;
                 background: linear-gradient(135deg, #FF6F61 0%, #2E1A47 100%);
                 color: white;
@@ -112,25 +105,25 @@ def create_results_email_html(student_name: str, holland_code: str, top_strength
                 font-weight: bold;
                 margin: 20px 0;
                 text-align: center;
-            }}
-            .footer {{
+            }
+            .footer {
                 text-align: center;
                 margin-top: 30px;
                 padding-top: 20px;
                 border-top: 1px solid #e0e0e0;
                 color: #666;
                 font-size: 14px;
-            }}
-            .emoji {{
+            }
+            .emoji {
                 font-size: 24px;
                 margin-right: 10px;
-            }}
+            }
         </style>
     </head>
     <body>
         <div class="container">
             <div class="logo">
-                {logo_html}
+                ${logo_html}
                 <div class="logo-text">CaRhythm</div>
                 <div class="tagline">Career Compass with a Heartbeat</div>
             </div>
@@ -138,13 +131,13 @@ def create_results_email_html(student_name: str, holland_code: str, top_strength
             <div class="content">
                 <h1>Your Career DNA Results Are Ready!</h1>
                 
-                <p>Dear {student_name},</p>
+                <p>Dear ${student_name},</p>
                 
                 <p>Congratulations on completing the CaRhythm Career Assessment! Your personalized Career DNA Report is now ready.</p>
                 
                 <div class="highlight-box">
-                    <p><strong>Your Holland Code:</strong> {holland_code}</p>
-                    <p><strong>Top Strength:</strong> {top_strength}</p>
+                    <p><strong>Your Holland Code:</strong> ${holland_code}</p>
+                    <p><strong>Top Strength:</strong> ${top_strength}</p>
                 </div>
                 
                 <p><strong>Your comprehensive report includes:</strong></p>
@@ -157,7 +150,7 @@ def create_results_email_html(student_name: str, holland_code: str, top_strength
                     <li>Personalized Action Plan</li>
                 </ul>
                 
-                <p><strong>Your report is attached to this email as a PDF.</strong></p>
+                ${report_access_html}
                 
                 <p style="background: #fff3cd; padding: 15px; border-radius: 8px; border-left: 4px solid #ffc107; margin-bottom: 20px;">
                     <strong>💡 Next Steps:</strong><br>
@@ -183,13 +176,92 @@ def create_results_email_html(student_name: str, holland_code: str, top_strength
         </div>
     </body>
     </html>
+    """)
+
+LOGO_CID = 'carhythm_logo'
+
+
+@lru_cache(maxsize=2)
+def _results_email_template(logo_cid: Optional[str]) -> Template:
+    """RESULTS_EMAIL_TEMPLATE with the logo block already filled in."""
+    # Logo section - use embedded image if available, otherwise show text logo
+    if logo_cid:
+        logo_html = f'<img src="cid:{logo_cid}" alt="CaRhythm Logo" style="width: 120px; height: 120px; margin: 0 auto; display: block;"/>'
+    else:
+        # Fallback to text-based logo if image embedding fails
+        logo_html = '<div class="logo-text-fallback" style="font-size: 48px; font-weight: bold; color: white; text-shadow: 2px 2px 4px rgba(0,0,0,0.2);">CaRhythm</div>'
+    return Template(RESULTS_EMAIL_TEMPLATE.safe_substitute(logo_html=logo_html))
+
+
+ATTACHMENT_ACCESS_HTML = '<p><strong>Your report is attached to this email as a PDF.</strong></p>'
+
+LINK_ACCESS_TEMPLATE = Template(
+    '<p><strong>Your report is ready to download:</strong></p>\n'
+    '                <p style="text-align: center;"><a href="${download_url}" class="cta-button" '
+    'style="color: white;">Download My Career DNA Report</a></p>\n'
+    '                <p style="font-size: 12px; color: #999;">This personal link expires in ${link_ttl_days} days. '
+    'You can request a new one from the results page at any time.</p>'
+)
+
+
+def create_results_email_html(student_name: str, holland_code: str, top_strength: str, logo_cid: str = None,
+                              download_url: Optional[str] = None) -> str:
     """
-    return html
+    Create HTML email template for results delivery.
+    With a download_url the email links to the report instead of saying it is attached.
+    """
+    if download_url:
+        report_access_html = LINK_ACCESS_TEMPLATE.substitute(
+            download_url=escape(download_url),
+            link_ttl_days=max(1, settings.REPORT_LINK_TTL_HOURS // 24)
+        )
+    else:
+        report_access_html = ATTACHMENT_ACCESS_HTML
+    return _results_email_template(logo_cid).substitute(
+        student_name=escape(student_name or ''),
+        holland_code=escape(holland_code or ''),
+        top_strength=escape(top_strength or ''),
+        report_access_html=report_access_html
+    )
+
+
+@lru_cache(maxsize=1)
+def _encoded_logo() -> Optional[str]:
+    """Logo PNG, read and base64-encoded once per process (None if unavailable)."""
+    if not os.path.exists(LOGO_PATH):
+        return None
+    try:
+        with open(LOGO_PATH, 'rb') as f:
+            return encodebytes(f.read()).decode('ascii')
+    except Exception as e:
+        logger.warning(f"Could not load logo: {e}")
+        return None
+
+
+def preload_email_assets():
+    """Prepare the cached logo and compiled template so the first email doesn't pay for it."""
+    logo_cid = LOGO_CID if _encoded_logo() is not None else None
+    _results_email_template(logo_cid)
+
+
+def create_logo_part() -> Optional[MIMENonMultipart]:
+    """
+    Inline logo image part. The payload is the cached base64 text, so no
+    per-message file read or re-encoding of the (large) PNG.
+    """
+    encoded = _encoded_logo()
+    if encoded is None:
+        return None
+    logo_img = MIMENonMultipart('image', 'png')
+    logo_img.set_payload(encoded)
+    logo_img['Content-Transfer-Encoding'] = 'base64'
+    logo_img.add_header('Content-ID', f'<{LOGO_CID}>')
+    return logo_img
 
 
 def create_admin_notification_html(student_name: str, student_email: str, 
                                    session_id: str, error_message: str, 
-                                   response_id: int) -> str:
+                                   response_id: Optional[int]) -> str:
     """
     Create HTML email for admin error notifications
     """
@@ -293,6 +365,73 @@ def create_admin_notification_html(student_name: str, student_email: str,
     return html
 
 
+def build_results_message(
+    to_email: str,
+    student_name: str,
+    holland_code: str,
+    top_strength: str,
+    pdf_bytes: Optional[bytes],
+    pdf_filename: str = "CaRhythm_Career_DNA_Report.pdf",
+    download_url: Optional[str] = None
+) -> MIMEMultipart:
+    """
+    Build the results email (HTML body, embedded logo, and either the PDF
+    attachment or a download link)
+    """
+    # Create message with related parts for embedded images
+    msg = MIMEMultipart('mixed')
+    msg['From'] = formataddr((settings.SMTP_FROM_NAME, settings.SMTP_FROM_EMAIL))
+    msg['To'] = to_email
+    msg['Subject'] = f"Your CaRhythm Career DNA Results Are Ready!"
+    
+    # Create multipart/related for HTML + embedded images
+    msg_related = MIMEMultipart('related')
+    
+    # Embed logo (cached, pre-encoded)
+    logo_img = create_logo_part()
+    logo_cid = LOGO_CID if logo_img is not None else None
+    
+    # Create HTML body with logo CID
+    html_content = create_results_email_html(student_name, holland_code, top_strength, logo_cid, download_url)
+    html_part = MIMEText(html_content, 'html', 'utf-8')
+    msg_related.attach(html_part)
+    
+    # Attach logo image after HTML
+    if logo_img is not None:
+        msg_related.attach(logo_img)
+    
+    msg.attach(msg_related)
+    
+    # Attach PDF (link delivery sends none)
+    if pdf_bytes is not None:
+        pdf_attachment = MIMEApplication(pdf_bytes, _subtype='pdf')
+        pdf_attachment.add_header('Content-Disposition', 'attachment', filename=pdf_filename)
+        msg.attach(pdf_attachment)
+    return msg
+
+
+def build_admin_notification_message(
+    student_name: str,
+    student_email: str,
+    session_id: str,
+    error_message: str,
+    response_id: Optional[int] = None
+) -> MIMEMultipart:
+    """
+    Build the admin error notification email
+    """
+    msg = MIMEMultipart('alternative')
+    msg['From'] = formataddr((settings.SMTP_FROM_NAME, settings.SMTP_FROM_EMAIL))
+    msg['To'] = settings.ADMIN_EMAIL
+    msg['Subject'] = f"[CaRhythm Alert] PDF/Email Error for {student_name}"
+    
+    html_content = create_admin_notification_html(
+        student_name, student_email, session_id, error_message, response_id
+    )
+    msg.attach(MIMEText(html_content, 'html'))
+    return msg
+
+
 async def send_results_email(
     to_email: str,
     student_name: str,
@@ -302,7 +441,9 @@ async def send_results_email(
     pdf_filename: str = "CaRhythm_Career_DNA_Report.pdf"
 ) -> Dict[str, Any]:
     """
-    Send results email with PDF attachment via Gmail SMTP
+    Send results email with PDF attachment via Gmail SMTP.
+    Request handlers should enqueue through email_outbox instead of
+    calling this directly, so SMTP retries never hold a request open.
     
     Returns:
         dict: {
@@ -330,63 +471,16 @@ async def send_results_email(
         }
     
     try:
-        # Create message with related parts for embedded images
-        msg = MIMEMultipart('mixed')
-        msg['From'] = formataddr((settings.SMTP_FROM_NAME, settings.SMTP_FROM_EMAIL))
-        msg['To'] = to_email
-        msg['Subject'] = f"Your CaRhythm Career DNA Results Are Ready!"
-        
-        # Create multipart/related for HTML + embedded images
-        msg_related = MIMEMultipart('related')
-        
-        # Try to embed logo
-        logo_cid = None
-        if os.path.exists(LOGO_PATH):
-            try:
-                with open(LOGO_PATH, 'rb') as f:
-                    logo_data = f.read()
-                logo_img = MIMEImage(logo_data)
-                logo_cid = 'carhythm_logo'
-                logo_img.add_header('Content-ID', f'<{logo_cid}>')
-            except Exception as e:
-                logger.warning(f"Could not embed logo: {e}")
-        
-        # Create HTML body with logo CID
-        html_content = create_results_email_html(student_name, holland_code, top_strength, logo_cid)
-        html_part = MIMEText(html_content, 'html', 'utf-8')
-        msg_related.attach(html_part)
-        
-        # Attach logo image after HTML
-        if logo_cid and os.path.exists(LOGO_PATH):
-            try:
-                with open(LOGO_PATH, 'rb') as f:
-                    logo_data = f.read()
-                logo_img = MIMEImage(logo_data)
-                logo_img.add_header('Content-ID', f'<{logo_cid}>')
-                msg_related.attach(logo_img)
-            except Exception as e:
-                logger.warning(f"Could not attach logo: {e}")
-        
-        msg.attach(msg_related)
-        
-        # Attach PDF
         pdf_buffer.seek(0)
-        pdf_attachment = MIMEApplication(pdf_buffer.read(), _subtype='pdf')
-        pdf_attachment.add_header('Content-Disposition', 'attachment', filename=pdf_filename)
-        msg.attach(pdf_attachment)
+        msg = build_results_message(
+            to_email, student_name, holland_code, top_strength,
+            pdf_buffer.read(), pdf_filename
+        )
         
         # Send email with retry logic
         for attempt in range(settings.EMAIL_RETRY_ATTEMPTS):
             try:
-                await aiosmtplib.send(
-                    msg,
-                    hostname=settings.SMTP_HOST,
-                    port=settings.SMTP_PORT,
-                    username=settings.SMTP_USER,
-                    password=settings.SMTP_PASSWORD,
-                    start_tls=True,
-                    timeout=30
-                )
+                await smtp_pool.send_message(msg, timeout=30)
                 
                 logger.info(f"✅ Email sent successfully to {to_email}")
                 return {
@@ -419,7 +513,7 @@ async def send_admin_notification(
     student_email: str,
     session_id: str,
     error_message: str,
-    response_id: int
+    response_id: Optional[int] = None
 ) -> bool:
     """
     Send error notification to admin
@@ -432,29 +526,12 @@ async def send_admin_notification(
         return False
     
     try:
-        # Create message
-        msg = MIMEMultipart('alternative')
-        msg['From'] = formataddr((settings.SMTP_FROM_NAME, settings.SMTP_FROM_EMAIL))
-        msg['To'] = settings.ADMIN_EMAIL
-        msg['Subject'] = f"[CaRhythm Alert] PDF/Email Error for {student_name}"
-        
-        # Create HTML body
-        html_content = create_admin_notification_html(
+        msg = build_admin_notification_message(
             student_name, student_email, session_id, error_message, response_id
         )
-        html_part = MIMEText(html_content, 'html')
-        msg.attach(html_part)
         
         # Send email
-        await aiosmtplib.send(
-            msg,
-            hostname=settings.SMTP_HOST,
-            port=settings.SMTP_PORT,
-            username=settings.SMTP_USER,
-            password=settings.SMTP_PASSWORD,
-            start_tls=True,
-            timeout=20
-        )
+        await smtp_pool.send_message(msg, timeout=20)
         
         logger.info(f"✅ Admin notification sent to {settings.ADMIN_EMAIL}")
         return True
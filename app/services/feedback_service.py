@@ -0,0 +1,141 @@
+"""
+Feedback listing and export
+Keyset-paginated feedback pages for the admin views and the API, and
+CSV/JSONL exports streamed from a single joined query fetched in
+``yield_per`` batches. Date filters use the feedbacks.created_at index.
+"""
+
+import json
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy.orm import Session, contains_eager
+
+from ..config import settings
+from ..models import Feedback, StudentResponse
+from ..utils.helpers import csv_chunks, keyset_after
+
+FEEDBACK_PAGE_SIZE = 50
+FEEDBACK_MAX_PAGE_SIZE = 200
+
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+FEEDBACK_CSV_HEADER = [
+    'ID', 'Date', 'Session ID', 'User Name', 'User Email',
+    'Rating', 'Experience', 'Would Recommend', 'Suggestions'
+]
+
+EXPORT_COLUMNS = (
+    Feedback.id,
+    Feedback.created_at,
+    Feedback.session_id,
+    StudentResponse.full_name,
+    StudentResponse.email,
+    Feedback.rating,
+    Feedback.experience_text,
+    Feedback.would_recommend,
+    Feedback.suggestions,
+)
+
+
+def _apply_filters(query, rating: Optional[int] = None, date_from: Optional[date] = None,
+                   date_to: Optional[date] = None):
+    if rating is not None:
+        query = query.filter(Feedback.rating == rating)
+    if date_from:
+        query = query.filter(Feedback.created_at >= datetime.combine(date_from, datetime.min.time()))
+    if date_to:
+        query = query.filter(Feedback.created_at < datetime.combine(date_to + timedelta(days=1), datetime.min.time()))
+    return query
+
+
+def list_feedbacks_page(
+    db: Session,
+    cursor: Optional[int] = None,
+    limit: int = FEEDBACK_PAGE_SIZE,
+    rating: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    offset: int = 0,
+) -> Tuple[List[Feedback], Optional[int]]:
+    """
+    One page of feedback, newest first, with each row's response loaded in the same query.
+
+    Pagination is keyset on (created_at, id): `cursor` is the id of the last
+    feedback of the previous page. Returns (feedbacks, next_cursor);
+    next_cursor is None on the last page. `offset` is only honoured without
+    a cursor, for API clients that still page by offset.
+    """
+    limit = max(1, min(limit, FEEDBACK_MAX_PAGE_SIZE))
+    query = db.query(Feedback).join(Feedback.response).options(contains_eager(Feedback.response))
+    query = _apply_filters(query, rating, date_from, date_to)
+
+    if cursor is not None:
+        query = keyset_after(query, Feedback, cursor)
+    elif offset:
+        query = query.offset(offset)
+
+    feedbacks = query.order_by(Feedback.created_at.desc(), Feedback.id.desc()).limit(limit + 1).all()
+    next_cursor = feedbacks[limit - 1].id if len(feedbacks) > limit else None
+    return feedbacks[:limit], next_cursor
+
+
+def iter_feedback_rows(db: Session, rating: Optional[int] = None, date_from: Optional[date] = None,
+                       date_to: Optional[date] = None, batch_size: Optional[int] = None):
+    """Yield export rows (EXPORT_COLUMNS) newest first, fetched ``batch_size`` at a time."""
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    query = db.query(*EXPORT_COLUMNS).outerjoin(
+        StudentResponse, StudentResponse.session_id == Feedback.session_id
+    )
+    query = _apply_filters(query, rating, date_from, date_to)
+    query = query.order_by(Feedback.created_at.desc(), Feedback.id.desc()).execution_options(yield_per=batch_size)
+    return iter(query)
+
+
+def format_feedback_row(row) -> List[Any]:
+    """Convert an export row into CSV cells matching FEEDBACK_CSV_HEADER."""
+    return [
+        row.id,
+        row.created_at.strftime(DATETIME_FORMAT) if row.created_at else '',
+        row.session_id,
+        row.full_name or '',
+        row.email or '',
+        row.rating or '',
+        row.experience_text or '',
+        'Yes' if row.would_recommend else ('No' if row.would_recommend is False else ''),
+        row.suggestions or ''
+    ]
+
+
+def feedback_row_to_dict(row) -> Dict[str, Any]:
+    """JSON shape of an export row."""
+    return {
+        "id": row.id,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "session_id": row.session_id,
+        "user_name": row.full_name,
+        "user_email": row.email,
+        "rating": row.rating,
+        "experience_text": row.experience_text,
+        "would_recommend": row.would_recommend,
+        "suggestions": row.suggestions,
+    }
+
+
+def iter_feedbacks_csv(db: Session, chunk_rows: Optional[int] = None, **filters) -> Iterator[bytes]:
+    """Generate the feedback CSV as UTF-8 chunks of ``chunk_rows`` rows each."""
+    rows = (format_feedback_row(row) for row in iter_feedback_rows(db, **filters))
+    return csv_chunks(rows, FEEDBACK_CSV_HEADER, chunk_rows or settings.EXPORT_CSV_CHUNK_ROWS)
+
+
+def iter_feedbacks_jsonl(db: Session, chunk_rows: Optional[int] = None, **filters) -> Iterator[bytes]:
+    """Generate feedback as JSON Lines, one object per feedback, in chunks of ``chunk_rows`` lines."""
+    chunk_rows = chunk_rows or settings.EXPORT_CSV_CHUNK_ROWS
+    lines = []
+    for row in iter_feedback_rows(db, **filters):
+        lines.append(json.dumps(feedback_row_to_dict(row), ensure_ascii=False))
+        if len(lines) >= chunk_rows:
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+            lines = []
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
@@ -0,0 +1,123 @@
+"""
+CaRhythm CSV Import Jobs
+Runs question CSV imports outside the request. The upload is spooled to a
+temporary file and an ImportLog row is created in the `queued` state; the
+job then streams the file through the chunked importer, which records
+progress on that row after every chunk and honours cancellation requests.
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from typing import Any, BinaryIO, Callable, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from ..models import ImportLog, ImportStatus
+from ..models.database import SessionLocal
+from .csv_import_service import CSVImportExportService
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = (ImportStatus.completed, ImportStatus.cancelled, ImportStatus.failed)
+
+
+def create_import_job(db: Session, upload: BinaryIO, question_type: str,
+                      filename: str, imported_by: str) -> ImportLog:
+    """Copy the upload to a temporary file and queue an import job for it."""
+    fd, path = tempfile.mkstemp(prefix="csv-import-", suffix=".csv")
+    with os.fdopen(fd, "wb") as spool:
+        shutil.copyfileobj(upload, spool)
+
+    import_log = ImportLog(
+        filename=filename,
+        import_type=question_type,
+        total_rows=0,
+        imported_by=imported_by,
+        status=ImportStatus.queued,
+        upload_path=path
+    )
+    db.add(import_log)
+    db.commit()
+    db.refresh(import_log)
+    return import_log
+
+
+def run_import_job(import_log_id: int, session_factory: Optional[Callable[[], Session]] = None) -> None:
+    """Import the job's spooled file, then remove it. Runs in a worker thread."""
+    db = (session_factory or SessionLocal)()
+    path = None
+    try:
+        import_log = db.get(ImportLog, import_log_id)
+        if import_log is None:
+            return
+        path = import_log.upload_path
+        if import_log.status != ImportStatus.queued:
+            # Cancelled before it started
+            return
+
+        with open(path, "rb") as upload:
+            result = CSVImportExportService.import_csv_file(
+                db, upload, import_log.import_type, import_log.filename,
+                import_log.imported_by, import_log=import_log
+            )
+        logger.info(f"Import job {import_log_id} {import_log.status.value}: "
+                    f"{result.successful_imports}/{result.total_rows} rows imported")
+    except Exception as e:
+        logger.error(f"Import job {import_log_id} failed: {e}")
+        # The importer marks the job failed itself; this covers errors outside it
+        db.rollback()
+        import_log = db.get(ImportLog, import_log_id)
+        if import_log is not None and import_log.status not in FINISHED_STATUSES:
+            import_log.status = ImportStatus.failed
+            import_log.errors = json.dumps([{"row": None, "error": str(e)}])
+            import_log.finished_at = datetime.utcnow()
+            db.commit()
+    finally:
+        if path:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        db.close()
+
+
+def request_cancel(db: Session, import_log_id: int) -> Optional[ImportLog]:
+    """
+    Ask a job to stop. Queued jobs are cancelled at once; running jobs stop
+    after the chunk in progress. Finished jobs are returned unchanged.
+    """
+    import_log = db.get(ImportLog, import_log_id)
+    if import_log is None or import_log.status in FINISHED_STATUSES:
+        return import_log
+
+    import_log.cancel_requested = True
+    if import_log.status == ImportStatus.queued:
+        import_log.status = ImportStatus.cancelled
+        import_log.finished_at = datetime.utcnow()
+    db.commit()
+    db.refresh(import_log)
+    return import_log
+
+
+def job_status(import_log: ImportLog) -> Dict[str, Any]:
+    """JSON shape of a job for the polling endpoint."""
+    errors = json.loads(import_log.errors) if import_log.errors else []
+    return {
+        "job_id": import_log.id,
+        "filename": import_log.filename,
+        "question_type": import_log.import_type,
+        "status": import_log.status.value if import_log.status else None,
+        "finished": import_log.status in FINISHED_STATUSES,
+        "cancel_requested": bool(import_log.cancel_requested),
+        "processed_rows": import_log.processed_rows or 0,
+        "total_rows": import_log.total_rows or 0,
+        "successful_imports": import_log.successful_imports or 0,
+        "failed_imports": import_log.failed_imports or 0,
+        "errors": errors,
+        "started_at": import_log.started_at.isoformat() if import_log.started_at else None,
+        "finished_at": import_log.finished_at.isoformat() if import_log.finished_at else None,
+    }
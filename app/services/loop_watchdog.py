@@ -0,0 +1,249 @@
+"""
+CaRhythm Event Loop Watchdog
+Detects handlers that block the event loop. A heartbeat task on the loop
+wakes every LOOP_WATCHDOG_INTERVAL_MS and measures how late it ran (the
+loop lag). A watcher thread notices when the heartbeat is overdue by more
+than LOOP_BLOCK_THRESHOLD_MS and captures the loop thread's stack while it
+is still blocked, together with the request being handled. When the loop
+recovers, the block is logged with that stack, recorded in the metrics and
+kept in a short history for /admin/system/event-loop.
+
+record_blocks() collects blocks over a stricter threshold for a block of
+code; the loop_block_budget test fixture uses it to fail tests whose
+handlers block the loop beyond a budget.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from ..config import settings
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Time record_blocks() waits for the heartbeat that closes a block still in progress
+SETTLE_TIMEOUT_SECONDS = 5.0
+
+
+class BlockEvent:
+    """One period during which the event loop did not run other callbacks."""
+
+    def __init__(self, route: Optional[str] = None, stack: Optional[str] = None):
+        self.started_at = datetime.utcnow()
+        self.route = route
+        self.stack = stack
+        self.duration: Optional[float] = None  # seconds, set when the loop recovers
+
+    def report(self) -> str:
+        duration = f"{self.duration * 1000:.0f} ms" if self.duration is not None else "ongoing"
+        lines = [f"Event loop blocked for {duration} in {self.route or 'unknown route'}"]
+        lines.append(self.stack.rstrip() if self.stack else "(unblocked before the stack could be captured)")
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration * 1000, 1) if self.duration is not None else None,
+            "route": self.route,
+            "stack": self.stack,
+        }
+
+
+class _Recording:
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.blocks: List[BlockEvent] = []
+
+
+class LoopWatchdog:
+    """Heartbeat on the loop plus a watcher thread that captures blocking stacks."""
+
+    def __init__(self, interval: float, threshold: float, history: int = 50):
+        self.interval = interval  # seconds
+        self.threshold = threshold  # seconds
+        self.events: Deque[BlockEvent] = deque(maxlen=history)
+        self.blocks_total = 0
+        self.max_lag = 0.0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._beat = threading.Condition(self._lock)
+        self._last_beat = 0.0
+        self._pending: Optional[BlockEvent] = None
+        self._recordings: List[_Recording] = []
+        self._requests: Dict[asyncio.Task, dict] = {}
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start watching the running event loop."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._pending = None
+        self._stop_event.clear()
+        self._task = self._loop.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        logger.info(f"Event loop watchdog started (threshold {self.threshold * 1000:.0f} ms)")
+
+    async def stop(self):
+        if not self.running:
+            return
+        self._stop_event.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._thread.join()
+        self._task = self._thread = None
+        logger.info("Event loop watchdog stopped")
+
+    # ------------------------------------------------------------------
+    # Detection
+    # ------------------------------------------------------------------
+
+    def _threshold(self) -> float:
+        return min([self.threshold] + [recording.threshold for recording in self._recordings])
+
+    async def _heartbeat(self):
+        while True:
+            due = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(time.perf_counter() - due, 0.0)
+            metrics.observe_loop_lag(lag)
+            with self._lock:
+                self.max_lag = max(self.max_lag, lag)
+                pending, self._pending = self._pending, None
+                if lag >= self._threshold():
+                    self._record(pending or BlockEvent(), lag)
+                self._last_beat = time.perf_counter()
+                self._beat.notify_all()
+
+    def _watch(self):
+        # Runs in its own thread, so it keeps going while the loop is stuck
+        while not self._stop_event.wait(self.interval):
+            try:
+                with self._lock:
+                    overdue = time.perf_counter() - self._last_beat - self.interval
+                    if self._pending is None and overdue >= self._threshold():
+                        self._pending = BlockEvent(route=self._current_route(), stack=self._loop_stack())
+            except Exception:
+                # A failed capture must not end the thread and silently stop detection
+                logger.exception("Event loop watchdog failed to capture a block")
+
+    def _loop_stack(self) -> Optional[str]:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        return "".join(traceback.format_stack(frame)) if frame is not None else None
+
+    def _current_route(self) -> Optional[str]:
+        # The loop thread may add or remove requests while this thread reads them
+        requests = list(self._requests.items())
+        scope = dict(requests).get(asyncio.current_task(self._loop))
+        if scope is None and len(requests) == 1:
+            # Blocked in a child task (e.g. a streaming body) of the only request in flight
+            scope = requests[0][1]
+        if scope is None:
+            return None
+        route = metrics.route_label(scope)
+        return f"{scope['method']} {scope['path'] if route == metrics.UNMATCHED_ROUTE else route}"
+
+    def _record(self, event: BlockEvent, lag: float):
+        event.duration = lag
+        for recording in self._recordings:
+            if lag >= recording.threshold:
+                recording.blocks.append(event)
+        # Blocks only a stricter record_blocks() threshold cares about stay out of the history
+        if lag >= self.threshold:
+            self.events.append(event)
+            self.blocks_total += 1
+            metrics.observe_loop_block(event.route or "unknown", lag)
+            logger.warning(event.report())
+
+    # ------------------------------------------------------------------
+    # Request tracking and tests
+    # ------------------------------------------------------------------
+
+    def request_started(self, scope: dict):
+        task = asyncio.current_task()
+        if task is not None:
+            self._requests[task] = scope
+
+    def request_finished(self):
+        self._requests.pop(asyncio.current_task(), None)
+
+    @contextmanager
+    def record_blocks(self, threshold_ms: float) -> Iterator[List[BlockEvent]]:
+        """
+        Collect blocks of at least threshold_ms while the block runs. On exit,
+        waits for the next heartbeat so a block that ended the block is counted.
+        """
+        if not self.running:
+            raise RuntimeError("The event loop watchdog is not running (is the app started?)")
+        recording = _Recording(threshold_ms / 1000)
+        with self._lock:
+            self._recordings.append(recording)
+        try:
+            yield recording.blocks
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self._beat.wait_for(lambda: self._last_beat > finished or not self.running,
+                                    timeout=SETTLE_TIMEOUT_SECONDS)
+                self._recordings.remove(recording)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self.running,
+                "interval_ms": self.interval * 1000,
+                "threshold_ms": self.threshold * 1000,
+                "blocks_total": self.blocks_total,
+                "max_lag_ms": round(self.max_lag * 1000, 1),
+                "recent_blocks": [event.to_dict() for event in reversed(self.events)],
+            }
+
+
+class LoopWatchdogMiddleware:
+    """ASGI middleware noting which task serves which request, to name the blocking route."""
+
+    def __init__(self, app, watchdog: "LoopWatchdog" = None):
+        self.app = app
+        self.watchdog = watchdog or loop_watchdog
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        self.watchdog.request_started(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.watchdog.request_finished()
+
+
+loop_watchdog = LoopWatchdog(
+    interval=settings.LOOP_WATCHDOG_INTERVAL_MS / 1000,
+    threshold=settings.LOOP_BLOCK_THRESHOLD_MS / 1000
+)
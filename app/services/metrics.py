@@ -0,0 +1,278 @@
+"""
+CaRhythm Metrics
+Prometheus counters, histograms and gauges for the hot paths: per-route
+latency, status and DB time, PDF render and section durations, report
+cache hits, SMTP send latency and retries, outbox deliveries, the report
+render queue, and database-derived gauges (active sessions, pending
+emails, running imports) computed when /metrics is scraped.
+
+Multiprocess: when PROMETHEUS_MULTIPROC_DIR is set before the app starts
+(one empty directory shared by all uvicorn workers, cleared on deploy),
+every worker writes its values there and /metrics aggregates them, so any
+worker can serve a complete scrape. Without it the in-process registry is
+used. prometheus_client is in requirements.txt; should it be missing,
+recording is a no-op and /metrics answers 503 rather than failing startup.
+"""
+
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..config import settings
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+    )
+    from prometheus_client import multiprocess
+    from prometheus_client.core import GaugeMetricFamily
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+# Routes that never matched a handler share one label so bad URLs can't explode cardinality
+UNMATCHED_ROUTE = "unmatched"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+RENDER_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+if PROMETHEUS_AVAILABLE:
+    HTTP_REQUESTS = Counter(
+        "carhythm_http_requests_total", "HTTP requests by route and status",
+        ["method", "route", "status"]
+    )
+    HTTP_LATENCY = Histogram(
+        "carhythm_http_request_duration_seconds", "HTTP request latency",
+        ["method", "route"], buckets=LATENCY_BUCKETS
+    )
+    HTTP_IN_PROGRESS = Gauge(
+        "carhythm_http_requests_in_progress", "HTTP requests being served",
+        multiprocess_mode="livesum"
+    )
+    HTTP_DB_TIME = Histogram(
+        "carhythm_http_request_db_seconds", "Database time spent per request",
+        ["route"], buckets=LATENCY_BUCKETS
+    )
+    HTTP_QUERIES = Histogram(
+        "carhythm_http_request_queries", "SQL statements issued per request",
+        ["route"], buckets=QUERY_COUNT_BUCKETS
+    )
+    PDF_RENDER = Histogram(
+        "carhythm_pdf_render_duration_seconds", "Full PDF report render time",
+        buckets=RENDER_BUCKETS
+    )
+    PDF_SECTION = Histogram(
+        "carhythm_pdf_section_duration_seconds", "PDF report time per section",
+        ["section"], buckets=RENDER_BUCKETS
+    )
+    REPORT_CACHE = Counter(
+        "carhythm_report_cache_requests_total", "Rendered report lookups by result",
+        ["result"]
+    )
+    REPORT_QUEUE_DEPTH = Gauge(
+        "carhythm_report_queue_depth", "Report renders waiting for a slot",
+        multiprocess_mode="livesum"
+    )
+    REPORT_RENDERS_ACTIVE = Gauge(
+        "carhythm_report_renders_active", "Report renders in progress",
+        multiprocess_mode="livesum"
+    )
+    SMTP_SEND = Histogram(
+        "carhythm_smtp_send_duration_seconds", "SMTP send latency by outcome",
+        ["outcome"], buckets=LATENCY_BUCKETS
+    )
+    SMTP_RETRIES = Counter(
+        "carhythm_smtp_send_retries_total", "SMTP sends retried on a fresh connection"
+    )
+    EMAIL_DELIVERIES = Counter(
+        "carhythm_email_deliveries_total", "Outbox delivery attempts by outcome",
+        ["outcome"]
+    )
+    LOOP_LAG = Histogram(
+        "carhythm_event_loop_lag_seconds", "How late the event loop heartbeat ran",
+        buckets=LOOP_LAG_BUCKETS
+    )
+    LOOP_BLOCKS = Histogram(
+        "carhythm_event_loop_block_duration_seconds", "Event loop blocks over the threshold by route",
+        ["route"], buckets=LOOP_LAG_BUCKETS
+    )
+
+
+def route_label(scope) -> str:
+    """Route template (e.g. /admin/results/{response_id}) of a handled request."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+def observe_request(method: str, route: str, status: int, seconds: float,
+                    db_seconds: Optional[float] = None, queries: Optional[int] = None) -> None:
+    if not PROMETHEUS_AVAILABLE:
+        return
+    HTTP_REQUESTS.labels(method, route, str(status)).inc()
+    HTTP_LATENCY.labels(method, route).observe(seconds)
+    if db_seconds is not None:
+        HTTP_DB_TIME.labels(route).observe(db_seconds)
+    if queries is not None:
+        HTTP_QUERIES.labels(route).observe(queries)
+
+
+def observe_pdf_render(seconds: float) -> None:
+    if PROMETHEUS_AVAILABLE:
+        PDF_RENDER.observe(seconds)
+
+
+def observe_pdf_section(section: str, seconds: float) -> None:
+    if PROMETHEUS_AVAILABLE:
+        PDF_SECTION.labels(section).observe(seconds)
+
+
+def record_report_cache(hit: bool) -> None:
+    if PROMETHEUS_AVAILABLE:
+        REPORT_CACHE.labels("hit" if hit else "miss").inc()
+
+
+def set_report_queue(depth: int, active: int) -> None:
+    if PROMETHEUS_AVAILABLE:
+        REPORT_QUEUE_DEPTH.set(depth)
+        REPORT_RENDERS_ACTIVE.set(active)
+
+
+def observe_smtp_send(seconds: float, ok: bool) -> None:
+    if PROMETHEUS_AVAILABLE:
+        SMTP_SEND.labels("sent" if ok else "failed").observe(seconds)
+
+
+def record_smtp_retry() -> None:
+    if PROMETHEUS_AVAILABLE:
+        SMTP_RETRIES.inc()
+
+
+def record_email_delivery(outcome: str) -> None:
+    """outcome: sent, failed (will retry) or dead."""
+    if PROMETHEUS_AVAILABLE:
+        EMAIL_DELIVERIES.labels(outcome).inc()
+
+
+def observe_loop_lag(seconds: float) -> None:
+    if PROMETHEUS_AVAILABLE:
+        LOOP_LAG.observe(seconds)
+
+
+def observe_loop_block(route: str, seconds: float) -> None:
+    if PROMETHEUS_AVAILABLE:
+        LOOP_BLOCKS.labels(route).observe(seconds)
+
+
+# ----------------------------------------------------------------------------
+# Database-derived gauges, computed per scrape by whichever worker serves it
+# ----------------------------------------------------------------------------
+
+class DatabaseCollector:
+    """Active assessment sessions, pending outbox emails and running CSV imports."""
+
+    def __init__(self, db: Optional[Session] = None):
+        self.db = db
+
+    def collect(self):
+        from ..models import StudentResponse, SessionStatus, EmailOutbox, OutboxStatus, ImportLog, ImportStatus
+        from ..models.database import SessionLocal
+
+        db = self.db or SessionLocal()
+        try:
+            since = datetime.utcnow() - timedelta(minutes=settings.ACTIVE_SESSION_WINDOW_MINUTES)
+            active_sessions = db.query(StudentResponse.id).filter(
+                StudentResponse.status == SessionStatus.active,
+                StudentResponse.last_activity >= since
+            ).count()
+            pending_emails = db.query(EmailOutbox.id).filter(
+                EmailOutbox.status.in_([OutboxStatus.pending, OutboxStatus.sending])
+            ).count()
+            running_imports = db.query(ImportLog.id).filter(
+                ImportLog.status.in_([ImportStatus.queued, ImportStatus.running])
+            ).count()
+        except Exception as e:
+            logger.warning(f"Could not collect database metrics: {e}")
+            db.rollback()
+            return
+        finally:
+            if self.db is None:
+                db.close()
+
+        yield GaugeMetricFamily(
+            "carhythm_active_sessions",
+            f"Assessment sessions active in the last {settings.ACTIVE_SESSION_WINDOW_MINUTES} minutes",
+            value=active_sessions
+        )
+        yield GaugeMetricFamily("carhythm_email_outbox_pending", "Outbox emails waiting to be sent",
+                                value=pending_emails)
+        yield GaugeMetricFamily("carhythm_import_jobs_pending", "CSV import jobs queued or running",
+                                value=running_imports)
+
+
+def render_latest(db: Optional[Session] = None) -> Tuple[bytes, str]:
+    """Exposition text for a scrape: every worker's metrics plus the database gauges."""
+    if not PROMETHEUS_AVAILABLE:
+        raise RuntimeError("prometheus_client is required for /metrics (pip install prometheus-client)")
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    database = CollectorRegistry(auto_describe=False)
+    database.register(DatabaseCollector(db))
+    return generate_latest(registry) + generate_latest(database), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """Drop this worker's live gauges from the shared multiprocess directory on shutdown."""
+    if PROMETHEUS_AVAILABLE and MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, status and DB time per route template.
+    Installed inside SQLInstrumentationMiddleware so the request's query
+    stats are visible to it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not PROMETHEUS_AVAILABLE:
+            await self.app(scope, receive, send)
+            return
+
+        from .sql_instrumentation import current_stats
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_PROGRESS.dec()
+            stats = current_stats()
+            observe_request(
+                scope["method"], route_label(scope), status, time.perf_counter() - started,
+                db_seconds=stats.duration if stats else None,
+                queries=stats.count if stats else None
+            )
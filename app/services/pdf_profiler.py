@@ -0,0 +1,268 @@
+"""
+CaRhythm PDF Render Profiler
+Breaks a report render down by section: wall time, CPU time of the rendering
+thread and peak memory allocated (tracemalloc). Sections come from the
+report_section() markers in pdf_service - the page builders, every chart and
+QR code, and doc.build - and nest, so the result is a tree that can be
+printed as a flame-style breakdown, emitted as folded stacks for flame graph
+tools, or returned as JSON by the admin endpoint.
+
+tracemalloc slows allocation-heavy code noticeably, so profiled timings are
+inflated relative to production renders; compare sections against each
+other, not against the render metrics. Only one profile runs at a time
+because tracemalloc's peak counter is process-wide.
+"""
+
+import random
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from io import BytesIO
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+TEMPLATES = ("v1", "v2")
+
+RIASEC_CODES = ['R', 'I', 'A', 'S', 'E', 'C']
+BIGFIVE_CODES = ['O', 'C', 'E', 'A', 'N']
+BEHAVIORAL_TRAITS = ['motivation_type', 'grit_persistence', 'self_efficacy',
+                     'resilience', 'learning_orientation', 'empathy', 'task_start_tempo']
+
+
+class ProfilerBusy(Exception):
+    """Another render is being profiled."""
+
+
+class SectionStats:
+    """Totals for one node of the section tree, summed over repeated calls."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.wall = 0.0  # seconds
+        self.cpu = 0.0  # seconds
+        self.peak_bytes: Optional[int] = None
+        self.children: Dict[str, "SectionStats"] = {}
+
+    def child(self, name: str) -> "SectionStats":
+        if name not in self.children:
+            self.children[name] = SectionStats(name)
+        return self.children[name]
+
+    @property
+    def self_wall(self) -> float:
+        """Wall time not accounted for by child sections."""
+        return max(self.wall - sum(child.wall for child in self.children.values()), 0.0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "wall_ms": round(self.wall * 1000, 2),
+            "self_ms": round(self.self_wall * 1000, 2),
+            "cpu_ms": round(self.cpu * 1000, 2),
+            "peak_alloc_bytes": self.peak_bytes,
+            "children": [child.to_dict() for child in self.children.values()],
+        }
+
+
+class _Frame:
+    def __init__(self, stats: SectionStats, trace_memory: bool):
+        self.stats = stats
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.thread_time()
+        self.mem_start = 0
+        self.peak_seen = 0
+        if trace_memory:
+            self.mem_start = self.peak_seen = tracemalloc.get_traced_memory()[0]
+
+
+class RenderProfiler:
+    """Collects the section tree of one render on the thread running it."""
+
+    def __init__(self, label: str = "render", trace_memory: bool = True):
+        self.root = SectionStats(label)
+        self.trace_memory = trace_memory
+        self._stack: List[_Frame] = []
+
+    def _push(self, stats: SectionStats) -> _Frame:
+        if self.trace_memory:
+            # Fold the peak reached so far into the enclosing section before
+            # resetting the counter for this one
+            peak = tracemalloc.get_traced_memory()[1]
+            if self._stack:
+                self._stack[-1].peak_seen = max(self._stack[-1].peak_seen, peak)
+            tracemalloc.reset_peak()
+        frame = _Frame(stats, self.trace_memory)
+        self._stack.append(frame)
+        return frame
+
+    def _pop(self) -> None:
+        frame = self._stack.pop()
+        stats = frame.stats
+        stats.calls += 1
+        stats.wall += time.perf_counter() - frame.wall_start
+        stats.cpu += time.thread_time() - frame.cpu_start
+        if self.trace_memory:
+            peak = max(frame.peak_seen, tracemalloc.get_traced_memory()[1])
+            stats.peak_bytes = max(stats.peak_bytes or 0, peak - frame.mem_start)
+            if self._stack:
+                self._stack[-1].peak_seen = max(self._stack[-1].peak_seen, peak)
+
+    @contextmanager
+    def section(self, name: str) -> Iterator[SectionStats]:
+        parent = self._stack[-1].stats if self._stack else self.root
+        frame = self._push(parent.child(name))
+        try:
+            yield frame.stats
+        finally:
+            self._pop()
+
+    @contextmanager
+    def run(self) -> Iterator["RenderProfiler"]:
+        """Profile the block as the root section, with this profiler active for report_section()."""
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        token = _active.set(self)
+        self._push(self.root)
+        try:
+            yield self
+        finally:
+            self._pop()
+            _active.reset(token)
+            if started_tracing:
+                tracemalloc.stop()
+
+
+_active: ContextVar[Optional[RenderProfiler]] = ContextVar("pdf_render_profiler", default=None)
+_profile_lock = threading.Lock()
+
+
+def active_profiler() -> Optional[RenderProfiler]:
+    """Profiler of the render running in this context, if it is being profiled."""
+    return _active.get()
+
+
+class RenderProfile:
+    """Result of a profiled render."""
+
+    def __init__(self, template: str, root: SectionStats, size_bytes: int, options: Dict[str, Any]):
+        self.template = template
+        self.root = root
+        self.size_bytes = size_bytes
+        self.options = options
+
+    def sections(self) -> Iterator[Tuple[int, SectionStats]]:
+        """(depth, stats) for every node, depth first."""
+        def walk(stats: SectionStats, depth: int):
+            yield depth, stats
+            for child in stats.children.values():
+                yield from walk(child, depth + 1)
+        return walk(self.root, 0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "template": self.template,
+            "options": self.options,
+            "size_bytes": self.size_bytes,
+            "total_ms": round(self.root.wall * 1000, 2),
+            "sections": self.root.to_dict(),
+        }
+
+    def flame(self, width: int = 30) -> str:
+        """Indented tree with a bar per section scaled to the render's wall time."""
+        total = self.root.wall or 1e-9
+        lines = [f"{'section':<36} {'calls':>5} {'wall ms':>9} {'self ms':>9} {'cpu ms':>9} "
+                 f"{'peak KiB':>9}  {'%':>5}"]
+        for depth, stats in self.sections():
+            share = stats.wall / total
+            peak = f"{stats.peak_bytes / 1024:.0f}" if stats.peak_bytes is not None else "-"
+            label = ("  " * depth + stats.name)[:36]
+            lines.append(f"{label:<36} {stats.calls:>5} {stats.wall * 1000:>9.1f} "
+                         f"{stats.self_wall * 1000:>9.1f} {stats.cpu * 1000:>9.1f} {peak:>9}  "
+                         f"{share * 100:>5.1f} {'█' * max(round(share * width), 0)}")
+        return "\n".join(lines)
+
+    def folded(self) -> str:
+        """Folded stacks ("render;riasec;hexagon_chart <self µs>") for flamegraph.pl or speedscope."""
+        lines = []
+
+        def walk(stats: SectionStats, prefix: str):
+            path = f"{prefix};{stats.name}" if prefix else stats.name
+            self_us = round(stats.self_wall * 1_000_000)
+            if self_us:
+                lines.append(f"{path} {self_us}")
+            for child in stats.children.values():
+                walk(child, path)
+
+        walk(self.root, "")
+        return "\n".join(lines)
+
+
+def profile_render(response_data: Dict, scores_data: Dict, template: str = "v1",
+                   trace_memory: bool = True, **options) -> RenderProfile:
+    """
+    Render a report with section profiling. `options` are passed to the
+    template's generate function (is_free_version, checkout_url, ...).
+    Raises ProfilerBusy if another profile is running.
+    """
+    from .pdf_service import generate_pdf_report, generate_pdf_report_v2
+
+    if template not in TEMPLATES:
+        raise ValueError(f"Unknown template '{template}', expected one of {', '.join(TEMPLATES)}")
+    render = generate_pdf_report if template == "v1" else generate_pdf_report_v2
+
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy("A report render is already being profiled")
+    try:
+        profiler = RenderProfiler(label="render", trace_memory=trace_memory)
+        with profiler.run():
+            buffer: BytesIO = render(response_data, scores_data, **options)
+    finally:
+        _profile_lock.release()
+
+    return RenderProfile(template, profiler.root, len(buffer.getbuffer()), options)
+
+
+def synthetic_inputs(seed: Optional[int] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Plausible random response/scores dicts for rendering without a database."""
+    from .scoring_service_v1_1 import (
+        get_strength_label, generate_behavioral_flags, calculate_ikigai_zones,
+        RIASEC_THRESHOLDS, BIGFIVE_THRESHOLDS, BEHAVIORAL_THRESHOLDS
+    )
+
+    rng = random.Random(seed)
+    riasec = {code: rng.randint(3, 15) for code in RIASEC_CODES}
+    bigfive = {code: rng.randint(5, 25) for code in BIGFIVE_CODES}
+    behavioral = {trait: rng.randint(3, 15) for trait in BEHAVIORAL_TRAITS}
+
+    riasec_labels = {code: get_strength_label(score, RIASEC_THRESHOLDS) for code, score in riasec.items()}
+    bigfive_labels = {code: get_strength_label(score, BIGFIVE_THRESHOLDS) for code, score in bigfive.items()}
+    behavioral_labels = {trait: get_strength_label(score, BEHAVIORAL_THRESHOLDS)
+                         for trait, score in behavioral.items()}
+
+    response_data = {
+        'student_name': f"Synthetic Student {rng.randint(1, 9999)}",
+        'email': 'synthetic@example.com',
+        'age_group': '17-18',
+        'country': 'Egypt',
+        'origin_country': 'Egypt',
+    }
+    scores_data = {
+        'riasec_raw_scores': riasec,
+        'riasec_strength_labels': riasec_labels,
+        'holland_code': ''.join(sorted(riasec, key=riasec.get, reverse=True)[:3]),
+        'bigfive_raw_scores': bigfive,
+        'bigfive_strength_labels': bigfive_labels,
+        'behavioral_raw_scores': behavioral,
+        'behavioral_strength_labels': behavioral_labels,
+        'behavioral_flags': generate_behavioral_flags(behavioral, behavioral_labels),
+        'ikigai_zones': calculate_ikigai_zones(
+            {'raw_scores': riasec, 'strength_labels': riasec_labels},
+            {'strength_labels': bigfive_labels},
+            {'strength_labels': behavioral_labels}
+        ),
+    }
+    return response_data, scores_data
@@ -32,10 +32,14 @@ from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.graphics.shapes import Drawing, Rect, String as ShapeString
 from reportlab.graphics import renderPDF
 from io import BytesIO
+from contextlib import contextmanager
 import os
+import time
 import matplotlib
 matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+# Charts are built on their own Figure rather than through pyplot: reports render
+# concurrently in worker threads and pyplot's current figure is process-global
+from matplotlib.figure import Figure
 import matplotlib.patches as mpatches
 import numpy as np
 from datetime import datetime
@@ -44,6 +48,7 @@ import json
 import qrcode
 
 from ..models import StudentResponse, AssessmentScore
+from . import metrics, pdf_profiler
 
 # Try to import RTL support (optional)
 try:
@@ -107,6 +112,25 @@ QUOTES = [
     "The only way to do great work is to love what you do.",
 ]
 
+@contextmanager
+def report_section(name: str):
+    """
+    Time one part of a render for the PDF section duration metric, or record
+    it in the active render profile. Also usable as a decorator.
+    """
+    profiler = pdf_profiler.active_profiler()
+    if profiler is not None:
+        # Profiled renders run under tracemalloc, so keep them out of the metrics
+        with profiler.section(name):
+            yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe_pdf_section(name, time.perf_counter() - started)
+
+
 # Helper function for strength labels
 def get_strength_label(score: float, max_score: float) -> str:
     """Calculate strength label from raw score"""
@@ -421,6 +445,7 @@ def get_strength_color_hex(label: str) -> str:
     return '#808080'  # Default gray
 
 
+@report_section("radar_chart")
 def create_radar_chart_v11(labels: List[str], values: List[float], 
                            max_value: float, title: str) -> BytesIO:
     """Create radar chart for v1.1 scores with modern coral/purple styling"""
@@ -428,7 +453,8 @@ def create_radar_chart_v11(labels: List[str], values: List[float],
     values_plot = values + [values[0]]
     angles += angles[:1]
     
-    fig, ax = plt.subplots(figsize=(8, 8), subplot_kw=dict(projection='polar'))
+    fig = Figure(figsize=(8, 8))
+    ax = fig.subplots(subplot_kw=dict(projection='polar'))
     
     # Shadow effect - plot slightly offset
     shadow_values = [v * 0.98 for v in values_plot]
@@ -450,16 +476,17 @@ def create_radar_chart_v11(labels: List[str], values: List[float],
     ax.spines['polar'].set_linewidth(2.5)
     
     img_buffer = BytesIO()
-    plt.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close(fig)
+    fig.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight', facecolor='white')
     img_buffer.seek(0)
     
     return img_buffer
 
 
+@report_section("hexagon_chart")
 def create_holland_hexagon(scores: Dict[str, float]) -> BytesIO:
     """Create Holland Hexagon visualization with coral/purple styling"""
-    fig, ax = plt.subplots(figsize=(8, 8))
+    fig = Figure(figsize=(8, 8))
+    ax = fig.subplots()
     ax.set_aspect('equal')
     
     # Hexagon vertices (RIASEC order)
@@ -517,18 +544,19 @@ def create_holland_hexagon(scores: Dict[str, float]) -> BytesIO:
                 fontsize=16, weight='bold', pad=20, color='#2E1A47')
     
     img_buffer = BytesIO()
-    plt.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close(fig)
+    fig.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight', facecolor='white')
     img_buffer.seek(0)
     
     return img_buffer
 
 
+@report_section("bar_chart")
 def create_bar_chart_v11(labels: List[str], values: List[float], 
                         strength_labels: List[str], max_value: float, 
                         title: str) -> BytesIO:
     """Create horizontal bar chart for Big Five with gradient styling"""
-    fig, ax = plt.subplots(figsize=(8, 6))
+    fig = Figure(figsize=(8, 6))
+    ax = fig.subplots()
     
     # Create gradient colors from purple to coral based on value
     colors_list = []
@@ -580,19 +608,20 @@ def create_bar_chart_v11(labels: List[str], values: List[float],
                f'{label}', 
                va='center', ha='left', fontsize=10, style='italic', color='#764ba2')
     
-    plt.tight_layout()
+    fig.tight_layout()
     
     img_buffer = BytesIO()
-    plt.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close(fig)
+    fig.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight', facecolor='white')
     img_buffer.seek(0)
     
     return img_buffer
 
 
+@report_section("ikigai_venn")
 def create_ikigai_venn_diagram(ikigai_zones: Dict) -> BytesIO:
     """Create Ikigai Venn diagram with 4 overlapping circles"""
-    fig, ax = plt.subplots(figsize=(10, 10))
+    fig = Figure(figsize=(10, 10))
+    ax = fig.subplots()
     ax.set_aspect('equal')
     
     # Circle positions for 4-way Venn (arranged in square)
@@ -632,16 +661,17 @@ def create_ikigai_venn_diagram(ikigai_zones: Dict) -> BytesIO:
                 fontsize=14, weight='bold', pad=20)
     
     img_buffer = BytesIO()
-    plt.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close(fig)
+    fig.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight', facecolor='white')
     img_buffer.seek(0)
     
     return img_buffer
 
 
+@report_section("flags_dashboard")
 def create_behavioral_flags_dashboard(flags: Dict[str, bool]) -> BytesIO:
     """Create modern card-style dashboard for behavioral flags"""
-    fig, ax = plt.subplots(figsize=(12, 5))
+    fig = Figure(figsize=(12, 5))
+    ax = fig.subplots()
     fig.patch.set_facecolor('white')
     
     flag_names = [
@@ -713,22 +743,23 @@ def create_behavioral_flags_dashboard(flags: Dict[str, bool]) -> BytesIO:
     for spine in ax.spines.values():
         spine.set_visible(False)
     
-    plt.tight_layout()
+    fig.tight_layout()
     
     img_buffer = BytesIO()
-    plt.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close(fig)
+    fig.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight', facecolor='white')
     img_buffer.seek(0)
     
     return img_buffer
 
 
+@report_section("strength_heatmap")
 def create_strength_heatmap(riasec_scores: Dict, bigfive_scores: Dict, 
                            behavioral_scores: Dict) -> BytesIO:
     """Create comprehensive strength heatmap with coral-purple gradient"""
     from matplotlib.colors import LinearSegmentedColormap
     
-    fig, ax = plt.subplots(figsize=(14, 5))
+    fig = Figure(figsize=(14, 5))
+    ax = fig.subplots()
     fig.patch.set_facecolor('white')
     
     # Prepare data - use actual behavioral trait keys from scoring service
@@ -789,26 +820,27 @@ def create_strength_heatmap(riasec_scores: Dict, bigfive_scores: Dict,
                 fontsize=18, weight='bold', pad=25, color='#2E1A47', family='sans-serif')
     
     # Add colorbar with modern styling
-    cbar = plt.colorbar(im, ax=ax, orientation='horizontal', pad=0.15, fraction=0.05, aspect=40)
+    cbar = fig.colorbar(im, ax=ax, orientation='horizontal', pad=0.15, fraction=0.05, aspect=40)
     cbar.set_label('Relative Strength', fontsize=12, color='#2E1A47', weight='bold')
     cbar.ax.tick_params(labelsize=10, colors='#2E1A47', width=0)
     cbar.outline.set_linewidth(0)
     
-    plt.tight_layout()
+    fig.tight_layout()
     
     img_buffer = BytesIO()
-    plt.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close(fig)
+    fig.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight', facecolor='white')
     img_buffer.seek(0)
     
     return img_buffer
 
 
+@report_section("mini_heatmap")
 def create_mini_heatmap_riasec(scores: Dict) -> BytesIO:
     """Create mini heatmap for RIASEC scores only"""
     from matplotlib.colors import LinearSegmentedColormap
     
-    fig, ax = plt.subplots(figsize=(9, 1.5))
+    fig = Figure(figsize=(9, 1.5))
+    ax = fig.subplots()
     fig.patch.set_facecolor('white')
     
     labels = ['R', 'I', 'A', 'S', 'E', 'C']
@@ -839,21 +871,22 @@ def create_mini_heatmap_riasec(scores: Dict) -> BytesIO:
     
     ax.set_title("RIASEC Score Distribution", fontsize=14, weight='bold', pad=15, color='#2E1A47', family='sans-serif')
     
-    plt.tight_layout()
+    fig.tight_layout()
     
     img_buffer = BytesIO()
-    plt.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close(fig)
+    fig.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight', facecolor='white')
     img_buffer.seek(0)
     
     return img_buffer
 
 
+@report_section("mini_heatmap")
 def create_mini_heatmap_bigfive(scores: Dict) -> BytesIO:
     """Create mini heatmap for Big Five scores only"""
     from matplotlib.colors import LinearSegmentedColormap
     
-    fig, ax = plt.subplots(figsize=(9, 1.5))
+    fig = Figure(figsize=(9, 1.5))
+    ax = fig.subplots()
     fig.patch.set_facecolor('white')
     
     labels = ['O', 'C', 'E', 'A', 'N']
@@ -885,21 +918,22 @@ def create_mini_heatmap_bigfive(scores: Dict) -> BytesIO:
     
     ax.set_title("Big Five Score Distribution", fontsize=14, weight='bold', pad=15, color='#2E1A47', family='sans-serif')
     
-    plt.tight_layout()
+    fig.tight_layout()
     
     img_buffer = BytesIO()
-    plt.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close(fig)
+    fig.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight', facecolor='white')
     img_buffer.seek(0)
     
     return img_buffer
 
 
+@report_section("mini_heatmap")
 def create_mini_heatmap_behavioral(scores: Dict) -> BytesIO:
     """Create mini heatmap for Behavioral scores only"""
     from matplotlib.colors import LinearSegmentedColormap
     
-    fig, ax = plt.subplots(figsize=(11, 1.5))
+    fig = Figure(figsize=(11, 1.5))
+    ax = fig.subplots()
     fig.patch.set_facecolor('white')
     
     # Use actual trait keys from scoring
@@ -942,11 +976,10 @@ def create_mini_heatmap_behavioral(scores: Dict) -> BytesIO:
     
     ax.set_title("Behavioral Traits Score Distribution", fontsize=12, weight='bold', pad=10)
     
-    plt.tight_layout()
+    fig.tight_layout()
     
     img_buffer = BytesIO()
-    plt.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close(fig)
+    fig.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight', facecolor='white')
     img_buffer.seek(0)
     
     return img_buffer
@@ -1839,6 +1872,7 @@ def create_large_discount_cta_page(checkout_url: str, student_name: str,
     return elements
 
 
+@report_section("qr_code")
 def generate_qr_code(url: str, size: int = 300) -> BytesIO:
     """Generate QR code for given URL"""
     qr = qrcode.QRCode(
@@ -1876,6 +1910,7 @@ def generate_pdf_report(response_data: Dict, scores_data: Dict,
     Returns:
         BytesIO buffer containing the PDF
     """
+    render_started = time.perf_counter()
     buffer = BytesIO()
     
     # Parse scores (using new field names from api_v2.py)
@@ -1909,98 +1944,111 @@ def generate_pdf_report(response_data: Dict, scores_data: Dict,
     # ========== FREE SECTIONS (Always visible) ==========
     
     # 1. Cover Page
-    story.extend(create_cover_page())
+    with report_section("cover"):
+        story.extend(create_cover_page())
     
     # 2. Welcome Letter
-    story.extend(create_welcome_letter(student_name))
+    with report_section("welcome"):
+        story.extend(create_welcome_letter(student_name))
     
     # 3. RIASEC Section (3-4 pages)
-    story.extend(create_riasec_explanation_page())
-    story.extend(create_riasec_results_pages(riasec_raw_scores, holland_code))
+    with report_section("riasec"):
+        story.extend(create_riasec_explanation_page())
+        story.extend(create_riasec_results_pages(riasec_raw_scores, holland_code))
     
     # 4. Big Five Section (2-3 pages)
-    story.extend(create_bigfive_explanation_page())
-    story.extend(create_bigfive_results_pages(bigfive_raw_scores, bigfive_strength_labels))
+    with report_section("bigfive"):
+        story.extend(create_bigfive_explanation_page())
+        story.extend(create_bigfive_results_pages(bigfive_raw_scores, bigfive_strength_labels))
     
     # 5. Behavioral Section (2 pages)
-    story.extend(create_behavioral_explanation_page())
-    story.extend(create_behavioral_results_page(behavioral_strength_labels, behavioral_flags, behavioral_raw_scores))
+    with report_section("behavioral"):
+        story.extend(create_behavioral_explanation_page())
+        story.extend(create_behavioral_results_page(behavioral_strength_labels, behavioral_flags, behavioral_raw_scores))
     
     # ========== PREMIUM SECTIONS (Conditional) ==========
     
     if is_free_version:
         # FREEMIUM: Blur premium sections with CTAs
-        
-        # 6. Complete Strength Profile (BLURRED)
-        story.extend(create_blurred_premium_section(
-            "Your Complete Strength Profile",
-            "Comprehensive heatmap showing your strengths across all domains at a glance",
-            "🔒",
-            height=3.5
-        ))
-        story.extend(create_mini_qr_cta(checkout_url, "Complete Strength Profile", discount_code))
-        
-        # 7. Ikigai (BLURRED)
-        story.extend(create_blurred_premium_section(
-            "Your Ikigai: Career Sweet Spot",
-            "Japanese concept of 'reason for being' — where passion meets profession",
-            "🔒",
-            height=5.0
-        ))
-        story.extend(create_mini_qr_cta(checkout_url, "Ikigai Career Zones", discount_code))
-        
-        # 8. Career Recommendations (BLURRED)
-        story.extend(create_blurred_premium_section(
-            "Your Career Pathways",
-            "5+ personalized career matches based on your unique profile",
-            "🔒",
-            height=4.5
-        ))
-        story.extend(create_mini_qr_cta(checkout_url, "Career Recommendations", discount_code))
-        
-        # 9. Action Plan (BLURRED)
-        story.extend(create_blurred_premium_section(
-            "Your Action Plan",
-            "12-month roadmap with immediate, short-term, and long-term goals",
-            "🔒",
-            height=4.0
-        ))
-        story.extend(create_mini_qr_cta(checkout_url, "Action Plan", discount_code))
+        with report_section("premium_teasers"):
+            # 6. Complete Strength Profile (BLURRED)
+            story.extend(create_blurred_premium_section(
+                "Your Complete Strength Profile",
+                "Comprehensive heatmap showing your strengths across all domains at a glance",
+                "🔒",
+                height=3.5
+            ))
+            story.extend(create_mini_qr_cta(checkout_url, "Complete Strength Profile", discount_code))
+            
+            # 7. Ikigai (BLURRED)
+            story.extend(create_blurred_premium_section(
+                "Your Ikigai: Career Sweet Spot",
+                "Japanese concept of 'reason for being' — where passion meets profession",
+                "🔒",
+                height=5.0
+            ))
+            story.extend(create_mini_qr_cta(checkout_url, "Ikigai Career Zones", discount_code))
+            
+            # 8. Career Recommendations (BLURRED)
+            story.extend(create_blurred_premium_section(
+                "Your Career Pathways",
+                "5+ personalized career matches based on your unique profile",
+                "🔒",
+                height=4.5
+            ))
+            story.extend(create_mini_qr_cta(checkout_url, "Career Recommendations", discount_code))
+            
+            # 9. Action Plan (BLURRED)
+            story.extend(create_blurred_premium_section(
+                "Your Action Plan",
+                "12-month roadmap with immediate, short-term, and long-term goals",
+                "🔒",
+                height=4.0
+            ))
+            story.extend(create_mini_qr_cta(checkout_url, "Action Plan", discount_code))
         
         # 10. Large Discount CTA Page
-        story.extend(create_large_discount_cta_page(checkout_url, student_name, discount_code))
+        with report_section("discount_cta"):
+            story.extend(create_large_discount_cta_page(checkout_url, student_name, discount_code))
         
     else:
         # PREMIUM: Show full sections
         
         # 6. Comprehensive Heatmap
         if behavioral_raw_scores:
-            story.append(create_section_header("Your Complete Strength Profile", "🔥"))
-            explanation = """
-            This heatmap shows your strengths across all domains at a glance. 
-            Coral tones indicate stronger areas, purple shows areas for development.
-            """
-            story.append(create_body_text(explanation))
-            story.append(Spacer(1, 0.2 * inch))
-            heatmap_img = create_strength_heatmap(riasec_raw_scores, bigfive_raw_scores, behavioral_raw_scores)
-            story.append(Image(heatmap_img, width=6.5*inch, height=3.5*inch))
-            story.append(PageBreak())
+            with report_section("heatmap"):
+                story.append(create_section_header("Your Complete Strength Profile", "🔥"))
+                explanation = """
+                This heatmap shows your strengths across all domains at a glance. 
+                Coral tones indicate stronger areas, purple shows areas for development.
+                """
+                story.append(create_body_text(explanation))
+                story.append(Spacer(1, 0.2 * inch))
+                heatmap_img = create_strength_heatmap(riasec_raw_scores, bigfive_raw_scores, behavioral_raw_scores)
+                story.append(Image(heatmap_img, width=6.5*inch, height=3.5*inch))
+                story.append(PageBreak())
         
         # 7. Ikigai Guidance (2 pages)
-        story.extend(create_ikigai_pages(holland_code, riasec_raw_scores))
+        with report_section("ikigai"):
+            story.extend(create_ikigai_pages(holland_code, riasec_raw_scores))
         
         # 8. Career Recommendations (1-2 pages)
-        story.extend(create_career_recommendations(holland_code, bigfive_raw_scores))
+        with report_section("careers"):
+            story.extend(create_career_recommendations(holland_code, bigfive_raw_scores))
         
         # 9. Action Plan (1 page)
-        story.extend(create_action_plan(behavioral_flags, riasec_raw_scores))
+        with report_section("action_plan"):
+            story.extend(create_action_plan(behavioral_flags, riasec_raw_scores))
     
     # 11. About CaRhythm (Always visible)
-    story.extend(create_about_page())
+    with report_section("about"):
+        story.extend(create_about_page())
     
-    # Build PDF with numbered pages
-    doc.build(story, canvasmaker=NumberedCanvas)
+    # Build PDF with numbered pages (layout and drawing of everything above)
+    with report_section("build"):
+        doc.build(story, canvasmaker=NumberedCanvas)
     
+    metrics.observe_pdf_render(time.perf_counter() - render_started)
     buffer.seek(0)
     return buffer
 
@@ -2056,6 +2104,7 @@ def get_font_name(style: str = 'regular') -> str:
     return font_map.get(style, 'Poppins')
 
 
+@report_section("radar_chart")
 def create_high_res_radar_chart(labels: List[str], values: List[float], 
                                 max_value: float, title: str) -> BytesIO:
     """Create high-resolution radar chart (600 dpi) for print quality"""
@@ -2063,7 +2112,8 @@ def create_high_res_radar_chart(labels: List[str], values: List[float],
     values_plot = values + [values[0]]
     angles += angles[:1]
     
-    fig, ax = plt.subplots(figsize=(8, 8), subplot_kw=dict(projection='polar'), dpi=600)
+    fig = Figure(figsize=(8, 8), dpi=600)
+    ax = fig.subplots(subplot_kw=dict(projection='polar'))
     ax.plot(angles, values_plot, 'o-', linewidth=3, color='#14b8a6', markersize=10)
     ax.fill(angles, values_plot, alpha=0.3, color='#14b8a6')
     ax.set_xticks(angles[:-1])
@@ -2075,21 +2125,22 @@ def create_high_res_radar_chart(labels: List[str], values: List[float],
     ax.spines['polar'].set_color('#14b8a6')
     
     img_buffer = BytesIO()
-    plt.savefig(img_buffer, format='png', dpi=600, bbox_inches='tight', facecolor='white')
-    plt.close(fig)
+    fig.savefig(img_buffer, format='png', dpi=600, bbox_inches='tight', facecolor='white')
     img_buffer.seek(0)
     
     return img_buffer
 
 
+@report_section("gauge")
 def create_circular_gauge(value: float, max_value: float, label: str, 
                          color: str = '#14b8a6') -> BytesIO:
     """Create circular gauge visualization"""
-    fig, ax = plt.subplots(figsize=(3, 3), dpi=300)
+    fig = Figure(figsize=(3, 3), dpi=300)
+    ax = fig.subplots()
     
     # Create circle
     percentage = (value / max_value) * 100
-    circle = plt.Circle((0.5, 0.5), 0.4, color='white', ec=color, linewidth=8, fill=False)
+    circle = mpatches.Circle((0.5, 0.5), 0.4, color='white', ec=color, linewidth=8, fill=False)
     ax.add_patch(circle)
     
     # Add filled arc for percentage
@@ -2112,14 +2163,14 @@ def create_circular_gauge(value: float, max_value: float, label: str,
     ax.set_aspect('equal')
     
     img_buffer = BytesIO()
-    plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight', 
+    fig.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight', 
                facecolor='white', transparent=True)
-    plt.close(fig)
     img_buffer.seek(0)
     
     return img_buffer
 
 
+@report_section("qr_code")
 def generate_qr_code(url: str, size: int = 300) -> BytesIO:
     """Generate QR code for given URL"""
     qr = qrcode.QRCode(
@@ -2744,3 +2795,41 @@ def create_friction_cta_page_v2(fields: Dict, checkout_url: str = 'https://carhy
     return elements
 
 
+def generate_pdf_report_v2(response_data: Dict, scores_data: Dict,
+                           checkout_url: str = 'https://carhythm.com/premium') -> BytesIO:
+    """
+    Assemble the V2 template: hero, science, career matches and friction CTA pages
+
+    Returns:
+        BytesIO buffer containing the PDF
+    """
+    render_started = time.perf_counter()
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=letter,
+        rightMargin=0.75*inch,
+        leftMargin=0.75*inch,
+        topMargin=0.75*inch,
+        bottomMargin=1*inch
+    )
+
+    with report_section("fields"):
+        fields = extract_template_fields_v2(response_data, scores_data)
+
+    story = []
+    with report_section("hero"):
+        story.extend(create_hero_page_v2(fields))
+    with report_section("science"):
+        story.extend(create_science_page_v2(fields))
+    with report_section("career_matches"):
+        story.extend(create_career_matches_page_v2(fields))
+    with report_section("friction_cta"):
+        story.extend(create_friction_cta_page_v2(fields, checkout_url))
+
+    with report_section("build"):
+        doc.build(story, canvasmaker=NumberedCanvas)
+
+    metrics.observe_pdf_render(time.perf_counter() - render_started)
+    buffer.seek(0)
+    return buffer
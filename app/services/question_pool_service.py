@@ -1,16 +1,22 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy.orm import Session, contains_eager, joinedload
+from sqlalchemy import func, and_, or_, false, text, case, delete, update, Integer, Float
 from ..models import Category, QuestionPool, QuestionPageAssignment, ImportLog, Page
+from ..models.question_search import FTS_TABLE
 from ..schemas.question_pool import (
     CategoryCreate, CategoryUpdate, QuestionPoolCreate, QuestionPoolUpdate,
     QuestionPageAssignmentCreate, QuestionPoolFilter, CSVImportResult
 )
+from . import stats_cache
 from typing import List, Optional, Dict, Any
 import json
 import csv
 import io
+import re
 from datetime import datetime
 
+# bm25 column weights: title, question_text, question_text_ar, options
+SEARCH_WEIGHTS = (10.0, 5.0, 5.0, 1.0)
+
 class QuestionPoolService:
     
     # Category Management
@@ -69,8 +75,8 @@ class QuestionPoolService:
     
     # Question Pool Management
     @staticmethod
-    def create_question_pool(db: Session, question: QuestionPoolCreate) -> QuestionPool:
-        """Create a new question in the pool."""
+    def question_pool_values(question: QuestionPoolCreate) -> Dict[str, Any]:
+        """Column values for a new pool question, with list fields encoded as JSON strings."""
         question_data = question.dict()
         
         # Convert list fields to JSON strings for database storage
@@ -84,30 +90,62 @@ class QuestionPoolService:
             question_data['mcq_options_ar'] = json.dumps(question_data['mcq_options_ar'])
         if question_data.get('ordering_options_ar'):
             question_data['ordering_options_ar'] = json.dumps(question_data['ordering_options_ar'])
-        
-        db_question = QuestionPool(**question_data)
+        return question_data
+    
+    @staticmethod
+    def create_question_pool(db: Session, question: QuestionPoolCreate) -> QuestionPool:
+        """Create a new question in the pool."""
+        db_question = QuestionPool(**QuestionPoolService.question_pool_values(question))
         db.add(db_question)
         db.commit()
+        stats_cache.invalidate_content()
         db.refresh(db_question)
         return db_question
     
     @staticmethod
-    def get_questions_pool(db: Session, filters: QuestionPoolFilter) -> List[QuestionPool]:
-        """Get questions from pool with filtering."""
-        query = db.query(QuestionPool).join(Category, isouter=True)
+    def build_search_query(search_text: str) -> Optional[str]:
+        """
+        FTS5 MATCH expression for free text: every word must match, as a prefix.
+        Words are quoted, so FTS operators typed by the user are searched literally.
+        """
+        words = re.findall(r"\w+", search_text)
+        if not words:
+            return None
+        return " ".join(f'"{word}"*' for word in words)
+    
+    @staticmethod
+    def apply_pool_filters(db: Session, query, filters: QuestionPoolFilter):
+        """
+        Apply a QuestionPoolFilter (except paging) to a query over QuestionPool.
+        
+        Returns (query, search_rank); search_rank is the BM25 rank column to
+        order by when the filter searched through the FTS5 index, else None.
+        """
+        search_rank = None
         
-        # Apply filters
         if filters.category_id:
             query = query.filter(QuestionPool.category_id == filters.category_id)
         
         if filters.question_type:
             query = query.filter(QuestionPool.question_type == filters.question_type)
         
-        if filters.search_text:
+        if filters.search_text and db.get_bind().dialect.name == "sqlite":
+            match = QuestionPoolService.build_search_query(filters.search_text)
+            if match is None:
+                return query.filter(false()), None
+            weights = ", ".join(str(w) for w in SEARCH_WEIGHTS)
+            matches = text(
+                f"SELECT rowid AS question_id, bm25({FTS_TABLE}, {weights}) AS rank "
+                f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"
+            ).bindparams(match=match).columns(question_id=Integer, rank=Float).subquery("search_matches")
+            query = query.join(matches, matches.c.question_id == QuestionPool.id)
+            search_rank = matches.c.rank
+        elif filters.search_text:
             search = f"%{filters.search_text}%"
             query = query.filter(or_(
                 QuestionPool.title.ilike(search),
-                QuestionPool.question_text.ilike(search)
+                QuestionPool.question_text.ilike(search),
+                QuestionPool.question_text_ar.ilike(search)
             ))
         
         if filters.created_by:
@@ -119,8 +157,26 @@ class QuestionPoolService:
         if filters.usage_max is not None:
             query = query.filter(QuestionPool.usage_count <= filters.usage_max)
         
-        # Order by updated_at desc
-        query = query.order_by(QuestionPool.updated_at.desc())
+        return query, search_rank
+    
+    @staticmethod
+    def get_questions_pool(db: Session, filters: QuestionPoolFilter) -> List[QuestionPool]:
+        """
+        Get questions from pool with filtering.
+        
+        Text search uses the FTS5 index on SQLite, ranked by BM25 (title matches
+        weigh most); elsewhere it falls back to ILIKE on title and both texts.
+        """
+        query = db.query(QuestionPool).join(Category, isouter=True).options(
+            contains_eager(QuestionPool.category)
+        )
+        query, search_rank = QuestionPoolService.apply_pool_filters(db, query, filters)
+        
+        # Best matches first when searching, otherwise most recently updated
+        if search_rank is not None:
+            query = query.order_by(search_rank, QuestionPool.updated_at.desc())
+        else:
+            query = query.order_by(QuestionPool.updated_at.desc())
         
         return query.offset(filters.skip).limit(filters.limit).all()
     
@@ -170,6 +226,7 @@ class QuestionPoolService:
         
         db.delete(db_question)
         db.commit()
+        stats_cache.invalidate_content()
         return True
     
     # Assignment Management
@@ -239,10 +296,133 @@ class QuestionPoolService:
     
     @staticmethod
     def get_page_assigned_questions(db: Session, page_id: int) -> List[QuestionPageAssignment]:
-        """Get all questions assigned to a page."""
-        return db.query(QuestionPageAssignment).filter(
+        """Get all questions assigned to a page, with each question and its category loaded."""
+        return db.query(QuestionPageAssignment).options(
+            joinedload(QuestionPageAssignment.question).joinedload(QuestionPool.category)
+        ).filter(
+            QuestionPageAssignment.page_id == page_id
+        ).order_by(QuestionPageAssignment.order_index, QuestionPageAssignment.id).all()
+    
+    @staticmethod
+    def get_page_assigned_question_ids(db: Session, page_id: int) -> set:
+        """Ids of the pool questions assigned to a page."""
+        rows = db.query(QuestionPageAssignment.question_pool_id).filter(
             QuestionPageAssignment.page_id == page_id
-        ).order_by(QuestionPageAssignment.order_index).all()
+        ).all()
+        return {row.question_pool_id for row in rows}
+    
+    @staticmethod
+    def bulk_assign_questions(db: Session, page_id: int, question_ids: List[int],
+                              assigned_by: Optional[str] = None) -> Dict[str, List[int]]:
+        """
+        Assign a list of pool questions to a page in one transaction.
+        
+        New assignments are appended after the page's current questions in
+        the order given; usage counts are bumped with a single UPDATE.
+        Questions already on the page or missing from the pool are skipped.
+        """
+        requested = list(dict.fromkeys(question_ids))
+        if not requested:
+            return {"assigned": [], "already_assigned": [], "not_found": []}
+        
+        existing = QuestionPoolService.get_page_assigned_question_ids(db, page_id)
+        known = {row.id for row in db.query(QuestionPool.id).filter(QuestionPool.id.in_(requested))}
+        new_ids = [qid for qid in requested if qid in known and qid not in existing]
+        
+        try:
+            if new_ids:
+                next_index = db.query(func.max(QuestionPageAssignment.order_index)).filter(
+                    QuestionPageAssignment.page_id == page_id
+                ).scalar()
+                next_index = 0 if next_index is None else next_index + 1
+                db.add_all([
+                    QuestionPageAssignment(question_pool_id=qid, page_id=page_id,
+                                           order_index=next_index + offset, assigned_by=assigned_by)
+                    for offset, qid in enumerate(new_ids)
+                ])
+                db.execute(
+                    update(QuestionPool).where(QuestionPool.id.in_(new_ids))
+                    .values(usage_count=func.coalesce(QuestionPool.usage_count, 0) + 1)
+                    .execution_options(synchronize_session=False)
+                )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        
+        return {
+            "assigned": new_ids,
+            "already_assigned": [qid for qid in requested if qid in existing],
+            "not_found": [qid for qid in requested if qid not in known],
+        }
+    
+    @staticmethod
+    def bulk_unassign_questions(db: Session, page_id: int, question_ids: List[int]) -> List[int]:
+        """
+        Remove a list of questions from a page in one transaction, decrementing
+        their usage counts with a single UPDATE. Returns the ids removed.
+        """
+        requested = set(question_ids)
+        if not requested:
+            return []
+        
+        removed = sorted(QuestionPoolService.get_page_assigned_question_ids(db, page_id) & requested)
+        if not removed:
+            return []
+        
+        try:
+            db.execute(
+                delete(QuestionPageAssignment).where(
+                    QuestionPageAssignment.page_id == page_id,
+                    QuestionPageAssignment.question_pool_id.in_(removed)
+                ).execution_options(synchronize_session=False)
+            )
+            db.execute(
+                update(QuestionPool).where(QuestionPool.id.in_(removed))
+                .values(usage_count=case(
+                    (QuestionPool.usage_count > 0, QuestionPool.usage_count - 1), else_=0
+                ))
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        # Removed assignments and stale usage counts may sit in the identity map
+        db.expire_all()
+        return removed
+    
+    @staticmethod
+    def reorder_page_questions(db: Session, page_id: int, question_ids: List[int]) -> int:
+        """
+        Set a page's question order from a list of pool question ids.
+        
+        Listed questions take positions 0..n-1; assigned questions left out
+        keep their relative order after them. All positions are written with
+        one executemany UPDATE. Returns the number of assignments on the page.
+        """
+        assignments = db.query(
+            QuestionPageAssignment.id, QuestionPageAssignment.question_pool_id
+        ).filter(
+            QuestionPageAssignment.page_id == page_id
+        ).order_by(QuestionPageAssignment.order_index, QuestionPageAssignment.id).all()
+        
+        by_question = {row.question_pool_id: row.id for row in assignments}
+        ordered = [by_question[qid] for qid in dict.fromkeys(question_ids) if qid in by_question]
+        listed = set(ordered)
+        ordered += [row.id for row in assignments if row.id not in listed]
+        
+        if ordered:
+            try:
+                db.execute(update(QuestionPageAssignment), [
+                    {"id": assignment_id, "order_index": index}
+                    for index, assignment_id in enumerate(ordered)
+                ])
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+        return len(ordered)
     
     @staticmethod
     def get_question_assignments(db: Session, question_pool_id: int) -> List[QuestionPageAssignment]:
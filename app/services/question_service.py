@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 from ..models import Page, Question
 from ..schemas import PageCreate, PageUpdate, QuestionCreate, QuestionUpdate
+from . import stats_cache
 from typing import List, Optional
 import json
 
@@ -10,6 +11,7 @@ def create_page(db: Session, page: PageCreate) -> Page:
     db_page = Page(**page.dict())
     db.add(db_page)
     db.commit()
+    stats_cache.invalidate_content()
     db.refresh(db_page)
     return db_page
 
@@ -46,6 +48,7 @@ def delete_page(db: Session, page_id: int) -> bool:
     
     db.delete(db_page)
     db.commit()
+    stats_cache.invalidate_content()
     return True
 
 def create_question(db: Session, question: QuestionCreate) -> Question:
@@ -63,6 +66,7 @@ def create_question(db: Session, question: QuestionCreate) -> Question:
     db_question = Question(**question_data)
     db.add(db_question)
     db.commit()
+    stats_cache.invalidate_content()
     db.refresh(db_question)
     return db_question
 
@@ -141,6 +145,7 @@ def delete_question(db: Session, question_id: int) -> bool:
     
     db.delete(db_question)
     db.commit()
+    stats_cache.invalidate_content()
     return True
 
 def update_question_image(db: Session, question_id: int, image_path: Optional[str]) -> Optional[Question]:
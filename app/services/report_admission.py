@@ -0,0 +1,218 @@
+"""
+CaRhythm Report Admission Control
+Bounds how many PDF reports render at once and sheds load when the wait queue is full
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Any, Callable, Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from ..config import settings
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ReportPriority(IntEnum):
+    """Priority classes for report rendering (lower value is served first)"""
+    STUDENT = 0  # Results delivery for students who just finished
+    ADMIN = 1    # Exports requested from the admin panel
+
+
+class ReportQueueFull(Exception):
+    """Raised when a render request is shed instead of queued"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ReportAdmissionController:
+    """
+    Concurrency limiter with a bounded, priority-ordered wait queue.
+
+    Student deliveries are always granted a free slot before any waiting
+    admin export, and admin exports may never hold more than
+    `admin_max_concurrency` slots, so a burst of exports cannot starve
+    students of render capacity.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float,
+                 admin_max_concurrency: int, retry_after: int):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.admin_max_concurrency = max(1, min(admin_max_concurrency, self.max_concurrency))
+        self.retry_after = retry_after
+
+        self._active = {priority: 0 for priority in ReportPriority}
+        self._waiting = {priority: 0 for priority in ReportPriority}
+        self._waiters = []  # heap of (priority, sequence, future)
+        self._sequence = itertools.count()
+
+        self._admitted_total = 0
+        self._shed_total = 0
+        self._timed_out_total = 0
+        self._wait_count = 0
+        self._wait_seconds_total = 0.0
+        self._wait_seconds_max = 0.0
+        self._recent_waits = deque(maxlen=500)
+
+    # ------------------------------------------------------------------
+    # Slot bookkeeping
+    # ------------------------------------------------------------------
+
+    @property
+    def active(self) -> int:
+        return sum(self._active.values())
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(self._waiting.values())
+
+    def _can_start(self, priority: ReportPriority) -> bool:
+        if self.active >= self.max_concurrency:
+            return False
+        if priority == ReportPriority.ADMIN:
+            return self._active[ReportPriority.ADMIN] < self.admin_max_concurrency
+        return True
+
+    def _dispatch(self):
+        """Hand free slots to waiters in priority order."""
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():
+                # Waiter gave up (timeout or cancellation) - drop it lazily
+                heapq.heappop(self._waiters)
+                continue
+            if not self._can_start(priority):
+                # Heap head is the most urgent waiter; nobody behind it can start either
+                break
+            heapq.heappop(self._waiters)
+            self._waiting[priority] -= 1
+            self._active[priority] += 1
+            future.set_result(True)
+        metrics.set_report_queue(self.queue_depth, self.active)
+
+    def _release(self, priority: ReportPriority):
+        self._active[priority] -= 1
+        self._dispatch()
+
+    def _record_wait(self, waited: float):
+        self._wait_count += 1
+        self._wait_seconds_total += waited
+        self._wait_seconds_max = max(self._wait_seconds_max, waited)
+        self._recent_waits.append(waited)
+
+    async def acquire(self, priority: ReportPriority = ReportPriority.STUDENT):
+        """
+        Wait for a render slot.
+
+        Raises:
+            ReportQueueFull: when the wait queue is full or the wait times out
+        """
+        started = time.monotonic()
+
+        if self.queue_depth >= self.max_queue and not self._can_start(priority):
+            self._shed_total += 1
+            logger.warning(
+                f"Report queue full ({self.queue_depth} waiting, {self.active} rendering) - "
+                f"shedding {priority.name.lower()} request"
+            )
+            raise ReportQueueFull("Report rendering queue is full", self.retry_after)
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self._waiting[priority] += 1
+        self._dispatch()
+
+        try:
+            await asyncio.wait_for(future, timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                # Slot was granted in the same tick the timeout fired - hand it back
+                self._release(priority)
+            else:
+                self._waiting[priority] -= 1
+                metrics.set_report_queue(self.queue_depth, self.active)
+            self._timed_out_total += 1
+            logger.warning(f"Gave up waiting for a report slot after {self.queue_timeout}s")
+            raise ReportQueueFull("Timed out waiting for a report rendering slot", self.retry_after)
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release(priority)
+            else:
+                self._waiting[priority] -= 1
+                metrics.set_report_queue(self.queue_depth, self.active)
+            raise
+
+        self._admitted_total += 1
+        self._record_wait(time.monotonic() - started)
+
+    def release(self, priority: ReportPriority = ReportPriority.STUDENT):
+        """Return a render slot acquired with `acquire`."""
+        self._release(priority)
+
+    async def render(self, priority: ReportPriority, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run a blocking render function once a slot is available.
+        The function runs in the threadpool so the event loop stays responsive.
+        """
+        await self.acquire(priority)
+        try:
+            return await run_in_threadpool(func, *args, **kwargs)
+        finally:
+            self.release(priority)
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of queue depth, slot usage and wait-time metrics."""
+        recent = sorted(self._recent_waits)
+
+        def percentile(p: float) -> Optional[float]:
+            if not recent:
+                return None
+            index = min(len(recent) - 1, int(round(p * (len(recent) - 1))))
+            return round(recent[index], 4)
+
+        return {
+            "max_concurrency": self.max_concurrency,
+            "admin_max_concurrency": self.admin_max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "active_by_priority": {p.name.lower(): n for p, n in self._active.items()},
+            "queue_depth": self.queue_depth,
+            "queue_depth_by_priority": {p.name.lower(): n for p, n in self._waiting.items()},
+            "admitted_total": self._admitted_total,
+            "shed_total": self._shed_total,
+            "timed_out_total": self._timed_out_total,
+            "wait_seconds": {
+                "count": self._wait_count,
+                "total": round(self._wait_seconds_total, 4),
+                "max": round(self._wait_seconds_max, 4),
+                "avg": round(self._wait_seconds_total / self._wait_count, 4) if self._wait_count else None,
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+            },
+        }
+
+
+# Global controller shared by every router that renders reports
+report_admission = ReportAdmissionController(
+    max_concurrency=settings.REPORT_MAX_CONCURRENCY,
+    max_queue=settings.REPORT_MAX_QUEUE,
+    queue_timeout=settings.REPORT_QUEUE_TIMEOUT,
+    admin_max_concurrency=settings.REPORT_ADMIN_MAX_CONCURRENCY,
+    retry_after=settings.REPORT_RETRY_AFTER,
+)
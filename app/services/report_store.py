@@ -0,0 +1,366 @@
+"""
+CaRhythm Report Store
+Content-addressed cache of rendered PDF reports. A report is keyed by a hash
+of everything that goes into rendering it, so it is rendered once and served
+(or attached) from disk until its inputs change
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from ..config import settings
+from ..models import StudentResponse, AssessmentScore, ReportArtifact
+from ..models.database import SessionLocal
+from ..utils.security import create_report_token
+from .pdf_service import generate_pdf_report
+from .report_admission import report_admission, ReportPriority
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Bump when the renderer changes in a way that should invalidate stored reports
+REPORT_RENDER_REVISION = 1
+
+# Options used for the free report students receive
+STUDENT_REPORT_OPTIONS = {
+    'is_free_version': True,  # Free version with blurred premium sections
+    'checkout_url': 'https://carhythm.com/paid',
+    'discount_code': 'LAUNCH50',
+}
+
+# Admin exports get the full report with nothing blurred
+ADMIN_REPORT_OPTIONS = {
+    'is_free_version': False,
+    'checkout_url': settings.PREMIUM_CHECKOUT_URL,
+}
+
+# The only response fields the renderer reads - others must not split the cache
+REPORT_RESPONSE_FIELDS = ('student_name',)
+
+# Reports accessed this recently are never evicted (they may be mid-download)
+EVICTION_GRACE_SECONDS = 300
+
+# Don't rewrite last_accessed_at more often than this per report
+TOUCH_INTERVAL_SECONDS = 60
+
+TRAIT_NAMES = {'O': 'Openness', 'C': 'Conscientiousness', 'E': 'Extraversion', 'A': 'Agreeableness', 'N': 'Neuroticism'}
+
+
+# ============================================================================
+# Report inputs
+# ============================================================================
+
+def build_report_inputs(student_response: StudentResponse, assessment_score: AssessmentScore,
+                        email: Optional[str] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Build the response/scores dicts generate_pdf_report expects from stored results."""
+    response_dict = {
+        'student_name': student_response.full_name,
+        'email': email or student_response.email,
+        'age_group': student_response.age_group,
+        'country': student_response.country,
+        'origin_country': student_response.origin_country
+    }
+
+    def load(value):
+        return json.loads(value) if value else {}
+
+    scores_dict = {
+        'riasec_raw_scores': load(assessment_score.riasec_raw_scores),
+        'riasec_strength_labels': load(assessment_score.riasec_strength_labels),
+        'holland_code': assessment_score.riasec_profile or '',
+        'bigfive_raw_scores': {
+            'O': assessment_score.bigfive_openness or 0,
+            'C': assessment_score.bigfive_conscientiousness or 0,
+            'E': assessment_score.bigfive_extraversion or 0,
+            'A': assessment_score.bigfive_agreeableness or 0,
+            'N': assessment_score.bigfive_neuroticism or 0
+        },
+        'bigfive_strength_labels': load(assessment_score.bigfive_strength_labels),
+        'behavioral_strength_labels': load(assessment_score.behavioral_strength_labels),
+        'behavioral_flags': load(assessment_score.behavioral_flags),
+        'ikigai_zones': load(assessment_score.ikigai_zones)
+    }
+
+    # Extract behavioral raw scores from rhythm_profile
+    try:
+        rhythm_profile = load(assessment_score.rhythm_profile)
+        scores_dict['behavioral_raw_scores'] = rhythm_profile.get('behavioral', {}).get('raw_scores', {})
+    except (ValueError, AttributeError):
+        scores_dict['behavioral_raw_scores'] = {}
+
+    return response_dict, scores_dict
+
+
+def top_strength(scores_dict: Dict[str, Any]) -> str:
+    """Highest Big Five trait with its strength label, for the email summary."""
+    bigfive_strength_labels = scores_dict.get('bigfive_strength_labels', {})
+    if not bigfive_strength_labels:
+        return 'Openness'
+    bigfive_raw = scores_dict.get('bigfive_raw_scores', {})
+    top_trait = max(bigfive_raw.items(), key=lambda x: x[1])[0] if bigfive_raw else 'O'
+    return f"{TRAIT_NAMES.get(top_trait, 'Openness')} ({bigfive_strength_labels.get(top_trait, 'High')})"
+
+
+def report_key(response_dict: Dict[str, Any], scores_dict: Dict[str, Any], **options) -> str:
+    """Content address of a report: SHA-256 over its canonicalised render inputs."""
+    canonical = json.dumps({
+        'response': {field: response_dict.get(field) for field in REPORT_RESPONSE_FIELDS},
+        'scores': scores_dict,
+        'options': options,
+        'template_version': settings.PDF_TEMPLATE_VERSION,
+        'revision': REPORT_RENDER_REVISION,
+    }, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def create_download_url(session_id: str) -> str:
+    """Signed, expiring link to a student's report."""
+    token = create_report_token(session_id, timedelta(hours=settings.REPORT_LINK_TTL_HOURS))
+    return f"{settings.API_BASE_URL.rstrip('/')}/api/v2/reports/{token}"
+
+
+# ============================================================================
+# Store
+# ============================================================================
+
+class StoredReport:
+    """A rendered report on disk."""
+
+    def __init__(self, key: str, path: str):
+        self.key = key
+        self.path = path
+
+    @property
+    def size(self) -> int:
+        return os.path.getsize(self.path)
+
+    def read_bytes(self) -> bytes:
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+
+class ReportStore:
+    """
+    Rendered PDFs stored under `root/<key[:2]>/<key>.pdf`, with a
+    ReportArtifact row per file for access tracking and eviction.
+
+    Files are written atomically and never modified, so the key doubles as a
+    strong ETag. Concurrent requests for the same missing report share one
+    render instead of each queueing their own. When the store grows past
+    `max_bytes` or `max_files`, least recently used reports are deleted.
+    """
+
+    def __init__(self, root: str, max_bytes: int, max_files: int,
+                 session_factory: Callable[[], Session] = SessionLocal):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.session_factory = session_factory
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.pdf")
+
+    # ------------------------------------------------------------------
+    # Files and metadata (blocking - run in the threadpool from async code)
+    # ------------------------------------------------------------------
+
+    def get(self, key: str, response_id: Optional[int] = None) -> Optional[StoredReport]:
+        """Return a stored report and record the access, or None if it is not on disk."""
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            return None
+
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            artifact = db.query(ReportArtifact).filter(ReportArtifact.key == key).first()
+            if artifact is None:
+                # File predates its metadata row (e.g. store copied between hosts)
+                db.add(ReportArtifact(key=key, response_id=response_id, size_bytes=os.path.getsize(path),
+                                      created_at=now, last_accessed_at=now, access_count=1))
+                db.commit()
+            elif now - artifact.last_accessed_at > timedelta(seconds=TOUCH_INTERVAL_SECONDS):
+                artifact.last_accessed_at = now
+                artifact.access_count += 1
+                db.commit()
+        finally:
+            db.close()
+        return StoredReport(key, path)
+
+    def put(self, key: str, data: bytes, response_id: Optional[int] = None,
+            is_free_version: bool = True) -> StoredReport:
+        """Write a rendered report atomically, record it, and evict if over budget."""
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            artifact = db.query(ReportArtifact).filter(ReportArtifact.key == key).first()
+            if artifact is None:
+                artifact = ReportArtifact(key=key, created_at=now, access_count=0)
+                db.add(artifact)
+            artifact.response_id = response_id if response_id is not None else artifact.response_id
+            artifact.size_bytes = len(data)
+            artifact.is_free_version = is_free_version
+            artifact.template_version = settings.PDF_TEMPLATE_VERSION
+            artifact.last_accessed_at = now
+            artifact.access_count += 1
+            db.commit()
+            self._evict(db, keep=key)
+        finally:
+            db.close()
+        return StoredReport(key, path)
+
+    def _evict(self, db: Session, keep: str):
+        """Delete least recently used reports until the store is within its limits."""
+        total_bytes, total_files = db.query(
+            func.coalesce(func.sum(ReportArtifact.size_bytes), 0), func.count(ReportArtifact.id)
+        ).one()
+        if total_bytes <= self.max_bytes and total_files <= self.max_files:
+            return
+
+        cutoff = datetime.utcnow() - timedelta(seconds=EVICTION_GRACE_SECONDS)
+        candidates = db.query(ReportArtifact.key, ReportArtifact.size_bytes).filter(
+            ReportArtifact.key != keep,
+            ReportArtifact.last_accessed_at < cutoff
+        ).order_by(ReportArtifact.last_accessed_at).all()
+
+        evicted = []
+        for key, size_bytes in candidates:
+            if total_bytes <= self.max_bytes and total_files <= self.max_files:
+                break
+            evicted.append(key)
+            total_bytes -= size_bytes
+            total_files -= 1
+
+        for key in evicted:
+            try:
+                os.remove(self.path_for(key))
+            except FileNotFoundError:
+                pass
+        if evicted:
+            db.query(ReportArtifact).filter(ReportArtifact.key.in_(evicted)).delete(synchronize_session=False)
+            db.commit()
+            self._evictions += len(evicted)
+            logger.info(f"Evicted {len(evicted)} report(s) from the report store")
+
+    def delete_for_response(self, response_id: int) -> int:
+        """Remove every stored report for a response (e.g. when the response is deleted)."""
+        return self.delete_for_responses([response_id])
+
+    def delete_for_responses(self, response_ids: List[int], chunk_size: int = 500) -> int:
+        """Remove every stored report for a set of responses, in chunks of `chunk_size` ids."""
+        removed = 0
+        db = self.session_factory()
+        try:
+            for start in range(0, len(response_ids), chunk_size):
+                chunk = response_ids[start:start + chunk_size]
+                keys = [row.key for row in db.query(ReportArtifact.key).filter(ReportArtifact.response_id.in_(chunk))]
+                for key in keys:
+                    try:
+                        os.remove(self.path_for(key))
+                    except FileNotFoundError:
+                        pass
+                if keys:
+                    db.query(ReportArtifact).filter(ReportArtifact.key.in_(keys)).delete(synchronize_session=False)
+                    db.commit()
+                removed += len(keys)
+            return removed
+        finally:
+            db.close()
+
+    # ------------------------------------------------------------------
+    # Async API
+    # ------------------------------------------------------------------
+
+    async def get_or_render(self, response_dict: Dict[str, Any], scores_dict: Dict[str, Any],
+                            priority: ReportPriority = ReportPriority.STUDENT,
+                            response_id: Optional[int] = None,
+                            **options) -> StoredReport:
+        """
+        Return the stored report for these inputs, rendering it first if needed.
+
+        Raises:
+            ReportQueueFull: when rendering is needed and the render queue sheds it
+        """
+        options = options or dict(STUDENT_REPORT_OPTIONS)
+        key = report_key(response_dict, scores_dict, **options)
+
+        stored = await run_in_threadpool(self.get, key, response_id)
+        if stored is not None:
+            self._hits += 1
+            metrics.record_report_cache(hit=True)
+            return stored
+
+        task = self._inflight.get(key)
+        if task is None:
+            self._misses += 1
+            metrics.record_report_cache(hit=False)
+            task = asyncio.ensure_future(
+                self._render(key, response_dict, scores_dict, priority, response_id, options)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so one caller going away doesn't cancel the render for the others
+        return await asyncio.shield(task)
+
+    async def _render(self, key: str, response_dict: Dict[str, Any], scores_dict: Dict[str, Any],
+                      priority: ReportPriority, response_id: Optional[int],
+                      options: Dict[str, Any]) -> StoredReport:
+        pdf_buffer = await report_admission.render(priority, generate_pdf_report,
+                                                   response_dict, scores_dict, **options)
+        stored = await run_in_threadpool(self.put, key, pdf_buffer.getvalue(), response_id,
+                                         options.get('is_free_version', False))
+        logger.info(f"Stored report {key[:12]} ({stored.size} bytes)")
+        return stored
+
+    def stats(self) -> Dict[str, Any]:
+        db = self.session_factory()
+        try:
+            total_bytes, total_files = db.query(
+                func.coalesce(func.sum(ReportArtifact.size_bytes), 0), func.count(ReportArtifact.id)
+            ).one()
+        finally:
+            db.close()
+        return {
+            "reports": total_files,
+            "size_bytes": total_bytes,
+            "max_bytes": self.max_bytes,
+            "max_files": self.max_files,
+            "hits": self._hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "rendering": len(self._inflight),
+        }
+
+
+# Global store shared by delivery and download endpoints
+report_store = ReportStore(
+    settings.REPORT_STORE_DIR,
+    max_bytes=settings.REPORT_STORE_MAX_MB * 1024 * 1024,
+    max_files=settings.REPORT_STORE_MAX_FILES,
+)
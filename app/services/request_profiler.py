@@ -0,0 +1,343 @@
+"""
+CaRhythm On-demand Request Profiler
+Profiles a single request when an authenticated admin asks for it with the
+X-Profile header or the _profile query parameter:
+
+  sample   - a background thread samples every thread's stack at a fixed
+             interval, so work handed to the threadpool is included. Stored
+             as speedscope JSON (https://www.speedscope.app), one profile
+             per thread. Idle threads are skipped.
+  cprofile - deterministic cProfile of the event loop thread, stored as a
+             pstats dump (python -m pstats, snakeviz). Sync endpoints and
+             run_in_threadpool work run elsewhere and are not seen.
+
+Both see whatever else the process does meanwhile, so profile on a quiet
+worker where possible. Limits keep it safe to leave enabled: one profile
+at a time, REQUEST_PROFILER_MAX_PER_MINUTE per worker, and sampling stops
+after REQUEST_PROFILER_MAX_SECONDS. Requests over the limits are served
+unprofiled. Profiles are kept in a per-worker ring buffer shown in the
+admin panel.
+"""
+
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+PROFILE_QUERY_PARAM = "_profile"
+MODES = ("sample", "cprofile")
+
+# A sampled thread whose innermost frame is in one of these is waiting, not working
+IDLE_FILES = ("threading.py", "selectors.py", "queue.py")
+
+SUMMARY_LINES = 40
+
+Frame = Tuple[str, str, int]  # (function, file, first line of the function)
+
+
+def requested_mode(headers, query_params) -> Optional[str]:
+    """Profiling mode asked for by the request, if any ("1" means sample)."""
+    value = headers.get(PROFILE_HEADER) or query_params.get(PROFILE_QUERY_PARAM)
+    if not value:
+        return None
+    value = value.strip().lower()
+    if value in ("1", "true"):
+        return "sample"
+    return value if value in MODES else None
+
+
+class StoredProfile:
+    """A captured request profile in the ring buffer."""
+
+    def __init__(self, profile_id: int, method: str, path: str, mode: str, admin: str,
+                 duration: float, content: bytes, summary: str, detail: str):
+        self.id = profile_id
+        self.created_at = datetime.utcnow()
+        self.method = method
+        self.path = path
+        self.mode = mode
+        self.admin = admin
+        self.duration = duration  # seconds
+        self.content = content
+        self.summary = summary
+        self.detail = detail  # "312 samples" / "48211 calls"
+
+    @property
+    def filename(self) -> str:
+        extension = "speedscope.json" if self.mode == "sample" else "pstats"
+        return f"profile-{self.id}-{self.created_at:%Y%m%d-%H%M%S}.{extension}"
+
+    @property
+    def media_type(self) -> str:
+        return "application/json" if self.mode == "sample" else "application/octet-stream"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "created_at": self.created_at.isoformat(),
+            "method": self.method,
+            "path": self.path,
+            "mode": self.mode,
+            "admin": self.admin,
+            "duration_ms": round(self.duration * 1000, 1),
+            "size_bytes": len(self.content),
+            "detail": self.detail,
+        }
+
+
+# ----------------------------------------------------------------------------
+# Stack sampling
+# ----------------------------------------------------------------------------
+
+class StackSampler(threading.Thread):
+    """Samples the stacks of all other threads until stopped or out of budget."""
+
+    def __init__(self, interval: float, max_seconds: float, main_thread_id: int):
+        super().__init__(name="request-profiler-sampler", daemon=True)
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.main_thread_id = main_thread_id
+        self.samples: Dict[int, List[Tuple[Tuple[Frame, ...], float]]] = {}
+        self.thread_names: Dict[int, str] = {}
+        self.truncated = False
+        self.started_at = 0.0
+        self.stopped_at = 0.0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        self.started_at = last = time.perf_counter()
+        while not self._stop_event.wait(self.interval):
+            now = time.perf_counter()
+            if now - self.started_at > self.max_seconds:
+                self.truncated = True
+                break
+            weight, last = now - last, now
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == self.ident:
+                    continue
+                stack = _stack(frame)
+                if not stack or os.path.basename(stack[-1][1]) in IDLE_FILES:
+                    continue
+                self.samples.setdefault(thread_id, []).append((stack, weight))
+        self.stopped_at = time.perf_counter()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id in self.samples:
+            label = names.get(thread_id, f"thread {thread_id}")
+            self.thread_names[thread_id] = f"{label} (event loop)" if thread_id == self.main_thread_id else label
+
+    @property
+    def sample_count(self) -> int:
+        return sum(len(samples) for samples in self.samples.values())
+
+    def speedscope(self, name: str) -> Dict[str, Any]:
+        """Speedscope file: one sampled profile per thread, stacks root first."""
+        frames: List[Dict[str, Any]] = []
+        frame_index: Dict[Frame, int] = {}
+        profiles = []
+        for thread_id, samples in self.samples.items():
+            stacks, weights = [], []
+            for stack, weight in samples:
+                indexes = []
+                for frame in stack:
+                    if frame not in frame_index:
+                        frame_index[frame] = len(frames)
+                        frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                    indexes.append(frame_index[frame])
+                stacks.append(indexes)
+                weights.append(weight)
+            profiles.append({
+                "type": "sampled",
+                "name": self.thread_names.get(thread_id, str(thread_id)),
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": stacks,
+                "weights": weights,
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "carhythm-request-profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+    def summary(self) -> str:
+        """Functions by inclusive and self share of the samples, across threads."""
+        total = self.sample_count
+        if not total:
+            return "No busy samples captured (the request finished between samples or only waited)."
+        inclusive: Counter = Counter()
+        own: Counter = Counter()
+        for samples in self.samples.values():
+            for stack, _ in samples:
+                own[_label(stack[-1])] += 1
+                for label in {_label(frame) for frame in stack}:
+                    inclusive[label] += 1
+
+        lines = [f"{total} samples at {self.interval * 1000:.0f} ms"
+                 + (" (stopped at the time limit)" if self.truncated else ""), "", "Self:"]
+        lines += [f"{n / total * 100:6.1f}%  {label}" for label, n in own.most_common(SUMMARY_LINES // 2)]
+        lines += ["", "Inclusive:"]
+        lines += [f"{n / total * 100:6.1f}%  {label}" for label, n in inclusive.most_common(SUMMARY_LINES // 2)]
+        return "\n".join(lines)
+
+
+def _stack(frame) -> Tuple[Frame, ...]:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    return tuple(reversed(stack))
+
+
+def _label(frame: Frame) -> str:
+    return f"{frame[0]} ({os.path.basename(frame[1])}:{frame[2]})"
+
+
+# ----------------------------------------------------------------------------
+# Profiler with limits and ring buffer
+# ----------------------------------------------------------------------------
+
+class RequestProfiler:
+    """Runs one profile at a time within a per-minute budget and keeps the recent ones."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._busy = threading.Lock()
+        self._recent_starts: Deque[float] = deque()
+        self._profiles: Deque[StoredProfile] = deque(maxlen=settings.REQUEST_PROFILER_BUFFER_SIZE)
+        self._next_id = 1
+        self.skipped_total = 0
+
+    def _admit(self) -> bool:
+        """Take the profiling slot if free and within the per-minute budget."""
+        if not self._busy.acquire(blocking=False):
+            return False
+        with self._lock:
+            now = time.monotonic()
+            while self._recent_starts and now - self._recent_starts[0] > 60:
+                self._recent_starts.popleft()
+            if len(self._recent_starts) >= settings.REQUEST_PROFILER_MAX_PER_MINUTE:
+                self._busy.release()
+                return False
+            self._recent_starts.append(now)
+        return True
+
+    @contextmanager
+    def profile(self, method: str, path: str, mode: str, admin: str) -> Iterator[bool]:
+        """Profile the block; yields False (and doesn't profile) when over the limits."""
+        if not settings.REQUEST_PROFILER_ENABLED or not self._admit():
+            self.skipped_total += 1
+            logger.info(f"Request profile of {method} {path} skipped: profiler busy or over its rate limit")
+            yield False
+            return
+
+        profiler = sampler = None
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError as e:
+                # Another profiler (debugger, coverage) already owns the hooks
+                self._busy.release()
+                logger.warning(f"Request profile of {method} {path} skipped: {e}")
+                yield False
+                return
+        else:
+            sampler = StackSampler(settings.REQUEST_PROFILER_INTERVAL_MS / 1000,
+                                   settings.REQUEST_PROFILER_MAX_SECONDS, threading.get_ident())
+            sampler.start()
+
+        started = time.perf_counter()
+        try:
+            yield True
+        finally:
+            # Failed requests are stored too; they are often the interesting ones
+            try:
+                if profiler is not None:
+                    profiler.disable()
+                    duration = time.perf_counter() - started
+                    content, summary, detail = _pstats_output(profiler)
+                else:
+                    sampler.stop()
+                    duration = time.perf_counter() - started
+                    content = json.dumps(sampler.speedscope(f"{method} {path}")).encode("utf-8")
+                    summary, detail = sampler.summary(), f"{sampler.sample_count} samples"
+                self._store(method, path, mode, admin, duration, content, summary, detail)
+            finally:
+                self._busy.release()
+
+    def _store(self, method: str, path: str, mode: str, admin: str, duration: float,
+               content: bytes, summary: str, detail: str) -> StoredProfile:
+        with self._lock:
+            stored = StoredProfile(self._next_id, method, path, mode, admin, duration, content, summary, detail)
+            self._next_id += 1
+            self._profiles.append(stored)
+        logger.info(f"Profiled {method} {path} ({mode}, {duration * 1000:.0f} ms) as profile {stored.id}")
+        return stored
+
+    def profiles(self) -> List[StoredProfile]:
+        """Stored profiles, newest first."""
+        with self._lock:
+            return list(reversed(self._profiles))
+
+    def get(self, profile_id: int) -> Optional[StoredProfile]:
+        with self._lock:
+            return next((p for p in self._profiles if p.id == profile_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._profiles.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": settings.REQUEST_PROFILER_ENABLED,
+                "stored": len(self._profiles),
+                "buffer_size": self._profiles.maxlen,
+                "max_per_minute": settings.REQUEST_PROFILER_MAX_PER_MINUTE,
+                "started_last_minute": sum(1 for t in self._recent_starts if time.monotonic() - t <= 60),
+                "skipped_total": self.skipped_total,
+            }
+
+
+def _pstats_output(profiler: cProfile.Profile) -> Tuple[bytes, str, str]:
+    """Binary pstats dump plus a cumulative-time summary."""
+    fd, path = tempfile.mkstemp(suffix=".pstats")
+    os.close(fd)
+    try:
+        profiler.dump_stats(path)
+        with open(path, "rb") as f:
+            content = f.read()
+    finally:
+        os.remove(path)
+
+    text = io.StringIO()
+    stats = pstats.Stats(profiler, stream=text)
+    stats.strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE).print_stats(SUMMARY_LINES)
+    return content, text.getvalue().strip(), f"{stats.total_calls} calls"
+
+
+request_profiler = RequestProfiler()
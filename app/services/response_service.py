@@ -1,16 +1,28 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import or_, delete, update, select
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy.sql import func
-from ..models import StudentResponse, QuestionAnswer, Question, SessionStatus, Page
+from ..models import (
+    StudentResponse, QuestionAnswer, Question, SessionStatus, Page, AssessmentScore, Feedback, EmailOutbox
+)
 from ..schemas import StudentResponseCreate, QuestionAnswerCreate
-from typing import List, Optional, Dict
-from datetime import datetime, timedelta
+from ..utils.helpers import keyset_after
+from . import analytics_rollup, stats_cache
+from typing import List, NamedTuple, Optional, Dict, Tuple, Any
+from datetime import datetime, timedelta, date
+import json
 import uuid
 
+RESULTS_PAGE_SIZE = 50
+RESULTS_MAX_PAGE_SIZE = 200
+BULK_DELETE_CHUNK_SIZE = 500  # ids per DELETE ... IN (...) statement and transaction
+
 def create_student_response(db: Session, response: StudentResponseCreate) -> StudentResponse:
     """Create a new student response record."""
     db_response = StudentResponse(**response.dict())
     db.add(db_response)
+    analytics_rollup.record_started(db)
     db.commit()
+    stats_cache.invalidate_responses()
     db.refresh(db_response)
     return db_response
 
@@ -24,8 +36,11 @@ def complete_student_response(db: Session, session_id: str) -> Optional[StudentR
     if not db_response:
         return None
     
+    if db_response.completed_at is None:
+        analytics_rollup.record_completed(db, db_response.country)
     db_response.completed_at = func.now()
     db.commit()
+    stats_cache.invalidate_responses()
     db.refresh(db_response)
     return db_response
 
@@ -56,10 +71,126 @@ def get_all_responses(db: Session, skip: int = 0, limit: int = 100) -> List[Stud
     """Get all student responses."""
     return db.query(StudentResponse).order_by(StudentResponse.created_at.desc()).offset(skip).limit(limit).all()
 
+def list_responses_page(
+    db: Session,
+    cursor: Optional[int] = None,
+    limit: int = RESULTS_PAGE_SIZE,
+    status: Optional[SessionStatus] = None,
+    completion: Optional[str] = None,
+    country: Optional[str] = None,
+    holland_code: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    search: Optional[str] = None,
+) -> Tuple[List[Any], Optional[int]]:
+    """
+    One page of responses, newest first, for the admin results list.
+
+    Pagination is keyset on (created_at, id): `cursor` is the id of the last
+    row of the previous page, so every page is an index range scan no matter
+    how deep it is. Returns (rows, next_cursor); each row is
+    (StudentResponse, score_id, riasec_profile) and next_cursor is None on
+    the last page. Filters are combined with AND.
+    """
+    limit = max(1, min(limit, RESULTS_MAX_PAGE_SIZE))
+    query = db.query(StudentResponse, AssessmentScore.id, AssessmentScore.riasec_profile).outerjoin(
+        AssessmentScore, AssessmentScore.response_id == StudentResponse.id
+    )
+
+    if status is not None:
+        query = query.filter(StudentResponse.status == status)
+    if completion == "completed":
+        query = query.filter(StudentResponse.completed_at.isnot(None))
+    elif completion == "incomplete":
+        query = query.filter(StudentResponse.completed_at.is_(None))
+    if country:
+        query = query.filter(StudentResponse.country == country)
+    if holland_code:
+        # Prefix match as an index range: "RI" matches "RIA", "RIS", ...
+        code = holland_code.replace("-", "").strip().upper()
+        upper_bound = code[:-1] + chr(ord(code[-1]) + 1)
+        query = query.filter(AssessmentScore.riasec_profile >= code, AssessmentScore.riasec_profile < upper_bound)
+    if date_from:
+        query = query.filter(StudentResponse.created_at >= datetime.combine(date_from, datetime.min.time()))
+    if date_to:
+        query = query.filter(StudentResponse.created_at < datetime.combine(date_to + timedelta(days=1), datetime.min.time()))
+    if search:
+        pattern = f"%{search.strip()}%"
+        query = query.filter(or_(
+            StudentResponse.full_name.ilike(pattern),
+            StudentResponse.email.ilike(pattern),
+            StudentResponse.session_id.ilike(pattern)
+        ))
+
+    if cursor is not None:
+        query = keyset_after(query, StudentResponse, cursor)
+
+    rows = query.order_by(StudentResponse.created_at.desc(), StudentResponse.id.desc()).limit(limit + 1).all()
+    next_cursor = rows[limit - 1][0].id if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+def get_response_countries(db: Session) -> List[str]:
+    """Distinct countries that have responses, for the results filter."""
+    return [row[0] for row in db.query(StudentResponse.country).distinct().order_by(StudentResponse.country)]
+
 def get_response_with_answers(db: Session, response_id: int) -> Optional[StudentResponse]:
     """Get student response with all answers."""
     return db.query(StudentResponse).filter(StudentResponse.id == response_id).first()
 
+class AnswerDetail(NamedTuple):
+    """An answer with the question it belongs to."""
+    question: Question
+    answer: QuestionAnswer
+
+
+class ResponseDetail(NamedTuple):
+    """Admin view of one response: answers in answer order, scores and their decoded label JSON."""
+    response: StudentResponse
+    answers: List[AnswerDetail]
+    scores: Optional[AssessmentScore]
+    riasec_labels: Dict[str, Any]
+    bigfive_labels: Dict[str, Any]
+    behavioral_flags: Dict[str, Any]
+    ikigai_zones: Dict[str, Any]
+
+
+def _load_json(value: Optional[str]) -> Dict[str, Any]:
+    if not value:
+        return {}
+    try:
+        return json.loads(value)
+    except (TypeError, ValueError):
+        return {}
+
+def get_response_detail(db: Session, response_id: int) -> Optional[ResponseDetail]:
+    """
+    Load a response for the admin detail page in two queries: the response
+    joined to its scores, then its answers joined to their questions.
+    Answers whose question has been deleted are left out.
+    """
+    response = db.query(StudentResponse).options(
+        joinedload(StudentResponse.scores),
+        selectinload(StudentResponse.answers).joinedload(QuestionAnswer.question)
+    ).filter(StudentResponse.id == response_id).first()
+    if not response:
+        return None
+    
+    answers = [
+        AnswerDetail(answer.question, answer)
+        for answer in sorted(response.answers, key=lambda answer: answer.id)
+        if answer.question is not None
+    ]
+    scores = response.scores
+    return ResponseDetail(
+        response=response,
+        answers=answers,
+        scores=scores,
+        riasec_labels=_load_json(scores.riasec_strength_labels) if scores else {},
+        bigfive_labels=_load_json(scores.bigfive_strength_labels) if scores else {},
+        behavioral_flags=_load_json(scores.behavioral_flags) if scores else {},
+        ikigai_zones=_load_json(scores.ikigai_zones) if scores else {},
+    )
+
 def get_answers_by_response(db: Session, response_id: int) -> List[QuestionAnswer]:
     """Get all answers for a specific response."""
     return db.query(QuestionAnswer).filter(QuestionAnswer.response_id == response_id).all()
@@ -70,21 +201,58 @@ def delete_student_response(db: Session, response_id: int) -> bool:
     if not db_response:
         return False
     
+    analytics_rollup.remove_responses(db, [response_id])
     db.delete(db_response)
     db.commit()
+    stats_cache.invalidate_responses()
+    stats_cache.invalidate_feedback()
     return True
 
+def bulk_delete_responses(db: Session, response_ids: List[int],
+                          chunk_size: int = BULK_DELETE_CHUNK_SIZE) -> Dict[str, int]:
+    """
+    Delete many responses and their dependent rows with set-based statements.
+
+    Each chunk of ids is one transaction issuing one DELETE per table
+    (answers, scores, feedback, responses) instead of an ORM load-and-cascade
+    per response. Their contributions to the analytics rollups are subtracted
+    in the same transaction. Queued emails keep their history with response_id
+    cleared. Returns the number of rows deleted per table.
+    """
+    counts = {"student_responses": 0, "question_answers": 0, "assessment_scores": 0, "feedbacks": 0}
+    ids = sorted(set(response_ids))
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        session_ids = select(StudentResponse.session_id).where(StudentResponse.id.in_(chunk))
+        try:
+            analytics_rollup.remove_responses(db, chunk)
+            counts["question_answers"] += db.execute(
+                delete(QuestionAnswer).where(QuestionAnswer.response_id.in_(chunk))
+            ).rowcount
+            counts["assessment_scores"] += db.execute(
+                delete(AssessmentScore).where(AssessmentScore.response_id.in_(chunk))
+            ).rowcount
+            counts["feedbacks"] += db.execute(
+                delete(Feedback).where(Feedback.session_id.in_(session_ids))
+            ).rowcount
+            db.execute(update(EmailOutbox).where(EmailOutbox.response_id.in_(chunk)).values(response_id=None))
+            counts["student_responses"] += db.execute(
+                delete(StudentResponse).where(StudentResponse.id.in_(chunk))
+            ).rowcount
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            stats_cache.invalidate_responses()
+            stats_cache.invalidate_feedback()
+    # Objects for deleted rows may still sit in the identity map
+    db.expire_all()
+    return counts
+
 def get_response_statistics(db: Session) -> Dict:
-    """Get basic statistics about responses."""
-    total_responses = db.query(StudentResponse).count()
-    completed_responses = db.query(StudentResponse).filter(StudentResponse.completed_at.isnot(None)).count()
-    incomplete_responses = total_responses - completed_responses
-    
-    return {
-        "total_responses": total_responses,
-        "completed_responses": completed_responses,
-        "incomplete_responses": incomplete_responses
-    }
+    """Get basic statistics about responses (one aggregate query, cached briefly)."""
+    return stats_cache.get_response_statistics(db)
 
 def mark_session_abandoned(db: Session, session_id: str) -> bool:
     """Mark session as user_abandoned_not_completed."""
@@ -92,6 +260,8 @@ def mark_session_abandoned(db: Session, session_id: str) -> bool:
     if not student_response:
         return False
     
+    if student_response.status != SessionStatus.abandoned and student_response.completed_at is None:
+        analytics_rollup.record_abandoned(db)
     student_response.status = SessionStatus.abandoned
     db.commit()
     return True
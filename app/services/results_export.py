@@ -0,0 +1,152 @@
+"""
+Results export
+Streams every response with its v1.1 scores as CSV in constant memory.
+Rows come from a single outer-joined query fetched in ``yield_per``
+batches and are written to the client in chunks of encoded CSV text.
+"""
+
+import json
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models import StudentResponse, AssessmentScore
+from ..utils.helpers import csv_chunks
+
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+RIASEC_CODES = ('R', 'I', 'A', 'S', 'E', 'C')
+BIGFIVE_CODES = ('O', 'C', 'E', 'A', 'N')
+BEHAVIORAL_FLAGS = ('procrastination_risk', 'perfectionism_risk', 'low_grit_risk',
+                    'poor_regulation_risk', 'growth_mindset')
+
+RESULTS_CSV_HEADER = [
+    'Response ID', 'Session ID', 'Name', 'Email', 'Age Group', 'Country', 'Origin Country',
+    'Started At', 'Completed At', 'Status',
+    # RIASEC raw scores
+    'RIASEC R', 'RIASEC I', 'RIASEC A', 'RIASEC S', 'RIASEC E', 'RIASEC C', 'RIASEC Profile',
+    # RIASEC v1.1 strength labels
+    'RIASEC R Label', 'RIASEC I Label', 'RIASEC A Label', 'RIASEC S Label', 'RIASEC E Label', 'RIASEC C Label',
+    # Big Five raw scores
+    'Big5 O', 'Big5 C', 'Big5 E', 'Big5 A', 'Big5 N',
+    # Big Five v1.1 strength labels
+    'Big5 O Label', 'Big5 C Label', 'Big5 E Label', 'Big5 A Label', 'Big5 N Label',
+    # Behavioral flags v1.1
+    'Procrastination Risk', 'Perfectionism Risk', 'Low Grit Risk', 'Poor Regulation Risk', 'Growth Mindset',
+    'Scores Calculated At'
+]
+
+RESPONSE_COLUMNS = (
+    StudentResponse.id,
+    StudentResponse.session_id,
+    StudentResponse.full_name,
+    StudentResponse.email,
+    StudentResponse.age_group,
+    StudentResponse.country,
+    StudentResponse.origin_country,
+    StudentResponse.created_at,
+    StudentResponse.completed_at,
+)
+
+# Only the score columns the export needs, so wide JSON blobs such as
+# ikigai_zones and rhythm_profile are never fetched
+SCORE_COLUMNS = (
+    AssessmentScore.id.label('score_id'),
+    AssessmentScore.riasec_r_score,
+    AssessmentScore.riasec_i_score,
+    AssessmentScore.riasec_a_score,
+    AssessmentScore.riasec_s_score,
+    AssessmentScore.riasec_e_score,
+    AssessmentScore.riasec_c_score,
+    AssessmentScore.riasec_profile,
+    AssessmentScore.riasec_strength_labels,
+    AssessmentScore.bigfive_openness,
+    AssessmentScore.bigfive_conscientiousness,
+    AssessmentScore.bigfive_extraversion,
+    AssessmentScore.bigfive_agreeableness,
+    AssessmentScore.bigfive_neuroticism,
+    AssessmentScore.bigfive_strength_labels,
+    AssessmentScore.behavioral_flags,
+    AssessmentScore.calculated_at,
+)
+
+SCORE_COLUMN_COUNT = len(RESULTS_CSV_HEADER) - 10
+
+
+def _format_datetime(value) -> str:
+    return value.strftime(DATETIME_FORMAT) if value else ''
+
+
+def _blank_if_none(value) -> Any:
+    return '' if value is None else value
+
+
+def _load_json(value: Optional[str]) -> Dict[str, Any]:
+    if not value:
+        return {}
+    try:
+        return json.loads(value)
+    except (TypeError, ValueError):
+        return {}
+
+
+def iter_result_rows(db: Session, batch_size: Optional[int] = None):
+    """
+    Yield (response columns, score columns) rows for every response, ordered by ID.
+    Responses without scores come back with all score columns set to None.
+    """
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    query = db.query(*RESPONSE_COLUMNS, *SCORE_COLUMNS).outerjoin(
+        AssessmentScore, AssessmentScore.response_id == StudentResponse.id
+    ).order_by(StudentResponse.id).execution_options(yield_per=batch_size)
+    return iter(query)
+
+
+def format_result_row(row) -> List[Any]:
+    """Convert a joined export row into CSV cells matching RESULTS_CSV_HEADER."""
+    cells = [
+        row.id,
+        row.session_id,
+        row.full_name,
+        row.email,
+        row.age_group,
+        row.country,
+        row.origin_country,
+        _format_datetime(row.created_at),
+        _format_datetime(row.completed_at),
+        "Complete" if row.completed_at else "In Progress",
+    ]
+
+    if row.score_id is None:
+        cells.extend([''] * SCORE_COLUMN_COUNT)
+        return cells
+
+    riasec_labels = _load_json(row.riasec_strength_labels)
+    bigfive_labels = _load_json(row.bigfive_strength_labels)
+    behavioral_flags = _load_json(row.behavioral_flags)
+
+    cells.extend(_blank_if_none(v) for v in (
+        row.riasec_r_score, row.riasec_i_score, row.riasec_a_score,
+        row.riasec_s_score, row.riasec_e_score, row.riasec_c_score,
+        row.riasec_profile,
+    ))
+    cells.extend(riasec_labels.get(code, '') for code in RIASEC_CODES)
+    cells.extend(_blank_if_none(v) for v in (
+        row.bigfive_openness, row.bigfive_conscientiousness, row.bigfive_extraversion,
+        row.bigfive_agreeableness, row.bigfive_neuroticism,
+    ))
+    cells.extend(bigfive_labels.get(code, '') for code in BIGFIVE_CODES)
+    cells.extend('Yes' if behavioral_flags.get(flag) else 'No' for flag in BEHAVIORAL_FLAGS)
+    cells.append(_format_datetime(row.calculated_at))
+    return cells
+
+
+def iter_results_csv(db: Session, batch_size: Optional[int] = None,
+                     chunk_rows: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Generate the results CSV as UTF-8 chunks of ``chunk_rows`` rows each.
+    Memory use is bounded by one fetch batch plus one output chunk.
+    """
+    rows = (format_result_row(row) for row in iter_result_rows(db, batch_size))
+    return csv_chunks(rows, RESULTS_CSV_HEADER, chunk_rows or settings.EXPORT_CSV_CHUNK_ROWS)
@@ -12,6 +12,7 @@ NEW APPROACH (v1.1):
 from sqlalchemy.orm import Session
 from typing import Dict, Optional, List, Tuple
 from ..models import StudentResponse, QuestionAnswer, Question, Page, AssessmentScore
+from . import analytics_rollup
 import json
 
 
@@ -431,9 +432,13 @@ def save_assessment_score_v1_1(db: Session, response_id: int, profile: Dict) ->
         AssessmentScore.response_id == response_id
     ).first()
     
+    # Scores count toward the analytics rollups on the day the response completed
+    rollup_day = response.completed_at.date() if response.completed_at else None
+    
     if existing_score:
-        # Update existing
+        # Update existing, replacing its previous contribution to the rollups
         score_record = existing_score
+        analytics_rollup.record_score(db, existing_score, rollup_day, sign=-1)
     else:
         # Create new
         score_record = AssessmentScore(
@@ -475,6 +480,7 @@ def save_assessment_score_v1_1(db: Session, response_id: int, profile: Dict) ->
     # Store complete rhythm profile
     score_record.rhythm_profile = json.dumps(profile)
     
+    analytics_rollup.record_score(db, score_record, rollup_day)
     db.commit()
     db.refresh(score_record)
     
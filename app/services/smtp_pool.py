@@ -0,0 +1,241 @@
+"""
+CaRhythm SMTP Connection Pool
+Keeps authenticated aiosmtplib connections open between messages so each email
+does not pay for a new TCP connection, STARTTLS handshake and AUTH
+"""
+
+import asyncio
+import logging
+import time
+from email.message import Message
+from typing import Any, Dict, List, Optional
+
+import aiosmtplib
+
+from ..config import settings
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean the connection itself is unusable and a fresh one may succeed
+CONNECTION_ERRORS = (
+    aiosmtplib.SMTPServerDisconnected,
+    aiosmtplib.SMTPConnectError,
+    aiosmtplib.SMTPTimeoutError,
+    ConnectionError,
+    OSError,
+    asyncio.TimeoutError,
+)
+
+
+class PooledConnection:
+    """An open SMTP client plus the bookkeeping the pool needs to recycle it"""
+
+    def __init__(self, client: aiosmtplib.SMTP):
+        self.client = client
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.messages_sent = 0
+
+
+class SMTPConnectionPool:
+    """
+    Pool of long-lived SMTP connections.
+
+    - At most `pool_size` messages are in flight at once (extra senders wait).
+    - Idle connections are health-checked with NOOP before reuse and closed
+      once they have been idle longer than `idle_timeout`.
+    - A connection is retired after `max_messages_per_connection` messages.
+    - If a send fails because the connection dropped, it is retried once on
+      a freshly opened connection.
+    """
+
+    def __init__(self, hostname: str, port: int, username: Optional[str] = None,
+                 password: Optional[str] = None, start_tls: bool = True, use_tls: bool = False,
+                 pool_size: int = 2, max_messages_per_connection: int = 50,
+                 idle_timeout: float = 60, health_check_interval: float = 15,
+                 timeout: float = 30):
+        self.hostname = hostname
+        self.port = port
+        self.username = username or None
+        self.password = password or None
+        self.start_tls = start_tls
+        self.use_tls = use_tls
+        self.pool_size = max(1, pool_size)
+        self.max_messages_per_connection = max(1, max_messages_per_connection)
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.timeout = timeout
+
+        self._idle: List[PooledConnection] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self._in_flight = 0
+        self._connections_opened = 0
+        self._connections_closed = 0
+        self._reconnects = 0
+        self._messages_sent = 0
+        self._send_failures = 0
+        self._health_check_failures = 0
+
+    # ------------------------------------------------------------------
+    # Connection lifecycle
+    # ------------------------------------------------------------------
+
+    def _bind_loop(self):
+        """
+        Connections and the semaphore belong to one event loop. If the pool is
+        used from a new loop (e.g. the sync wrappers call asyncio.run), drop
+        state from the old loop rather than touching it from the wrong thread.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            if self._idle:
+                logger.info(f"SMTP pool moved to a new event loop, dropping {len(self._idle)} idle connection(s)")
+                self._connections_closed += len(self._idle)
+            self._idle = []
+            self._semaphore = asyncio.Semaphore(self.pool_size)
+            self._loop = loop
+
+    async def _open(self) -> PooledConnection:
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            username=self.username,
+            password=self.password,
+            use_tls=self.use_tls,
+            start_tls=self.start_tls,
+            timeout=self.timeout,
+        )
+        await client.connect()
+        self._connections_opened += 1
+        logger.debug(f"Opened SMTP connection to {self.hostname}:{self.port}")
+        return PooledConnection(client)
+
+    async def _close(self, connection: PooledConnection):
+        self._connections_closed += 1
+        try:
+            if connection.client.is_connected:
+                await connection.client.quit()
+        except Exception:
+            connection.client.close()
+
+    async def _is_healthy(self, connection: PooledConnection) -> bool:
+        if not connection.client.is_connected:
+            return False
+        if time.monotonic() - connection.last_used < self.health_check_interval:
+            return True
+        try:
+            await connection.client.noop()
+            return True
+        except Exception as e:
+            self._health_check_failures += 1
+            logger.info(f"Idle SMTP connection failed health check: {e}")
+            return False
+
+    async def _checkout(self) -> PooledConnection:
+        """Take the most recently used healthy idle connection, or open a new one."""
+        now = time.monotonic()
+        while self._idle:
+            connection = self._idle.pop()
+            if now - connection.last_used > self.idle_timeout:
+                await self._close(connection)
+                continue
+            if await self._is_healthy(connection):
+                return connection
+            await self._close(connection)
+        return await self._open()
+
+    async def _checkin(self, connection: PooledConnection):
+        connection.last_used = time.monotonic()
+        if (connection.messages_sent >= self.max_messages_per_connection
+                or not connection.client.is_connected):
+            await self._close(connection)
+            return
+        self._idle.append(connection)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def send_message(self, message: Message, **kwargs) -> Any:
+        """
+        Send a message on a pooled connection.
+        Raises the underlying aiosmtplib error if the send ultimately fails.
+        """
+        self._bind_loop()
+        async with self._semaphore:
+            self._in_flight += 1
+            started = time.perf_counter()
+            ok = False
+            try:
+                result = await self._send(message, **kwargs)
+                ok = True
+                return result
+            finally:
+                self._in_flight -= 1
+                metrics.observe_smtp_send(time.perf_counter() - started, ok)
+
+    async def _send(self, message: Message, **kwargs) -> Any:
+        connection = await self._checkout()
+        try:
+            result = await connection.client.send_message(message, **kwargs)
+        except CONNECTION_ERRORS as e:
+            # Connection went stale between health check and send - retry once fresh
+            logger.warning(f"SMTP connection dropped during send, reconnecting: {e}")
+            await self._close(connection)
+            self._reconnects += 1
+            metrics.record_smtp_retry()
+            connection = await self._open()
+            try:
+                result = await connection.client.send_message(message, **kwargs)
+            except Exception:
+                self._send_failures += 1
+                await self._close(connection)
+                raise
+        except Exception:
+            # Protocol-level failure (e.g. recipient refused) - don't reuse this session
+            self._send_failures += 1
+            await self._close(connection)
+            raise
+
+        connection.messages_sent += 1
+        self._messages_sent += 1
+        await self._checkin(connection)
+        return result
+
+    async def close(self):
+        """Close all idle connections (called on application shutdown)."""
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            await self._close(connection)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool usage counters."""
+        return {
+            "pool_size": self.pool_size,
+            "idle_connections": len(self._idle),
+            "in_flight": self._in_flight,
+            "connections_opened": self._connections_opened,
+            "connections_closed": self._connections_closed,
+            "reconnects": self._reconnects,
+            "messages_sent": self._messages_sent,
+            "send_failures": self._send_failures,
+            "health_check_failures": self._health_check_failures,
+        }
+
+
+# Global pool used by email_service
+smtp_pool = SMTPConnectionPool(
+    hostname=settings.SMTP_HOST,
+    port=settings.SMTP_PORT,
+    username=settings.SMTP_USER,
+    password=settings.SMTP_PASSWORD,
+    start_tls=settings.SMTP_START_TLS,
+    pool_size=settings.SMTP_POOL_SIZE,
+    max_messages_per_connection=settings.SMTP_MAX_MESSAGES_PER_CONNECTION,
+    idle_timeout=settings.SMTP_POOL_IDLE_TIMEOUT,
+    health_check_interval=settings.SMTP_HEALTH_CHECK_INTERVAL,
+    timeout=settings.SMTP_SEND_TIMEOUT,
+)
@@ -0,0 +1,199 @@
+"""
+CaRhythm SQL Instrumentation
+SQLAlchemy cursor events count statements and accumulate database time for
+the request in progress. The ASGI middleware reports the totals in a
+Server-Timing header, logs slow queries with their parameters redacted, and
+warns when one statement shape repeats often enough within a request to
+suggest an N+1 pattern. capture_queries() collects statements from every
+thread for a block of code, which the tests use to enforce query budgets.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+# Expanded IN lists render one placeholder per value; fold them so
+# `IN (?, ?)` and `IN (?, ?, ?)` count as the same statement shape
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%s|:\w+)(?:\s*,\s*(?:\?|%s|:\w+))*\s*\)")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalise a statement so repeats differing only in bound values compare equal."""
+    return _PLACEHOLDER_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+def redact_parameters(parameters) -> str:
+    """Describe bound parameters by type only, so values never reach the logs."""
+    if parameters is None:
+        return "[]"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (list, tuple, dict)):
+            # executemany: describe the first row only
+            return f"{len(parameters)} x {redact_parameters(parameters[0])}"
+        return "[" + ", ".join(type(value).__name__ for value in parameters) + "]"
+    return type(parameters).__name__
+
+
+class QueryStats:
+    """Statement count, database time and per-shape repeats for one request or block."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0  # seconds
+        self.shapes: Counter = Counter()
+        self.statements: List[str] = []
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, duration: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.duration += duration
+            self.shapes[statement_shape(statement)] += 1
+            self.statements.append(statement)
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration * 1000
+
+    def repeated(self, threshold: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Statement shapes issued at least `threshold` times: probable N+1 queries."""
+        threshold = threshold or settings.SQL_N_PLUS_ONE_THRESHOLD
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+    def report(self) -> str:
+        """Human-readable summary, most repeated statements first."""
+        lines = [f"{self.count} queries in {self.duration_ms:.1f} ms"]
+        lines += [f"  {n} x {shape}" for shape, n in self.shapes.most_common(10)]
+        return "\n".join(lines)
+
+
+_request_stats: ContextVar[Optional[QueryStats]] = ContextVar("sql_request_stats", default=None)
+_captures: List[QueryStats] = []
+_captures_lock = threading.Lock()
+_installed = False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.record(statement, duration)
+    if _captures:
+        with _captures_lock:
+            for capture in _captures:
+                capture.record(statement, duration)
+
+    if duration * 1000 >= settings.SQL_SLOW_QUERY_MS:
+        logger.warning(f"Slow query ({duration * 1000:.1f} ms): {statement_shape(statement)} "
+                       f"params={redact_parameters(parameters)}")
+
+
+def _handle_error(exception_context):
+    # Failed statements never reach after_cursor_execute; drop their start time
+    starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+def install() -> None:
+    """Register the cursor event hooks on every engine (idempotent)."""
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+    _installed = True
+
+
+def current_stats() -> Optional[QueryStats]:
+    """Stats of the request being served in this context, if any."""
+    return _request_stats.get()
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Count queries issued from the current context (request task and the threads it hands work to)."""
+    stats = QueryStats()
+    token = _request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_stats.reset(token)
+
+
+@contextmanager
+def capture_queries() -> Iterator[QueryStats]:
+    """Count every query issued from any thread while the block runs."""
+    install()
+    stats = QueryStats()
+    with _captures_lock:
+        _captures.append(stats)
+    try:
+        yield stats
+    finally:
+        with _captures_lock:
+            _captures.remove(stats)
+
+
+def server_timing(stats: QueryStats, total: float) -> str:
+    """Server-Timing header value for a request's database and total time (seconds)."""
+    return (f'db;dur={stats.duration_ms:.1f};desc="{stats.count} queries", '
+            f'app;dur={total * 1000:.1f}')
+
+
+class SQLInstrumentationMiddleware:
+    """
+    ASGI middleware that tracks each HTTP request's queries. The header covers
+    queries made before the response started; statements issued while a body
+    streams or in background tasks are still included in the N+1 check.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        with track_queries() as stats:
+            async def send_with_timing(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    value = server_timing(stats, time.perf_counter() - started)
+                    headers.append((b"server-timing", value.encode("latin-1")))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                for shape, n in stats.repeated():
+                    logger.warning(f"Probable N+1 in {scope.get('method')} {scope.get('path')}: "
+                                   f"{n} x {shape}")
+
@@ -0,0 +1,165 @@
+"""
+CaRhythm Statistics Cache
+Dashboard, response and feedback statistics computed with one aggregate query
+per table and cached in-process for STATS_CACHE_TTL seconds. Write paths that
+change the counts invalidate the affected entries, so admins see their own
+changes immediately; the TTL bounds staleness for writes made by other workers.
+"""
+
+import copy
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Tuple
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models import Page, Question, StudentResponse, Feedback
+from ..models.question_pool import QuestionPool
+
+logger = logging.getLogger(__name__)
+
+# Cache keys
+DASHBOARD = "dashboard"
+RESPONSES = "responses"
+FEEDBACK = "feedback"
+
+
+class StatsCache:
+    """Thread-safe TTL cache of small statistics dicts with per-key hit/miss counters."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, key: str, event: str) -> None:
+        counters = self._counters.setdefault(key, {"hits": 0, "misses": 0, "invalidations": 0})
+        counters[event] += 1
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for `key`, computing and storing it when missing or expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._count(key, "hits")
+                return copy.deepcopy(entry[1])
+            self._count(key, "misses")
+
+        # Computed outside the lock; concurrent misses may both query, which is harmless
+        value = compute()
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+        return copy.deepcopy(value)
+
+    def invalidate(self, *keys: str) -> None:
+        """Drop the given entries (all entries when no key is given)."""
+        with self._lock:
+            for key in keys or tuple(self._entries):
+                if self._entries.pop(key, None) is not None:
+                    self._count(key, "invalidations")
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/invalidation counters and hit rate per key."""
+        with self._lock:
+            now = time.monotonic()
+            keys = {}
+            hits = misses = 0
+            for key, counters in self._counters.items():
+                lookups = counters["hits"] + counters["misses"]
+                entry = self._entries.get(key)
+                keys[key] = {
+                    **counters,
+                    "hit_rate": round(counters["hits"] / lookups, 4) if lookups else None,
+                    "cached": entry is not None and entry[0] > now,
+                    "expires_in": round(entry[0] - now, 1) if entry is not None and entry[0] > now else None,
+                }
+                hits += counters["hits"]
+                misses += counters["misses"]
+
+        return {
+            "ttl_seconds": self.ttl,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+            "keys": keys,
+        }
+
+
+stats_cache = StatsCache(ttl=settings.STATS_CACHE_TTL)
+
+
+def _compute_dashboard_counts(db: Session) -> Dict[str, int]:
+    row = db.execute(select(
+        select(func.count(Page.id)).scalar_subquery().label("total_pages"),
+        select(func.count(Question.id)).scalar_subquery().label("total_questions"),
+        select(func.count(StudentResponse.id)).scalar_subquery().label("total_responses"),
+        select(func.count(QuestionPool.id)).scalar_subquery().label("total_pool_questions"),
+        select(func.count(Feedback.id)).scalar_subquery().label("total_feedbacks"),
+    )).one()
+    return dict(row._mapping)
+
+
+def _compute_response_statistics(db: Session) -> Dict[str, int]:
+    total, completed = db.execute(select(
+        func.count(StudentResponse.id),
+        func.count(StudentResponse.completed_at),
+    )).one()
+    return {
+        "total_responses": total,
+        "completed_responses": completed,
+        "incomplete_responses": total - completed,
+    }
+
+
+def _compute_feedback_stats(db: Session) -> Dict[str, Any]:
+    row = db.execute(select(
+        func.count(Feedback.id).label("total_feedbacks"),
+        func.avg(Feedback.rating).label("average_rating"),
+        func.count(Feedback.rating).label("total_with_rating"),
+        func.coalesce(func.sum(case((Feedback.would_recommend == True, 1), else_=0)), 0).label("would_recommend_count"),
+        func.coalesce(func.sum(case((Feedback.would_recommend == False, 1), else_=0)), 0).label("would_not_recommend_count"),
+    )).one()
+    stats = dict(row._mapping)
+    stats["average_rating"] = round(stats["average_rating"], 2) if stats["average_rating"] else None
+    return stats
+
+
+def get_dashboard_counts(db: Session) -> Dict[str, int]:
+    """Page, question, response, pool question and feedback totals for the admin dashboard."""
+    return stats_cache.get_or_compute(DASHBOARD, lambda: _compute_dashboard_counts(db))
+
+
+def get_response_statistics(db: Session) -> Dict[str, int]:
+    """Total, completed and incomplete response counts."""
+    return stats_cache.get_or_compute(RESPONSES, lambda: _compute_response_statistics(db))
+
+
+def get_feedback_stats(db: Session) -> Dict[str, Any]:
+    """Feedback count, average rating and recommendation counts."""
+    return stats_cache.get_or_compute(FEEDBACK, lambda: _compute_feedback_stats(db))
+
+
+def invalidate_responses() -> None:
+    """Call after responses are created, completed or deleted."""
+    stats_cache.invalidate(DASHBOARD, RESPONSES)
+
+
+def invalidate_feedback() -> None:
+    """Call after feedback is created, updated or deleted."""
+    stats_cache.invalidate(DASHBOARD, FEEDBACK)
+
+
+def invalidate_content() -> None:
+    """Call after pages, questions or pool questions are created or deleted."""
+    stats_cache.invalidate(DASHBOARD)
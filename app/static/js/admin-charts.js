@@ -110,11 +110,12 @@ function createResponseTrendChart(canvas, trendData) {
     });
 }
 
-function createCompletionRateChart(canvas) {
+function createCompletionRateChart(canvas, stats) {
+    const incomplete = (stats.in_progress || 0) + (stats.abandoned || 0);
     const data = {
         labels: ['Completed', 'Incomplete'],
         datasets: [{
-            data: [75, 25],
+            data: [stats.completed, incomplete],
             backgroundColor: [
                 '#27AE60',
                 '#E74C3C'
@@ -1,7 +1,11 @@
+import csv
+import io
 import uuid
 import os
-from typing import Optional
-from fastapi import UploadFile
+from typing import Any, Iterable, Iterator, Optional, Sequence, Tuple
+from fastapi import UploadFile, Request
+from sqlalchemy import and_, or_
+from fastapi.responses import Response, FileResponse, StreamingResponse
 
 def generate_session_id() -> str:
     """Generate a unique session ID."""
@@ -51,4 +55,122 @@ def format_datetime(dt) -> str:
     """Format datetime for display."""
     if dt:
         return dt.strftime("%Y-%m-%d %H:%M:%S")
-    return "N/A"
\ No newline at end of file
+    return "N/A"
+
+def keyset_after(query, model, cursor: int):
+    """
+    Restrict a query ordered by (created_at DESC, id DESC) to the rows after
+    `cursor`, the id of the last row of the previous page.
+    """
+    anchor_exists = query.session.query(model.id).filter(model.id == cursor).first()
+    if not anchor_exists:
+        # Anchor row was deleted; ids follow creation order closely enough to resume
+        return query.filter(model.id < cursor)
+    # Compare against the stored value of the anchor row rather than a
+    # re-bound timestamp, so the comparison is exact
+    anchor_created = query.session.query(model.created_at).filter(model.id == cursor).scalar_subquery()
+    return query.filter(or_(
+        model.created_at < anchor_created,
+        and_(model.created_at == anchor_created, model.id < cursor)
+    ))
+
+def csv_chunks(rows: Iterable[Sequence[Any]], header: Sequence[str], chunk_rows: int) -> Iterator[bytes]:
+    """Write a header and rows as CSV, yielding UTF-8 chunks of `chunk_rows` rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+
+    tail = buffer.getvalue()
+    if tail:
+        yield tail.encode('utf-8')
+
+def _parse_byte_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single `bytes=start-end` range against a file size.
+    Returns (start, end) inclusive, or None if the header is not a single byte range.
+    Raises ValueError if the range cannot be satisfied.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start_text, sep, end_text = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if start_text == "":
+            # Suffix range: last N bytes
+            length = int(end_text)
+            if length <= 0:
+                raise ValueError("empty suffix range")
+            return max(0, size - length), size - 1
+        start = int(start_text)
+        end = int(end_text) if end_text else size - 1
+    except ValueError:
+        raise ValueError(f"invalid range: {range_header}")
+    if start >= size or start > end:
+        raise ValueError(f"unsatisfiable range: {range_header}")
+    return start, min(end, size - 1)
+
+def ranged_file_response(request: Request, path: str, etag: str, media_type: str,
+                         filename: Optional[str] = None, max_age: int = 0) -> Response:
+    """
+    Serve a file with a strong ETag, conditional GET (If-None-Match) and
+    single byte-range requests (Range / If-Range).
+
+    Multi-range requests are answered with the full file, which RFC 9110 allows.
+    """
+    size = os.path.getsize(path)
+    quoted_etag = f'"{etag}"'
+    headers = {
+        "ETag": quoted_etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": f"private, max-age={max_age}",
+    }
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or quoted_etag in [t.strip() for t in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() == quoted_etag):
+        try:
+            byte_range = _parse_byte_range(range_header, size)
+        except ValueError:
+            headers["Content-Range"] = f"bytes */{size}"
+            return Response(status_code=416, headers=headers)
+
+        if byte_range is not None:
+            start, end = byte_range
+            length = end - start + 1
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            headers["Content-Length"] = str(length)
+            if request.method == "HEAD":
+                return Response(status_code=206, headers=headers, media_type=media_type)
+
+            def read_range(chunk_size: int = 64 * 1024):
+                with open(path, "rb") as f:
+                    f.seek(start)
+                    remaining = length
+                    while remaining > 0:
+                        chunk = f.read(min(chunk_size, remaining))
+                        if not chunk:
+                            break
+                        remaining -= len(chunk)
+                        yield chunk
+
+            return StreamingResponse(read_range(), status_code=206, headers=headers, media_type=media_type)
+
+    return FileResponse(path, headers=headers, media_type=media_type, method=request.method)
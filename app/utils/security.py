@@ -37,9 +37,31 @@ def verify_token(token: str):
     """Verify and decode a JWT token."""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        if payload.get("scope") == "report":
+            # Report download links must never authenticate an admin session
+            return None
         username: str = payload.get("sub")
         if username is None:
             return None
         return username
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+
+def create_report_token(session_id: str, expires_delta: timedelta) -> str:
+    """Create a signed, expiring token for a student's report download link."""
+    to_encode = {
+        "sub": session_id,
+        "scope": "report",
+        "exp": datetime.utcnow() + expires_delta,
+    }
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+def verify_report_token(token: str) -> Optional[str]:
+    """Return the session ID from a valid report download token, or None."""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    if payload.get("scope") != "report":
+        return None
+    return payload.get("sub")
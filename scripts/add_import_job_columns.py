@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Database Migration Script: Add Import Job Columns
+Adds the background job progress columns to 'import_logs'. Existing rows
+are marked completed, since earlier imports ran synchronously.
+
+Usage:
+    python scripts/add_import_job_columns.py
+"""
+
+import sqlite3
+import sys
+import os
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+DB_PATH = "career_dna.db"
+BACKUP_SUFFIX = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+IMPORT_JOB_COLUMNS = [
+    ("status", "VARCHAR(9)"),
+    ("processed_rows", "INTEGER DEFAULT 0"),
+    ("cancel_requested", "BOOLEAN DEFAULT 0"),
+    ("upload_path", "VARCHAR(500)"),
+    ("started_at", "DATETIME"),
+    ("finished_at", "DATETIME"),
+]
+
+
+def create_backup(db_path):
+    """Create backup of database before migration"""
+    backup_path = f"{db_path}.backup_{BACKUP_SUFFIX}"
+    import shutil
+    shutil.copy2(db_path, backup_path)
+    print(f"✅ Backup created: {backup_path}")
+    return backup_path
+
+
+def add_import_job_columns(cursor):
+    """Add job status/progress columns to the import_logs table"""
+    print("\n📝 Adding job columns to 'import_logs' table...")
+
+    for col_name, col_type in IMPORT_JOB_COLUMNS:
+        try:
+            cursor.execute(f"ALTER TABLE import_logs ADD COLUMN {col_name} {col_type};")
+            print(f"   ✓ Added column: {col_name}")
+        except sqlite3.OperationalError as e:
+            if "duplicate column name" in str(e).lower():
+                print(f"   ⚠ Column already exists: {col_name}")
+            else:
+                raise
+
+    cursor.execute(
+        "UPDATE import_logs SET status = 'completed', processed_rows = total_rows "
+        "WHERE status IS NULL;"
+    )
+    print(f"   ✓ Marked {cursor.rowcount} earlier imports as completed")
+
+
+def verify_migration(cursor):
+    """Verify that all columns were added successfully"""
+    print("\n🔍 Verifying migration...")
+
+    cursor.execute("PRAGMA table_info(import_logs);")
+    columns = {row[1] for row in cursor.fetchall()}
+
+    missing = {name for name, _ in IMPORT_JOB_COLUMNS} - columns
+    if missing:
+        print(f"   ❌ Missing columns in import_logs: {missing}")
+        return False
+    print(f"   ✅ All import_logs columns present ({len(IMPORT_JOB_COLUMNS)} columns)")
+    return True
+
+
+def main():
+    """Main migration function"""
+    print("=" * 60)
+    print("📥 IMPORT JOBS MIGRATION - Adding Job Progress Columns")
+    print("=" * 60)
+
+    if not os.path.exists(DB_PATH):
+        print(f"❌ Error: Database not found at {DB_PATH}")
+        print(f"   Current directory: {os.getcwd()}")
+        sys.exit(1)
+
+    try:
+        # Create backup
+        backup_path = create_backup(DB_PATH)
+
+        # Connect to database
+        conn = sqlite3.connect(DB_PATH)
+        cursor = conn.cursor()
+
+        # Run migration
+        add_import_job_columns(cursor)
+
+        # Commit changes
+        conn.commit()
+        print("\n✅ Migration committed successfully")
+
+        # Verify migration
+        if verify_migration(cursor):
+            print("\n✅ Migration completed successfully!")
+        else:
+            print("\n❌ Migration verification failed")
+            print(f"   You can restore from backup: {backup_path}")
+            sys.exit(1)
+
+        # Close connection
+        conn.close()
+
+    except Exception as e:
+        print(f"\n❌ Migration failed: {e}")
+        print(f"   Restore from backup: {backup_path}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Analytics Rollup Backfill
+Rebuilds the daily analytics rollup tables from student responses and
+assessment scores. Run once after upgrading, and whenever the rollups need
+repairing (e.g. after bulk deletions). New activity keeps them current.
+
+Usage:
+    python scripts/backfill_analytics_rollups.py
+    python scripts/backfill_analytics_rollups.py --since 2025-01-01 --until 2025-01-31
+"""
+
+import argparse
+import os
+import sys
+from datetime import date
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models import create_tables
+from app.models.database import SessionLocal
+from app.services.analytics_rollup import rebuild_rollups
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the daily analytics rollup tables")
+    parser.add_argument("--since", type=date.fromisoformat, default=None, help="first day to rebuild (YYYY-MM-DD)")
+    parser.add_argument("--until", type=date.fromisoformat, default=None, help="last day to rebuild (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    create_tables()
+    db = SessionLocal()
+    try:
+        print(f"📊 Rebuilding analytics rollups from {args.since or 'the first response'} "
+              f"to {args.until or 'today'}...")
+        written = rebuild_rollups(db, since=args.since, until=args.until)
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Backfill failed: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    print(f"✅ Wrote {written['activity_days']} activity days, {written['country_rows']} country rows, "
+          f"{written['score_rows']} score rows and {written['label_rows']} label rows")
+
+
+if __name__ == "__main__":
+    main()
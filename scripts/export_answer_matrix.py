@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Answer Matrix Export
+Writes the response x item answer table with score columns to Parquet or
+Arrow IPC for analysts. By default only responses completed since the last
+export are written; pass --full for a complete snapshot.
+
+Requires pyarrow (pip install pyarrow).
+
+Usage:
+    python scripts/export_answer_matrix.py
+    python scripts/export_answer_matrix.py --format arrow --full
+    python scripts/export_answer_matrix.py --output-dir /data/carhythm
+"""
+
+import argparse
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models import create_tables
+from app.models.database import SessionLocal
+from app.services.answer_matrix_export import run_export, last_export_run, EXPORT_FORMATS, PYARROW_AVAILABLE
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the response x item answer matrix for analysis")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="parquet",
+                        help="parquet (compressed) or arrow (IPC file, memory-mappable)")
+    parser.add_argument("--full", action="store_true",
+                        help="export every completed response instead of those since the last run")
+    parser.add_argument("--output-dir", default=None, help="directory for export files (default: ANSWER_EXPORT_DIR)")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="responses per row group (default: ANSWER_EXPORT_ROW_GROUP_SIZE)")
+    args = parser.parse_args()
+
+    if not PYARROW_AVAILABLE:
+        print("❌ pyarrow is not installed. Run: pip install pyarrow")
+        sys.exit(1)
+
+    create_tables()
+    db = SessionLocal()
+    try:
+        previous = None if args.full else last_export_run(db)
+        if previous:
+            print(f"📦 Incremental export of responses completed after {previous.until:%Y-%m-%d %H:%M:%S} UTC")
+        else:
+            print("📦 Full export of all completed responses")
+
+        run = run_export(db, fmt=args.format, incremental=not args.full,
+                         output_dir=args.output_dir, batch_size=args.batch_size)
+    except Exception as e:
+        print(f"❌ Export failed: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    print(f"✅ Wrote {run.row_count} responses x {run.item_count} items "
+          f"({run.size_bytes / 1024:.0f} KiB) to {run.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,410 @@
+"""
+CaRhythm Student Journey Load Harness
+Drives the real API the way the student app does, for many students at
+once: start a session, load the modules, then for every page fetch its
+questions, submit each answer and check progress, and finally submit the
+student's details, which scores the assessment and queues the results email.
+
+Each request is timed and recorded under its route, giving p50/p95/p99,
+throughput and error rates per endpoint. Results go to JSON so runs can be
+compared between commits with compare_results(). The outbox delivers the
+results emails to an SMTPSink (a local aiosmtpd server), so the run also
+reports how many emails arrived and when the last one did.
+
+scripts/load_test.py runs it in-process (httpx.ASGITransport, a throwaway
+database seeded with seed_assessment()) or against a uvicorn server. This
+module only imports app lazily, so the script can point the settings at
+that database before anything reads them.
+"""
+
+import asyncio
+import math
+import random
+import socket
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+try:
+    from aiosmtpd.controller import Controller
+    AIOSMTPD_AVAILABLE = True
+except ImportError:
+    AIOSMTPD_AVAILABLE = False
+
+API = "/api/v2"
+
+# Route labels, in journey order
+START = f"POST {API}/session/start"
+MODULES = f"GET {API}/modules"
+QUESTIONS = f"GET {API}/questions"
+SUBMIT = f"POST {API}/answers/submit"
+PROGRESS = f"GET {API}/session/{{session_id}}/progress"
+FINALIZE = f"POST {API}/student/info"
+ENDPOINTS = (START, MODULES, QUESTIONS, SUBMIT, PROGRESS, FINALIZE)
+
+PERCENTILES = (50, 95, 99)
+
+# The scored v1.1 assessment: (page order_index, module, item prefix, domains, items per domain)
+ASSESSMENT = [
+    (1, "RIASEC", "R", ['R', 'I', 'A', 'S', 'E', 'C'], 3),
+    (2, "Big Five", "BF", ['O', 'C', 'E', 'A', 'N'], 5),
+    (3, "Work Rhythm", "BH", ['motivation_type', 'grit_persistence', 'self_efficacy',
+                              'resilience', 'learning_orientation', 'empathy', 'task_start_tempo'], 3),
+]
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of values (None when empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = min(max(math.ceil(q / 100 * len(ordered)) - 1, 0), len(ordered) - 1)
+    return ordered[rank]
+
+
+class EndpointStats:
+    """Latencies and outcomes of every request made to one route."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: List[float] = []  # seconds
+        self.statuses: Counter = Counter()
+        self.errors = 0
+
+    def record(self, seconds: float, status: Optional[int]):
+        """Record one request; status None means it failed without a response."""
+        self.latencies.append(seconds)
+        self.statuses[str(status) if status is not None else "exception"] += 1
+        if status is None or status >= 400:
+            self.errors += 1
+
+    @property
+    def requests(self) -> int:
+        return len(self.latencies)
+
+    def to_dict(self, duration: float) -> Dict[str, Any]:
+        data = {
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.requests, 4) if self.requests else 0.0,
+            "throughput_rps": round(self.requests / duration, 2) if duration else 0.0,
+            "statuses": dict(self.statuses),
+        }
+        for q in PERCENTILES:
+            value = percentile(self.latencies, q)
+            data[f"p{q}_ms"] = round(value * 1000, 2) if value is not None else None
+        data["max_ms"] = round(max(self.latencies) * 1000, 2) if self.latencies else None
+        return data
+
+
+class LoadResult:
+    """Outcome of a load run, serialisable for comparison between commits."""
+
+    def __init__(self, students: int, concurrency: int, duration: float,
+                 endpoints: Dict[str, EndpointStats], journeys_completed: int,
+                 errors: List[str], meta: Optional[Dict[str, Any]] = None):
+        self.students = students
+        self.concurrency = concurrency
+        self.duration = duration  # seconds
+        self.endpoints = endpoints
+        self.journeys_completed = journeys_completed
+        self.errors = errors  # first failure of each failed journey
+        self.meta = meta or {}
+        self.email: Dict[str, Any] = {}
+
+    @property
+    def requests(self) -> int:
+        return sum(stats.requests for stats in self.endpoints.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        failed = sum(stats.errors for stats in self.endpoints.values())
+        return {
+            "meta": self.meta,
+            "students": self.students,
+            "concurrency": self.concurrency,
+            "duration_s": round(self.duration, 3),
+            "journeys_completed": self.journeys_completed,
+            "journeys_failed": self.students - self.journeys_completed,
+            "journeys_per_second": round(self.journeys_completed / self.duration, 3) if self.duration else 0.0,
+            "requests": self.requests,
+            "throughput_rps": round(self.requests / self.duration, 2) if self.duration else 0.0,
+            "error_rate": round(failed / self.requests, 4) if self.requests else 0.0,
+            "endpoints": {name: stats.to_dict(self.duration) for name, stats in self.endpoints.items()},
+            "email": self.email,
+            "sample_errors": self.errors[:10],
+        }
+
+    def report(self) -> str:
+        data = self.to_dict()
+        lines = [
+            f"{data['students']} students, concurrency {data['concurrency']}: "
+            f"{data['journeys_completed']} journeys completed in {data['duration_s']:.1f}s "
+            f"({data['journeys_per_second']:.2f}/s), {data['requests']} requests "
+            f"({data['throughput_rps']:.1f}/s), error rate {data['error_rate'] * 100:.2f}%",
+            "",
+            f"{'endpoint':<42} {'reqs':>6} {'err %':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}",
+        ]
+        for name, stats in data["endpoints"].items():
+            lines.append(f"{name:<42} {stats['requests']:>6} {stats['error_rate'] * 100:>6.1f} "
+                         f"{_ms(stats['p50_ms']):>8} {_ms(stats['p95_ms']):>8} {_ms(stats['p99_ms']):>8} "
+                         f"{_ms(stats['max_ms']):>8}")
+        if self.email:
+            lines += ["", f"Emails: {self.email.get('delivered')}/{self.email.get('expected')} delivered"
+                          + (f", last after {self.email['last_delivery_s']:.1f}s"
+                             if self.email.get("last_delivery_s") is not None else "")]
+        if self.errors:
+            lines += ["", "Failed journeys (first failure each):"] + [f"  {error}" for error in self.errors[:10]]
+        return "\n".join(lines)
+
+
+def _ms(value: Optional[float]) -> str:
+    return f"{value:.1f}" if value is not None else "-"
+
+
+# ----------------------------------------------------------------------------
+# Journeys
+# ----------------------------------------------------------------------------
+
+class JourneyFailed(Exception):
+    """A step of a student's journey failed; the rest of it is skipped."""
+
+
+class JourneyRunner:
+    """Runs student journeys against an httpx client, at most `concurrency` at a time."""
+
+    def __init__(self, client: httpx.AsyncClient, concurrency: int = 10,
+                 think_time: float = 0.0, seed: Optional[int] = None):
+        self.client = client
+        self.concurrency = max(1, concurrency)
+        self.think_time = think_time  # seconds between a student's requests
+        self.endpoints = {name: EndpointStats(name) for name in ENDPOINTS}
+        self._rng = random.Random(seed)
+        self._errors: List[str] = []
+        self._completed = 0
+
+    async def run(self, students: int) -> LoadResult:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def limited(index: int):
+            async with semaphore:
+                await self._journey(index)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(limited(index) for index in range(students)))
+        return LoadResult(students, self.concurrency, time.perf_counter() - started,
+                          self.endpoints, self._completed, self._errors)
+
+    async def _request(self, endpoint: str, method: str, url: str, **kwargs) -> Dict[str, Any]:
+        if self.think_time:
+            await asyncio.sleep(self._rng.uniform(0, 2 * self.think_time))
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.endpoints[endpoint].record(time.perf_counter() - started, None)
+            raise JourneyFailed(f"{endpoint}: {type(e).__name__}: {e}")
+        self.endpoints[endpoint].record(time.perf_counter() - started, response.status_code)
+        if response.status_code >= 400:
+            raise JourneyFailed(f"{endpoint}: HTTP {response.status_code} {response.text[:200]}")
+        return response.json()
+
+    async def _journey(self, index: int):
+        try:
+            session_id = (await self._request(START, "POST", f"{API}/session/start"))["session_id"]
+            modules = await self._request(MODULES, "GET", f"{API}/modules")
+            page_id = modules[0]["id"] if modules else None
+            while page_id is not None:
+                page = await self._request(QUESTIONS, "GET", f"{API}/questions",
+                                           params={"page_id": page_id, "session_id": session_id})
+                for question in page["questions"]:
+                    await self._request(SUBMIT, "POST", f"{API}/answers/submit", json={
+                        "session_id": session_id,
+                        "question_id": question["id"],
+                        "answer": self._answer(question),
+                    })
+                await self._request(PROGRESS, "GET", f"{API}/session/{session_id}/progress")
+                page_id = page["navigation"]["next_page_id"]
+            await self._request(FINALIZE, "POST", f"{API}/student/info", json={
+                "session_id": session_id,
+                "email": f"loadtest{index}@example.com",
+                "full_name": f"Load Test Student {index}",
+                "age_group": "17-18",
+                "country": "Egypt",
+                "origin_country": "Egypt",
+            })
+            self._completed += 1
+        except JourneyFailed as e:
+            self._errors.append(f"student {index}: {e}")
+
+    def _answer(self, question: Dict[str, Any]) -> Dict[str, Any]:
+        options = question.get("options") or {}
+        if question["type"] == "slider":
+            return {"type": "slider", "value": self._rng.randint(options.get("min", 1), options.get("max", 5))}
+        if question["type"] == "mcq":
+            choices = list(range(len(options.get("choices") or [])))
+            return {"type": "mcq", "selected_options": choices[:1]}
+        if question["type"] == "ordering":
+            items = list(options.get("items") or [])
+            self._rng.shuffle(items)
+            return {"type": "ordering", "ordered_items": items}
+        return {"type": "essay", "text": "I like building things and helping people."}
+
+
+# ----------------------------------------------------------------------------
+# Environment: seeded database, in-process app, SMTP sink
+# ----------------------------------------------------------------------------
+
+def seed_assessment(db) -> int:
+    """
+    Create the three scored v1.1 pages with their Likert items, unless pages
+    1-3 already exist. Returns the number of questions created.
+    """
+    from app.models import Page, Question, QuestionType
+
+    if db.query(Page).filter(Page.order_index.in_([1, 2, 3])).count():
+        return 0
+
+    created = 0
+    for order_index, module, prefix, domains, per_domain in ASSESSMENT:
+        page = Page(title=f"{module} (load test)", description=f"Seeded {module} items",
+                    order_index=order_index, module_name=module, chapter_number=order_index)
+        db.add(page)
+        db.flush()
+        for domain_index, domain in enumerate(domains):
+            for item in range(1, per_domain + 1):
+                db.add(Question(
+                    page_id=page.id,
+                    question_text=f"{module} statement {domain} {item}",
+                    question_type=QuestionType.slider,
+                    order_index=domain_index * per_domain + item,
+                    item_id=f"{prefix}{domain_index + 1}_{item}",
+                    domain=domain,
+                    scale_type="likert_5",
+                ))
+                created += 1
+    db.commit()
+    return created
+
+
+@asynccontextmanager
+async def in_process_client(app, base_url: str = "http://loadtest") -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Client calling the ASGI app directly, with its startup and shutdown
+    events run around it (outbox dispatcher, watchdog). The transport waits
+    for background tasks before returning, so they count toward latency.
+    """
+    await app.router.startup()
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url=base_url,
+                                     timeout=120) as client:
+            yield client
+    finally:
+        await app.router.shutdown()
+
+
+class _SinkHandler:
+    def __init__(self):
+        self.messages = 0
+        self.last_delivery: Optional[float] = None
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages += 1
+        self.last_delivery = time.perf_counter()
+        return "250 Message accepted for delivery"
+
+
+class SMTPSink:
+    """Local SMTP server (no TLS, no auth) that accepts and counts every message."""
+
+    def __init__(self, hostname: str = "127.0.0.1", port: Optional[int] = None):
+        if not AIOSMTPD_AVAILABLE:
+            raise RuntimeError("The SMTP sink needs aiosmtpd: pip install aiosmtpd")
+        self.handler = _SinkHandler()
+        self.controller = Controller(self.handler, hostname=hostname, port=port or free_port())
+
+    @property
+    def hostname(self) -> str:
+        return self.controller.hostname
+
+    @property
+    def port(self) -> int:
+        return self.controller.port
+
+    @property
+    def messages(self) -> int:
+        return self.handler.messages
+
+    def start(self):
+        self.controller.start()
+
+    def stop(self):
+        self.controller.stop()
+
+    async def wait_for(self, expected: int, timeout: float, since: float) -> Dict[str, Any]:
+        """Wait until `expected` messages arrived or the timeout passed; summary for LoadResult.email."""
+        deadline = time.perf_counter() + timeout
+        while self.messages < expected and time.perf_counter() < deadline:
+            await asyncio.sleep(0.1)
+        last = self.handler.last_delivery
+        return {
+            "expected": expected,
+            "delivered": self.messages,
+            "last_delivery_s": round(last - since, 3) if last is not None else None,
+        }
+
+
+def free_port() -> int:
+    """A TCP port on localhost that is free right now."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# ----------------------------------------------------------------------------
+# Comparison
+# ----------------------------------------------------------------------------
+
+def compare_results(previous: Dict[str, Any], current: Dict[str, Any],
+                    tolerance: float = 0.2) -> Tuple[str, List[str]]:
+    """
+    Side-by-side table of two result dicts, and the regressions in it: a p95
+    more than `tolerance` (a fraction) slower, or a higher error rate.
+    """
+    def label(result: Dict[str, Any]) -> str:
+        meta = result.get("meta", {})
+        return meta.get("commit") or meta.get("started_at", "?")
+
+    lines = [f"{label(previous)} -> {label(current)}",
+             f"{'endpoint':<42} {'p50 ms':>17} {'p95 ms':>17} {'p99 ms':>17} {'err %':>13}"]
+    regressions = []
+    for name, now in current["endpoints"].items():
+        before = previous.get("endpoints", {}).get(name)
+        if not before or not now["requests"]:
+            continue
+        cells = []
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            old, new = before.get(key), now.get(key)
+            change = f"{(new - old) / old * 100:+.0f}%" if old and new is not None else ""
+            cells.append(f"{_ms(new):>8} {change:>8}")
+        lines.append(f"{name:<42} {' '.join(cells)} "
+                     f"{before['error_rate'] * 100:>5.1f}->{now['error_rate'] * 100:<5.1f}")
+
+        old_p95, new_p95 = before.get("p95_ms"), now.get("p95_ms")
+        if old_p95 and new_p95 is not None and new_p95 > old_p95 * (1 + tolerance):
+            regressions.append(f"{name}: p95 {old_p95:.1f} -> {new_p95:.1f} ms")
+        if now["error_rate"] > before["error_rate"]:
+            regressions.append(f"{name}: error rate {before['error_rate'] * 100:.1f}% -> "
+                               f"{now['error_rate'] * 100:.1f}%")
+
+    lines.append(f"{'throughput':<42} {previous.get('throughput_rps', 0):.1f} -> "
+                 f"{current.get('throughput_rps', 0):.1f} req/s")
+    return "\n".join(lines), regressions
+
+
+def run_metadata(mode: str, **extra) -> Dict[str, Any]:
+    """Metadata stored with a result: when, against what, and with which settings."""
+    return {"started_at": datetime.utcnow().isoformat(), "mode": mode, **extra}
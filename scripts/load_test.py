@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Student Journey Load Test
+Simulates concurrent students going through the whole assessment: start,
+questions, answer submissions, progress checks and the final submission
+that scores it and emails the report. Prints p50/p95/p99, throughput and
+error rates per endpoint and can save them as JSON to compare commits.
+
+By default the app runs in-process against a throwaway SQLite database
+seeded with the scored assessment, and results emails go to a local SMTP
+sink. --uvicorn serves the same setup from a local uvicorn instead, so
+latencies include the HTTP server. --base-url targets a server you started
+yourself; it must already have the assessment, and emails are only counted
+if it sends them to --sink-port.
+
+Usage:
+    python scripts/load_test.py --students 50 --concurrency 10
+    python scripts/load_test.py --students 200 --concurrency 25 --uvicorn --workers 2
+    python scripts/load_test.py --output results/$(git rev-parse --short HEAD).json
+    python scripts/load_test.py --compare results/main.json --fail-on-regression 20
+    python scripts/load_test.py --base-url http://localhost:8000 --students 20 --sink-port 2525
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to path
+sys.path.insert(0, ROOT)
+
+# Doesn't import app, which main() has to configure first
+from journey_load import (
+    JourneyRunner, SMTPSink, compare_results, free_port, in_process_client, run_metadata, seed_assessment
+)
+
+
+def git_commit() -> str:
+    """Short commit hash, marked dirty when the tree has changes ('' outside git)."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def app_environment(workdir: str, sink_port: int, delivery: str, email: bool = True) -> dict:
+    """Settings for a throwaway app: its own database and report store, email to the sink."""
+    return {
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'loadtest.db')}",
+        "REPORT_STORE_DIR": os.path.join(workdir, "report_store"),
+        "RESULTS_DELIVERY_MODE": delivery,
+        "ENABLE_EMAIL": "true" if email else "false",
+        "SMTP_HOST": "127.0.0.1",
+        "SMTP_PORT": str(sink_port),
+        "SMTP_START_TLS": "false",
+        "SMTP_USER": "",
+        "SMTP_PASSWORD": "",
+        "SMTP_FROM_EMAIL": "results@example.com",
+        "ADMIN_EMAIL": "",
+    }
+
+
+def seed_database():
+    """Create the tables and the scored assessment in the database DATABASE_URL points at."""
+    from app.models.database import SessionLocal, create_tables
+
+    create_tables()
+    db = SessionLocal()
+    try:
+        print(f"📦 Seeded {seed_assessment(db)} questions")
+    finally:
+        db.close()
+
+
+def start_uvicorn(port: int, workers: int) -> subprocess.Popen:
+    """Serve the app with the environment set up in main(); returns once /health answers."""
+    import httpx
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=ROOT,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("uvicorn did not become healthy within 60s")
+
+
+async def run(args, sink, base_url=None):
+    import httpx
+
+    async def drive(client):
+        runner = JourneyRunner(client, concurrency=args.concurrency, think_time=args.think_time, seed=args.seed)
+        started = time.perf_counter()
+        result = await runner.run(args.students)
+        if sink is not None:
+            print(f"⏳ Waiting up to {args.email_timeout}s for results emails...")
+            result.email = await sink.wait_for(result.journeys_completed, args.email_timeout, since=started)
+        return result
+
+    if base_url is None:
+        from app.main import app
+        async with in_process_client(app) as client:
+            return await drive(client)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        return await drive(client)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the student journey end to end")
+    parser.add_argument("--students", type=int, default=20, help="number of simulated students")
+    parser.add_argument("--concurrency", type=int, default=5, help="students in flight at once")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="mean seconds a student waits between requests")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the simulated answers")
+    parser.add_argument("--delivery", choices=("attachment", "link"), default="attachment",
+                        help="RESULTS_DELIVERY_MODE of the app under test")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--uvicorn", action="store_true", help="serve the app from a local uvicorn")
+    target.add_argument("--base-url", help="test an already running server instead")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers (with --uvicorn)")
+    parser.add_argument("--sink-port", type=int, default=None, help="port for the SMTP sink (default: any free port)")
+    parser.add_argument("--no-email", action="store_true", help="don't start the SMTP sink or wait for emails")
+    parser.add_argument("--email-timeout", type=float, default=60, help="seconds to wait for results emails")
+    parser.add_argument("--output", help="write the results JSON here")
+    parser.add_argument("--compare", help="results JSON of an earlier run to compare against")
+    parser.add_argument("--fail-on-regression", type=float, default=None, metavar="PCT",
+                        help="exit 1 if a p95 is more than PCT%% slower or an error rate rose (with --compare)")
+    parser.add_argument("--json", action="store_true", help="print the results JSON instead of the table")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    workdir = None
+    sink_port = args.sink_port or free_port()
+    if args.base_url is None:
+        workdir = tempfile.mkdtemp(prefix="carhythm-loadtest-")
+        # Importing anything from app reads these, so they go in first
+        os.environ.update(app_environment(workdir, sink_port, args.delivery,
+                                          email=not args.no_email))
+
+    sink = None
+    server = None
+    base_url = args.base_url
+    try:
+        if not args.no_email and (args.base_url is None or args.sink_port):
+            try:
+                sink = SMTPSink(port=sink_port)
+            except RuntimeError as e:
+                print(f"❌ {e} (or pass --no-email)")
+                sys.exit(1)
+            sink.start()
+
+        if workdir is not None:
+            seed_database()
+            if args.uvicorn:
+                port = free_port()
+                server = start_uvicorn(port, args.workers)
+                base_url = f"http://127.0.0.1:{port}"
+
+        mode = "uvicorn" if args.uvicorn else ("external" if args.base_url else "in-process")
+        print(f"🚀 {args.students} students, concurrency {args.concurrency}, {mode}")
+        result = asyncio.run(run(args, sink, base_url))
+        result.meta = run_metadata(mode, commit=git_commit(), base_url=base_url, workers=args.workers,
+                                   delivery=args.delivery, think_time=args.think_time, seed=args.seed)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        if sink is not None:
+            sink.stop()
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    data = result.to_dict()
+    print(json.dumps(data, indent=2) if args.json else "\n" + result.report())
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(data, f, indent=2)
+        print(f"\n✅ Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        tolerance = (args.fail_on_regression if args.fail_on_regression is not None else 20) / 100
+        table, regressions = compare_results(previous, data, tolerance=tolerance)
+        print(f"\n📊 Compared with {args.compare}\n{table}")
+        if regressions:
+            print("\n❌ Regressions:\n" + "\n".join(f"  {regression}" for regression in regressions))
+            if args.fail_on_regression is not None:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+PDF Render Profiler
+Renders reports for synthetic student profiles (no database needed) and
+prints where the time and memory go, section by section: page builders,
+charts, QR codes and doc.build.
+
+Usage:
+    python scripts/profile_pdf_render.py
+    python scripts/profile_pdf_render.py --template v2 --runs 3 --seed 7
+    python scripts/profile_pdf_render.py --free --no-memory
+    python scripts/profile_pdf_render.py --folded > render.folded   # flamegraph.pl / speedscope
+    python scripts/profile_pdf_render.py --json > render.json
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.pdf_profiler import profile_render, synthetic_inputs, TEMPLATES
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile PDF report rendering section by section")
+    parser.add_argument("--template", choices=TEMPLATES, default="v1", help="report template to render")
+    parser.add_argument("--free", action="store_true", help="render the free (blurred premium) v1 report")
+    parser.add_argument("--runs", type=int, default=1, help="number of synthetic profiles to render")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the synthetic profiles")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip tracemalloc (faster, timings closer to production, no peak column)")
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument("--json", action="store_true", help="print the structured profiles as JSON")
+    output.add_argument("--folded", action="store_true", help="print folded stacks for flame graph tools")
+    args = parser.parse_args()
+
+    options = {"is_free_version": args.free} if args.template == "v1" else {}
+    profiles = []
+    for run in range(args.runs):
+        seed = None if args.seed is None else args.seed + run
+        response_data, scores_data = synthetic_inputs(seed)
+        profile = profile_render(response_data, scores_data, template=args.template,
+                                 trace_memory=not args.no_memory, **options)
+        profiles.append(profile)
+
+        if not (args.json or args.folded):
+            print(f"\n📄 Run {run + 1}/{args.runs}: {args.template} report, holland code "
+                  f"{scores_data['holland_code']}, {profile.size_bytes / 1024:.0f} KiB, "
+                  f"{profile.root.wall:.2f}s")
+            print(profile.flame())
+
+    if args.json:
+        print(json.dumps([profile.to_dict() for profile in profiles], indent=2))
+    elif args.folded:
+        print("\n".join(profile.folded() for profile in profiles))
+
+
+if __name__ == "__main__":
+    main()
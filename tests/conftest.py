@@ -14,6 +14,9 @@ from app.models import (
     Category, QuestionPool, QuestionPageAssignment, ImportLog
 )
 from app.utils.security import get_password_hash
+from app.services.stats_cache import stats_cache
+from app.services.sql_instrumentation import capture_queries
+from app.services.loop_watchdog import loop_watchdog
 
 # Test database setup
 @pytest.fixture(scope="session")
@@ -38,6 +41,66 @@ def test_db():
         # On Windows, the file might still be locked
         pass
 
+@pytest.fixture
+def isolated_db(tmp_path):
+    """
+    Session on a fresh database of its own, for tests that assert exact
+    totals or statement counts; seed it in the test or a class fixture
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'isolated.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+@pytest.fixture(autouse=True)
+def clear_stats_cache():
+    """Fixtures insert rows directly, bypassing the write paths that invalidate cached counts"""
+    stats_cache.clear()
+    yield
+
+@pytest.fixture
+def query_budget():
+    """
+    Assert a block stays within a query budget:
+        with query_budget(5) as queries:
+            client.get(...)
+    max_repeats additionally caps how often one statement shape may repeat (N+1).
+    """
+    from contextlib import contextmanager
+    
+    @contextmanager
+    def budget(max_queries, max_repeats=None):
+        with capture_queries() as queries:
+            yield queries
+        assert queries.count <= max_queries, f"Query budget of {max_queries} exceeded: {queries.report()}"
+        if max_repeats is not None:
+            repeated = queries.repeated(max_repeats + 1)
+            assert not repeated, f"Statements repeated more than {max_repeats} times: {repeated}"
+    
+    return budget
+
+@pytest.fixture
+def loop_block_budget():
+    """
+    Assert requests don't block the event loop beyond a budget:
+        with loop_block_budget(200):
+            client.get(...)
+    Needs a started app (the client fixture), which runs the loop watchdog.
+    """
+    from contextlib import contextmanager
+    
+    @contextmanager
+    def budget(max_ms):
+        with loop_watchdog.record_blocks(max_ms) as blocks:
+            yield blocks
+        assert not blocks, "Event loop blocked beyond budget:\n" + "\n\n".join(block.report() for block in blocks)
+    
+    return budget
+
 @pytest.fixture
 def db_session(test_db):
     """Create a database session for testing"""
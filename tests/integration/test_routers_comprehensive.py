@@ -201,12 +201,65 @@ class TestResponseManagement:
         """Test retrieving responses list"""
         response = authenticated_admin_client.get("/admin/results")
         assert response.status_code == 200
-    
+
+    def test_results_filters_and_json_pages(self, authenticated_admin_client, test_student_response):
+        """Test server-side filters and cursor pages from the results JSON API"""
+        filtered = authenticated_admin_client.get("/admin/results", params={
+            "search": test_student_response.session_id, "completion": "incomplete", "date_from": ""
+        })
+        assert filtered.status_code == 200
+        assert test_student_response.email in filtered.text
+
+        first = authenticated_admin_client.get("/admin/results/data", params={"limit": 1}).json()
+        assert len(first["items"]) == 1
+        if first["has_more"]:
+            second = authenticated_admin_client.get("/admin/results/data", params={
+                "limit": 1, "cursor": first["next_cursor"]
+            }).json()
+            assert second["items"][0]["id"] != first["items"][0]["id"]
+
+        assert authenticated_admin_client.get("/admin/results/data", params={"date_to": "soon"}).status_code == 400
+
     def test_view_single_response(self, authenticated_admin_client, test_student_response):
         """Test viewing a single response"""
         response = authenticated_admin_client.get(f"/admin/results/{test_student_response.id}")
         assert response.status_code == 200
     
+    def test_response_detail_query_count_is_constant(self, authenticated_admin_client, test_page, db_session):
+        """Test the detail page issues the same number of queries for 2 or 20 answers"""
+        from sqlalchemy import event
+        from app.models import StudentResponse, QuestionAnswer, Question, QuestionType
+        
+        questions = [Question(page_id=test_page.id, question_text=f"Detail Q{i}", question_type=QuestionType.slider)
+                     for i in range(20)]
+        db_session.add_all(questions)
+        db_session.flush()
+        response_ids = []
+        for count in (2, 20):
+            response = StudentResponse(session_id=f"detail-count-{count}", email="dc@test.com", full_name="Detail",
+                                       age_group="19-22", country="Canada", origin_country="India")
+            db_session.add(response)
+            db_session.flush()
+            db_session.add_all([QuestionAnswer(response_id=response.id, question_id=q.id, answer_value=50)
+                                for q in questions[:count]])
+            response_ids.append(response.id)
+        db_session.commit()
+        
+        engine = db_session.get_bind()
+        query_counts = []
+        for response_id in response_ids:
+            statements = []
+            listener = lambda *args: statements.append(args[2])
+            event.listen(engine, "before_cursor_execute", listener)
+            try:
+                page = authenticated_admin_client.get(f"/admin/results/{response_id}")
+            finally:
+                event.remove(engine, "before_cursor_execute", listener)
+            assert page.status_code == 200
+            query_counts.append(len(statements))
+        
+        assert query_counts[0] == query_counts[1]
+        assert "Detail Q19" in page.text
     def test_delete_response(self, authenticated_admin_client, test_student_response, db_session):
         """Test deleting a response"""
         response_id = test_student_response.id
@@ -219,11 +272,16 @@ class TestResponseManagement:
     
     def test_bulk_delete_responses(self, authenticated_admin_client, db_session, test_student_response):
         """Test bulk deleting responses"""
+        response_id = test_student_response.id
         response = authenticated_admin_client.post("/admin/results/bulk-delete",
-            json={"response_ids": [test_student_response.id]},
+            json={"response_ids": [response_id]},
             headers={"Content-Type": "application/json"}
         )
         assert response.status_code == 200
+        assert response.json()["deleted"]["student_responses"] == 1
+        
+        from app.models import StudentResponse
+        assert db_session.query(StudentResponse).filter(StudentResponse.id == response_id).first() is None
     
     def test_export_response_csv(self, authenticated_admin_client, test_student_response):
         """Test exporting response as CSV"""
@@ -231,6 +289,15 @@ class TestResponseManagement:
         assert response.status_code == 200
         assert "text/csv" in response.headers.get("content-type", "")
 
+    def test_export_all_results_csv(self, authenticated_admin_client, test_student_response):
+        """Test the full results export streams a header plus every response"""
+        response = authenticated_admin_client.get("/admin/results/export/csv")
+        assert response.status_code == 200
+        assert "text/csv" in response.headers.get("content-type", "")
+        lines = response.text.splitlines()
+        assert lines[0].startswith("Response ID,Session ID")
+        assert any(test_student_response.session_id in line for line in lines[1:])
+
 
 class TestCategoryManagement:
     """Test category CRUD operations"""
@@ -346,6 +413,61 @@ class TestQuestionPoolManagement:
         ).first()
         assert assignment is not None
     
+    def test_bulk_assign_reorder_unassign(self, authenticated_admin_client, test_question_pool,
+                                          test_question_pool_mcq, test_page, db_session):
+        """Test curating a page with the bulk assignment endpoints"""
+        first, second = test_question_pool.id, test_question_pool_mcq.id
+        base = f"/admin/pages/{test_page.id}/assignments"
+        
+        response = authenticated_admin_client.post(f"{base}/bulk-assign", json={"question_ids": [first, second]})
+        assert response.status_code == 200
+        assert response.json()["assigned"] == [first, second]
+        
+        response = authenticated_admin_client.post(f"{base}/reorder", json={"question_ids": [second, first]})
+        assert response.status_code == 200
+        
+        from app.services.question_pool_service import QuestionPoolService
+        db_session.expire_all()
+        assigned = QuestionPoolService.get_page_assigned_questions(db_session, test_page.id)
+        assert [a.question_pool_id for a in assigned if a.question_pool_id in (first, second)] == [second, first]
+        
+        page = authenticated_admin_client.get(f"/admin/pages/{test_page.id}/assign-questions")
+        assert page.status_code == 200
+        
+        response = authenticated_admin_client.post(f"{base}/bulk-unassign", json={"question_ids": [first, second]})
+        assert response.json()["unassigned"] == sorted([first, second])
+        assert authenticated_admin_client.post(f"{base}/reorder", json={"question_ids": "x"}).status_code == 400
+        assert authenticated_admin_client.post("/admin/pages/999999/assignments/reorder",
+                                               json={"question_ids": []}).status_code == 404
+    
+    def test_update_question_order_validates_entries(self, authenticated_admin_client, test_question_pool,
+                                                     test_page, db_session):
+        """Test the order endpoint updates by assignment id and rejects anything else"""
+        base = f"/admin/pages/{test_page.id}/assignments"
+        authenticated_admin_client.post(f"{base}/bulk-assign", json={"question_ids": [test_question_pool.id]})
+        
+        from app.models import QuestionPageAssignment
+        assignment = db_session.query(QuestionPageAssignment).filter(
+            QuestionPageAssignment.question_pool_id == test_question_pool.id,
+            QuestionPageAssignment.page_id == test_page.id
+        ).first()
+        
+        response = authenticated_admin_client.post("/admin/update-question-order", json={
+            "updates": [{"assignment_id": assignment.id, "order_index": 7}]
+        })
+        assert response.status_code == 200
+        db_session.expire_all()
+        assert db_session.get(QuestionPageAssignment, assignment.id).order_index == 7
+        
+        for body in ({"updates": [{"question_id": test_question_pool.id, "order_index": 0}]},
+                     {"updates": [{"assignment_id": "abc", "order_index": 0}]},
+                     {"updates": [{"assignment_id": assignment.id}]},
+                     {"updates": "x"}):
+            response = authenticated_admin_client.post("/admin/update-question-order", json=body)
+            assert response.status_code == 400
+        db_session.expire_all()
+        assert db_session.get(QuestionPageAssignment, assignment.id).order_index == 7
+    
     def test_filter_questions_by_category(self, authenticated_admin_client, test_category):
         """Test filtering pool questions by category"""
         response = authenticated_admin_client.get(f"/admin/question-pool?category_id={test_category.id}")
@@ -468,6 +590,165 @@ class TestAPIv2Endpoints:
         assert response.status_code in [200, 400]
 
 
+class TestReportDownload:
+    """Test signed report download links"""
+    
+    @pytest.fixture
+    def report_token(self, test_db, db_session, test_student_response, tmp_path):
+        """Completed response with scores, a download token and an isolated report store"""
+        from datetime import datetime, timedelta
+        from unittest.mock import patch
+        from app.models import AssessmentScore
+        from app.utils.security import create_report_token
+        
+        test_student_response.completed_at = datetime.utcnow()
+        db_session.add(AssessmentScore(response_id=test_student_response.id, riasec_profile="RIA"))
+        db_session.commit()
+        
+        pdf = b"%PDF-1.4 " + bytes(range(256)) * 4
+        with patch('app.services.report_store.generate_pdf_report', return_value=BytesIO(pdf)), \
+             patch('app.routers.api_v2.report_store.root', str(tmp_path)), \
+             patch('app.routers.api_v2.report_store.session_factory', test_db):
+            yield create_report_token(test_student_response.session_id, timedelta(hours=1)), pdf
+    
+    def test_download_and_conditional_get(self, client, report_token):
+        """Test the report is served with an ETag and revalidates with 304"""
+        token, pdf = report_token
+        response = client.get(f"/api/v2/reports/{token}")
+        assert response.status_code == 200
+        assert response.content == pdf
+        assert response.headers["accept-ranges"] == "bytes"
+        
+        etag = response.headers["etag"]
+        cached = client.get(f"/api/v2/reports/{token}", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+    
+    def test_range_requests(self, client, report_token):
+        """Test single byte ranges return 206 and bad ranges 416"""
+        token, pdf = report_token
+        partial = client.get(f"/api/v2/reports/{token}", headers={"Range": "bytes=10-19"})
+        assert partial.status_code == 206
+        assert partial.content == pdf[10:20]
+        assert partial.headers["content-range"] == f"bytes 10-19/{len(pdf)}"
+        
+        suffix = client.get(f"/api/v2/reports/{token}", headers={"Range": "bytes=-5"})
+        assert suffix.content == pdf[-5:]
+        
+        unsatisfiable = client.get(f"/api/v2/reports/{token}", headers={"Range": f"bytes={len(pdf)}-"})
+        assert unsatisfiable.status_code == 416
+    
+    def test_invalid_token_rejected(self, client):
+        """Test tampered or foreign tokens are rejected"""
+        from app.utils.security import create_access_token
+        
+        assert client.get("/api/v2/reports/not-a-token").status_code == 404
+        admin_token = create_access_token({"sub": "admin"})
+        assert client.get(f"/api/v2/reports/{admin_token}").status_code == 404
+
+    def test_admin_export_served_from_store(self, authenticated_admin_client, test_db, db_session,
+                                            test_student_response, tmp_path):
+        """Test repeated admin PDF exports reuse the stored premium report"""
+        from unittest.mock import patch
+        from app.models import AssessmentScore
+
+        db_session.add(AssessmentScore(response_id=test_student_response.id, riasec_profile="RIA"))
+        db_session.commit()
+
+        renders = []
+
+        def fake_render(response_dict, scores_dict, **options):
+            renders.append(options["is_free_version"])
+            return BytesIO(b"%PDF-1.4 premium")
+
+        with patch('app.services.report_store.generate_pdf_report', side_effect=fake_render), \
+             patch('app.routers.admin_panel.report_store.root', str(tmp_path)), \
+             patch('app.routers.admin_panel.report_store.session_factory', test_db):
+            first = authenticated_admin_client.get(f"/admin/results/{test_student_response.id}/export/pdf")
+            second = authenticated_admin_client.get(f"/admin/results/{test_student_response.id}/export/pdf")
+
+        assert first.status_code == 200
+        assert first.headers["content-type"] == "application/pdf"
+        assert second.content == b"%PDF-1.4 premium"
+        assert second.headers["etag"] == first.headers["etag"]
+        assert renders == [False]
+
+    def test_admin_profile_render(self, authenticated_admin_client, db_session, test_student_response):
+        """Test the profile endpoint renders the report and returns a section breakdown"""
+        from app.models import AssessmentScore
+
+        db_session.add(AssessmentScore(response_id=test_student_response.id, riasec_profile="RIA"))
+        db_session.commit()
+        url = f"/admin/results/{test_student_response.id}/export/pdf/profile"
+
+        assert authenticated_admin_client.get(url, params={"template": "v3"}).status_code == 400
+        assert authenticated_admin_client.get("/admin/results/999999/export/pdf/profile").status_code == 404
+
+        response = authenticated_admin_client.get(url, params={"template": "v2", "memory": "false", "format": "text"})
+        assert response.status_code == 200
+        assert response.text.splitlines()[1].startswith("render")
+        assert "  build" in response.text
+
+
+class TestRequestProfiling:
+    """Test on-demand request profiling for admins"""
+
+    def test_profile_flag_requires_admin(self, client):
+        """Test a student can't trigger profiling"""
+        response = client.get("/api/v2/reports/not-a-token", params={"_profile": "sample"})
+        assert response.status_code == 401
+
+    def test_admin_profiles_request(self, authenticated_admin_client):
+        """Test a flagged request is profiled and can be viewed and downloaded"""
+        import json
+        from app.services.request_profiler import request_profiler
+
+        request_profiler.clear()
+        response = authenticated_admin_client.get("/admin/dashboard", headers={"X-Profile": "sample"})
+        assert response.status_code == 200
+
+        stored = request_profiler.profiles()[0]
+        assert stored.path == "/admin/dashboard"
+
+        listing = authenticated_admin_client.get("/admin/system/profiles")
+        assert listing.status_code == 200
+        assert "/admin/dashboard" in listing.text
+        assert authenticated_admin_client.get(f"/admin/system/profiles/{stored.id}").status_code == 200
+        download = authenticated_admin_client.get(f"/admin/system/profiles/{stored.id}/download")
+        assert download.status_code == 200
+        assert "profiles" in json.loads(download.content)
+        assert authenticated_admin_client.get("/admin/system/profiles/999999").status_code == 404
+
+
+class TestEventLoopWatchdog:
+    """Test handlers are checked for blocking the event loop"""
+
+    def test_fast_handler_within_budget(self, client, loop_block_budget):
+        """Test a quick request passes the loop block budget"""
+        with loop_block_budget(200):
+            assert client.get("/health").status_code == 200
+
+    def test_blocking_handler_fails_budget(self, authenticated_admin_client, loop_block_budget):
+        """Test blocking work inside an async handler is caught with its route"""
+        import time
+        from unittest.mock import patch
+
+        def slow_dashboard_data(db):
+            time.sleep(0.4)
+            return {}
+
+        with patch('app.services.analytics_rollup.get_dashboard_data', side_effect=slow_dashboard_data):
+            with pytest.raises(AssertionError) as excinfo:
+                with loop_block_budget(150):
+                    authenticated_admin_client.get("/admin/analytics/data")
+
+        assert "GET /admin/analytics/data" in str(excinfo.value)
+        assert "slow_dashboard_data" in str(excinfo.value)
+
+        status = authenticated_admin_client.get("/admin/system/event-loop").json()
+        assert status["running"] is True
+        assert status["recent_blocks"][0]["route"] == "GET /admin/analytics/data"
+
+
 class TestFeedbackEndpoints:
     """Test feedback system endpoints"""
     
@@ -484,6 +765,54 @@ class TestFeedbackEndpoints:
         """Test getting feedback list (admin)"""
         response = authenticated_admin_client.get("/api/v2/feedback/list")
         assert response.status_code == 200
+    
+    @pytest.fixture
+    def dated_feedbacks(self, db_session):
+        """Three feedbacks on days no other test uses, so date filters isolate them (removed afterwards)"""
+        import uuid
+        from datetime import datetime
+        from app.models import Feedback, StudentResponse
+        
+        for day in (1, 2, 3):
+            session_id = f"feedback-page-{uuid.uuid4()}"
+            db_session.add(StudentResponse(session_id=session_id, email=f"fp{day}@test.com", full_name=f"Feedback {day}",
+                                           age_group="19-22", country="Canada", origin_country="India"))
+            db_session.add(Feedback(session_id=session_id, rating=day, created_at=datetime(2031, 1, day, 12)))
+        db_session.commit()
+        yield {"date_from": "2031-01-01", "date_to": "2031-01-31"}
+        db_session.query(Feedback).filter(Feedback.created_at >= datetime(2031, 1, 1)).delete()
+        db_session.commit()
+    
+    def test_feedback_list_keyset_pages(self, authenticated_admin_client, dated_feedbacks):
+        """Test the API pages with X-Next-Cursor, newest first"""
+        first = authenticated_admin_client.get("/api/v2/feedback/list", params={**dated_feedbacks, "limit": 2})
+        assert first.status_code == 200
+        assert [f["rating"] for f in first.json()] == [3, 2]
+        assert first.json()[0]["user_name"] == "Feedback 3"
+        
+        second = authenticated_admin_client.get("/api/v2/feedback/list", params={
+            **dated_feedbacks, "limit": 2, "cursor": first.headers["x-next-cursor"]
+        })
+        assert [f["rating"] for f in second.json()] == [1]
+        assert "x-next-cursor" not in second.headers
+    
+    def test_admin_feedback_export_formats(self, authenticated_admin_client, dated_feedbacks):
+        """Test filtered CSV and JSONL exports stream only matching feedback"""
+        page = authenticated_admin_client.get("/admin/feedbacks", params=dated_feedbacks)
+        assert page.status_code == 200
+        assert "Feedback 2" in page.text
+        
+        jsonl = authenticated_admin_client.get("/admin/feedbacks/export", params={**dated_feedbacks, "format": "jsonl"})
+        assert jsonl.status_code == 200
+        records = [json.loads(line) for line in jsonl.text.splitlines()]
+        assert [r["rating"] for r in records] == [3, 2, 1]
+        
+        csv_export = authenticated_admin_client.get("/admin/feedbacks/export", params={**dated_feedbacks, "rating": 2})
+        assert csv_export.headers["content-type"].startswith("text/csv")
+        assert len(csv_export.text.strip().splitlines()) == 2
+        
+        bad = authenticated_admin_client.get("/admin/feedbacks/export", params={"format": "xml"})
+        assert bad.status_code == 400
 
 
 class TestAnalyticsEndpoints:
@@ -506,6 +835,17 @@ class TestAnalyticsEndpoints:
         data = response.json()
         assert "total_responses" in data or "statistics" in data
 
+    def test_rebuild_analytics_rollups(self, authenticated_admin_client, test_student_response):
+        """Test the rollup rebuild endpoint recounts started responses"""
+        response = authenticated_admin_client.post("/admin/analytics/rebuild")
+        assert response.status_code == 200
+        assert response.json()["rows"]["activity_days"] >= 1
+        
+        data = authenticated_admin_client.get("/admin/analytics/data").json()
+        assert data["total_responses"] >= 1
+        assert set(data["riasec_distribution"]) == {
+            "Realistic", "Investigative", "Artistic", "Social", "Enterprising", "Conventional"}
+
 
 class TestCSVOperations:
     """Test CSV import/export operations"""
@@ -527,18 +867,49 @@ class TestCSVOperations:
         assert response.status_code == 200
     
     def test_import_csv_questions(self, authenticated_admin_client, test_category):
-        """Test importing questions from CSV"""
+        """Test importing questions from CSV as a background job"""
         csv_content = f"""title,question_text,category_name,is_required,essay_char_limit
-Test Question,What are your goals?,{test_category.name},TRUE,500"""
+Test Question,What are your goals?,{test_category.name},TRUE,500
+,Missing title,{test_category.name},TRUE,500"""
         
         csv_file = BytesIO(csv_content.encode('utf-8'))
         csv_file.name = 'test_import.csv'
         
+        # The test client runs background tasks before returning the response
         response = authenticated_admin_client.post(
             "/admin/csv-import/essay",
             files={"csv_file": ("test.csv", csv_file, "text/csv")}
         )
-        assert response.status_code in [200, 302]
+        assert response.status_code == 202
+        
+        job = authenticated_admin_client.get(response.json()["status_url"]).json()
+        assert job["status"] == "completed"
+        assert job["finished"] is True
+        assert (job["processed_rows"], job["successful_imports"], job["failed_imports"]) == (2, 1, 1)
+        assert job["errors"][0]["row"] == 3
+    
+    def test_cancel_queued_import_job(self, authenticated_admin_client, db_session, test_db):
+        """Test a job cancelled before it starts never imports and drops its upload"""
+        import os
+        from app.models import ImportStatus
+        from app.services import import_jobs
+        
+        job = import_jobs.create_import_job(
+            db_session, BytesIO(b"title,question_text\nQ,Text\n"), "essay", "cancel.csv", "admin"
+        )
+        assert os.path.exists(job.upload_path)
+        
+        response = authenticated_admin_client.post(f"/admin/csv-import/jobs/{job.id}/cancel")
+        assert response.status_code == 200
+        assert response.json()["status"] == "cancelled"
+        
+        import_jobs.run_import_job(job.id, session_factory=test_db)
+        db_session.refresh(job)
+        assert job.status == ImportStatus.cancelled
+        assert job.processed_rows in (0, None)
+        assert not os.path.exists(job.upload_path)
+        
+        assert authenticated_admin_client.get("/admin/csv-import/jobs/999999").status_code == 404
     
     def test_export_questions_to_csv(self, authenticated_admin_client, test_question_pool):
         """Test exporting questions to CSV"""
@@ -546,6 +917,71 @@ Test Question,What are your goals?,{test_category.name},TRUE,500"""
             f"/admin/question-pool/export?question_ids={test_question_pool.id}&question_type=essay"
         )
         assert response.status_code == 200
+    
+    def test_export_questions_matching_filter(self, authenticated_admin_client, test_question_pool):
+        """Test exporting every question matching a filter, and selected ids by form post"""
+        response = authenticated_admin_client.get(
+            f"/admin/question-pool/export?question_type=essay&category_id={test_question_pool.category_id}"
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert test_question_pool.title in response.text
+        
+        response = authenticated_admin_client.post("/admin/csv-export", data={
+            "question_ids": [str(test_question_pool.id)], "question_type": "essay"
+        })
+        assert response.status_code == 200
+        assert response.text.startswith("title,question_text,category_name,is_required,essay_char_limit")
+        
+        assert authenticated_admin_client.get("/admin/question-pool/export?question_type=poem").status_code == 400
+        assert authenticated_admin_client.post("/admin/csv-export", data={
+            "question_ids": ["999999"], "question_type": "essay"
+        }).status_code == 400
+
+
+class TestSQLInstrumentation:
+    """Test per-request query instrumentation"""
+    
+    def test_server_timing_and_n_plus_one_warning(self, client, db_session, monkeypatch, caplog):
+        """Test responses carry DB timing and repeated per-page queries are flagged"""
+        import logging
+        from app.config import settings
+        from app.models import Page, Question, QuestionType, StudentResponse
+        
+        for i in range(3):
+            page = Page(title=f"N+1 page {i}", order_index=200 + i, is_active=True)
+            db_session.add(page)
+            db_session.flush()
+            db_session.add(Question(page_id=page.id, question_text="Q", question_type=QuestionType.slider))
+        db_session.add(StudentResponse(session_id="n-plus-one", email="n@test.com", full_name="N",
+                                       age_group="19-22", country="Canada", origin_country="India"))
+        db_session.commit()
+        
+        monkeypatch.setattr(settings, "SQL_N_PLUS_ONE_THRESHOLD", 3)
+        with caplog.at_level(logging.WARNING, logger="app.services.sql_instrumentation"):
+            response = client.get("/api/v2/session/n-plus-one/progress")
+        
+        assert response.status_code == 200
+        timing = response.headers["server-timing"]
+        assert timing.startswith("db;dur=") and "queries" in timing and "app;dur=" in timing
+        assert "Probable N+1 in GET /api/v2/session/n-plus-one/progress" in caplog.text
+    
+    def test_metrics_endpoint(self, client):
+        """Test /metrics exposes per-route request counts by route template"""
+        client.get("/api/v2/session/metrics-missing/progress")
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert ('carhythm_http_requests_total{method="GET",route="/api/v2/session/{session_id}/progress",'
+                'status="404"}') in response.text
+        assert "carhythm_active_sessions" in response.text
+    
+    def test_response_detail_query_budget(self, authenticated_admin_client, test_student_response, query_budget):
+        """Test the response detail page stays within its query budget"""
+        with query_budget(4, max_repeats=1) as queries:
+            response = authenticated_admin_client.get(f"/admin/results/{test_student_response.id}")
+        assert response.status_code == 200
+        assert queries.count > 0
 
 
 class TestSettingsEndpoints:
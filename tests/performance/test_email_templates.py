@@ -0,0 +1,116 @@
+"""
+Results email build benchmark
+Per-message build time and allocations with the cached logo part and
+compiled HTML template, compared with a cold cache (old per-message cost)
+"""
+
+import time
+import tracemalloc
+import pytest
+
+from app.services import email_service
+
+
+PDF_BYTES = b"%PDF-1.4\n" + b"0" * 200_000  # Roughly the size of a free report
+
+
+def _build(i: int):
+    return email_service.build_results_message(
+        to_email=f"student{i}@carhythm.test",
+        student_name=f"Student {i}",
+        holland_code="RIA",
+        top_strength="Openness (High)",
+        pdf_bytes=PDF_BYTES,
+    )
+
+
+def _clear_caches():
+    email_service._encoded_logo.cache_clear()
+    email_service._results_email_template.cache_clear()
+
+
+def _measure(builds: int, cold: bool):
+    """Average seconds and peak traced bytes per built message."""
+    elapsed = 0.0
+    peak_total = 0
+    tracemalloc.start()
+    try:
+        for i in range(builds):
+            if cold:
+                _clear_caches()
+            tracemalloc.reset_peak()
+            start_current, _ = tracemalloc.get_traced_memory()
+            start = time.perf_counter()
+            _build(i)
+            elapsed += time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            peak_total += peak - start_current
+    finally:
+        tracemalloc.stop()
+    return elapsed / builds, peak_total / builds
+
+
+class TestResultsEmailTemplateCache:
+    """Test the static parts of the results email are prepared once"""
+
+    def test_logo_read_once(self, monkeypatch):
+        """Test the logo file is read only on first use"""
+        import builtins
+
+        if not email_service.os.path.exists(email_service.LOGO_PATH):
+            pytest.skip("Logo asset not present")
+
+        opened = []
+        real_open = builtins.open
+
+        def counting_open(path, *args, **kwargs):
+            if path == email_service.LOGO_PATH:
+                opened.append(path)
+            return real_open(path, *args, **kwargs)
+
+        _clear_caches()
+        monkeypatch.setattr(builtins, "open", counting_open)
+        for i in range(5):
+            _build(i)
+
+        assert len(opened) == 1
+
+    def test_html_substitutes_fields(self):
+        """Test only the student fields vary and are HTML-escaped"""
+        html = email_service.create_results_email_html("<Ana>", "RIA", "Openness (High)", "carhythm_logo")
+
+        assert "Dear &lt;Ana&gt;," in html
+        assert "<strong>Your Holland Code:</strong> RIA" in html
+        assert 'src="cid:carhythm_logo"' in html
+        assert "$" not in html
+
+    def test_message_structure(self):
+        """Test the cached logo part serialises as a normal inline PNG"""
+        msg = _build(1)
+        related, attachment = msg.get_payload()
+        parts = related.get_payload()
+
+        assert parts[0].get_content_type() == "text/html"
+        if len(parts) > 1:
+            assert parts[1].get_content_type() == "image/png"
+            assert parts[1]["Content-ID"] == "<carhythm_logo>"
+            assert parts[1].get_payload(decode=True)[:8] == b"\x89PNG\r\n\x1a\n"
+        assert attachment.get_filename() == "CaRhythm_Career_DNA_Report.pdf"
+
+
+class TestResultsEmailBuildBenchmark:
+    """Message build cost with warm caches versus a cold cache per message"""
+
+    BUILDS = 30
+
+    def test_build_time_and_allocations(self):
+        """Compare per-email build time and peak allocations"""
+        cold_seconds, cold_bytes = _measure(self.BUILDS, cold=True)
+        _build(0)  # warm the caches
+        warm_seconds, warm_bytes = _measure(self.BUILDS, cold=False)
+
+        print(f"\nResults email build: cold {cold_seconds * 1000:.2f} ms / {cold_bytes / 1024:.0f} KiB, "
+              f"cached {warm_seconds * 1000:.2f} ms / {warm_bytes / 1024:.0f} KiB per email")
+
+        assert warm_seconds < cold_seconds
+        assert warm_bytes < cold_bytes
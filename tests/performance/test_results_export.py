@@ -0,0 +1,63 @@
+"""
+Results CSV export benchmark
+Peak memory while streaming the export should stay flat as the number of
+responses grows, since rows are fetched in batches and written in chunks
+"""
+
+import time
+import tracemalloc
+import pytest
+from datetime import datetime
+
+from app.models import StudentResponse, AssessmentScore
+from app.services.results_export import iter_results_csv
+
+
+def _populate(session, count: int, start: int = 0):
+    now = datetime.utcnow()
+    session.bulk_insert_mappings(StudentResponse, [
+        {"id": i + 1, "session_id": f"bench-{i}", "full_name": f"Student {i}", "email": f"s{i}@test.com",
+         "age_group": "19-22", "country": "Canada", "origin_country": "India",
+         "created_at": now, "completed_at": now}
+        for i in range(start, start + count)
+    ])
+    session.bulk_insert_mappings(AssessmentScore, [
+        {"response_id": i + 1, "riasec_r_score": 12.0, "riasec_profile": "RIA", "bigfive_openness": 70.0,
+         "riasec_strength_labels": '{"R": "High"}', "bigfive_strength_labels": '{"O": "High"}',
+         "behavioral_flags": '{"growth_mindset": 1}', "calculated_at": now}
+        for i in range(start, start + count)
+    ])
+    session.commit()
+
+
+def _stream(session):
+    """Consume the export; return (seconds, peak traced bytes, total bytes)."""
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        total = sum(len(chunk) for chunk in iter_results_csv(session, batch_size=500, chunk_rows=250))
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return elapsed, peak, total
+
+
+class TestResultsExportBenchmark:
+    """Streaming export memory at two data sizes"""
+    
+    @pytest.mark.slow
+    def test_peak_memory_is_flat(self, isolated_db):
+        """Test peak memory does not grow with the number of exported rows"""
+        _populate(isolated_db, 1_000)
+        small_seconds, small_peak, small_bytes = _stream(isolated_db)
+        
+        _populate(isolated_db, 9_000, start=1_000)
+        large_seconds, large_peak, large_bytes = _stream(isolated_db)
+        
+        print(f"\nResults export: 1k rows {small_seconds:.2f}s peak {small_peak / 1024:.0f} KiB "
+              f"({small_bytes / 1024:.0f} KiB CSV), 10k rows {large_seconds:.2f}s "
+              f"peak {large_peak / 1024:.0f} KiB ({large_bytes / 1024:.0f} KiB CSV)")
+        
+        assert large_bytes > 9 * small_bytes
+        assert large_peak < 2 * small_peak
@@ -0,0 +1,171 @@
+"""
+SMTP connection pool tests and throughput benchmark
+Runs against a local aiosmtpd stand-in server (no TLS, no auth)
+"""
+
+import pytest
+import asyncio
+import socket
+import time
+from email.mime.text import MIMEText
+
+aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+
+
+class CountingHandler:
+    """aiosmtpd handler that counts sessions and delivered messages"""
+
+    def __init__(self):
+        self.sessions = 0
+        self.messages = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.sessions += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages += 1
+        return "250 Message accepted for delivery"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    """Start a local SMTP sink for the duration of a test"""
+    handler = CountingHandler()
+    controller = aiosmtpd_controller.Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    try:
+        yield controller, handler
+    finally:
+        controller.stop()
+
+
+def _make_pool(controller, **overrides):
+    from app.services.smtp_pool import SMTPConnectionPool
+
+    options = dict(hostname=controller.hostname, port=controller.port,
+                   start_tls=False, pool_size=2, max_messages_per_connection=50,
+                   idle_timeout=60, health_check_interval=15, timeout=5)
+    options.update(overrides)
+    return SMTPConnectionPool(**options)
+
+
+def _message(i: int) -> MIMEText:
+    msg = MIMEText(f"Benchmark message {i}")
+    msg["From"] = "results@carhythm.test"
+    msg["To"] = f"student{i}@carhythm.test"
+    msg["Subject"] = f"Pool test {i}"
+    return msg
+
+
+class TestSMTPConnectionPool:
+    """Test connection reuse, recycling and reconnects"""
+
+    @pytest.mark.asyncio
+    async def test_reuses_connection(self, smtp_server):
+        """Test sequential sends share one SMTP session"""
+        controller, handler = smtp_server
+        pool = _make_pool(controller)
+
+        for i in range(5):
+            await pool.send_message(_message(i))
+        await pool.close()
+
+        assert handler.messages == 5
+        assert pool.stats()["connections_opened"] == 1
+
+    @pytest.mark.asyncio
+    async def test_recycles_after_max_messages(self, smtp_server):
+        """Test connections are retired after max_messages_per_connection"""
+        controller, handler = smtp_server
+        pool = _make_pool(controller, max_messages_per_connection=2)
+
+        for i in range(5):
+            await pool.send_message(_message(i))
+        await pool.close()
+
+        assert handler.messages == 5
+        assert pool.stats()["connections_opened"] == 3
+
+    @pytest.mark.asyncio
+    async def test_reconnects_after_server_drop(self):
+        """Test a dropped idle connection is replaced transparently"""
+        handler = CountingHandler()
+        port = _free_port()
+        first = aiosmtpd_controller.Controller(handler, hostname="127.0.0.1", port=port)
+        first.start()
+        pool = _make_pool(first, health_check_interval=0)
+
+        try:
+            await pool.send_message(_message(1))
+        finally:
+            first.stop()
+
+        # Bring up a new server on the same port: the pooled connection is now dead
+        second = aiosmtpd_controller.Controller(handler, hostname="127.0.0.1", port=port)
+        second.start()
+        try:
+            await pool.send_message(_message(2))
+            await pool.close()
+        finally:
+            second.stop()
+
+        assert handler.messages == 2
+        stats = pool.stats()
+        assert stats["connections_opened"] == 2
+        assert stats["send_failures"] == 0
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limited_to_pool_size(self, smtp_server):
+        """Test concurrent sends never open more than pool_size connections"""
+        controller, handler = smtp_server
+        pool = _make_pool(controller, pool_size=3)
+
+        await asyncio.gather(*(pool.send_message(_message(i)) for i in range(20)))
+        await pool.close()
+
+        assert handler.messages == 20
+        assert pool.stats()["connections_opened"] <= 3
+
+
+class TestSMTPPoolBenchmark:
+    """Throughput of pooled sends versus one connection per message"""
+
+    MESSAGES = 50
+
+    @pytest.mark.asyncio
+    async def test_pool_throughput(self, smtp_server):
+        """Compare aiosmtplib.send per message against the pooled client"""
+        import aiosmtplib
+
+        controller, handler = smtp_server
+
+        start = time.perf_counter()
+        for i in range(self.MESSAGES):
+            await aiosmtplib.send(_message(i), hostname=controller.hostname,
+                                  port=controller.port, start_tls=False, timeout=5)
+        unpooled_elapsed = time.perf_counter() - start
+
+        pool = _make_pool(controller, pool_size=2)
+        start = time.perf_counter()
+        await asyncio.gather(*(pool.send_message(_message(i)) for i in range(self.MESSAGES)))
+        pooled_elapsed = time.perf_counter() - start
+        await pool.close()
+
+        unpooled_rate = self.MESSAGES / unpooled_elapsed
+        pooled_rate = self.MESSAGES / pooled_elapsed
+        print(f"\nSMTP throughput: unpooled {unpooled_rate:.1f} msg/s, "
+              f"pooled {pooled_rate:.1f} msg/s ({pooled_rate / unpooled_rate:.1f}x), "
+              f"sessions opened: {pool.stats()['connections_opened']}")
+
+        assert handler.messages == self.MESSAGES * 2
+        assert pool.stats()["connections_opened"] <= 2
+        # Even on loopback (no TLS/AUTH to amortise) reuse should not be slower
+        assert pooled_elapsed < unpooled_elapsed * 1.5
@@ -0,0 +1,92 @@
+"""
+Student journey load harness tests
+Runs scripts/load_test.py end to end for a few students (in-process app,
+throwaway database, local SMTP sink) and checks the result summaries
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+from journey_load import ENDPOINTS, EndpointStats, LoadResult, compare_results, percentile  # noqa: E402
+
+
+def _result(latency_ms: float, status: int = 200) -> dict:
+    endpoints = {}
+    for name in ENDPOINTS:
+        stats = EndpointStats(name)
+        for _ in range(20):
+            stats.record(latency_ms / 1000, status)
+        endpoints[name] = stats
+    return LoadResult(students=10, concurrency=5, duration=2.0, endpoints=endpoints,
+                      journeys_completed=10, errors=[]).to_dict()
+
+
+class TestLoadResults:
+    """Test percentiles and comparing runs"""
+
+    def test_percentile_nearest_rank(self):
+        """Test percentiles pick observed values"""
+        values = [i / 1000 for i in range(1, 101)]
+        assert percentile(values, 50) == 0.05
+        assert percentile(values, 95) == 0.095
+        assert percentile(values, 99) == 0.099
+        assert percentile([0.2], 99) == 0.2
+        assert percentile([], 50) is None
+
+    def test_endpoint_error_rate(self):
+        """Test error statuses and failed requests count as errors"""
+        stats = EndpointStats("POST /api/v2/student/info")
+        stats.record(0.1, 200)
+        stats.record(0.2, 503)
+        stats.record(0.3, None)
+        data = stats.to_dict(duration=1.0)
+        assert data["errors"] == 2
+        assert data["statuses"] == {"200": 1, "503": 1, "exception": 1}
+        assert data["p99_ms"] == 300.0
+
+    def test_compare_flags_regressions(self):
+        """Test a slower p95 beyond tolerance and a higher error rate are reported"""
+        baseline = _result(10)
+        _, regressions = compare_results(baseline, _result(11), tolerance=0.2)
+        assert regressions == []
+
+        table, regressions = compare_results(baseline, _result(15), tolerance=0.2)
+        assert len(regressions) == len(ENDPOINTS)
+        assert "+50%" in table
+
+        _, regressions = compare_results(baseline, _result(10, status=500), tolerance=0.2)
+        assert all("error rate" in regression for regression in regressions)
+
+
+class TestStudentJourneyLoad:
+    """Test the harness against the real app"""
+
+    def test_in_process_journeys(self, tmp_path):
+        """Test a small run completes every journey and delivers every results email"""
+        pytest.importorskip("aiosmtpd.controller")
+        output = tmp_path / "results.json"
+
+        completed = subprocess.run(
+            [sys.executable, "scripts/load_test.py", "--students", "3", "--concurrency", "3",
+             "--seed", "1", "--email-timeout", "60", "--output", str(output)],
+            cwd=ROOT, capture_output=True, text=True, timeout=300,
+        )
+        assert completed.returncode == 0, completed.stdout + completed.stderr
+
+        result = json.loads(output.read_text())
+        assert result["journeys_completed"] == 3, result["sample_errors"]
+        assert result["error_rate"] == 0, result["sample_errors"]
+        assert set(result["endpoints"]) == set(ENDPOINTS)
+        submits = result["endpoints"]["POST /api/v2/answers/submit"]
+        assert submits["requests"] == 3 * 64
+        assert submits["p50_ms"] <= submits["p95_ms"] <= submits["p99_ms"]
+        assert result["email"]["delivered"] == 3
+        assert result["meta"]["mode"] == "in-process"
@@ -5,7 +5,7 @@ Tests scoring, PDF generation, email, and other business logic services
 
 import pytest
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 from io import BytesIO
 from unittest.mock import Mock, patch, MagicMock
 
@@ -215,6 +215,33 @@ class TestPDFService:
         )
         
         assert pdf_buffer is not None
+    
+    def test_concurrent_renders_do_not_share_figures(self):
+        """Test reports rendered in parallel threads (as report admission runs them) stay separate"""
+        from concurrent.futures import ThreadPoolExecutor
+        from app.services.pdf_service import create_mini_heatmap_riasec, generate_pdf_report
+        
+        scores_data = {
+            'holland_code': 'RIA',
+            'riasec_raw_scores': {'R': 12, 'I': 10, 'A': 8, 'S': 6, 'E': 4, 'C': 2},
+            'bigfive_raw_scores': {'O': 20, 'C': 18, 'E': 15, 'A': 16, 'N': 10},
+            'behavioral_raw_scores': {'motivation': 12, 'grit': 11},
+            'behavioral_flags': {},
+            'ikigai_zones': {}
+        }
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            reports = list(pool.map(
+                lambda name: generate_pdf_report({'student_name': name}, scores_data, is_free_version=True),
+                ['First Student', 'Second Student']
+            ))
+        assert all(report.getvalue().startswith(b'%PDF') for report in reports)
+        
+        # Each chart must match its serial rendering, not pick up another thread's figure
+        chart_scores = [{code: (i + j) % 15 for j, code in enumerate('RIASEC')} for i in range(8)]
+        expected = [create_mini_heatmap_riasec(scores).getvalue() for scores in chart_scores]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            charts = [chart.getvalue() for chart in pool.map(create_mini_heatmap_riasec, chart_scores * 3)]
+        assert charts == expected * 3
 
 
 class TestEmailService:
@@ -705,3 +732,1636 @@ class TestAuthService:
         admin = authenticate_admin(db_session, "testadmin", "wrongpassword")
         
         assert admin is None
+
+
+class TestReportAdmission:
+    """Test report rendering admission control"""
+    
+    def _controller(self, **overrides):
+        from app.services.report_admission import ReportAdmissionController
+        
+        options = dict(max_concurrency=1, max_queue=2, queue_timeout=1,
+                       admin_max_concurrency=1, retry_after=7)
+        options.update(overrides)
+        return ReportAdmissionController(**options)
+    
+    @pytest.mark.asyncio
+    async def test_render_runs_function(self):
+        """Test render returns the function result and frees the slot"""
+        from app.services.report_admission import ReportPriority
+        
+        controller = self._controller()
+        result = await controller.render(ReportPriority.STUDENT, lambda x: x * 2, 21)
+        
+        assert result == 42
+        assert controller.active == 0
+        assert controller.stats()["admitted_total"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_sheds_when_queue_full(self):
+        """Test requests beyond the wait queue are rejected with retry_after"""
+        import asyncio
+        from app.services.report_admission import ReportPriority, ReportQueueFull
+        
+        controller = self._controller(max_queue=1)
+        await controller.acquire(ReportPriority.STUDENT)
+        waiter = asyncio.ensure_future(controller.acquire(ReportPriority.STUDENT))
+        await asyncio.sleep(0)
+        
+        with pytest.raises(ReportQueueFull) as exc_info:
+            await controller.acquire(ReportPriority.STUDENT)
+        assert exc_info.value.retry_after == 7
+        assert controller.stats()["queue_depth"] == 1
+        
+        controller.release(ReportPriority.STUDENT)
+        await waiter
+        controller.release(ReportPriority.STUDENT)
+        assert controller.stats()["shed_total"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_students_served_before_admins(self):
+        """Test waiting students get the next free slot ahead of earlier admin exports"""
+        import asyncio
+        from app.services.report_admission import ReportPriority
+        
+        controller = self._controller(max_concurrency=2, max_queue=5, admin_max_concurrency=1)
+        await controller.acquire(ReportPriority.ADMIN)
+        
+        # Admin cap reached: second export waits even though a slot is free
+        admin_waiter = asyncio.ensure_future(controller.acquire(ReportPriority.ADMIN))
+        await asyncio.sleep(0)
+        assert not admin_waiter.done()
+        
+        # Student takes the free slot immediately
+        await controller.acquire(ReportPriority.STUDENT)
+        student_waiter = asyncio.ensure_future(controller.acquire(ReportPriority.STUDENT))
+        await asyncio.sleep(0)
+        
+        # Freeing the admin slot goes to the waiting student first
+        controller.release(ReportPriority.ADMIN)
+        await asyncio.wait_for(student_waiter, timeout=1)
+        stats = controller.stats()
+        assert stats["active_by_priority"] == {"student": 2, "admin": 0}
+        assert stats["queue_depth_by_priority"]["admin"] == 1
+        assert not admin_waiter.done()
+        
+        controller.release(ReportPriority.STUDENT)
+        await asyncio.wait_for(admin_waiter, timeout=1)
+        controller.release(ReportPriority.STUDENT)
+        controller.release(ReportPriority.ADMIN)
+        assert controller.active == 0
+    
+    @pytest.mark.asyncio
+    async def test_wait_timeout(self):
+        """Test waiting past the queue timeout raises and leaves no stale waiter"""
+        from app.services.report_admission import ReportPriority, ReportQueueFull
+        
+        controller = self._controller(queue_timeout=0.05)
+        await controller.acquire(ReportPriority.STUDENT)
+        
+        with pytest.raises(ReportQueueFull):
+            await controller.acquire(ReportPriority.STUDENT)
+        
+        controller.release(ReportPriority.STUDENT)
+        stats = controller.stats()
+        assert stats["queue_depth"] == 0
+        assert stats["timed_out_total"] == 1
+        
+        # A fresh request is admitted straight away
+        await controller.acquire(ReportPriority.STUDENT)
+        assert controller.active == 1
+
+
+class TestEmailOutbox:
+    """Test the durable email outbox and its dispatcher"""
+    
+    def _dispatcher(self, test_db, sender, **overrides):
+        from app.services.email_outbox import EmailDispatcher, CircuitBreaker
+        
+        options = dict(poll_interval=1, batch_size=10, claim_timeout=300,
+                       breaker=CircuitBreaker(failure_threshold=3, reset_timeout=60),
+                       session_factory=test_db, sender=sender)
+        options.update(overrides)
+        return EmailDispatcher(**options)
+    
+    def _enqueue(self, db_session):
+        from app.models import EmailOutbox
+        from app.services.email_outbox import enqueue_results_email
+        
+        db_session.query(EmailOutbox).delete()
+        db_session.commit()
+        return enqueue_results_email(
+            db_session,
+            to_email="student@test.com",
+            student_name="Outbox Student",
+            holland_code="RIA",
+            top_strength="Openness (High)",
+            pdf_bytes=b"%PDF-1.4 fake",
+            session_id="outbox-session"
+        )
+    
+    @pytest.mark.asyncio
+    async def test_dispatch_sends_and_marks_sent(self, test_db, db_session):
+        """Test a queued email is delivered and its attachment released"""
+        from app.models import EmailOutbox, OutboxStatus
+        
+        sent_messages = []
+        
+        async def sender(message, **kwargs):
+            sent_messages.append(message)
+        
+        queued = self._enqueue(db_session)
+        dispatcher = self._dispatcher(test_db, sender)
+        
+        assert await dispatcher.dispatch_once() == 1
+        assert sent_messages[0]["To"] == "student@test.com"
+        
+        db_session.expire_all()
+        row = db_session.get(EmailOutbox, queued.id)
+        assert row.status == OutboxStatus.sent
+        assert row.attempts == 1
+        assert row.attachment is None
+    
+    @pytest.mark.asyncio
+    async def test_failure_backs_off_then_dead_letters(self, test_db, db_session):
+        """Test failed sends are rescheduled, then dead-lettered with an admin alert"""
+        from app.models import EmailOutbox, OutboxStatus, EmailKind
+        
+        async def sender(message, **kwargs):
+            raise ValueError("550 mailbox unavailable")
+        
+        queued = self._enqueue(db_session)
+        dispatcher = self._dispatcher(test_db, sender)
+        
+        await dispatcher.dispatch_once()
+        db_session.expire_all()
+        row = db_session.get(EmailOutbox, queued.id)
+        assert row.status == OutboxStatus.pending
+        assert row.attempts == 1
+        assert row.next_attempt_at > datetime.utcnow()
+        
+        # Final attempt: make it due and exhaust the budget
+        row.attempts = row.max_attempts - 1
+        row.next_attempt_at = datetime.utcnow()
+        db_session.commit()
+        
+        with patch('app.services.email_outbox.settings.ADMIN_EMAIL', 'admin@test.com'):
+            await dispatcher.dispatch_once()
+        
+        db_session.expire_all()
+        row = db_session.get(EmailOutbox, queued.id)
+        assert row.status == OutboxStatus.dead
+        assert "550 mailbox unavailable" in row.last_error
+        alert = db_session.query(EmailOutbox).filter(EmailOutbox.kind == EmailKind.admin_notification).one()
+        assert alert.to_email == "admin@test.com"
+        assert alert.status == OutboxStatus.pending
+    
+    @pytest.mark.asyncio
+    async def test_circuit_opens_on_host_failures(self, test_db, db_session):
+        """Test repeated connection failures open the circuit and pause delivery"""
+        from app.models import EmailOutbox
+        from app.services.email_outbox import CircuitBreaker
+        
+        calls = []
+        
+        async def sender(message, **kwargs):
+            calls.append(message)
+            raise ConnectionRefusedError("SMTP host down")
+        
+        self._enqueue(db_session)
+        dispatcher = self._dispatcher(
+            test_db, sender, breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        )
+        
+        await dispatcher.dispatch_once()
+        assert dispatcher.breaker.state == CircuitBreaker.OPEN
+        
+        # Make the message due again - the open circuit must still hold it back
+        db_session.query(EmailOutbox).update({EmailOutbox.next_attempt_at: datetime(2000, 1, 1)})
+        db_session.commit()
+        assert await dispatcher.dispatch_once() == 0
+        assert len(calls) == 1
+    
+    @pytest.mark.asyncio
+    async def test_lost_claim_is_not_sent(self, test_db, db_session):
+        """Test a message re-queued while its batch was running is left to whoever claims it next"""
+        from app.models import EmailOutbox, OutboxStatus
+        
+        calls = []
+        
+        async def sender(message, **kwargs):
+            calls.append(message)
+        
+        queued = self._enqueue(db_session)
+        dispatcher = self._dispatcher(test_db, sender)
+        item = dispatcher._claim_due(10)[0]
+        
+        # The stale-claim sweep of another worker returned it to pending
+        db_session.query(EmailOutbox).update({EmailOutbox.status: OutboxStatus.pending})
+        db_session.commit()
+        
+        assert await dispatcher._deliver(item) is False
+        assert calls == []
+        db_session.expire_all()
+        assert db_session.get(EmailOutbox, queued.id).status == OutboxStatus.pending
+    
+    @pytest.mark.asyncio
+    async def test_claim_renewed_before_send(self, test_db, db_session):
+        """Test each send refreshes its claim so a long batch isn't swept as stale"""
+        from app.models import EmailOutbox
+        
+        seen = []
+        
+        async def sender(message, **kwargs):
+            row = db_session.query(EmailOutbox).one()
+            db_session.refresh(row)
+            seen.append(row.updated_at)
+        
+        self._enqueue(db_session)
+        dispatcher = self._dispatcher(test_db, sender)
+        item = dispatcher._claim_due(10)[0]
+        db_session.query(EmailOutbox).update({EmailOutbox.updated_at: datetime(2000, 1, 1)})
+        db_session.commit()
+        
+        assert await dispatcher._deliver(item) is True
+        assert seen[0] > datetime.utcnow() - timedelta(minutes=1)
+    
+    @pytest.mark.asyncio
+    async def test_stop_while_woken(self, test_db):
+        """Test stop() returns even when the cancel lands as the dispatcher wakes up"""
+        import asyncio
+        
+        async def sender(message, **kwargs):
+            pass
+        
+        dispatcher = self._dispatcher(test_db, sender, poll_interval=60)
+        dispatcher.start()
+        await asyncio.sleep(0.2)
+        dispatcher.wake()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        stopping = asyncio.ensure_future(dispatcher.stop())
+        done, _ = await asyncio.wait({stopping}, timeout=5)
+        if not done:
+            dispatcher._task.cancel()
+        assert stopping in done
+        assert not dispatcher.running
+    
+    def test_claim_timeout_must_outlast_a_send(self, test_db):
+        """Test a claim timeout shorter than a retried send is rejected"""
+        with pytest.raises(ValueError):
+            self._dispatcher(test_db, None, claim_timeout=60, send_timeout=30)
+    
+    def test_submit_only_enqueues(self, client, test_db, db_session, test_student_response, tmp_path):
+        """Test results submission queues the email instead of sending inline"""
+        from app.models import EmailOutbox, AssessmentScore
+        
+        score = AssessmentScore(response_id=test_student_response.id, riasec_profile="RIA")
+        with patch('app.routers.api_v2.settings.ENABLE_EMAIL', True), \
+             patch('app.routers.api_v2.settings.RESULTS_DELIVERY_MODE', 'attachment'), \
+             patch('app.routers.api_v2.calculate_complete_profile_v1_1', return_value={"ok": True}), \
+             patch('app.routers.api_v2.save_assessment_score_v1_1', return_value=score), \
+             patch('app.services.report_store.generate_pdf_report', return_value=BytesIO(b"%PDF")), \
+             patch('app.routers.api_v2.report_store.root', str(tmp_path)), \
+             patch('app.routers.api_v2.report_store.session_factory', test_db), \
+             patch('app.services.email_outbox.email_dispatcher.wake'):
+            response = client.post("/api/v2/student/info", json={
+                "session_id": test_student_response.session_id,
+                "email": "queued@test.com",
+                "full_name": "Queued Student",
+                "age_group": "19-22",
+                "country": "Canada",
+                "origin_country": "India"
+            })
+        
+        assert response.status_code == 200
+        assert response.json()["email_status"] == "queued"
+        queued = db_session.query(EmailOutbox).filter(EmailOutbox.to_email == "queued@test.com").one()
+        assert queued.attachment == b"%PDF"
+    
+    def test_link_mode_enqueues_download_link(self, client, db_session, test_student_response):
+        """Test link delivery queues an email with a signed URL and no attachment"""
+        from app.models import EmailOutbox, AssessmentScore
+        from app.services.email_outbox import build_message
+        
+        score = AssessmentScore(response_id=test_student_response.id, riasec_profile="RIA")
+        with patch('app.routers.api_v2.settings.ENABLE_EMAIL', True), \
+             patch('app.routers.api_v2.settings.RESULTS_DELIVERY_MODE', 'link'), \
+             patch('app.routers.api_v2.settings.REPORT_PRERENDER', False), \
+             patch('app.routers.api_v2.calculate_complete_profile_v1_1', return_value={"ok": True}), \
+             patch('app.routers.api_v2.save_assessment_score_v1_1', return_value=score), \
+             patch('app.services.email_outbox.email_dispatcher.wake'):
+            response = client.post("/api/v2/student/info", json={
+                "session_id": test_student_response.session_id,
+                "email": "linked@test.com",
+                "full_name": "Linked Student",
+                "age_group": "19-22",
+                "country": "Canada",
+                "origin_country": "India"
+            })
+        
+        assert response.status_code == 200
+        download_url = response.json()["download_url"]
+        assert "/api/v2/reports/" in download_url
+        
+        queued = db_session.query(EmailOutbox).filter(EmailOutbox.to_email == "linked@test.com").one()
+        assert queued.attachment is None
+        message = build_message(queued.kind, queued.to_email, json.loads(queued.payload), None, None)
+        assert len(message.get_payload()) == 1  # HTML/logo only, no PDF part
+        assert download_url in message.get_payload()[0].get_payload()[0].get_payload(decode=True).decode()
+
+
+class TestReportStore:
+    """Test the content-addressed report store"""
+    
+    def _inputs(self, name="Store Student"):
+        response_dict = {'student_name': name, 'email': 'store@test.com'}
+        scores_dict = {'holland_code': 'RIA', 'bigfive_raw_scores': {'O': 80}}
+        return response_dict, scores_dict
+    
+    def test_key_changes_with_inputs(self):
+        """Test the key is stable for equal inputs and changes with them"""
+        from app.services.report_store import report_key
+        
+        response_dict, scores_dict = self._inputs()
+        assert report_key(response_dict, scores_dict, is_free_version=True) == \
+            report_key(dict(reversed(list(response_dict.items()))), scores_dict, is_free_version=True)
+        assert report_key(response_dict, scores_dict, is_free_version=True) != \
+            report_key(response_dict, scores_dict, is_free_version=False)
+        assert report_key(response_dict, scores_dict) != report_key(*self._inputs("Someone Else"))
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_render_once(self, test_db, tmp_path):
+        """Test simultaneous fetches of a missing report share one render"""
+        import asyncio
+        from app.services.report_store import ReportStore
+        
+        renders = []
+        
+        def fake_render(response_dict, scores_dict, **options):
+            renders.append(response_dict['student_name'])
+            return BytesIO(b"%PDF-1.4 stored")
+        
+        store = ReportStore(str(tmp_path), max_bytes=1024 * 1024, max_files=10, session_factory=test_db)
+        response_dict, scores_dict = self._inputs()
+        with patch('app.services.report_store.generate_pdf_report', side_effect=fake_render):
+            results = await asyncio.gather(*(store.get_or_render(response_dict, scores_dict) for _ in range(5)))
+            again = await store.get_or_render(response_dict, scores_dict)
+        
+        assert renders == ["Store Student"]
+        assert len({r.key for r in results}) == 1
+        assert again.read_bytes() == b"%PDF-1.4 stored"
+        assert store.stats()["hits"] == 1
+    
+    def test_evicts_least_recently_used(self, test_db, tmp_path):
+        """Test the file cap evicts the stalest report outside the grace window"""
+        from datetime import datetime, timedelta
+        from app.models import ReportArtifact
+        from app.services.report_store import ReportStore, EVICTION_GRACE_SECONDS
+        
+        store = ReportStore(str(tmp_path), max_bytes=1024 * 1024, max_files=2, session_factory=test_db)
+        keys = [f"{i:064x}" for i in range(3)]
+        
+        db = test_db()
+        try:
+            db.query(ReportArtifact).delete()
+            db.commit()
+            store.put(keys[0], b"%PDF old")
+            store.put(keys[1], b"%PDF recent")
+            stale = datetime.utcnow() - timedelta(seconds=EVICTION_GRACE_SECONDS * 2)
+            db.query(ReportArtifact).filter(ReportArtifact.key == keys[0]).update({"last_accessed_at": stale})
+            db.query(ReportArtifact).filter(ReportArtifact.key == keys[1]).update(
+                {"last_accessed_at": stale + timedelta(seconds=1)})
+            db.commit()
+        finally:
+            db.close()
+        
+        store.put(keys[2], b"%PDF new")
+        
+        assert store.get(keys[0]) is None
+        assert store.get(keys[1]).read_bytes() == b"%PDF recent"
+        assert store.get(keys[2]).read_bytes() == b"%PDF new"
+        assert store.stats()["evictions"] == 1
+    
+    def test_delete_for_response_removes_files(self, test_db, test_student_response, tmp_path):
+        """Test deleting a response drops its stored reports"""
+        import os
+        from app.services.report_store import ReportStore
+        
+        store = ReportStore(str(tmp_path), max_bytes=1024 * 1024, max_files=10, session_factory=test_db)
+        key = "f" * 64
+        store.put(key, b"%PDF", response_id=test_student_response.id)
+        
+        assert store.delete_for_response(test_student_response.id) == 1
+        assert not os.path.exists(store.path_for(key))
+        assert store.get(key) is None
+
+
+class TestResultsExport:
+    """Test the streaming results CSV export"""
+    
+    def test_rows_include_scores_and_unscored_responses(self, db_session, test_student_response):
+        """Test scored and unscored responses are both exported with all columns"""
+        import csv
+        import io
+        from app.models import AssessmentScore, StudentResponse
+        from app.services.results_export import iter_results_csv, RESULTS_CSV_HEADER
+        
+        unscored = StudentResponse(session_id=f"export-{test_student_response.id}", full_name="No Scores",
+                                   email="none@test.com", age_group="19-22", country="Canada",
+                                   origin_country="Canada")
+        db_session.add(unscored)
+        db_session.add(AssessmentScore(
+            response_id=test_student_response.id, riasec_r_score=0.0, riasec_profile="RIA",
+            bigfive_openness=82.5, riasec_strength_labels=json.dumps({"R": "High"}),
+            bigfive_strength_labels=json.dumps({"O": "Very High"}),
+            behavioral_flags=json.dumps({"growth_mindset": 1})
+        ))
+        db_session.commit()
+        
+        rows = list(csv.reader(io.StringIO(b"".join(iter_results_csv(db_session, chunk_rows=1)).decode())))
+        assert rows[0] == RESULTS_CSV_HEADER
+        by_id = {row[0]: dict(zip(RESULTS_CSV_HEADER, row)) for row in rows[1:]}
+        assert all(len(row) == len(RESULTS_CSV_HEADER) for row in rows)
+        
+        scored = by_id[str(test_student_response.id)]
+        assert scored["RIASEC R"] == "0.0"
+        assert scored["RIASEC R Label"] == "High"
+        assert scored["Big5 O"] == "82.5"
+        assert scored["Big5 O Label"] == "Very High"
+        assert scored["Growth Mindset"] == "Yes"
+        assert by_id[str(unscored.id)]["RIASEC Profile"] == ""
+    
+    def test_export_is_not_capped(self, db_session):
+        """Test every response is exported, not just the first page"""
+        from app.models import StudentResponse
+        from app.services.results_export import iter_results_csv
+        
+        db_session.add_all(StudentResponse(session_id=f"export-cap-{i}", full_name=f"Student {i}",
+                                           email=f"cap{i}@test.com", age_group="19-22",
+                                           country="Canada", origin_country="Canada")
+                           for i in range(120))
+        db_session.commit()
+        
+        body = b"".join(iter_results_csv(db_session, batch_size=25, chunk_rows=40)).decode()
+        total = db_session.query(StudentResponse).count()
+        assert body.count("\r\n") == total + 1
+
+
+class TestAnswerMatrixExport:
+    """Test the analyst answer matrix export"""
+    
+    @pytest.fixture
+    def matrix_db(self, isolated_db):
+        """Two items plus one scored and one unscored completed response"""
+        from app.models import Page, Question, QuestionType, StudentResponse, QuestionAnswer, AssessmentScore
+        
+        session = isolated_db
+        page = Page(title="Items", order_index=1)
+        session.add(page)
+        session.flush()
+        slider = Question(page_id=page.id, question_text="Fix things", question_type=QuestionType.slider, item_id="R1")
+        mcq = Question(page_id=page.id, question_text="Pick one", question_type=QuestionType.mcq, item_id="FC_RI_1")
+        untagged = Question(page_id=page.id, question_text="Comments", question_type=QuestionType.essay)
+        session.add_all([slider, mcq, untagged])
+        session.flush()
+        
+        for i in range(2):
+            response = StudentResponse(session_id=f"matrix-{i}", email=f"m{i}@test.com", full_name=f"Matrix {i}",
+                                       age_group="19-22", country="Canada", origin_country="India",
+                                       completed_at=datetime(2025, 1, 1 + i))
+            session.add(response)
+            session.flush()
+            session.add_all([
+                QuestionAnswer(response_id=response.id, question_id=slider.id, answer_value=60.0 + i),
+                QuestionAnswer(response_id=response.id, question_id=mcq.id, answer_json='["0"]'),
+                QuestionAnswer(response_id=response.id, question_id=untagged.id, answer_text="hello"),
+            ])
+            if i == 0:
+                session.add(AssessmentScore(response_id=response.id, riasec_r_score=14.0, riasec_profile="RIA"))
+        session.add(StudentResponse(session_id="matrix-open", email="o@test.com", full_name="Open",
+                                    age_group="19-22", country="Canada", origin_country="India"))
+        session.commit()
+        return session
+    
+    def test_batches_are_wide_and_keyed_by_item(self, matrix_db):
+        """Test each completed response becomes one row with a column per item_id"""
+        from app.services.answer_matrix_export import load_items, iter_matrix_batches
+        
+        items = load_items(matrix_db)
+        batches = list(iter_matrix_batches(matrix_db, items, batch_size=1))
+        
+        assert [item.item_id for item in items] == ["FC_RI_1", "R1"]
+        assert len(batches) == 2  # in-progress response excluded
+        first = batches[0]
+        assert first["R1"] == [60.0]
+        assert first["FC_RI_1"] == ['["0"]']
+        assert first["riasec_r_score"] == [14.0]
+        assert "email" not in first and "full_name" not in first
+        assert batches[1]["riasec_profile"] == [None]
+    
+    def test_incremental_runs_export_new_completions_only(self, matrix_db, tmp_path):
+        """Test the second run only picks up responses completed after the watermark"""
+        from app.models import StudentResponse
+        from app.services.answer_matrix_export import run_export, PYARROW_AVAILABLE
+        
+        if not PYARROW_AVAILABLE:
+            pytest.skip("pyarrow not installed")
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        full = run_export(matrix_db, fmt="parquet", output_dir=str(tmp_path / "exports"), batch_size=1)
+        table = pq.read_table(full.path)
+        assert full.row_count == 2 and full.since is None
+        assert pq.ParquetFile(full.path).num_row_groups == 2
+        assert table.column("R1").to_pylist() == [60.0, 61.0]
+        
+        late = matrix_db.query(StudentResponse).filter(StudentResponse.session_id == "matrix-open").one()
+        late.completed_at = datetime.utcnow()
+        matrix_db.commit()
+        
+        incremental = run_export(matrix_db, fmt="arrow", output_dir=str(tmp_path / "exports"))
+        assert incremental.since == full.until
+        assert incremental.row_count == 1
+        
+        with pa.memory_map(incremental.path) as source:
+            mapped = pa.ipc.open_file(source).read_all()
+        assert mapped.column("session_id").to_pylist() == ["matrix-open"]
+
+
+class TestResultsPagination:
+    """Test keyset pagination and filters of the admin results list"""
+    
+    @pytest.fixture
+    def results_db(self, isolated_db):
+        """25 responses, several sharing a created_at timestamp"""
+        from datetime import timedelta
+        from app.models import StudentResponse, AssessmentScore
+        
+        session = isolated_db
+        base = datetime(2025, 3, 1, 12, 0, 0)
+        for i in range(25):
+            response = StudentResponse(
+                session_id=f"page-{i}", email=f"p{i}@test.com", full_name=f"Page Student {i}",
+                age_group="19-22", country="Canada" if i % 2 else "Egypt", origin_country="India",
+                created_at=base + timedelta(days=i // 5),  # groups of five share a timestamp
+                completed_at=base + timedelta(days=i // 5, hours=1) if i % 3 == 0 else None
+            )
+            session.add(response)
+            session.flush()
+            if i % 3 == 0:
+                session.add(AssessmentScore(response_id=response.id, riasec_profile=["RIA", "RIS", "SEC"][i % 9 // 3]))
+        session.commit()
+        return session
+    
+    def _walk(self, db, **filters):
+        from app.services.response_service import list_responses_page
+        
+        seen, cursor = [], None
+        while True:
+            rows, cursor = list_responses_page(db, cursor=cursor, limit=4, **filters)
+            seen.extend(row[0].id for row in rows)
+            if cursor is None:
+                return seen
+    
+    def test_pages_cover_every_row_once_with_ties(self, results_db):
+        """Test walking the pages returns each response exactly once, newest first"""
+        from app.models import StudentResponse
+        
+        expected = [r.id for r in results_db.query(StudentResponse).order_by(
+            StudentResponse.created_at.desc(), StudentResponse.id.desc())]
+        assert self._walk(results_db) == expected
+    
+    def test_filters(self, results_db):
+        """Test completion, country, holland code prefix and date range filters"""
+        from datetime import date
+        from app.models import StudentResponse
+        
+        completed = self._walk(results_db, completion="completed")
+        assert len(completed) == 9
+        assert all(results_db.get(StudentResponse, rid).completed_at for rid in completed)
+        
+        assert len(self._walk(results_db, holland_code="RI")) == 6
+        assert len(self._walk(results_db, holland_code="R-I-S")) == 3
+        assert len(self._walk(results_db, country="Egypt")) == 13
+        assert len(self._walk(results_db, date_from=date(2025, 3, 2), date_to=date(2025, 3, 3))) == 10
+        assert self._walk(results_db, search="student 7") == [results_db.query(StudentResponse.id).filter(
+            StudentResponse.session_id == "page-7").scalar()]
+    
+    def test_deleted_cursor_row_resumes(self, results_db):
+        """Test a page still loads when the previous page's last row was deleted"""
+        from app.services.response_service import list_responses_page
+        
+        first, cursor = list_responses_page(results_db, limit=4)
+        results_db.delete(first[-1][0])
+        results_db.commit()
+        
+        second, _ = list_responses_page(results_db, cursor=cursor, limit=4)
+        assert second and cursor not in [row[0].id for row in second]
+        assert {row[0].id for row in second}.isdisjoint({row[0].id for row in first})
+    
+    def test_page_query_uses_index_order(self, results_db):
+        """Test deep pages walk the (created_at, id) index instead of sorting the table"""
+        from sqlalchemy import event
+        from app.services.response_service import list_responses_page
+        
+        captured = []
+        
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if "LIMIT" in statement.upper():
+                captured.append((statement, parameters))
+        
+        engine = results_db.get_bind()
+        _, cursor = list_responses_page(results_db, limit=4)
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            list_responses_page(results_db, cursor=cursor, limit=4)
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+        
+        statement, parameters = captured[-1]
+        plan = " ".join(str(row[-1]) for row in results_db.connection().exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {statement}", parameters))
+        assert "ix_student_responses_created_id" in plan
+        assert "TEMP B-TREE" not in plan
+
+
+class TestAnalyticsRollups:
+    """Test incrementally maintained analytics rollups"""
+    
+    def _profile(self, r_score):
+        return {
+            'riasec': {'raw_scores': {'R': r_score, 'I': 10, 'A': 8, 'S': 6, 'E': 4, 'C': 2},
+                       'strength_labels': {'R': 'High', 'I': 'Medium'}, 'holland_code': 'RIA'},
+            'bigfive': {'raw_scores': {'O': 20, 'C': 18, 'E': 16, 'A': 14, 'N': 12},
+                        'strength_labels': {'O': 'Very High'}},
+            'behavioral': {'strength_labels': {}, 'behavioral_flags': {}},
+            'ikigai_zones': {},
+        }
+    
+    def _simulate(self, db):
+        from app.schemas import StudentResponseCreate
+        from app.services import response_service
+        from app.services.scoring_service_v1_1 import save_assessment_score_v1_1
+        
+        sessions = []
+        for i, country in enumerate(["Canada", "Canada", "Egypt", "Egypt"]):
+            created = response_service.create_student_response(db, StudentResponseCreate(
+                session_id=f"rollup-{i}", email=f"r{i}@test.com", full_name=f"Rollup {i}",
+                age_group="19-22", country=country, origin_country="India"))
+            sessions.append(created)
+        for created, r_score in zip(sessions[:2], (20, 30)):
+            response_service.complete_student_response(db, created.session_id)
+            save_assessment_score_v1_1(db, created.id, self._profile(r_score))
+        # Resubmission and rescoring must not double count
+        response_service.complete_student_response(db, sessions[0].session_id)
+        save_assessment_score_v1_1(db, sessions[0].id, self._profile(40))
+        response_service.mark_session_abandoned(db, sessions[3].session_id)
+        return sessions
+    
+    def test_incremental_counters(self, isolated_db):
+        """Test starts, completions, abandonment and scores update the dashboard"""
+        from app.services.analytics_rollup import get_dashboard_data
+        
+        self._simulate(isolated_db)
+        data = get_dashboard_data(isolated_db)
+        
+        assert data["total_responses"] == 4
+        assert data["completion_stats"] == {"completed": 2, "in_progress": 1, "abandoned": 1, "completion_rate": 50.0}
+        assert data["riasec_distribution"]["Realistic"] == 35.0  # (40 + 30) / 2 after rescoring
+        assert data["bigfive_distribution"]["Openness"] == 20.0
+        assert data["label_distribution"]["riasec"]["R"] == {"High": 2}
+        assert data["country_counts"] == [{"country": "Canada", "completed": 2}]
+        assert data["response_trend"][-1]["count"] == 4
+    
+    def test_rebuild_matches_incremental(self, isolated_db):
+        """Test the backfill recomputes the same rollups from the base tables"""
+        from app.services.analytics_rollup import get_dashboard_data, rebuild_rollups
+        
+        self._simulate(isolated_db)
+        incremental = get_dashboard_data(isolated_db)
+        
+        written = rebuild_rollups(isolated_db)
+        
+        assert written["activity_days"] == 1
+        assert get_dashboard_data(isolated_db) == incremental
+    
+    def test_removed_responses_are_subtracted(self, isolated_db):
+        """Test removing responses takes back their counts, scores and labels"""
+        from app.services.analytics_rollup import get_dashboard_data, rebuild_rollups, remove_responses
+        
+        sessions = self._simulate(isolated_db)
+        remove_responses(isolated_db, [sessions[0].id, sessions[3].id])
+        isolated_db.commit()
+        data = get_dashboard_data(isolated_db)
+        
+        assert data["completion_stats"] == {"completed": 1, "in_progress": 1, "abandoned": 0, "completion_rate": 50.0}
+        assert data["riasec_distribution"]["Realistic"] == 30.0
+        assert data["label_distribution"]["riasec"]["R"] == {"High": 1}
+        assert data["country_counts"] == [{"country": "Canada", "completed": 1}]
+        
+        remove_responses(isolated_db, [sessions[1].id, sessions[2].id])
+        isolated_db.commit()
+        data = get_dashboard_data(isolated_db)
+        assert data["total_responses"] == 0
+        assert data["riasec_distribution"]["Realistic"] == 0
+        assert data["label_distribution"] == {"riasec": {}, "bigfive": {}}
+        assert data["country_counts"] == []
+    
+    def test_score_rollups_are_one_upsert_per_table(self, isolated_db):
+        """Test scoring, rescoring and removal write each rollup table with a single statement"""
+        from app.services.analytics_rollup import remove_responses
+        from app.services.scoring_service_v1_1 import save_assessment_score_v1_1
+        from app.services.sql_instrumentation import capture_queries
+        
+        sessions = self._simulate(isolated_db)
+        
+        def upserts(queries, table):
+            return [s for s in queries.statements if s.lstrip().upper().startswith(f"INSERT INTO {table.upper()}")]
+        
+        with capture_queries() as queries:
+            save_assessment_score_v1_1(isolated_db, sessions[1].id, self._profile(25))
+        # The old score is subtracted and the new one added: one statement each
+        assert len(upserts(queries, "daily_score_rollups")) == 2
+        assert len(upserts(queries, "daily_label_rollups")) == 2
+        
+        with capture_queries() as queries:
+            remove_responses(isolated_db, [session.id for session in sessions])
+        assert len(upserts(queries, "daily_score_rollups")) == 1
+        assert len(upserts(queries, "daily_label_rollups")) == 1
+        assert len(upserts(queries, "daily_activity_rollups")) == 1
+    
+    def test_row_by_row_fallback_matches(self, isolated_db):
+        """Test dialects without ON CONFLICT get the same rollups from the per-row path"""
+        from unittest.mock import patch
+        from app.services.analytics_rollup import get_dashboard_data, rebuild_rollups
+        from app.services.response_service import delete_student_response
+        
+        with patch.object(isolated_db.get_bind().dialect, "name", "other"):
+            sessions = self._simulate(isolated_db)
+            delete_student_response(isolated_db, sessions[0].id)
+            incremental = get_dashboard_data(isolated_db)
+        
+        rebuild_rollups(isolated_db)
+        assert incremental["riasec_distribution"]["Realistic"] == 30.0
+        assert get_dashboard_data(isolated_db) == incremental
+
+
+class TestBulkDeleteResponses:
+    """Test set-based bulk deletion of responses"""
+    
+    def test_deletes_dependents_in_chunks(self, db_session, test_db):
+        """Test dependent rows go with their responses using one DELETE per table per chunk"""
+        from sqlalchemy import event
+        from app.models import (
+            StudentResponse, QuestionAnswer, AssessmentScore, Feedback, EmailOutbox, EmailKind, Page, Question, QuestionType
+        )
+        from app.services.response_service import bulk_delete_responses
+        
+        page = Page(title="Bulk", order_index=99)
+        db_session.add(page)
+        db_session.flush()
+        question = Question(page_id=page.id, question_text="Q", question_type=QuestionType.slider)
+        db_session.add(question)
+        db_session.flush()
+        
+        ids = []
+        for i in range(5):
+            response = StudentResponse(session_id=f"bulk-{i}", email=f"b{i}@test.com", full_name="Bulk",
+                                       age_group="19-22", country="Canada", origin_country="India")
+            db_session.add(response)
+            db_session.flush()
+            ids.append(response.id)
+            db_session.add_all([
+                QuestionAnswer(response_id=response.id, question_id=question.id, answer_value=50),
+                AssessmentScore(response_id=response.id, riasec_profile="RIA"),
+                Feedback(session_id=response.session_id, rating=5),
+            ])
+        keeper = ids.pop()
+        db_session.add(EmailOutbox(kind=EmailKind.results, to_email="b0@test.com", payload="{}",
+                                   max_attempts=3, response_id=ids[0]))
+        db_session.commit()
+        
+        statements = []
+        
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("DELETE"):
+                statements.append(statement)
+        
+        engine = db_session.get_bind()
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            counts = bulk_delete_responses(db_session, ids + [ids[0], 999999], chunk_size=3)
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+        
+        assert counts == {"student_responses": 4, "question_answers": 4, "assessment_scores": 4, "feedbacks": 4}
+        assert len(statements) == 4 * 2  # four tables, two chunks
+        assert db_session.query(StudentResponse).filter(StudentResponse.id.in_(ids)).count() == 0
+        assert db_session.query(QuestionAnswer).filter(QuestionAnswer.response_id == keeper).count() == 1
+        assert db_session.query(EmailOutbox).filter(EmailOutbox.to_email == "b0@test.com").one().response_id is None
+    
+    def test_deletes_update_dashboard_rollups(self, isolated_db):
+        """Test deleted responses and scores no longer count on the analytics dashboard"""
+        from app.services.analytics_rollup import get_dashboard_data
+        from app.services.response_service import bulk_delete_responses, delete_student_response
+        
+        sessions = TestAnalyticsRollups()._simulate(isolated_db)
+        before = get_dashboard_data(isolated_db)
+        assert before["total_responses"] == 4
+        
+        bulk_delete_responses(isolated_db, [sessions[0].id, sessions[3].id], chunk_size=1)
+        data = get_dashboard_data(isolated_db)
+        assert data["total_responses"] == 2
+        assert data["completion_stats"]["completed"] == 1
+        assert data["completion_stats"]["abandoned"] == 0
+        assert data["riasec_distribution"]["Realistic"] == 30.0
+        assert data["country_counts"] == [{"country": "Canada", "completed": 1}]
+        
+        assert delete_student_response(isolated_db, sessions[1].id)
+        data = get_dashboard_data(isolated_db)
+        assert data["total_responses"] == 1
+        assert data["completion_stats"]["completed"] == 0
+        assert data["riasec_distribution"]["Realistic"] == 0
+        assert data["country_counts"] == []
+
+
+class TestStatsCache:
+    """Test cached admin statistics"""
+    
+    def _add_response(self, db, session_id, rating=None, would_recommend=None):
+        from app.models import StudentResponse, Feedback
+        
+        db.add(StudentResponse(session_id=session_id, email=f"{session_id}@test.com", full_name="Stats",
+                               age_group="19-22", country="Canada", origin_country="India"))
+        db.add(Feedback(session_id=session_id, rating=rating, would_recommend=would_recommend))
+        db.commit()
+    
+    def test_single_query_and_invalidation(self, isolated_db):
+        """Test stats are computed in one statement, served from cache, and refreshed on invalidation"""
+        from sqlalchemy import event
+        from app.services import stats_cache
+        
+        self._add_response(isolated_db, "stats-1", rating=5, would_recommend=True)
+        self._add_response(isolated_db, "stats-2", rating=2, would_recommend=False)
+        self._add_response(isolated_db, "stats-3")
+        
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(isolated_db.get_bind(), "before_cursor_execute", listener)
+        try:
+            first = stats_cache.get_feedback_stats(isolated_db)
+            second = stats_cache.get_feedback_stats(isolated_db)
+        finally:
+            event.remove(isolated_db.get_bind(), "before_cursor_execute", listener)
+        
+        assert len(statements) == 1
+        assert first == second == {
+            "total_feedbacks": 3,
+            "average_rating": 3.5,
+            "total_with_rating": 2,
+            "would_recommend_count": 1,
+            "would_not_recommend_count": 1
+        }
+        
+        self._add_response(isolated_db, "stats-4", rating=5)
+        assert stats_cache.get_feedback_stats(isolated_db)["total_feedbacks"] == 3
+        stats_cache.invalidate_feedback()
+        assert stats_cache.get_feedback_stats(isolated_db)["total_feedbacks"] == 4
+        assert stats_cache.get_dashboard_counts(isolated_db)["total_responses"] == 4
+        
+        counters = stats_cache.stats_cache.stats()["keys"]["feedback"]
+        assert (counters["hits"], counters["misses"], counters["invalidations"]) == (2, 2, 1)
+        assert counters["hit_rate"] == 0.5
+    
+    def test_entries_expire_after_ttl(self):
+        """Test a zero TTL recomputes on every lookup"""
+        from app.services.stats_cache import StatsCache
+        
+        cache = StatsCache(ttl=0)
+        calls = []
+        for _ in range(3):
+            cache.get_or_compute("k", lambda: calls.append(1) or len(calls))
+        
+        assert len(calls) == 3
+        assert cache.stats()["misses"] == 3
+    
+    def test_response_writes_invalidate(self, db_session):
+        """Test creating a response through the service refreshes the cached totals"""
+        from app.schemas import StudentResponseCreate
+        from app.services import response_service
+        
+        before = response_service.get_response_statistics(db_session)["total_responses"]
+        response_service.create_student_response(db_session, StudentResponseCreate(
+            session_id="stats-write", email="sw@test.com", full_name="Stats Write",
+            age_group="19-22", country="Canada", origin_country="India"
+        ))
+        
+        assert response_service.get_response_statistics(db_session)["total_responses"] == before + 1
+
+
+class TestChunkedCSVImport:
+    """Test the streaming, chunked CSV question import"""
+    
+    @pytest.fixture
+    def import_db(self, isolated_db):
+        """Category the imported rows are filed under"""
+        from app.models import Category
+        
+        session = isolated_db
+        session.add(Category(name="Imported"))
+        session.commit()
+        return session
+    
+    def _csv(self, titles):
+        lines = ["title,question_text,category_name,is_required,essay_char_limit"]
+        lines += [f"{title},Question {i},Imported,TRUE,{'oops' if title == 'bad' else 300}" for i, title in enumerate(titles)]
+        return "\n".join(lines) + "\n"
+    
+    def test_inserts_each_chunk_with_one_statement(self, import_db):
+        """Test valid rows go in one executemany INSERT per chunk and invalid rows are reported"""
+        from io import BytesIO
+        from sqlalchemy import event
+        from app.models import QuestionPool, ImportLog
+        from app.services.csv_import_service import CSVImportExportService
+        
+        titles = [f"Q{i}" for i in range(7)]
+        titles[3] = "bad"
+        upload = BytesIO(b"\xef\xbb\xbf" + self._csv(titles).encode("utf-8"))
+        
+        inserts = []
+        listener = lambda conn, cursor, statement, params, context, executemany: (
+            inserts.append(executemany) if statement.startswith("INSERT INTO question_pool") else None
+        )
+        event.listen(import_db.get_bind(), "before_cursor_execute", listener)
+        try:
+            result = CSVImportExportService.import_csv_file(
+                import_db, upload, "essay", "bulk.csv", "tester", chunk_size=3
+            )
+        finally:
+            event.remove(import_db.get_bind(), "before_cursor_execute", listener)
+        
+        assert (result.total_rows, result.successful_imports, result.failed_imports) == (7, 6, 1)
+        assert result.errors[0]["row"] == 5
+        assert len(inserts) == 3  # chunks of 2, 3 and 1 valid rows
+        assert not upload.closed
+        assert import_db.query(QuestionPool).filter(QuestionPool.created_by == "tester").count() == 6
+        log = import_db.get(ImportLog, result.import_log_id)
+        assert (log.total_rows, log.successful_imports, log.failed_imports) == (7, 6, 1)
+    
+    def test_failed_chunk_is_retried_row_by_row(self, import_db):
+        """Test a database error in one row only rejects that row"""
+        from sqlalchemy import text
+        from app.models import QuestionPool
+        from app.services.csv_import_service import CSVImportExportService
+        
+        import_db.execute(text(
+            "CREATE TRIGGER reject_boom BEFORE INSERT ON question_pool WHEN NEW.title = 'boom' "
+            "BEGIN SELECT RAISE(ABORT, 'rejected by database'); END"
+        ))
+        import_db.commit()
+        
+        result = CSVImportExportService.validate_and_import_csv(
+            import_db, self._csv(["A", "boom", "C", "D"]), "essay", "retry.csv", "tester"
+        )
+        
+        assert (result.successful_imports, result.failed_imports) == (3, 1)
+        assert "rejected by database" in result.errors[0]["error"]
+        assert sorted(t for (t,) in import_db.query(QuestionPool.title)) == ["A", "C", "D"]
+    
+    def test_cancel_stops_after_current_chunk(self, import_db):
+        """Test a cancellation request stops a running import at the next chunk boundary"""
+        from sqlalchemy.orm import sessionmaker
+        from app.models import ImportLog, ImportStatus, QuestionPool
+        from app.services.csv_import_service import CSVImportExportService
+        
+        job = ImportLog(filename="big.csv", import_type="essay", imported_by="tester", status=ImportStatus.queued)
+        import_db.add(job)
+        import_db.commit()
+        other_session = sessionmaker(bind=import_db.get_bind())()
+        
+        def lines():
+            for i, line in enumerate(self._csv([f"Q{i}" for i in range(10)]).splitlines(keepends=True)):
+                if i == 4:
+                    # An admin presses cancel while the second chunk is being read
+                    other_session.query(ImportLog).filter(ImportLog.id == job.id).update({"cancel_requested": True})
+                    other_session.commit()
+                yield line
+        
+        result = CSVImportExportService.import_csv_stream(
+            import_db, lines(), "essay", "big.csv", "tester", chunk_size=3, import_log=job
+        )
+        other_session.close()
+        
+        assert result.total_rows == 6
+        assert import_db.query(QuestionPool).count() == 6
+        import_db.refresh(job)
+        assert (job.status, job.processed_rows, job.successful_imports) == (ImportStatus.cancelled, 6, 6)
+        assert job.finished_at is not None
+
+
+class TestQuestionPoolSearch:
+    """Test full-text search over the question pool"""
+    
+    def _search(self, db, text):
+        from app.schemas.question_pool import QuestionPoolFilter
+        from app.services.question_pool_service import QuestionPoolService
+        
+        return [q.title for q in QuestionPoolService.get_questions_pool(db, QuestionPoolFilter(search_text=text))]
+    
+    def test_ranked_prefix_search_across_languages_and_options(self, isolated_db):
+        """Test prefix matches in any indexed field, with title matches ranked first"""
+        from app.schemas.question_pool import QuestionPoolCreate
+        from app.services.question_pool_service import QuestionPoolService
+        
+        QuestionPoolService.create_question_pool(isolated_db, QuestionPoolCreate(
+            title="Teamwork", question_text="How do you feel about leadership?", question_type="essay"
+        ))
+        QuestionPoolService.create_question_pool(isolated_db, QuestionPoolCreate(
+            title="Leadership style", question_text="Pick one", question_type="mcq",
+            mcq_options=["Coach", "Director"], mcq_correct_answer=[0],
+            question_text_ar="اختر أسلوب القيادة", mcq_options_ar=["مدرب", "مدير"]
+        ))
+        
+        assert self._search(isolated_db, "lead") == ["Leadership style", "Teamwork"]
+        assert self._search(isolated_db, "coach") == ["Leadership style"]
+        assert self._search(isolated_db, "القيادة") == ["Leadership style"]
+        assert self._search(isolated_db, "مدير") == ["Leadership style"]
+        assert self._search(isolated_db, "team lead") == ["Teamwork"]
+        assert self._search(isolated_db, '" OR NEAR(') == []
+    
+    def test_index_follows_bulk_writes(self, isolated_db):
+        """Test rows written by the bulk CSV importer and updates are searchable"""
+        from app.models import QuestionPool
+        from app.services.csv_import_service import CSVImportExportService
+        
+        CSVImportExportService.validate_and_import_csv(
+            isolated_db, "title,question_text\nAstronomy,Do you enjoy stargazing?\nCooking,Do you bake?\n",
+            "essay", "bulk.csv", "tester"
+        )
+        assert self._search(isolated_db, "star") == ["Astronomy"]
+        
+        question = isolated_db.query(QuestionPool).filter(QuestionPool.title == "Cooking").one()
+        question.question_text = "Do you enjoy gardening?"
+        isolated_db.commit()
+        assert self._search(isolated_db, "bake") == []
+        assert self._search(isolated_db, "garden") == ["Cooking"]
+        
+        isolated_db.delete(question)
+        isolated_db.commit()
+        assert self._search(isolated_db, "garden") == []
+
+
+class TestBulkPageAssignments:
+    """Test set-based page assignment, unassignment and reordering"""
+    
+    @pytest.fixture
+    def assign_db(self, isolated_db):
+        """A page, a category and five pool questions"""
+        from app.models import Category, Page, QuestionPool
+        
+        session = isolated_db
+        category = Category(name="Skills", color="#336699")
+        session.add_all([category, Page(title="Curated", order_index=1)])
+        session.flush()
+        session.add_all([
+            QuestionPool(title=f"Q{i}", question_text="Text", question_type="essay",
+                         category_id=category.id, usage_count=0)
+            for i in range(5)
+        ])
+        session.commit()
+        return session
+    
+    def _ids(self, db):
+        from app.models import QuestionPool
+        return [row.id for row in db.query(QuestionPool.id).order_by(QuestionPool.id)]
+    
+    def _page_id(self, db):
+        from app.models import Page
+        return db.query(Page.id).scalar()
+    
+    def _order(self, db, page_id):
+        from app.services.question_pool_service import QuestionPoolService
+        return [a.question_pool_id for a in QuestionPoolService.get_page_assigned_questions(db, page_id)]
+    
+    def test_bulk_assign_appends_and_skips(self, assign_db):
+        """Test new questions are appended in order, counted once, and duplicates skipped"""
+        from app.models import QuestionPool
+        from app.services.question_pool_service import QuestionPoolService
+        
+        ids = self._ids(assign_db)
+        page_id = self._page_id(assign_db)
+        QuestionPoolService.bulk_assign_questions(assign_db, page_id, [ids[2]])
+        
+        result = QuestionPoolService.bulk_assign_questions(
+            assign_db, page_id, [ids[4], ids[2], ids[0], ids[4], 9999], assigned_by="admin"
+        )
+        
+        assert result == {"assigned": [ids[4], ids[0]], "already_assigned": [ids[2]], "not_found": [9999]}
+        assert self._order(assign_db, page_id) == [ids[2], ids[4], ids[0]]
+        usage = dict(assign_db.query(QuestionPool.id, QuestionPool.usage_count))
+        assert [usage[i] for i in ids] == [1, 0, 1, 0, 1]
+    
+    def test_bulk_unassign_and_reorder(self, assign_db):
+        """Test unassigning decrements usage and reordering puts unlisted questions last"""
+        from app.models import QuestionPool
+        from app.services.question_pool_service import QuestionPoolService
+        
+        ids = self._ids(assign_db)
+        page_id = self._page_id(assign_db)
+        QuestionPoolService.bulk_assign_questions(assign_db, page_id, ids)
+        
+        assert QuestionPoolService.bulk_unassign_questions(assign_db, page_id, [ids[1], ids[3], 9999]) == [ids[1], ids[3]]
+        assert QuestionPoolService.reorder_page_questions(assign_db, page_id, [ids[4], 9999, ids[2]]) == 3
+        assert self._order(assign_db, page_id) == [ids[4], ids[2], ids[0]]
+        
+        assigned = QuestionPoolService.get_page_assigned_questions(assign_db, page_id)
+        assert [a.order_index for a in assigned] == [0, 1, 2]
+        usage = dict(assign_db.query(QuestionPool.id, QuestionPool.usage_count))
+        assert [usage[i] for i in ids] == [1, 0, 1, 0, 1]
+    
+    def test_assignment_view_loads_in_constant_queries(self, assign_db):
+        """Test assigned questions and their categories load without per-row queries"""
+        from sqlalchemy import event
+        from app.schemas.question_pool import QuestionPoolFilter
+        from app.services.question_pool_service import QuestionPoolService
+        
+        page_id = self._page_id(assign_db)
+        QuestionPoolService.bulk_assign_questions(assign_db, page_id, self._ids(assign_db))
+        assign_db.expire_all()
+        
+        statements = []
+        engine = assign_db.get_bind()
+        listener = lambda *args: statements.append(args[2])
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            assigned = QuestionPoolService.get_page_assigned_questions(assign_db, page_id)
+            available = QuestionPoolService.get_questions_pool(assign_db, QuestionPoolFilter())
+            names = {a.question.category.name for a in assigned} | {q.category.name for q in available}
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        
+        assert names == {"Skills"}
+        assert len(statements) == 2
+
+
+class TestResponseDetail:
+    """Test the eager-loaded admin response detail"""
+    
+    def test_loads_in_two_queries(self, db_session):
+        """Test answers, questions and scores load in two queries however many answers there are"""
+        from sqlalchemy import event
+        from app.models import StudentResponse, QuestionAnswer, AssessmentScore, Page, Question, QuestionType
+        from app.services.response_service import get_response_detail
+        
+        page = Page(title="Detail", order_index=98)
+        db_session.add(page)
+        db_session.flush()
+        questions = [Question(page_id=page.id, question_text=f"Q{i}", question_type=QuestionType.slider)
+                     for i in range(25)]
+        response = StudentResponse(session_id="detail-eager", email="d@test.com", full_name="Detail",
+                                   age_group="19-22", country="Canada", origin_country="India")
+        db_session.add_all(questions + [response])
+        db_session.flush()
+        db_session.add_all([QuestionAnswer(response_id=response.id, question_id=q.id, answer_value=i)
+                            for i, q in enumerate(questions)])
+        db_session.add(AssessmentScore(response_id=response.id, riasec_strength_labels='{"R": "High"}',
+                                       behavioral_flags='not json'))
+        db_session.commit()
+        response_id = response.id
+        db_session.expire_all()
+        
+        statements = []
+        engine = db_session.get_bind()
+        listener = lambda *args: statements.append(args[2])
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            detail = get_response_detail(db_session, response_id)
+            texts = [item.question.question_text for item in detail.answers]
+            values = [item.answer.answer_value for item in detail.answers]
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        
+        assert len(statements) == 2
+        assert texts == [f"Q{i}" for i in range(25)]
+        assert values == list(range(25))
+        assert detail.riasec_labels == {"R": "High"}
+        assert detail.behavioral_flags == {}
+        assert get_response_detail(db_session, 999999) is None
+
+
+class TestPoolCSVExport:
+    """Test chunked, streamed question pool exports"""
+    
+    @pytest.fixture
+    def export_db(self, isolated_db):
+        """MCQ questions in two categories and one essay"""
+        from app.models import Category, QuestionPool
+        
+        session = isolated_db
+        science, arts = Category(name="Science"), Category(name="Arts")
+        session.add_all([science, arts])
+        session.flush()
+        session.add_all([
+            QuestionPool(title=f"MCQ {i}", question_text=f"Pick {i}", question_type="mcq",
+                         category_id=(science if i % 2 == 0 else arts).id, is_required=True,
+                         mcq_options=json.dumps(["A", "B", "C"]), mcq_correct_answer=json.dumps([1]))
+            for i in range(5)
+        ] + [QuestionPool(title="Essay", question_text="Write", question_type="essay", essay_char_limit=300)])
+        session.commit()
+        return session
+    
+    def _csv_rows(self, chunks):
+        import csv
+        import io
+        return list(csv.DictReader(io.StringIO(b''.join(chunks).decode('utf-8'))))
+    
+    def test_selected_ids_fetched_in_chunks_in_given_order(self, export_db):
+        """Test selected ids are fetched with one IN query per chunk and written in request order"""
+        from sqlalchemy import event
+        from app.models import QuestionPool
+        from app.services.csv_import_service import CSVImportExportService
+        
+        ids = {q.title: q.id for q in export_db.query(QuestionPool)}
+        selected = [ids["MCQ 3"], ids["MCQ 0"], ids["Essay"], 999999, ids["MCQ 4"], ids["MCQ 0"]]
+        
+        statements = []
+        engine = export_db.get_bind()
+        listener = lambda *args: statements.append(args[2])
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            rows = CSVImportExportService.iter_export_rows(export_db, "mcq", question_ids=selected, batch_size=2)
+            records = self._csv_rows(CSVImportExportService.iter_questions_csv(rows, "mcq", chunk_rows=1))
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        
+        assert len(statements) == 3
+        assert "mcq_options_ar" not in statements[0]
+        assert [r["title"] for r in records] == ["MCQ 3", "MCQ 0", "MCQ 4"]
+        assert records[1] == {
+            "title": "MCQ 0", "question_text": "Pick 0", "category_name": "Science", "is_required": "TRUE",
+            "allow_multiple_selection": "FALSE", "option_1": "A", "option_2": "B", "option_3": "C",
+            "option_4": "", "option_5": "", "option_6": "", "correct_answers": "2"
+        }
+    
+    def test_export_matching_filter(self, export_db):
+        """Test filter mode exports every question of the type matching the category and search"""
+        from app.models import Category
+        from app.schemas.question_pool import QuestionPoolFilter
+        from app.services.csv_import_service import CSVImportExportService
+        
+        arts_id = export_db.query(Category.id).filter(Category.name == "Arts").scalar()
+        rows = CSVImportExportService.iter_export_rows(export_db, "mcq", filters=QuestionPoolFilter(category_id=arts_id))
+        assert sorted(r["title"] for r in self._csv_rows(CSVImportExportService.iter_questions_csv(rows, "mcq"))) == ["MCQ 1", "MCQ 3"]
+        
+        rows = CSVImportExportService.iter_export_rows(export_db, "essay", filters=QuestionPoolFilter(search_text="writ"))
+        assert self._csv_rows(CSVImportExportService.iter_questions_csv(rows, "essay")) == [{
+            "title": "Essay", "question_text": "Write", "category_name": "",
+            "is_required": "TRUE", "essay_char_limit": "300"
+        }]
+        
+        with pytest.raises(ValueError):
+            CSVImportExportService.export_questions_to_csv(export_db, [999999], "mcq")
+
+
+class TestSQLInstrumentation:
+    """Test query counting, statement shapes and slow query logging"""
+    
+    def test_statement_shape_and_redaction(self):
+        """Test IN lists fold to one shape and logged parameters carry no values"""
+        from app.services.sql_instrumentation import statement_shape, redact_parameters
+        
+        assert statement_shape("SELECT * FROM t\n  WHERE id IN (?, ?, ?)") == "SELECT * FROM t WHERE id IN (?)"
+        assert statement_shape("SELECT * FROM t WHERE id IN (?)") == "SELECT * FROM t WHERE id IN (?)"
+        assert redact_parameters(("secret@example.com", 42)) == "[str, int]"
+        assert redact_parameters({"email": "secret@example.com"}) == "{email: str}"
+        assert redact_parameters([("a", 1), ("b", 2)]) == "2 x [str, int]"
+    
+    def test_tracks_only_inside_the_block(self, db_session):
+        """Test track_queries counts its own context's statements and flags repeats"""
+        from sqlalchemy import text
+        from app.services.sql_instrumentation import install, track_queries
+        
+        install()
+        db_session.execute(text("SELECT 1"))
+        with track_queries() as stats:
+            for i in range(3):
+                db_session.execute(text("SELECT :n"), {"n": i})
+            db_session.execute(text("SELECT 2"))
+        db_session.execute(text("SELECT 1"))
+        
+        assert stats.count == 4
+        assert stats.duration > 0
+        assert stats.repeated(3) == [("SELECT ?", 3)]
+        assert stats.repeated(4) == []
+    
+    def test_slow_queries_logged_without_values(self, db_session, monkeypatch, caplog):
+        """Test slow statements are logged with parameter types instead of values"""
+        import logging
+        from sqlalchemy import text
+        from app.config import settings
+        from app.services.sql_instrumentation import install
+        
+        install()
+        monkeypatch.setattr(settings, "SQL_SLOW_QUERY_MS", 0)
+        with caplog.at_level(logging.WARNING, logger="app.services.sql_instrumentation"):
+            db_session.execute(text("SELECT :email"), {"email": "secret@example.com"})
+        
+        assert "Slow query" in caplog.text
+        assert "params=[str]" in caplog.text
+        assert "secret@example.com" not in caplog.text
+
+
+class TestMetrics:
+    """Test Prometheus metrics recording and exposition"""
+    
+    def _sample(self, name, **labels):
+        from prometheus_client import REGISTRY
+        return REGISTRY.get_sample_value(name, labels) or 0.0
+    
+    def test_request_and_pdf_section_metrics(self):
+        """Test route observations and per-section render timings are recorded"""
+        from app.services import metrics
+        from app.services.pdf_service import generate_pdf_report
+        
+        assert metrics.route_label({}) == metrics.UNMATCHED_ROUTE
+        assert metrics.route_label({"route": Mock(path="/admin/results/{response_id}")}) == "/admin/results/{response_id}"
+        
+        before = self._sample("carhythm_http_requests_total", method="GET", route="/metrics-test", status="200")
+        metrics.observe_request("GET", "/metrics-test", 200, 0.02, db_seconds=0.005, queries=3)
+        assert self._sample("carhythm_http_requests_total", method="GET", route="/metrics-test", status="200") == before + 1
+        assert self._sample("carhythm_http_request_queries_sum", route="/metrics-test") >= 3
+        
+        renders = self._sample("carhythm_pdf_render_duration_seconds_count")
+        builds = self._sample("carhythm_pdf_section_duration_seconds_count", section="build")
+        generate_pdf_report({'student_name': 'Metrics'}, {'holland_code': 'RIA'}, is_free_version=True)
+        assert self._sample("carhythm_pdf_render_duration_seconds_count") == renders + 1
+        assert self._sample("carhythm_pdf_section_duration_seconds_count", section="build") == builds + 1
+        assert self._sample("carhythm_pdf_section_duration_seconds_count", section="premium_teasers") >= 1
+    
+    def test_database_gauges(self, isolated_db):
+        """Test active sessions and pending emails are counted at scrape time"""
+        from datetime import timedelta
+        from app.models import StudentResponse, SessionStatus, EmailOutbox, EmailKind
+        from app.services.metrics import DatabaseCollector
+        
+        person = dict(email="m@test.com", full_name="M", age_group="19-22", country="Canada", origin_country="India")
+        isolated_db.add_all([
+            StudentResponse(session_id="live", status=SessionStatus.active, last_activity=datetime.utcnow(), **person),
+            StudentResponse(session_id="stale", status=SessionStatus.active,
+                            last_activity=datetime.utcnow() - timedelta(days=2), **person),
+            StudentResponse(session_id="done", status=SessionStatus.completed, last_activity=datetime.utcnow(), **person),
+            EmailOutbox(kind=EmailKind.results, to_email="m@test.com", payload="{}", max_attempts=3),
+        ])
+        isolated_db.commit()
+        
+        values = {family.name: family.samples[0].value for family in DatabaseCollector(isolated_db).collect()}
+        
+        assert values == {"carhythm_active_sessions": 1, "carhythm_email_outbox_pending": 1,
+                          "carhythm_import_jobs_pending": 0}
+    
+    def test_multiprocess_aggregation(self, tmp_path):
+        """Test a scrape aggregates requests recorded by separate worker processes"""
+        import os
+        import subprocess
+        import sys
+        
+        env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+        record = ("from app.services import metrics; "
+                  "metrics.observe_request('GET', '/worker', 200, 0.01)")
+        for _ in range(2):
+            subprocess.run([sys.executable, "-c", record], env=env, check=True, cwd=os.getcwd())
+        
+        scrape = ("from app.services import metrics; "
+                  "print(metrics.render_latest()[0].decode())")
+        output = subprocess.run([sys.executable, "-c", scrape], env=env, check=True, cwd=os.getcwd(),
+                                capture_output=True, text=True).stdout
+        assert 'carhythm_http_requests_total{method="GET",route="/worker",status="200"} 2.0' in output
+
+
+class TestPDFProfiler:
+    """Test section-level render profiling"""
+    
+    def test_nested_sections_are_aggregated(self):
+        """Test sections nest, repeated calls sum up and memory peaks are attributed"""
+        from app.services.pdf_profiler import RenderProfiler, RenderProfile
+        from app.services.pdf_service import report_section
+        
+        @report_section("chart")
+        def chart():
+            return bytearray(2 * 1024 * 1024)
+        
+        profiler = RenderProfiler()
+        with profiler.run():
+            with report_section("cover"):
+                pass
+            with report_section("riasec"):
+                chart()
+                chart()
+        
+        riasec = profiler.root.children["riasec"]
+        assert list(profiler.root.children) == ["cover", "riasec"]
+        assert riasec.children["chart"].calls == 2
+        assert riasec.children["chart"].peak_bytes > 1.5 * 1024 * 1024
+        assert riasec.peak_bytes >= riasec.children["chart"].peak_bytes
+        assert profiler.root.wall >= riasec.wall >= riasec.children["chart"].wall
+        
+        profile = RenderProfile("v1", profiler.root, 0, {})
+        assert [(depth, stats.name) for depth, stats in profile.sections()] == [
+            (0, "render"), (1, "cover"), (1, "riasec"), (2, "chart")
+        ]
+        assert "    chart" in profile.flame()
+        assert profile.folded().splitlines()[-1].startswith("render;riasec;chart ")
+        assert profile.to_dict()["sections"]["children"][1]["children"][0]["calls"] == 2
+    
+    def test_profile_render(self):
+        """Test a synthetic v2 render is profiled down to its charts and build"""
+        from app.services.pdf_profiler import profile_render, synthetic_inputs, active_profiler
+        
+        response_data, scores_data = synthetic_inputs(seed=1)
+        assert len(scores_data['holland_code']) == 3
+        
+        profile = profile_render(response_data, scores_data, template="v2", trace_memory=False)
+        sections = profile.to_dict()["sections"]
+        assert [child["name"] for child in sections["children"]] == [
+            "fields", "hero", "science", "career_matches", "friction_cta", "build"
+        ]
+        assert profile.root.children["fields"].children["gauge"].calls == 3
+        assert "qr_code" in profile.root.children["friction_cta"].children
+        assert profile.size_bytes > 0
+        assert active_profiler() is None
+        
+        with pytest.raises(ValueError):
+            profile_render(response_data, scores_data, template="v3")
+
+
+class TestRequestProfiler:
+    """Test the on-demand request profiler and its limits"""
+    
+    def test_requested_mode(self):
+        """Test the header and query flag select a mode; unknown values are ignored"""
+        from app.services.request_profiler import requested_mode
+        
+        assert requested_mode({}, {}) is None
+        assert requested_mode({"x-profile": "cprofile"}, {}) == "cprofile"
+        assert requested_mode({}, {"_profile": "1"}) == "sample"
+        assert requested_mode({}, {"_profile": "bogus"}) is None
+    
+    def test_sample_mode_sees_threadpool_work(self, monkeypatch):
+        """Test stack samples of other threads end up in a speedscope profile"""
+        import json
+        import threading
+        import time
+        from app.config import settings
+        from app.services.request_profiler import RequestProfiler
+        
+        monkeypatch.setattr(settings, "REQUEST_PROFILER_INTERVAL_MS", 1)
+        
+        def busy_worker_function():
+            deadline = time.perf_counter() + 0.15
+            while time.perf_counter() < deadline:
+                sum(range(1000))
+        
+        profiler = RequestProfiler()
+        with profiler.profile("GET", "/slow", "sample", "admin") as profiling:
+            assert profiling
+            worker = threading.Thread(target=busy_worker_function)
+            worker.start()
+            worker.join()
+        
+        stored = profiler.profiles()[0]
+        assert (stored.method, stored.path, stored.mode, stored.admin) == ("GET", "/slow", "sample", "admin")
+        assert stored.filename.endswith(".speedscope.json")
+        document = json.loads(stored.content)
+        names = {frame["name"] for frame in document["shared"]["frames"]}
+        assert "busy_worker_function" in names
+        assert all(profile["type"] == "sampled" for profile in document["profiles"])
+        assert "busy_worker_function" in stored.summary
+    
+    def test_cprofile_mode_and_limits(self, monkeypatch, tmp_path):
+        """Test cProfile output loads in pstats, and busy/over-budget requests go unprofiled"""
+        import pstats
+        from app.config import settings
+        from app.services.request_profiler import RequestProfiler
+        
+        monkeypatch.setattr(settings, "REQUEST_PROFILER_MAX_PER_MINUTE", 2)
+        profiler = RequestProfiler()
+        
+        with profiler.profile("GET", "/a", "cprofile", "admin") as profiling:
+            if profiling:
+                # Nested request while the first is profiled: only one at a time
+                with profiler.profile("GET", "/b", "sample", "admin") as nested:
+                    assert not nested
+                sorted([3, 1, 2])
+        
+        if profiling:  # False when another tool (e.g. coverage) owns the profiling hooks
+            stored = profiler.get(1)
+            path = tmp_path / stored.filename
+            path.write_bytes(stored.content)
+            assert pstats.Stats(str(path)).total_calls > 0
+            assert "calls" in stored.detail
+        
+        with profiler.profile("GET", "/c", "sample", "admin") as second:
+            assert second
+        with profiler.profile("GET", "/d", "sample", "admin") as third:
+            assert not third
+        assert profiler.stats()["skipped_total"] >= 2
+        
+        profiler.clear()
+        assert profiler.profiles() == []
+
+
+class TestLoopWatchdog:
+    """Test event loop block detection"""
+    
+    def test_block_is_captured_with_stack_and_route(self, caplog):
+        """Test a blocking call is reported with the request route and the blocking stack"""
+        import asyncio
+        import logging
+        import time
+        from app.services.loop_watchdog import LoopWatchdog
+        
+        def blocking_handler_body():
+            time.sleep(0.3)
+        
+        async def scenario():
+            watchdog = LoopWatchdog(interval=0.01, threshold=0.1)
+            watchdog.start()
+            await asyncio.sleep(0.05)
+            watchdog.request_started({"type": "http", "method": "GET", "path": "/slow"})
+            blocking_handler_body()
+            watchdog.request_finished()
+            await asyncio.sleep(0.05)
+            await watchdog.stop()
+            return watchdog
+        
+        with caplog.at_level(logging.WARNING, logger="app.services.loop_watchdog"):
+            watchdog = asyncio.run(scenario())
+        
+        assert watchdog.blocks_total == 1
+        event = watchdog.events[0]
+        assert event.duration >= 0.25
+        assert event.route == "GET /slow"
+        assert "blocking_handler_body" in event.stack
+        assert "Event loop blocked" in caplog.text
+        assert watchdog.stats()["recent_blocks"][0]["route"] == "GET /slow"
+        assert not watchdog.running
+    
+    def test_stricter_recording_keeps_blocks_out_of_history(self):
+        """Test a block under the threshold reaches record_blocks() but not the counters"""
+        import asyncio
+        import time
+        from app.services.loop_watchdog import LoopWatchdog
+        
+        async def scenario():
+            watchdog = LoopWatchdog(interval=0.01, threshold=1.0)
+            watchdog.start()
+            await asyncio.sleep(0.05)
+            with watchdog.record_blocks(threshold_ms=50) as blocks:
+                time.sleep(0.2)
+                await asyncio.sleep(0.05)
+            await watchdog.stop()
+            return watchdog, blocks
+        
+        watchdog, blocks = asyncio.run(scenario())
+        
+        assert len(blocks) == 1
+        assert blocks[0].duration >= 0.15
+        assert watchdog.blocks_total == 0
+        assert watchdog.stats()["recent_blocks"] == []
+    
+    def test_watcher_survives_a_failed_capture(self, caplog):
+        """Test an error while capturing a block is logged and detection carries on"""
+        import asyncio
+        import logging
+        import time
+        from app.services.loop_watchdog import LoopWatchdog
+        
+        async def scenario():
+            watchdog = LoopWatchdog(interval=0.01, threshold=0.1)
+            failures = []
+            
+            def broken_stack():
+                if not failures:
+                    failures.append(True)
+                    raise RuntimeError("no frames")
+                return "stack"
+            
+            watchdog._loop_stack = broken_stack
+            watchdog.start()
+            await asyncio.sleep(0.05)
+            time.sleep(0.3)
+            await asyncio.sleep(0.05)
+            time.sleep(0.3)
+            await asyncio.sleep(0.05)
+            alive = watchdog._thread.is_alive()
+            await watchdog.stop()
+            return watchdog, alive
+        
+        with caplog.at_level(logging.ERROR, logger="app.services.loop_watchdog"):
+            watchdog, alive = asyncio.run(scenario())
+        
+        assert alive
+        assert "failed to capture a block" in caplog.text
+        assert watchdog.blocks_total == 2
+        assert watchdog.events[-1].stack == "stack"